@@ -0,0 +1,234 @@
+"""
+awslimitchecker/aio.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2019 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import asyncio
+import logging
+import threading
+
+from botocore.exceptions import ClientError
+
+from awslimitchecker.utils import (
+    _get_dict_value_by_path, _set_dict_value_by_path, is_throttling_error,
+    throttle_backoff_delay, _paginate_dict_kwargs
+)
+from awslimitchecker import utils
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+except ImportError:
+    AioConfig = None
+    get_session = None
+
+logger = logging.getLogger(__name__)
+
+#: Default maximum number of concurrent API requests that services make when
+#: fanning out per-resource requests with :py:func:`~.gather_bounded`.
+AIO_CONCURRENCY = 10
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_aio_session():
+    """
+    Return the shared ``aiobotocore`` session used for all asynchronous
+    clients, creating it if needed.
+
+    :raises: RuntimeError if aiobotocore is not installed
+    :rtype: ``aiobotocore.session.AioSession``
+    """
+    global _session
+    if get_session is None:
+        raise RuntimeError(
+            'The asyncio backend requires the "aiobotocore" package; please '
+            'install awslimitchecker[async]'
+        )
+    with _session_lock:
+        if _session is None:
+            _session = get_session()
+        return _session
+
+
+def create_client(api_name, conn_kwargs, config=None):
+    """
+    Return an asynchronous context manager that yields an ``aiobotocore``
+    client for ``api_name``.
+
+    :param api_name: AWS API (service) name
+    :type api_name: str
+    :param conn_kwargs: keyword arguments for the connection, i.e. region name
+      and credentials, as used for boto3 connections
+    :type conn_kwargs: dict
+    :param config: optional botocore Config; only its retry settings are used
+    :type config: ``botocore.config.Config`` or None
+    """
+    session = get_aio_session()
+    kwargs = dict(conn_kwargs)
+    if config is not None:
+        kwargs['config'] = AioConfig(retries=config.retries)
+    return session.create_client(api_name, **kwargs)
+
+
+def run(coro):
+    """
+    Run a coroutine to completion on a new event loop and return its result.
+    This is the bridge from the synchronous API to the asyncio backend, and
+    must not be called from within a running event loop.
+
+    :param coro: the coroutine to run
+    :return: the coroutine's return value
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+async def run_in_executor(func, *args):
+    """
+    Run a synchronous callable in the running event loop's default executor
+    and return its result, so blocking boto3 code can run alongside
+    asynchronous code.
+
+    :param func: the callable to run
+    :type func: ``callable``
+    :param args: positional arguments to pass to ``func``
+    :return: the return value of ``func``
+    """
+    # get_running_loop() is Python 3.7+; from within a coroutine,
+    # get_event_loop() returns the running loop
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, func, *args)
+
+
+async def gather_bounded(coros, limit=AIO_CONCURRENCY, semaphore=None):
+    """
+    Run the given coroutines concurrently, with at most ``limit`` of them in
+    progress at any one time, and return their results in the same order as
+    ``coros``. If any of them raises an exception, it is propagated.
+
+    To bound requests made at more than one level (i.e. a per-resource request
+    made for each result of a per-parent request) by a single limit, pass the
+    same ``semaphore`` to each call instead of a ``limit``. The coroutines
+    must then not themselves wait on that semaphore while holding it, or they
+    may deadlock.
+
+    :param coros: iterable of coroutines (awaitables)
+    :type coros: ``iterable``
+    :param limit: maximum number to run at once; ignored if ``semaphore`` is
+      given
+    :type limit: int
+    :param semaphore: semaphore to acquire for each coroutine, shared with
+      other callers
+    :type semaphore: ``asyncio.Semaphore``
+    :return: list of results
+    :rtype: list
+    """
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(limit)
+
+    async def _run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*[_run(c) for c in coros])
+
+
+async def paginate_dict_async(function_ref, *argv, **kwargs):
+    """
+    Asynchronous version of :py:func:`~.utils.paginate_dict` for coroutine
+    functions, such as ``aiobotocore`` client methods. Takes the same special
+    ``alc_marker_path``, ``alc_data_path`` and ``alc_marker_param`` kwargs.
+
+    :param function_ref: the coroutine function to call
+    :type function_ref: ``function``
+    :param argv: the parameters to pass to the function
+    :type argv: tuple
+    :param kwargs: keyword arguments to pass to the function
+    :type kwargs: dict
+    """
+    marker_path, data_path, marker_param, pass_kwargs = \
+        _paginate_dict_kwargs(kwargs)
+    result = await function_ref(*argv, **pass_kwargs)
+    marker = _get_dict_value_by_path(result, marker_path)
+    if marker is None:
+        return result
+    results = []
+    results.extend(_get_dict_value_by_path(result, data_path))
+    while marker is not None:
+        logger.debug("Querying %s with %s=%s", function_ref, marker_param,
+                     marker)
+        pass_kwargs[marker_param] = marker
+        result = await function_ref(*argv, **pass_kwargs)
+        results.extend(_get_dict_value_by_path(result, data_path))
+        marker = _get_dict_value_by_path(result, marker_path)
+    return _set_dict_value_by_path(result, results, data_path)
+
+
+async def call_with_throttle_backoff_async(function_ref, *argv, **kwargs):
+    """
+    Asynchronous version of :py:func:`~.utils.call_with_throttle_backoff` for
+    coroutine functions.
+
+    :param function_ref: the coroutine function to call
+    :type function_ref: ``function``
+    :param argv: the parameters to pass to the function
+    :type argv: tuple
+    :param kwargs: keyword arguments to pass to the function
+    :type kwargs: dict
+    """
+    attempt = 0
+    while True:
+        try:
+            return await function_ref(*argv, **kwargs)
+        except ClientError as ex:
+            if (
+                not is_throttling_error(ex) or
+                attempt >= utils.THROTTLE_MAX_RETRIES
+            ):
+                raise
+            delay = throttle_backoff_delay(attempt)
+            logger.warning(
+                'Request throttled calling %s; retrying in %.2f seconds',
+                function_ref, delay
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
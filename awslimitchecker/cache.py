@@ -0,0 +1,396 @@
+"""
+awslimitchecker/cache.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2019 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import abc
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentCache(object):
+    """
+    Base class for persistent (on-disk) key/value caches, used to keep
+    rarely-changing API responses (such as Service Quotas) between runs.
+    Keys are strings and values must be JSON-serializable. Each entry records
+    the time it was stored, so callers can decide for themselves whether an
+    entry is fresh enough to use.
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    def get(self, key):
+        """
+        Return the value stored for ``key`` and its age in seconds.
+
+        :param key: cache key
+        :type key: str
+        :return: 2-tuple of the cached value and its age in seconds, or
+          ``(None, None)`` if there is no entry for ``key``
+        :rtype: tuple
+        """
+        entry = self._read(key)
+        if entry is None:
+            return None, None
+        stored_at, value = entry
+        return value, max(0.0, time.time() - stored_at)
+
+    def set(self, key, value):
+        """
+        Store ``value`` for ``key``, replacing any existing entry.
+
+        :param key: cache key
+        :type key: str
+        :param value: JSON-serializable value to store
+        """
+        self._write(key, time.time(), value)
+
+    @abc.abstractmethod
+    def _read(self, key):
+        """
+        Read the entry for ``key`` from storage.
+
+        :param key: cache key
+        :type key: str
+        :return: 2-tuple of (float timestamp the entry was stored at, value),
+          or None if there is no (readable) entry
+        :rtype: tuple
+        """
+        raise NotImplementedError('abstract base class')
+
+    @abc.abstractmethod
+    def _write(self, key, stored_at, value):
+        """
+        Write the entry for ``key`` to storage.
+
+        :param key: cache key
+        :type key: str
+        :param stored_at: timestamp the entry was stored at
+        :type stored_at: float
+        :param value: JSON-serializable value to store
+        """
+        raise NotImplementedError('abstract base class')
+
+    @abc.abstractmethod
+    def delete(self, key):
+        """
+        Remove the entry for ``key``, if present.
+
+        :param key: cache key
+        :type key: str
+        """
+        raise NotImplementedError('abstract base class')
+
+
+class JsonFileCache(PersistentCache):
+    """
+    :py:class:`~.PersistentCache` storing each entry as a JSON file in a
+    directory. Files are written atomically, so concurrent readers (including
+    other processes) never see a partial entry.
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: path to the directory to store cache files in; it
+          will be created if it does not exist.
+        :type directory: str
+        """
+        self.directory = directory
+
+    def _path(self, key):
+        """
+        Return the path to the cache file for ``key``.
+
+        :param key: cache key
+        :type key: str
+        :rtype: str
+        """
+        return os.path.join(
+            self.directory, re.sub(r'[^A-Za-z0-9_.-]', '_', key) + '.json'
+        )
+
+    def _read(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as fh:
+                data = json.load(fh)
+        except Exception:
+            logger.warning('Unable to read cache file %s', path, exc_info=True)
+            return None
+        if data.get('key') != key:
+            # another key that sanitizes to the same file name
+            return None
+        return data['stored_at'], data['value']
+
+    def _write(self, key, stored_at, value):
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as fh:
+                json.dump(
+                    {'key': key, 'stored_at': stored_at, 'value': value}, fh
+                )
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def delete(self, key):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+class SqliteCache(PersistentCache):
+    """
+    :py:class:`~.PersistentCache` storing entries in a SQLite database in a
+    directory. A new database connection is used for every operation, so
+    instances can be shared between threads.
+    """
+
+    #: name of the database file within the cache directory
+    filename = 'awslimitchecker_cache.sqlite'
+
+    def __init__(self, directory):
+        """
+        :param directory: path to the directory to store the database in; it
+          will be created if it does not exist.
+        :type directory: str
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, self.filename)
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        """
+        Return a new connection to the database, creating the directory and
+        table if needed.
+
+        :rtype: sqlite3.Connection
+        """
+        with self._lock:
+            if not self._initialized:
+                if not os.path.exists(self.directory):
+                    os.makedirs(self.directory)
+                conn = sqlite3.connect(self.path)
+                with conn:
+                    conn.execute(
+                        'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY '
+                        'KEY, stored_at REAL NOT NULL, value TEXT NOT NULL)'
+                    )
+                conn.close()
+                self._initialized = True
+        return sqlite3.connect(self.path)
+
+    def _read(self, key):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT stored_at, value FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _write(self, key, stored_at, value):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache (key, stored_at, value) '
+                    'VALUES (?, ?, ?)', (key, stored_at, json.dumps(value))
+                )
+        finally:
+            conn.close()
+
+    def delete(self, key):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+        finally:
+            conn.close()
+
+
+#: Mapping of cache type names (as used by the ``--cache-type`` command line
+#: option) to :py:class:`~.PersistentCache` subclasses.
+CACHE_TYPES = {
+    'json': JsonFileCache,
+    'sqlite': SqliteCache,
+}
+
+
+class ResponseCache(object):
+    """
+    In-memory cache of API responses shared by the services of one
+    :py:class:`~.AwsLimitChecker` (i.e. one account and region) for the
+    duration of a run, so that services calling the same API operation with
+    the same parameters (such as EC2 and VPC both describing network
+    interfaces) only make the underlying requests once. Entries are keyed by
+    API name, operation and normalized parameters.
+
+    Concurrent requests for a key that is not yet cached are coalesced: the
+    first caller makes the request, and the others wait for and share its
+    result (or exception). Cached values are shared between callers, and
+    must not be modified.
+
+    Entries stored with ``transient=True`` (such as full lists of resources,
+    which may be large) are only kept until :py:meth:`~.discard_transient` is
+    called, i.e. at the end of a usage collection pass.
+
+    :param ttl: number of seconds an entry is used for, or None to keep
+      entries until :py:meth:`~.invalidate` is called
+    :type ttl: int
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        # key -> (time.time() stored at, value)
+        self._entries = {}
+        # key -> Future for a request in progress
+        self._pending = {}
+        # keys of entries stored with transient=True
+        self._transient = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(api_name, operation, params):
+        """
+        Return the cache key for a request.
+
+        :param api_name: API name, i.e. ``ec2``
+        :type api_name: str
+        :param operation: operation name or other hashable identifier for the
+          request
+        :param params: request parameters
+        :type params: dict
+        :rtype: tuple
+        """
+        return (
+            api_name, operation,
+            json.dumps(params, sort_keys=True, default=str)
+        )
+
+    def call(self, api_name, operation, params, function_ref,
+             transient=False):
+        """
+        Return the cached result for ``operation`` of ``api_name`` with
+        ``params`` if there is a fresh one; otherwise call ``function_ref``
+        (with no arguments), cache its result and return it.
+
+        :param api_name: API name, i.e. ``ec2``
+        :type api_name: str
+        :param operation: operation name or other hashable identifier for the
+          request
+        :param params: request parameters, used only as part of the key
+        :type params: dict
+        :param function_ref: function making the request
+        :type function_ref: ``function``
+        :param transient: if True, the result is discarded by the next call
+          to :py:meth:`~.discard_transient`
+        :type transient: bool
+        """
+        key = self._key(api_name, operation, params)
+        with self._lock:
+            if key in self._entries:
+                stored_at, value = self._entries[key]
+                if self.ttl is None or time.time() - stored_at < self.ttl:
+                    logger.debug('Using shared cached %s %s response',
+                                 api_name, operation)
+                    return value
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._pending[key] = future
+        if not owner:
+            logger.debug('Waiting for in-progress %s %s request',
+                         api_name, operation)
+            return future.result()
+        try:
+            value = function_ref()
+        except Exception as ex:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(ex)
+            raise
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            if transient:
+                self._transient.add(key)
+            del self._pending[key]
+        future.set_result(value)
+        return value
+
+    def invalidate(self, api_name=None):
+        """
+        Discard cached entries for ``api_name``, or all entries if it is None.
+        Requests already in progress are not affected.
+
+        :param api_name: API name, i.e. ``ec2``
+        :type api_name: str
+        """
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if api_name is None or key[0] == api_name:
+                    del self._entries[key]
+                    self._transient.discard(key)
+
+    def discard_transient(self):
+        """
+        Discard all entries that were stored with ``transient=True``.
+        Requests already in progress are not affected.
+        """
+        with self._lock:
+            for key in self._transient:
+                self._entries.pop(key, None)
+            self._transient = set()
@@ -37,19 +37,39 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 ################################################################################
 """
 
-from .connectable import ConnectableCredentials
+from . import aio
+from .cache import ResponseCache
+from .connectable import (
+    ConnectableCredentials, cached_client, discard_connections
+)
 from .services import _services
+from .services.base import API_CACHE_TTL
 from .trustedadvisor import TrustedAdvisor
-from .version import _get_version_info
+from .version import _get_version_info, _print_license_notice
 from .utils import _get_latest_version
-from .quotas import ServiceQuotasClient
+from .quotas import ServiceQuotasClient, QUOTAS_CACHE_TTL
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from copy import copy
+import asyncio
 import boto3
 import sys
 import logging
+import threading
 import warnings
 
 logger = logging.getLogger(__name__)
 
+#: Number of seconds before their expiration that cached STS credentials
+#: will be replaced with new ones.
+STS_REFRESH_MARGIN = 300
+
+#: Process-wide cache of STS assumed role credentials, shared by all
+#: :py:class:`~.AwsLimitChecker` instances. Keys are (role ARN, external ID,
+#: MFA serial number) tuples and values are
+#: :py:class:`~.ConnectableCredentials` instances.
+_sts_credentials = {}
+_sts_credentials_lock = threading.Lock()
+
 warnings.filterwarnings(
     action="always", category=DeprecationWarning, module=__name__
 )
@@ -60,12 +80,23 @@ warnings.filterwarnings(
 
 class AwsLimitChecker(object):
 
+    #: dict of service name to the exception raised while processing that
+    #: service during the most recent call to :py:meth:`~.get_limits`,
+    #: :py:meth:`~.find_usage` or :py:meth:`~.check_thresholds`, when
+    #: services are processed concurrently
+    service_errors = {}
+
     def __init__(self, warning_threshold=80, critical_threshold=99,
                  profile_name=None, account_id=None, account_role=None,
                  role_partition='aws', region=None, external_id=None,
                  mfa_serial_number=None, mfa_token=None, ta_refresh_mode=None,
                  ta_refresh_timeout=None, ta_api_region='us-east-1',
-                 check_version=True, skip_quotas=False):
+                 check_version=True, skip_quotas=False, parallel=None,
+                 cache=None, quotas_cache_ttl=QUOTAS_CACHE_TTL,
+                 quotas_cache_ttls=None, refresh_cache=False,
+                 use_asyncio=False, api_cache_ttl=API_CACHE_TTL,
+                 service_names=None, skip_services=None,
+                 count_stack_set_instances=False):
         """
         Main AwsLimitChecker class - this should be the only externally-used
         portion of awslimitchecker.
@@ -140,6 +171,51 @@ class AwsLimitChecker(object):
         :param skip_quotas: If set to True, do not connect to Service Quotas
           service or use it to obtain current limits.
         :type skip_quotas: bool
+        :param parallel: If set to an integer greater than one, process up to
+          this many services concurrently (each on its own worker thread) in
+          :py:meth:`~.get_limits`, :py:meth:`~.find_usage` and
+          :py:meth:`~.check_thresholds`. If None (the default) or one, process
+          services serially.
+        :type parallel: :py:class:`int` or :py:data:`None`
+        :param cache: optional persistent cache to keep rarely-changing API
+          responses (such as Service Quotas, and Route53 per-hosted-zone
+          limits) in between runs.
+        :type cache: :py:class:`~.PersistentCache`
+        :param quotas_cache_ttl: number of seconds that Service Quotas
+          responses in ``cache`` are considered fresh for.
+        :type quotas_cache_ttl: int
+        :param quotas_cache_ttls: optional dict of Service Quotas service code
+          to the number of seconds that responses for that service code in
+          ``cache`` are fresh for, overriding ``quotas_cache_ttl``.
+        :type quotas_cache_ttls: dict
+        :param refresh_cache: If True, do not use any data from ``cache``;
+          query the APIs and update the cache with the results.
+        :type refresh_cache: bool
+        :param use_asyncio: If True, :py:meth:`~.find_usage` uses the asyncio
+          backend (see :py:meth:`~.find_usage_async`). This requires the
+          optional ``aiobotocore`` dependency.
+        :type use_asyncio: bool
+        :param api_cache_ttl: number of seconds for which limit information
+          retrieved from each service's API and from Service Quotas is reused
+          by subsequent calls to :py:meth:`~.get_limits`,
+          :py:meth:`~.find_usage` and :py:meth:`~.check_thresholds`, before
+          being retrieved again. Responses to requests that several services
+          make (e.g. EC2 and VPC both describing network interfaces) are also
+          shared between them for this long. Cached API responses (but not
+          Service Quotas limits) are discarded at the start of every usage
+          collection run, so usage is never reused from a previous run. None
+          disables this. See also :py:meth:`~.invalidate_api_cache`.
+        :type api_cache_ttl: int
+        :param service_names: if not None, a list of the names of the only
+          services to check; other services' modules are never imported.
+        :type service_names: list
+        :param skip_services: names of services to exclude from checking, as
+          with :py:meth:`~.remove_services`; their modules are never imported.
+        :type skip_services: list
+        :param count_stack_set_instances: If True, also check the
+          CloudFormation "Stack sets" and "Stack instances per stack set"
+          limits. This makes one request per StackSet.
+        :type count_stack_set_instances: bool
         """
         # ###### IMPORTANT license notice ##########
         # Pursuant to Sections 5(b) and 13 of the GNU Affero General Public
@@ -156,14 +232,7 @@ class AwsLimitChecker(object):
         # for further information.
         # ###### IMPORTANT license notice ##########
         self.vinfo = _get_version_info()
-        sys.stderr.write(
-            "awslimitchecker %s is AGPL-licensed free software; "
-            "all users have a right to the full source code of "
-            "this version. See <%s>\n" % (
-                self.vinfo.version_str,
-                self.vinfo.url
-            )
-        )
+        _print_license_notice(self.vinfo)
         if check_version:
             latest_ver = _get_latest_version()
             if latest_ver is not None:
@@ -183,24 +252,112 @@ class AwsLimitChecker(object):
         self.mfa_serial_number = mfa_serial_number
         self.mfa_token = mfa_token
         self.region = region
+        self.parallel = parallel
+        self.use_asyncio = use_asyncio
+        self.api_cache_ttl = api_cache_ttl
+        self.service_names = service_names
+        self.skip_services = skip_services or []
+        for sname in self.skip_services:
+            logger.warning('Skipping service: %s', sname)
+        #: dict of service name to additional keyword arguments for that
+        #: service's constructor
+        self._service_kwargs = {}
+        if count_stack_set_instances:
+            self._service_kwargs['CloudFormation'] = {
+                'count_stack_set_instances': True
+            }
 
+        self.skip_quotas = skip_quotas
+        self.cache = cache
+        self.quotas_cache_ttl = quotas_cache_ttl
+        self.quotas_cache_ttls = quotas_cache_ttls
+        self.refresh_cache = refresh_cache
+        self.ta_refresh_mode = ta_refresh_mode
+        self.ta_refresh_timeout = ta_refresh_timeout
+        self.ta_api_region = ta_api_region
+        self.service_errors = {}
+        self._init_services(self._boto_conn_kwargs)
+
+    def _init_services(self, boto_conn_kwargs, skip_global=False):
+        """
+        Build ``self.services`` as a dict of service name to a new
+        :py:class:`~._AwsService` instance for each of ``_services`` selected
+        by ``self.service_names`` and ``self.skip_services``, along with the
+        Service Quotas client and :py:class:`~.TrustedAdvisor` instance used
+        by them. Only the modules of the selected services are imported.
+
+        :param boto_conn_kwargs: keyword arguments for boto3 connection
+          functions, as returned by :py:attr:`~._boto_conn_kwargs`
+        :type boto_conn_kwargs: dict
+        :param skip_global: if True, do not include services whose
+          :py:attr:`~._AwsService.is_global` attribute is True
+        :type skip_global: bool
+        """
+        self._conn_kwargs = boto_conn_kwargs
         self.services = {}
-
-        boto_conn_kwargs = self._boto_conn_kwargs
         self._quotas_client = None
-        if not skip_quotas:
-            self._quotas_client = ServiceQuotasClient(boto_conn_kwargs)
-        for sname, cls in _services.items():
-            self.services[sname] = cls(warning_threshold,
-                                       critical_threshold,
+        self._response_cache = None
+        if self.api_cache_ttl is not None:
+            self._response_cache = ResponseCache(ttl=self.api_cache_ttl)
+        if not self.skip_quotas:
+            self._quotas_client = ServiceQuotasClient(
+                boto_conn_kwargs, cache=self.cache,
+                cache_ttl=self.quotas_cache_ttl,
+                cache_ttls=self.quotas_cache_ttls,
+                refresh_cache=self.refresh_cache
+            )
+        for sname in list(_services.keys()):
+            if (
+                self.service_names is not None and
+                sname not in self.service_names
+            ):
+                continue
+            if sname in self.skip_services:
+                continue
+            cls = _services[sname]
+            if skip_global and cls.is_global:
+                continue
+            self.services[sname] = cls(self.warning_threshold,
+                                       self.critical_threshold,
                                        boto_conn_kwargs,
-                                       self._quotas_client)
+                                       self._quotas_client,
+                                       **self._service_kwargs.get(sname, {}))
+            self.services[sname].api_cache_ttl = self.api_cache_ttl
+            self.services[sname].persistent_cache = self.cache
+            self.services[sname].refresh_cache = self.refresh_cache
+            self.services[sname].shared_cache = self._response_cache
 
         self.ta = TrustedAdvisor(self.services,
                                  boto_conn_kwargs,
-                                 ta_refresh_mode=ta_refresh_mode,
-                                 ta_refresh_timeout=ta_refresh_timeout,
-                                 ta_api_region=ta_api_region)
+                                 ta_refresh_mode=self.ta_refresh_mode,
+                                 ta_refresh_timeout=self.ta_refresh_timeout,
+                                 ta_api_region=self.ta_api_region,
+                                 cache=self.cache,
+                                 refresh_cache=self.refresh_cache)
+
+    def _copy_for_region(self, region, skip_global=False):
+        """
+        Return a new :py:class:`~.AwsLimitChecker` with the same configuration
+        as this one, but checking ``region``. Unlike the constructor, this does
+        not print the license notice, check for a newer version or retrieve
+        new credentials; the new checker reuses the connection keyword
+        arguments (including any credentials) of this instance.
+
+        :param region: AWS region name for the new checker
+        :type region: str
+        :param skip_global: if True, do not include services whose
+          :py:attr:`~._AwsService.is_global` attribute is True
+        :type skip_global: bool
+        :returns: new checker instance for ``region``
+        :rtype: :py:class:`~.AwsLimitChecker`
+        """
+        conn_kwargs = dict(self._conn_kwargs)
+        conn_kwargs['region_name'] = region
+        other = copy(self)
+        other.region = region
+        other.service_errors = {}
+        other._init_services(conn_kwargs, skip_global=skip_global)
+        return other
 
     def _check_python_version(self):
         """
@@ -324,6 +481,30 @@ class AwsLimitChecker(object):
             logger.warning('Skipping service: %s', sname)
             self.services.pop(sname, None)
 
+    def invalidate_api_cache(self):
+        """
+        Discard limit information cached (for up to ``api_cache_ttl``
+        seconds) from each service's API and from Service Quotas, so that the
+        next call to :py:meth:`~.get_limits`, :py:meth:`~.find_usage` or
+        :py:meth:`~.check_thresholds` retrieves it again. This does not clear
+        the persistent ``cache``, if one was given.
+        """
+        for svc in self.services.values():
+            svc.invalidate_api_cache()
+        if self._response_cache is not None:
+            self._response_cache.invalidate()
+        if self._quotas_client is not None:
+            self._quotas_client.invalidate()
+
+    def wait_for_cache_refresh(self):
+        """
+        Wait for any background refreshes of stale Service Quotas responses
+        in the persistent ``cache`` to finish, so that they are stored before
+        the process exits. The command line runner calls this before exiting.
+        """
+        if self._quotas_client is not None:
+            self._quotas_client.wait_for_refresh()
+
     def get_limits(self, service=None, use_ta=True):
         """
         Return all :py:class:`~.AwsLimit` objects for the given
@@ -340,18 +521,13 @@ class AwsLimitChecker(object):
           of limit name (string) to limit (:py:class:`~.AwsLimit`)
         :rtype: dict
         """
-        res = {}
         to_get = self.services
         if service is not None:
             to_get = dict((each, self.services[each]) for each in service)
+        self._prefetch_quotas(to_get)
         if use_ta:
             self.ta.update_limits()
-        for sname, cls in to_get.items():
-            if hasattr(cls, '_update_limits_from_api'):
-                cls._update_limits_from_api()
-            cls._update_service_quotas()
-            res[sname] = cls.get_limits()
-        return res
+        return self._process_services(to_get, 'get_limits')
 
     def get_service_names(self):
         """
@@ -366,7 +542,7 @@ class AwsLimitChecker(object):
         """
         Assume a role via STS and return the credentials.
 
-        First connect to STS via :py:func:`boto3.client`, then
+        First connect to STS via :py:func:`~.cached_client`, then
         assume a role using `boto3.STS.Client.assume_role <https://boto3.readthe
         docs.org/en/latest/reference/services/sts.html#STS.Client.assume_role>`_
         using ``self.account_id`` and ``self.account_role`` (and optionally
@@ -374,16 +550,27 @@ class AwsLimitChecker(object):
         Return the resulting :py:class:`~.ConnectableCredentials`
         object.
 
+        Credentials are cached process-wide (shared by all instances of this
+        class) and reused for the same role until
+        :py:data:`~.STS_REFRESH_MARGIN` seconds before they expire.
+
         :returns: STS assumed role credentials
         :rtype: :py:class:`~.ConnectableCredentials`
         """
-        logger.debug("Connecting to STS in region %s", self.region)
-        sts = boto3.client('sts', region_name=self.region)
         arn = "arn:%s:iam::%s:role/%s" % (
             self.role_partition,
             self.account_id,
             self.account_role
         )
+        cache_key = (arn, self.external_id, self.mfa_serial_number)
+        with _sts_credentials_lock:
+            creds = _sts_credentials.get(cache_key, None)
+        if creds is not None and not creds.expires_within(STS_REFRESH_MARGIN):
+            logger.debug("Using cached STS credentials for %s (expiration: "
+                         "%s)", arn, creds.expiration)
+            return creds
+        logger.debug("Connecting to STS in region %s", self.region)
+        sts = cached_client('sts', {'region_name': self.region})
         logger.debug("STS assume role for %s", arn)
         assume_kwargs = {
             'RoleArn': arn,
@@ -399,11 +586,43 @@ class AwsLimitChecker(object):
 
         creds = ConnectableCredentials(role)
         creds.account_id = self.account_id
+        with _sts_credentials_lock:
+            _sts_credentials[cache_key] = creds
 
         logger.debug("Got STS credentials for role; access_key_id=%s "
                      "(account_id=%s)", creds.access_key, creds.account_id)
         return creds
 
+    def _copy_for_account(self, account_id, account_role):
+        """
+        Return a new :py:class:`~.AwsLimitChecker` with the same configuration
+        as this one, but checking account ``account_id`` by assuming the
+        ``account_role`` role in it via STS. Unlike the constructor, this does
+        not print the license notice or check for a newer version.
+
+        :param account_id: AWS Account ID to check
+        :type account_id: str
+        :param account_role: name of the IAM Role to assume in that account
+        :type account_role: str
+        :returns: new checker instance for ``account_id``
+        :rtype: :py:class:`~.AwsLimitChecker`
+        """
+        other = copy(self)
+        other.account_id = account_id
+        other.account_role = account_role
+        other.service_errors = {}
+        other._init_services(other._boto_conn_kwargs)
+        return other
+
+    def _discard_connections(self):
+        """
+        Discard the process-wide cached boto3 connections made with this
+        checker's credentials (see :py:func:`~.discard_connections`), i.e.
+        once a per-account copy from :py:meth:`~._copy_for_account` is
+        finished with.
+        """
+        discard_connections(self._conn_kwargs)
+
     def find_usage(self, service=None, use_ta=True):
         """
         For each limit in the specified service (or all services if
@@ -414,23 +633,79 @@ class AwsLimitChecker(object):
         :py:class:`~.AwsLimit` objects for each service, which can
         then be queried using :py:meth:`~.get_limits`.
 
+        If ``use_ta`` is True, Trusted Advisor is polled in a background
+        thread (see :py:meth:`~.TrustedAdvisor.start_update`) while usage is
+        collected, and its limits are applied once both have finished.
+
+        If this instance was constructed with ``use_asyncio=True``, this runs
+        :py:meth:`~.find_usage_async` to completion on a new event loop.
+
         :param service: list of :py:class:`~._AwsService` name(s), or ``None``
           to check all services.
         :type service: :py:obj:`None`, or :py:obj:`list` service names to get
         :param use_ta: check Trusted Advisor for information on limits
         :type use_ta: bool
         """
+        if self.use_asyncio:
+            return aio.run(
+                self.find_usage_async(service=service, use_ta=use_ta)
+            )
         to_get = self.services
         if service is not None:
             to_get = dict((each, self.services[each]) for each in service)
+        self._prefetch_quotas(to_get)
+        if use_ta:
+            self.ta.start_update()
+        self._start_usage_run(to_get)
+        try:
+            self._process_services(to_get, 'find_usage')
+        finally:
+            self._end_usage_run()
         if use_ta:
             self.ta.update_limits()
-        for cls in to_get.values():
-            if hasattr(cls, '_update_limits_from_api'):
-                cls._update_limits_from_api()
-            cls._update_service_quotas()
-            logger.debug("Finding usage for service: %s", cls.service_name)
-            cls.find_usage()
+
+    async def find_usage_async(self, service=None, use_ta=True):
+        """
+        Asynchronous version of :py:meth:`~.find_usage`, for use from a running
+        event loop. All services are processed concurrently (at most
+        ``parallel`` at a time, if that was set) via
+        :py:meth:`~._AwsService.find_usage_async`; services with many
+        per-resource API calls make those calls concurrently using
+        ``aiobotocore``, and the rest run in the event loop's default executor.
+        Errors are handled as described for :py:meth:`~._process_services`.
+
+        :param service: list of :py:class:`~._AwsService` name(s), or ``None``
+          to check all services.
+        :type service: :py:obj:`None`, or :py:obj:`list` service names to get
+        :param use_ta: check Trusted Advisor for information on limits
+        :type use_ta: bool
+        """
+        to_get = self.services
+        if service is not None:
+            to_get = dict((each, self.services[each]) for each in service)
+        self._prefetch_quotas(to_get)
+        if use_ta:
+            self.ta.start_update()
+        self._start_usage_run(to_get)
+        names = sorted(to_get.keys())
+        coros = [self._process_service_async(to_get[x]) for x in names]
+        try:
+            if self.parallel is not None and self.parallel > 0:
+                results = await aio.gather_bounded(
+                    [self._return_exception(x) for x in coros], self.parallel
+                )
+            else:
+                results = await asyncio.gather(
+                    *coros, return_exceptions=True
+                )
+        finally:
+            self._end_usage_run()
+        if use_ta:
+            await aio.run_in_executor(self.ta.update_limits)
+        self.service_errors = {}
+        for sname, result in zip(names, results):
+            if isinstance(result, Exception):
+                self._service_error(sname, 'find_usage_async', result)
 
     def set_limit_overrides(self, override_dict, override_ta=True):
         """
@@ -624,17 +899,171 @@ class AwsLimitChecker(object):
         to_get = self.services
         if service is not None:
             to_get = dict((each, self.services[each]) for each in service)
+        self._prefetch_quotas(to_get)
         if use_ta:
             self.ta.update_limits()
-        for sname, cls in to_get.items():
-            if hasattr(cls, '_update_limits_from_api'):
-                cls._update_limits_from_api()
-            cls._update_service_quotas()
-            tmp = cls.check_thresholds()
+        for sname, tmp in self._process_services(
+            to_get, 'check_thresholds'
+        ).items():
             if len(tmp) > 0:
                 res[sname] = tmp
         return res
 
+    def _start_usage_run(self, to_get):
+        """
+        Discard the API responses cached for the services in ``to_get`` (see
+        :py:meth:`~._AwsService._reset_api_cache`), and those for their APIs
+        in the shared :py:class:`~.ResponseCache`, before finding their
+        usage; some responses carry usage, which must not be reused from a
+        previous run. Limits from Service Quotas are kept.
+
+        :param to_get: dict of service name to :py:class:`~._AwsService`
+        :type to_get: dict
+        """
+        for sname in sorted(to_get.keys()):
+            to_get[sname]._reset_api_cache()
+        if self._response_cache is None:
+            return
+        for api_name in sorted(set(x.api_name for x in to_get.values())):
+            self._response_cache.invalidate(api_name)
+
+    def _end_usage_run(self):
+        """
+        Discard the transient entries (i.e. full lists of resources shared
+        between services) from the shared :py:class:`~.ResponseCache` once a
+        usage collection pass has finished, so they are not kept in memory
+        between runs.
+        """
+        if self._response_cache is not None:
+            self._response_cache.discard_transient()
+
+    def _prefetch_quotas(self, to_get):
+        """
+        Start retrieving the Service Quotas needed by the services in
+        ``to_get`` in the background, concurrently for each service code (see
+        :py:meth:`~.ServiceQuotasClient.prefetch`), so that they are
+        retrieved while Trusted Advisor is polled and usage is collected
+        rather than one service code after another.
+
+        :param to_get: dict of service name to :py:class:`~._AwsService`
+        :type to_get: dict
+        """
+        if self._quotas_client is None:
+            return
+        limits = []
+        for sname in sorted(to_get.keys()):
+            if to_get[sname].quotas_service_code is None:
+                continue
+            limits.extend(to_get[sname].get_limits().values())
+        self._quotas_client.prefetch(limits)
+
+    def _process_service(self, cls, method_name):
+        """
+        Update limits for a single :py:class:`~._AwsService` instance from its
+        API (if supported) and from Service Quotas, then call the method named
+        ``method_name`` on it and return the result.
+
+        :param cls: the service instance to process
+        :type cls: :py:class:`~._AwsService`
+        :param method_name: name of the service method to call
+        :type method_name: str
+        :returns: return value of the ``method_name`` method
+        """
+        if hasattr(cls, '_update_limits_from_api'):
+            cls._update_limits_from_api()
+        cls._update_service_quotas()
+        logger.debug("Calling %s() for service: %s", method_name,
+                     cls.service_name)
+        return getattr(cls, method_name)()
+
+    async def _process_service_async(self, cls):
+        """
+        Asynchronous version of :py:meth:`~._process_service` for
+        ``find_usage``.
+
+        :param cls: the service instance to process
+        :type cls: :py:class:`~._AwsService`
+        """
+        await cls._update_limits_from_api_async()
+        await aio.run_in_executor(cls._update_service_quotas)
+        logger.debug("Calling find_usage_async() for service: %s",
+                     cls.service_name)
+        await cls.find_usage_async()
+
+    @staticmethod
+    async def _return_exception(coro):
+        """
+        Await ``coro`` and return its result, or the exception it raised.
+
+        :param coro: the coroutine to await
+        """
+        try:
+            return await coro
+        except Exception as ex:
+            return ex
+
+    def _process_services(self, to_get, method_name):
+        """
+        Call :py:meth:`~._process_service` for every service in ``to_get``.
+
+        If ``self.parallel`` is greater than one, services are processed
+        concurrently on a pool of that many worker threads, so a full run takes
+        roughly as long as the slowest service instead of the sum of all of
+        them, and an exception raised by one service does not stop the
+        others: it is logged and stored in ``self.service_errors``, and that
+        service is left out of the returned dict. Otherwise services are
+        processed serially, and an exception raised by any of them is
+        propagated. ``self.service_errors`` is reset on every call.
+
+        :param to_get: dict of service name to :py:class:`~._AwsService`
+          instance
+        :type to_get: dict
+        :param method_name: name of the service method to call
+        :type method_name: str
+        :returns: dict of service name to return value of ``method_name``,
+          for each service that did not raise an exception
+        :rtype: dict
+        """
+        res = {}
+        self.service_errors = {}
+        if self.parallel is None or self.parallel < 2:
+            for sname, cls in to_get.items():
+                res[sname] = self._process_service(cls, method_name)
+            return res
+        logger.debug('Processing %d services with %d worker threads',
+                     len(to_get), self.parallel)
+        with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+            futures = {}
+            for sname in sorted(to_get.keys()):
+                futures[executor.submit(
+                    self._process_service, to_get[sname], method_name
+                )] = sname
+            for future in as_completed(futures):
+                sname = futures[future]
+                try:
+                    res[sname] = future.result()
+                except Exception as ex:
+                    self._service_error(sname, method_name, ex)
+        return res
+
+    def _service_error(self, sname, method_name, ex):
+        """
+        Log an exception raised by one service, and store it in
+        ``self.service_errors``.
+
+        :param sname: service name
+        :type sname: str
+        :param method_name: name of the service method that raised it
+        :type method_name: str
+        :param ex: the exception
+        :type ex: Exception
+        """
+        logger.error(
+            'Error calling %s() for service %s: %s',
+            method_name, sname, ex, exc_info=ex
+        )
+        self.service_errors[sname] = ex
+
     def get_required_iam_policy(self):
         """
         Return an IAM policy granting all of the permissions needed for
@@ -648,6 +1077,7 @@ class AwsLimitChecker(object):
         :rtype: dict
         """
         required_actions = [
+            'servicequotas:GetServiceQuota',
             'servicequotas:ListServiceQuotas',
             'support:*',
             'trustedadvisor:Describe*',
@@ -673,6 +1103,5 @@ class AwsLimitChecker(object):
         :return: AWS region name
         :rtype: str
         """
-        kwargs = self._boto_conn_kwargs
-        conn = boto3.client('ec2', **kwargs)
+        conn = cached_client('ec2', self._boto_conn_kwargs)
         return conn._client_config.region_name
@@ -39,11 +39,177 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 
 import os
 import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
 import boto3
 from botocore.config import Config
+from pytz import utc
+
+from awslimitchecker import aio
 
 logger = logging.getLogger(__name__)
 
+#: Creating clients from a boto3 session is not thread-safe; serialize
+#: client and resource creation so services can connect from worker threads.
+_connect_lock = threading.Lock()
+
+#: Process-wide :py:class:`boto3.session.Session` shared by every client and
+#: resource we create, so that botocore's loaded service models, endpoint data
+#: and credential resolution are only paid for once. Created lazily by
+#: :py:func:`~._get_session`.
+_session = None
+
+#: Maximum number of boto3 connections kept in ``_connections``; the least
+#: recently used ones are discarded beyond this.
+CONNECTION_CACHE_SIZE = 256
+
+#: Process-wide LRU cache of boto3 clients and (per-thread) resources, keyed
+#: by :py:func:`~._connection_cache_key`.
+_connections = OrderedDict()
+
+
+def _get_session():
+    """
+    Return the shared :py:class:`boto3.session.Session`, creating it if it
+    does not yet exist. Must be called with ``_connect_lock`` held.
+
+    :rtype: boto3.session.Session
+    """
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+
+def _connection_cache_key(kind, api_name, conn_kwargs, config):
+    """
+    Return a hashable key identifying a boto3 connection. boto3 resources
+    are not thread-safe, so keys for resources also include the current
+    thread's identifier.
+
+    :param kind: either "client" or "resource"
+    :type kind: str
+    :param api_name: boto3 API (service) name
+    :type api_name: str
+    :param conn_kwargs: keyword arguments for the connection, i.e. region name
+      and credentials.
+    :type conn_kwargs: dict
+    :param config: optional botocore Config; only its retry settings are used
+    :type config: ``botocore.config.Config`` or None
+    :rtype: tuple
+    """
+    retries = None
+    if config is not None and config.retries is not None:
+        retries = tuple(sorted(config.retries.items()))
+    key = (kind, api_name, tuple(sorted(conn_kwargs.items())), retries)
+    if kind == 'resource':
+        key += (threading.current_thread().ident,)
+    return key
+
+
+def _cached_connection(kind, api_name, conn_kwargs, config=None):
+    """
+    Return a boto3 client or resource for ``api_name`` created from the shared
+    session with ``conn_kwargs``, reusing a previously-created one with the
+    same API, region, credentials and retry configuration if possible.
+    At most :py:const:`~.CONNECTION_CACHE_SIZE` connections are kept; the
+    least recently used one is discarded when a new one is added beyond that.
+
+    :param kind: either "client" or "resource"
+    :type kind: str
+    :param api_name: boto3 API (service) name
+    :type api_name: str
+    :param conn_kwargs: keyword arguments for the connection, i.e. region name
+      and credentials.
+    :type conn_kwargs: dict
+    :param config: optional botocore Config to create the connection with
+    :type config: ``botocore.config.Config`` or None
+    :returns: boto3 client or resource
+    """
+    key = _connection_cache_key(kind, api_name, conn_kwargs, config)
+    with _connect_lock:
+        if key in _connections:
+            _connections.move_to_end(key)
+            return _connections[key]
+        kwargs = dict(conn_kwargs)
+        if config is not None:
+            kwargs['config'] = config
+        session = _get_session()
+        conn = getattr(session, kind)(api_name, **kwargs)
+        _connections[key] = conn
+        while len(_connections) > CONNECTION_CACHE_SIZE:
+            _connections.popitem(last=False)
+        return conn
+
+
+def cached_client(api_name, conn_kwargs, config=None):
+    """
+    Return a (possibly cached) boto3 client; see
+    :py:func:`~._cached_connection`.
+
+    :param api_name: boto3 API (service) name
+    :type api_name: str
+    :param conn_kwargs: keyword arguments for the connection, i.e. region name
+      and credentials.
+    :type conn_kwargs: dict
+    :param config: optional botocore Config to create the client with
+    :type config: ``botocore.config.Config`` or None
+    :returns: boto3 client
+    """
+    return _cached_connection('client', api_name, conn_kwargs, config=config)
+
+
+def cached_resource(api_name, conn_kwargs, config=None):
+    """
+    Return a (possibly cached) boto3 resource; see
+    :py:func:`~._cached_connection`. As boto3 resources are not thread-safe,
+    they are only shared within the thread that created them.
+
+    :param api_name: boto3 API (service) name
+    :type api_name: str
+    :param conn_kwargs: keyword arguments for the connection, i.e. region name
+      and credentials.
+    :type conn_kwargs: dict
+    :param config: optional botocore Config to create the resource with
+    :type config: ``botocore.config.Config`` or None
+    :returns: boto3 resource
+    """
+    return _cached_connection('resource', api_name, conn_kwargs, config=config)
+
+
+def discard_connections(conn_kwargs):
+    """
+    Discard all cached boto3 clients and resources created with the same
+    credentials as ``conn_kwargs``, in any region; i.e. once an account has
+    been checked.
+
+    :param conn_kwargs: keyword arguments for the connection, i.e. region name
+      and credentials.
+    :type conn_kwargs: dict
+    """
+    creds = set(
+        (k, v) for k, v in conn_kwargs.items() if k != 'region_name'
+    )
+    with _connect_lock:
+        for key in list(_connections.keys()):
+            key_creds = set(
+                (k, v) for k, v in key[2] if k != 'region_name'
+            )
+            if key_creds == creds:
+                del _connections[key]
+
+
+def clear_connection_cache():
+    """
+    Discard all cached boto3 clients and resources, and the shared session.
+    Subsequently-created connections will resolve credentials afresh.
+    """
+    global _session
+    with _connect_lock:
+        _connections.clear()
+        _session = None
+
 
 class ConnectableCredentials(object):
     """
@@ -66,6 +232,25 @@ class ConnectableCredentials(object):
         self.assumed_role_arn = creds_dict['AssumedRoleUser']['Arn']
         self.account_id = None
 
+    def expires_within(self, seconds):
+        """
+        Return whether or not these credentials expire within ``seconds``
+        seconds from now. Credentials whose expiration is not a
+        :py:class:`datetime.datetime` are always considered to be expiring.
+        Naive datetimes are assumed to be in UTC.
+
+        :param seconds: number of seconds from now
+        :type seconds: int
+        :rtype: bool
+        """
+        if not isinstance(self.expiration, datetime):
+            return True
+        if self.expiration.tzinfo is None:
+            now = datetime.utcnow()
+        else:
+            now = datetime.now(utc)
+        return self.expiration - now <= timedelta(seconds=seconds)
+
 
 class Connectable(object):
     """
@@ -73,6 +258,17 @@ class Connectable(object):
     connecting via regions and/or STS.
     """
 
+    #: optional :py:class:`~.PersistentCache` used by
+    #: :py:meth:`~._persistent_cache_get` and :py:meth:`~._persistent_cache_set`
+    persistent_cache = None
+
+    #: if True, :py:meth:`~._persistent_cache_get` ignores existing entries
+    #: in :py:attr:`~.persistent_cache`, so they are retrieved and stored again
+    refresh_cache = False
+
+    #: account ID, looked up by :py:meth:`~._persistent_cache_key`
+    _account_id = None
+
     @property
     def _max_retries_config(self):
         """
@@ -107,15 +303,16 @@ class Connectable(object):
         ocs.org/en/latest/reference/core/boto3.html#boto3.client>`_ object
         (a ``botocore.client.*`` instance). If ``self.conn`` is not None,
         do nothing. This connects to the API name given by ``self.api_name``.
+        Clients are shared process-wide via :py:func:`~.cached_client`.
 
         :returns: None
         """
         if self.conn is not None:
             return
-        kwargs = dict(self._boto3_connection_kwargs)
-        if self._max_retries_config is not None:
-            kwargs['config'] = self._max_retries_config
-        self.conn = boto3.client(self.api_name, **kwargs)
+        self.conn = cached_client(
+            self.api_name, self._boto3_connection_kwargs,
+            config=self._max_retries_config
+        )
         logger.info("Connected to %s in region %s",
                     self.api_name, self.conn._client_config.region_name)
 
@@ -127,14 +324,96 @@ class Connectable(object):
         (a ``boto3.resources.factory.*.ServiceResource`` instance).
         If ``self.resource_conn`` is not None,
         do nothing. This connects to the API name given by ``self.api_name``.
+        Resources are shared process-wide via :py:func:`~.cached_resource`.
 
         :returns: None
         """
         if self.resource_conn is not None:
             return
-        kwargs = dict(self._boto3_connection_kwargs)
-        if self._max_retries_config is not None:
-            kwargs['config'] = self._max_retries_config
-        self.resource_conn = boto3.resource(self.api_name, **kwargs)
+        self.resource_conn = cached_resource(
+            self.api_name, self._boto3_connection_kwargs,
+            config=self._max_retries_config
+        )
         logger.info("Connected to %s (resource) in region %s", self.api_name,
                     self.resource_conn.meta.client._client_config.region_name)
+
+    def _persistent_cache_key(self, *names):
+        """
+        Return the :py:attr:`~.persistent_cache` key for the account- and
+        region-specific item ``names``, i.e. ``api_name/account/region`` with
+        each of ``names`` appended, or None if there is no persistent cache.
+        The account ID is looked up via STS ``GetCallerIdentity`` the first
+        time this is called. The region is that of the connection kwargs, or
+        else of the client (connecting if needed).
+
+        :param names: path components of the cached item
+        :type names: str
+        :rtype: str
+        """
+        if self.persistent_cache is None:
+            return None
+        if self._account_id is None:
+            sts = cached_client('sts', self._boto3_connection_kwargs)
+            self._account_id = sts.get_caller_identity()['Account']
+        region = self._boto3_connection_kwargs.get('region_name')
+        if region is None:
+            self.connect()
+            region = self.conn._client_config.region_name
+        return '/'.join([self.api_name, self._account_id, region] + list(names))
+
+    def _persistent_cache_get(self, key, ttl):
+        """
+        Return the value stored for ``key`` in :py:attr:`~.persistent_cache`
+        if there is one, it is no more than ``ttl`` seconds old (or ``ttl`` is
+        None) and :py:attr:`~.refresh_cache` is not set. Otherwise return
+        None.
+
+        :param key: persistent cache key, i.e. from
+          :py:meth:`~._persistent_cache_key`
+        :type key: str
+        :param ttl: maximum age in seconds of a usable entry, or None
+        :type ttl: int
+        """
+        if key is None or self.persistent_cache is None or self.refresh_cache:
+            return None
+        value, age = self.persistent_cache.get(key)
+        if value is None or (ttl is not None and age > ttl):
+            return None
+        logger.debug('Using cached %s (age %ds)', key, age)
+        return value
+
+    def _persistent_cache_set(self, key, value):
+        """
+        Store ``value`` for ``key`` in :py:attr:`~.persistent_cache`, if there
+        is one.
+
+        :param key: persistent cache key, i.e. from
+          :py:meth:`~._persistent_cache_key`
+        :type key: str
+        :param value: JSON-serializable value to store
+        """
+        if key is None or self.persistent_cache is None:
+            return
+        self.persistent_cache.set(key, value)
+
+    def connect_async(self, api_name=None, config=None):
+        """
+        Return an asynchronous context manager yielding an ``aiobotocore``
+        client for use by the asyncio backend, e.g.
+        ``async with self.connect_async() as conn:``. Requires the optional
+        ``aiobotocore`` dependency.
+
+        :param api_name: the API name to connect to; defaults to
+          ``self.api_name``
+        :type api_name: str
+        :param config: botocore Config for the client; defaults to
+          :py:attr:`~._max_retries_config` for ``self.api_name``
+        :type config: ``botocore.config.Config`` or None
+        """
+        if api_name is None:
+            api_name = self.api_name
+            if config is None:
+                config = self._max_retries_config
+        return aio.create_client(
+            api_name, self._boto3_connection_kwargs, config=config
+        )
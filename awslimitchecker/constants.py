@@ -0,0 +1,49 @@
+"""
+awslimitchecker/constants.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2019 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+# This module must not import boto3 or botocore, so that the runner can use
+# these as argument defaults without slowing down startup.
+
+#: Default number of seconds that Service Quotas responses stored in a
+#: :py:class:`~awslimitchecker.cache.PersistentCache` are considered fresh.
+QUOTAS_CACHE_TTL = 86400
+
+#: Number of seconds past its TTL that a cached Service Quotas response may
+#: still be used while it is refreshed in the background.
+QUOTAS_CACHE_MAX_STALE = 604800
@@ -60,7 +60,8 @@ class AwsLimit(object):
                  limit_type=None, limit_subtype=None,
                  ta_service_name=None, ta_limit_name=None,
                  quotas_service_code=None, quotas_name=None,
-                 quotas_unit='None', quotas_unit_converter=None):
+                 quotas_unit='None', quotas_unit_converter=None,
+                 quotas_code=None):
         """
         Describes one specific AWS service limit, as well as its
         current utilization, default limit, thresholds, and any
@@ -115,6 +116,10 @@ class AwsLimit(object):
           the quota value from the quota Unit to this class's expected unit.
           If they cannot be converted, it should log an error and return None.
         :type quotas_unit_converter: ``callable``
+        :param quotas_code: the Service Quotas QuotaCode for this limit, if
+          known. If set, this limit's quota may be retrieved individually
+          instead of listing all quotas for the service.
+        :type quotas_code: str or None
         :raises: ValueError
         """
         if def_warning_threshold >= def_critical_threshold:
@@ -144,6 +149,7 @@ class AwsLimit(object):
         self._quotas_service_code = quotas_service_code
         self._quotas_name = quotas_name
         self._quotas_unit = quotas_unit
+        self.quotas_code = quotas_code
         self.quotas_limit = None
         self.quotas_unit_converter = quotas_unit_converter
 
@@ -0,0 +1,276 @@
+"""
+awslimitchecker/multiaccount.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2019 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import logging
+
+from .checker import AwsLimitChecker
+
+logger = logging.getLogger(__name__)
+
+
+class MultiAccountLimitChecker(object):
+
+    def __init__(self, accounts, max_workers=4, **kwargs):
+        """
+        Check limits in many AWS accounts from a single process, by assuming
+        a role in each of them via STS.
+
+        A single :py:class:`~.AwsLimitChecker` is constructed up front using
+        ``kwargs``; this prints the license notice and checks for a newer
+        version exactly once. For each account, a copy of it is made (see
+        :py:meth:`~.AwsLimitChecker._copy_for_account`) with its own set of
+        :py:class:`~._AwsService` instances, used, and then discarded. At
+        most ``max_workers`` accounts are in progress at any time, so memory
+        use is bounded by the number of workers rather than the number of
+        accounts. Cached boto3 connections for each account are discarded
+        once it is finished.
+
+        STS credentials are cached process-wide by
+        :py:meth:`~.AwsLimitChecker._get_sts_token` and reused until shortly
+        before they expire, so repeated runs against the same accounts in one
+        process do not assume each role again.
+
+        :param accounts: list of (account ID, role name) 2-tuples to check
+        :type accounts: list
+        :param max_workers: maximum number of accounts to check concurrently
+        :type max_workers: int
+        :param kwargs: keyword arguments to pass to the
+          :py:class:`~.AwsLimitChecker` constructor, other than
+          ``account_id`` and ``account_role``. ``parallel`` is passed through
+          to each account's checker.
+        :type kwargs: dict
+        """
+        self.accounts = list(accounts)
+        self.max_workers = max_workers
+        self._checker = AwsLimitChecker(**kwargs)
+        self._services_to_remove = []
+        self._limit_overrides = None
+        self._threshold_overrides = None
+
+    def remove_services(self, services_to_remove=[]):
+        """
+        Remove the specified service names from the checkers for all accounts;
+        see :py:meth:`~.AwsLimitChecker.remove_services`.
+
+        :param services_to_remove: the name(s) of one or more services to
+          permanently exclude from future calls to this instance
+        :type service_to_skip: list
+        """
+        self._services_to_remove.extend(services_to_remove)
+
+    def set_limit_overrides(self, override_dict, override_ta=True):
+        """
+        Set limit overrides for all accounts; see
+        :py:meth:`~.AwsLimitChecker.set_limit_overrides`.
+
+        :param override_dict: dict of overrides to default limits
+        :type override_dict: dict
+        :param override_ta: whether or not to use this value even if Trusted
+          Advisor supplies limit information
+        :type override_ta: bool
+        """
+        self._limit_overrides = (override_dict, override_ta)
+
+    def set_threshold_overrides(self, override_dict):
+        """
+        Set threshold overrides for all accounts; see
+        :py:meth:`~.AwsLimitChecker.set_threshold_overrides`.
+
+        :param override_dict: nested dict of threshold overrides
+        :type override_dict: dict
+        """
+        self._threshold_overrides = override_dict
+
+    def get_limits(self, service=None, use_ta=True):
+        """
+        Generator that calls :py:meth:`~.AwsLimitChecker.get_limits` for each
+        account, yielding results as each account finishes (in no particular
+        order).
+
+        :param service: the name(s) of one or more services to return limits
+          for
+        :type service: list
+        :param use_ta: check Trusted Advisor for information on limits
+        :type use_ta: bool
+        :returns: generator of 3-tuples of account ID, the return value of
+          :py:meth:`~.AwsLimitChecker.get_limits` for that account (or None
+          on error) and the exception raised for that account (or None)
+        :rtype: ``generator``
+        """
+        return self._run(self._get_limits, service, use_ta)
+
+    def find_usage(self, service=None, use_ta=True):
+        """
+        Generator that calls :py:meth:`~.AwsLimitChecker.find_usage` for each
+        account, yielding results as each account finishes (in no particular
+        order). As the per-account checker is discarded once the account is
+        finished, the yielded result is the subsequent return value of
+        :py:meth:`~.AwsLimitChecker.get_limits`, which includes the usage.
+
+        :param service: the name(s) of one or more services to find usage for
+        :type service: list
+        :param use_ta: check Trusted Advisor for information on limits
+        :type use_ta: bool
+        :returns: generator of 3-tuples of account ID, the return value of
+          :py:meth:`~.AwsLimitChecker.get_limits` for that account (or None
+          on error) and the exception raised for that account (or None)
+        :rtype: ``generator``
+        """
+        return self._run(self._find_usage, service, use_ta)
+
+    def check_thresholds(self, service=None, use_ta=True):
+        """
+        Generator that calls :py:meth:`~.AwsLimitChecker.check_thresholds`
+        for each account, yielding results as each account finishes (in no
+        particular order).
+
+        :param service: the name(s) of one or more service(s) to return
+          results for
+        :type service: list
+        :param use_ta: check Trusted Advisor for information on limits
+        :type use_ta: bool
+        :returns: generator of 3-tuples of account ID, the return value of
+          :py:meth:`~.AwsLimitChecker.check_thresholds` for that account (or
+          None on error) and the exception raised for that account (or None)
+        :rtype: ``generator``
+        """
+        return self._run(self._check_thresholds, service, use_ta)
+
+    def _get_limits(self, checker, service, use_ta):
+        return checker.get_limits(service=service, use_ta=use_ta)
+
+    def _find_usage(self, checker, service, use_ta):
+        checker.find_usage(service=service, use_ta=use_ta)
+        return checker.get_limits(service=service, use_ta=use_ta)
+
+    def _check_thresholds(self, checker, service, use_ta):
+        return checker.check_thresholds(service=service, use_ta=use_ta)
+
+    def _checker_for_account(self, account_id, account_role):
+        """
+        Return a new :py:class:`~.AwsLimitChecker` for the given account, with
+        any services removed and overrides set on this instance applied.
+
+        :param account_id: AWS Account ID to check
+        :type account_id: str
+        :param account_role: name of the IAM Role to assume in that account
+        :type account_role: str
+        :rtype: :py:class:`~.AwsLimitChecker`
+        """
+        checker = self._checker._copy_for_account(account_id, account_role)
+        if len(self._services_to_remove) > 0:
+            checker.remove_services(self._services_to_remove)
+        if self._limit_overrides is not None:
+            checker.set_limit_overrides(
+                self._limit_overrides[0], override_ta=self._limit_overrides[1]
+            )
+        if self._threshold_overrides is not None:
+            checker.set_threshold_overrides(self._threshold_overrides)
+        return checker
+
+    def _process_account(self, func, account_id, account_role, service,
+                         use_ta):
+        """
+        Build a checker for one account and call ``func`` with it, then
+        discard the cached boto3 connections for that account's credentials
+        (see :py:meth:`~.AwsLimitChecker._discard_connections`).
+
+        :param func: callable taking the checker, ``service`` and ``use_ta``
+        :type func: ``callable``
+        :param account_id: AWS Account ID to check
+        :type account_id: str
+        :param account_role: name of the IAM Role to assume in that account
+        :type account_role: str
+        :param service: list of service names, or None for all services
+        :type service: :py:obj:`None` or :py:obj:`list`
+        :param use_ta: check Trusted Advisor for information on limits
+        :type use_ta: bool
+        :returns: return value of ``func``
+        """
+        logger.debug('Checking account %s (role %s)', account_id, account_role)
+        checker = self._checker_for_account(account_id, account_role)
+        try:
+            return func(checker, service, use_ta)
+        finally:
+            checker._discard_connections()
+
+    def _run(self, func, service, use_ta):
+        """
+        Generator that calls :py:meth:`~._process_account` for every account
+        on a pool of ``self.max_workers`` threads, never having more than that
+        many accounts in progress at once, and yields (account ID, result,
+        exception) 3-tuples as each account finishes.
+
+        :param func: callable taking the checker, ``service`` and ``use_ta``
+        :type func: ``callable``
+        :param service: list of service names, or None for all services
+        :type service: :py:obj:`None` or :py:obj:`list`
+        :param use_ta: check Trusted Advisor for information on limits
+        :type use_ta: bool
+        :rtype: ``generator``
+        """
+        pending = iter(self.accounts)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_progress = {}
+
+            def submit_next():
+                for account_id, account_role in pending:
+                    in_progress[executor.submit(
+                        self._process_account, func, account_id,
+                        account_role, service, use_ta
+                    )] = account_id
+                    return
+
+            for _ in range(self.max_workers):
+                submit_next()
+            while len(in_progress) > 0:
+                done, _ = wait(in_progress.keys(), return_when=FIRST_COMPLETED)
+                for future in done:
+                    account_id = in_progress.pop(future)
+                    submit_next()
+                    try:
+                        res = (account_id, future.result(), None)
+                    except Exception as ex:
+                        logger.error(
+                            'Error checking account %s: %s', account_id, ex,
+                            exc_info=True
+                        )
+                        res = (account_id, None, ex)
+                    yield res
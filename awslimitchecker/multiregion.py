@@ -0,0 +1,265 @@
+"""
+awslimitchecker/multiregion.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2019 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+
+from .checker import AwsLimitChecker
+
+logger = logging.getLogger(__name__)
+
+
+class MultiRegionLimitChecker(object):
+
+    def __init__(self, regions, max_region_workers=None, **kwargs):
+        """
+        Check limits in multiple regions from a single process.
+
+        An :py:class:`~.AwsLimitChecker` is constructed for the first region
+        in ``regions``; this prints the license notice, checks for a newer
+        version and (if needed) assumes a role via STS exactly once. Checkers
+        for the remaining regions are copies of it (see
+        :py:meth:`~.AwsLimitChecker._copy_for_region`) sharing the same
+        configuration and credentials, each with its own set of
+        :py:class:`~._AwsService` instances built from ``_services``, its own
+        Service Quotas client and its own :py:class:`~.TrustedAdvisor`.
+
+        Services whose :py:attr:`~._AwsService.is_global` attribute is True
+        (i.e. IAM, S3 and Route53) are account-wide, and are only checked in
+        the first region.
+
+        :param regions: list of AWS region names to check
+        :type regions: list
+        :param max_region_workers: maximum number of regions to process
+          concurrently; if None, all regions are processed at once.
+        :type max_region_workers: :py:class:`int` or :py:data:`None`
+        :param kwargs: keyword arguments to pass to the
+          :py:class:`~.AwsLimitChecker` constructor, other than ``region``.
+          ``parallel`` is passed through to each region's checker.
+        :type kwargs: dict
+        """
+        if len(regions) < 1:
+            raise ValueError('At least one region must be specified')
+        self.regions = list(regions)
+        self.max_region_workers = max_region_workers
+        #: dict of region name to the exception raised while processing that
+        #: region during the most recent run
+        self.region_errors = {}
+        primary = AwsLimitChecker(region=self.regions[0], **kwargs)
+        #: dict of region name to :py:class:`~.AwsLimitChecker` instance
+        self.checkers = {self.regions[0]: primary}
+        for region in self.regions[1:]:
+            self.checkers[region] = primary._copy_for_region(
+                region, skip_global=True
+            )
+
+    def remove_services(self, services_to_remove=[]):
+        """
+        Call :py:meth:`~.AwsLimitChecker.remove_services` on every region's
+        checker.
+
+        :param services_to_remove: the name(s) of one or more services to
+          permanently exclude from future calls to this instance
+        :type service_to_skip: list
+        """
+        for region in self.regions:
+            checker = self.checkers[region]
+            checker.remove_services(
+                [x for x in services_to_remove if x in checker.services]
+            )
+
+    def set_limit_overrides(self, override_dict, override_ta=True):
+        """
+        Call :py:meth:`~.AwsLimitChecker.set_limit_overrides` on every
+        region's checker, for the services that region checks.
+
+        :param override_dict: dict of overrides to default limits
+        :type override_dict: dict
+        :param override_ta: whether or not to use this value even if Trusted
+          Advisor supplies limit information
+        :type override_ta: bool
+        """
+        for region in self.regions:
+            checker = self.checkers[region]
+            checker.set_limit_overrides(
+                dict(
+                    (k, v) for k, v in override_dict.items()
+                    if k in checker.services
+                ),
+                override_ta=override_ta
+            )
+
+    def set_threshold_overrides(self, override_dict):
+        """
+        Call :py:meth:`~.AwsLimitChecker.set_threshold_overrides` on every
+        region's checker, for the services that region checks.
+
+        :param override_dict: nested dict of threshold overrides
+        :type override_dict: dict
+        """
+        for region in self.regions:
+            checker = self.checkers[region]
+            checker.set_threshold_overrides(
+                dict(
+                    (k, v) for k, v in override_dict.items()
+                    if k in checker.services
+                )
+            )
+
+    def get_limits(self, service=None, use_ta=True):
+        """
+        Return all :py:class:`~.AwsLimit` objects for the given service names
+        (or all services, if ``service`` is None) in all regions.
+
+        :param service: the name(s) of one or more services to return limits
+          for
+        :type service: list
+        :param use_ta: check Trusted Advisor for information on limits
+        :type use_ta: bool
+        :returns: dict of (region, service name, limit name) tuples to
+          :py:class:`~.AwsLimit` instances
+        :rtype: dict
+        """
+        return self._flatten(
+            self._run_in_regions('get_limits', service, use_ta)
+        )
+
+    def find_usage(self, service=None, use_ta=True):
+        """
+        Call :py:meth:`~.AwsLimitChecker.find_usage` in every region, for the
+        given service names (or all services, if ``service`` is None).
+
+        :param service: list of service name(s), or ``None`` to check all
+          services.
+        :type service: :py:obj:`None`, or :py:obj:`list` service names to get
+        :param use_ta: check Trusted Advisor for information on limits
+        :type use_ta: bool
+        """
+        self._run_in_regions('find_usage', service, use_ta)
+
+    def check_thresholds(self, service=None, use_ta=True):
+        """
+        Call :py:meth:`~.AwsLimitChecker.check_thresholds` in every region,
+        and return all :py:class:`~.AwsLimit` instances that have crossed one
+        or more of their thresholds.
+
+        :param service: the name(s) of one or more service(s) to return
+          results for
+        :type service: list
+        :param use_ta: check Trusted Advisor for information on limits
+        :type use_ta: bool
+        :returns: dict of (region, service name, limit name) tuples to
+          :py:class:`~.AwsLimit` instances
+        :rtype: dict
+        """
+        return self._flatten(
+            self._run_in_regions('check_thresholds', service, use_ta)
+        )
+
+    def _flatten(self, results):
+        """
+        Convert a dict of region name to the nested dict results of
+        :py:meth:`~.AwsLimitChecker.get_limits` or
+        :py:meth:`~.AwsLimitChecker.check_thresholds` into a flat dict keyed
+        by (region, service name, limit name) tuples.
+
+        :param results: dict of region name to service name to limit name to
+          :py:class:`~.AwsLimit`
+        :type results: dict
+        :rtype: dict
+        """
+        res = {}
+        for region, svcs in results.items():
+            for sname, limits in svcs.items():
+                for lname, limit in limits.items():
+                    res[(region, sname, lname)] = limit
+        return res
+
+    def _run_in_regions(self, method_name, service, use_ta):
+        """
+        Concurrently call the :py:class:`~.AwsLimitChecker` method named
+        ``method_name`` on every region's checker. Exceptions raised for
+        individual regions are collected in ``self.region_errors`` and logged;
+        once every region has finished, the exception for the first failed
+        region (by name) is re-raised.
+
+        :param method_name: name of the checker method to call
+        :type method_name: str
+        :param service: list of service names to limit the call to, or None
+          for all services
+        :type service: :py:obj:`None` or :py:obj:`list`
+        :param use_ta: check Trusted Advisor for information on limits
+        :type use_ta: bool
+        :returns: dict of region name to return value of ``method_name``
+        :rtype: dict
+        """
+        calls = {}
+        for region in self.regions:
+            checker = self.checkers[region]
+            if service is None:
+                calls[region] = None
+                continue
+            svcs = [x for x in service if x in checker.services]
+            if len(svcs) > 0:
+                calls[region] = svcs
+        self.region_errors = {}
+        res = {}
+        workers = self.max_region_workers
+        if workers is None:
+            workers = max(len(calls), 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for region in sorted(calls.keys()):
+                futures[executor.submit(
+                    getattr(self.checkers[region], method_name),
+                    service=calls[region], use_ta=use_ta
+                )] = region
+            for future in as_completed(futures):
+                region = futures[future]
+                try:
+                    res[region] = future.result()
+                except Exception as ex:
+                    logger.error(
+                        'Error calling %s() for region %s: %s',
+                        method_name, region, ex, exc_info=True
+                    )
+                    self.region_errors[region] = ex
+        if len(self.region_errors) > 0:
+            raise self.region_errors[sorted(self.region_errors.keys())[0]]
+        return res
@@ -38,34 +38,105 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
 
 from awslimitchecker.connectable import Connectable
+from awslimitchecker.constants import (
+    QUOTAS_CACHE_TTL, QUOTAS_CACHE_MAX_STALE
+)
 
 logger = logging.getLogger(__name__)
 
+#: Default maximum number of service codes that
+#: :py:meth:`~.ServiceQuotasClient.prefetch` retrieves concurrently.
+QUOTAS_PREFETCH_WORKERS = 4
+
+
+def _normalize_quota_name(name):
+    """
+    Return a quota name normalized for lookups: lower-cased, with runs of
+    whitespace collapsed to a single space.
+
+    :param name: quota name
+    :type name: str
+    :rtype: str
+    """
+    return ' '.join(name.lower().split())
+
 
 class ServiceQuotasClient(Connectable):
     api_name = 'service-quotas'
 
-    def __init__(self, boto_connection_kwargs):
+    #: maximum number of service codes that :py:meth:`~.prefetch` retrieves
+    #: concurrently
+    prefetch_workers = QUOTAS_PREFETCH_WORKERS
+
+    def __init__(self, boto_connection_kwargs, cache=None,
+                 cache_ttl=QUOTAS_CACHE_TTL, cache_ttls=None,
+                 refresh_cache=False, cache_max_stale=QUOTAS_CACHE_MAX_STALE):
         """
         Client for the AWS Service Quotas service, that manages retrieving
         quotas information and updating :py:class:`~.AwsLimit` instances for
         them. This class is also intended to cache Service Quotas responses.
 
+        Responses are always cached on the instance. If ``cache`` is given,
+        they are also stored in that persistent cache, keyed by account ID,
+        region and service code, and read back from it on later runs. A
+        persistent cache entry is used as-is while younger than its TTL. Once
+        it is older than that but less than ``cache_max_stale`` seconds past
+        its TTL, it is still used, but refreshed from the API in a background
+        thread for the next run. Older entries are ignored.
+
         :param boto_connection_kwargs: keyword arguments to pass to boto3
           connection methods.
         :type boto_connection_kwargs: dict
+        :param cache: optional persistent cache to store responses in
+        :type cache: :py:class:`~.PersistentCache`
+        :param cache_ttl: default number of seconds that persistently-cached
+          responses are fresh for
+        :type cache_ttl: int
+        :param cache_ttls: optional dict of service code to the number of
+          seconds that persistently-cached responses for that service code are
+          fresh for, overriding ``cache_ttl``
+        :type cache_ttls: dict
+        :param refresh_cache: if True, ignore any persistently-cached
+          responses, and re-query the API (updating the cache)
+        :type refresh_cache: bool
+        :param cache_max_stale: number of seconds past their TTL that
+          persistently-cached responses may be used while being refreshed
+        :type cache_max_stale: int
         """
         self._boto3_connection_kwargs = boto_connection_kwargs
         self._cache = {}
         self.conn = None
+        self.persistent_cache = cache
+        self._cache_ttl = cache_ttl
+        self._cache_ttls = {} if cache_ttls is None else cache_ttls
+        self.refresh_cache = refresh_cache
+        self._cache_max_stale = cache_max_stale
+        self._account_id = None
+        self._refresh_threads = []
+        #: (service code, QuotaCode) to quota information, for quotas
+        #: retrieved individually
+        self._code_cache = {}
+        #: (service code, normalized quota name) to quota information
+        self._index = {}
+        #: service codes that have been added to ``_index``
+        self._indexed = set()
+        #: service code to the lock held while retrieving its quotas
+        self._code_locks = {}
+        self._code_locks_lock = threading.Lock()
+        #: service code to the exception raised while prefetching its quotas,
+        #: re-raised by the next lookup for that service code
+        self._prefetch_errors = {}
 
     def quotas_for_service(self, service_code):
         """
         Return this account's current quotas for the specified service code.
-        Also cache them on this class instance.
+        Also cache them on this class instance, and in the persistent cache
+        if one was given.
 
         :param service_code: the service code to get quotas for
         :type service_code: str
@@ -75,25 +146,257 @@ class ServiceQuotasClient(Connectable):
         """
         if service_code in self._cache:
             return self._cache[service_code]
+        with self._code_lock(service_code):
+            # a prefetch of these quotas may have failed while we waited
+            self._raise_prefetch_error(service_code)
+            # or another thread may have retrieved them
+            if service_code in self._cache:
+                return self._cache[service_code]
+            try:
+                self._load_quotas(service_code)
+            except ClientError:
+                self._cache[service_code] = {}
+                raise
+        return self._cache[service_code]
+
+    def _load_quotas(self, service_code):
+        """
+        Retrieve this account's current quotas for the specified service code
+        (from the persistent cache, if one was given, or the API) and cache
+        them on this class instance. The caller must hold the service code's
+        :py:meth:`~._code_lock`.
+
+        :param service_code: the service code to get quotas for
+        :type service_code: str
+        """
+        self._cache[service_code] = self._cached_response(
+            service_code, self._persistent_cache_key(service_code),
+            lambda: self._get_quotas(service_code)
+        )
+        self._prefetch_errors.pop(service_code, None)
+
+    def _code_lock(self, service_code):
+        """
+        Return the (reentrant) lock guarding retrieval and invalidation of
+        quotas for ``service_code``, creating it if needed.
+
+        :param service_code: the service code
+        :type service_code: str
+        :rtype: threading.RLock
+        """
+        with self._code_locks_lock:
+            if service_code not in self._code_locks:
+                self._code_locks[service_code] = threading.RLock()
+            return self._code_locks[service_code]
+
+    def _raise_prefetch_error(self, service_code):
+        """
+        If prefetching quotas for ``service_code`` failed, raise that
+        exception (once), so the caller sees the error just as if it had made
+        the request itself, without the request being repeated. The caller
+        must hold the service code's :py:meth:`~._code_lock`, so that lookups
+        that waited for a failing prefetch see its error.
+
+        :param service_code: the service code
+        :type service_code: str
+        """
+        ex = self._prefetch_errors.pop(service_code, None)
+        if ex is not None:
+            raise ex
+
+    def prefetch(self, limits):
+        """
+        Start retrieving the quotas that :py:meth:`~.update_limits` will need
+        for ``limits``, concurrently for each service code (at most
+        :py:attr:`~.prefetch_workers` at a time), in background threads. For
+        service codes where every limit has a ``quotas_code`` those quotas are
+        retrieved individually, otherwise all of the service's quotas are
+        listed; this is the same choice :py:meth:`~._find_quota` makes.
+
+        This returns immediately. Later lookups for a service code wait for
+        its retrieval to finish instead of repeating it. If retrieval fails,
+        the exception is kept and raised by the next lookup for that service
+        code, in place of the failed request.
+
+        :param limits: iterable of :py:class:`~.AwsLimit` instances
+        :type limits: iterable
+        :return: list of :py:class:`concurrent.futures.Future`, one for each
+          service code being retrieved
+        :rtype: list
+        """
+        # service code to set of QuotaCodes, or None to list all quotas
+        todo = {}
+        for lim in limits:
+            code = lim.quotas_service_code
+            if code is None or code in self._cache:
+                continue
+            if lim.quotas_code is None:
+                todo[code] = None
+            elif todo.get(code, ()) is not None:
+                todo.setdefault(code, set()).add(lim.quotas_code)
+        if len(todo) < 1:
+            return []
+        logger.debug('Prefetching service quotas for: %s', sorted(todo))
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.prefetch_workers, len(todo))
+        )
+        futures = [
+            executor.submit(self._prefetch_code, code, todo[code])
+            for code in sorted(todo)
+        ]
+        executor.shutdown(wait=False)
+        return futures
+
+    def _prefetch_code(self, service_code, quota_codes):
+        """
+        Retrieve quotas for one service code for :py:meth:`~.prefetch`; run
+        in a worker thread.
+
+        :param service_code: the service code
+        :type service_code: str
+        :param quota_codes: set of QuotaCodes to retrieve individually, or
+          None to list all of the service's quotas
+        :type quota_codes: set
+        """
+        # hold the lock throughout, so lookups waiting for this service code
+        # see any error once they acquire it
+        with self._code_lock(service_code):
+            # this retrieval replaces any earlier failed one
+            self._prefetch_errors.pop(service_code, None)
+            try:
+                if quota_codes is None:
+                    if service_code not in self._cache:
+                        self._load_quotas(service_code)
+                else:
+                    for quota_code in sorted(quota_codes):
+                        self.quota_by_code(service_code, quota_code)
+            except Exception as ex:
+                logger.debug(
+                    'Unable to prefetch service quotas for service code %s',
+                    service_code, exc_info=True
+                )
+                self._prefetch_errors[service_code] = ex
+
+    def invalidate(self, service_code=None):
+        """
+        Discard the quotas held in memory, so that they are retrieved again
+        (from the persistent cache, if one was given, or the API) the next
+        time they are needed.
+
+        :param service_code: only discard quotas for this service code; if
+          None, discard all
+        :type service_code: str
+        """
+        if service_code is None:
+            codes = set(list(self._cache.keys()))
+            for d in [self._code_cache, self._index]:
+                codes.update(x[0] for x in list(d.keys()))
+            codes.update(list(self._prefetch_errors.keys()))
+            for code in sorted(codes):
+                self.invalidate(code)
+            return
+        with self._code_lock(service_code):
+            self._cache.pop(service_code, None)
+            self._indexed.discard(service_code)
+            self._prefetch_errors.pop(service_code, None)
+            for d in [self._code_cache, self._index]:
+                # other service codes' entries may be added concurrently
+                for k in [x for x in list(d.keys()) if x[0] == service_code]:
+                    del d[k]
+
+    def quota_by_code(self, service_code, quota_code):
+        """
+        Return this account's current quota for the specified service code
+        and QuotaCode, retrieved individually via ``GetServiceQuota`` rather
+        than by listing all of the service's quotas. Also cache it on this
+        class instance, and in the persistent cache if one was given.
+
+        :param service_code: the service code of the quota
+        :type service_code: str
+        :param quota_code: the QuotaCode of the quota
+        :type quota_code: str
+        :return: dictionary of quota information returned by the service, or
+          None if the quota could not be found
+        :rtype: dict
+        """
+        key = (service_code, quota_code)
+        if key not in self._code_cache:
+            with self._code_lock(service_code):
+                self._raise_prefetch_error(service_code)
+                if key not in self._code_cache:
+                    self._code_cache[key] = self._cached_response(
+                        service_code,
+                        self._persistent_cache_key(service_code, quota_code),
+                        lambda: self._get_quota(service_code, quota_code)
+                    )
+                    self._prefetch_errors.pop(service_code, None)
+        return self._code_cache[key] or None
+
+    def _get_quota(self, service_code, quota_code):
+        """
+        Query the Service Quotas API for this account's current quota for the
+        specified service code and QuotaCode.
+
+        :param service_code: the service code of the quota
+        :type service_code: str
+        :param quota_code: the QuotaCode of the quota
+        :type quota_code: str
+        :return: dictionary of quota information returned by the service, or
+          an empty dict if the quota does not exist
+        :rtype: dict
+        """
+        self.connect()
+        logger.debug(
+            'Getting service quota for service code %s quota code %s',
+            service_code, quota_code
+        )
+        try:
+            return self.conn.get_service_quota(
+                ServiceCode=service_code, QuotaCode=quota_code
+            )['Quota']
+        except ClientError as ex:
+            if ex.response.get(
+                'Error', {}
+            ).get('Code', '') == 'NoSuchResourceException':
+                logger.warning(
+                    'Attempted to retrieve Service Quota for service code %s '
+                    'quota code %s but received NoSuchResourceException',
+                    service_code, quota_code
+                )
+                return {}
+            raise
+
+    def _get_quotas(self, service_code):
+        """
+        Query the Service Quotas API for this account's current quotas for the
+        specified service code.
+
+        :param service_code: the service code to get quotas for
+        :type service_code: str
+        :return: QuotaName to dictionary of quota information returned by the
+          service
+        :rtype: dict
+        """
         self.connect()
         logger.debug(
             'Getting service quotas for service code: %s', service_code
         )
-        self._cache[service_code] = {}
+        # build the result locally and only store it in the cache once
+        # complete, so concurrent callers never see a partial result
+        quotas = {}
         try:
             paginator = self.conn.get_paginator('list_service_quotas')
             for page in paginator.paginate(ServiceCode=service_code):
                 for item in page['Quotas']:
-                    if item['QuotaName'] in self._cache[service_code]:
+                    if item['QuotaName'] in quotas:
                         logger.error(
                             'ERROR: Received duplicate service quota for '
                             'service code %s quota name "%s" - QuotaCodes %s'
                             ' and %s', service_code, item['QuotaName'],
-                            self._cache[service_code][
-                                item['QuotaName']
-                            ]['QuotaCode'], item['QuotaCode']
+                            quotas[item['QuotaName']]['QuotaCode'],
+                            item['QuotaCode']
                         )
-                    self._cache[service_code][item['QuotaName'].lower()] = item
+                    quotas[item['QuotaName'].lower()] = item
         except ClientError as ex:
             if ex.response.get(
                 'Error', {}
@@ -107,13 +410,143 @@ class ServiceQuotasClient(Connectable):
             raise
         logger.debug(
             'Retrieved %d quotas for service code %s: %s',
-            len(self._cache[service_code]), service_code,
-            sorted([x['QuotaName'] for x in self._cache[service_code].values()])
+            len(quotas), service_code,
+            sorted([x['QuotaName'] for x in quotas.values()])
+        )
+        return quotas
+
+    def _cached_response(self, service_code, key, fetch):
+        """
+        Return a Service Quotas response from the persistent cache if there
+        is a usable entry for it, or else call ``fetch`` to retrieve it from
+        the API and store the result in the persistent cache.
+
+        :param service_code: the service code the response is for; used to
+          look up the TTL
+        :type service_code: str
+        :param key: the persistent cache key for the response, or None if
+          there is no persistent cache
+        :type key: str
+        :param fetch: callable taking no arguments, to retrieve the response
+          from the API
+        :type fetch: ``callable``
+        :return: the response
+        """
+        if key is None:
+            return fetch()
+        if not self.refresh_cache:
+            value = self._from_persistent_cache(service_code, key, fetch)
+            if value is not None:
+                return value
+        value = fetch()
+        self._persistent_cache_set(key, value)
+        return value
+
+    def _from_persistent_cache(self, service_code, key, fetch):
+        """
+        Return a response from the persistent cache, if present and not too
+        old. If the entry is past its TTL but within ``cache_max_stale``
+        seconds of it, start a background refresh via ``fetch``.
+
+        :param service_code: the service code the response is for; used to
+          look up the TTL
+        :type service_code: str
+        :param key: the persistent cache key for the response
+        :type key: str
+        :param fetch: callable taking no arguments, to retrieve the response
+          from the API
+        :type fetch: ``callable``
+        :return: the cached response, or None if there is no usable entry
+        """
+        value, age = self.persistent_cache.get(key)
+        if value is None:
+            return None
+        ttl = self._cache_ttls.get(service_code, self._cache_ttl)
+        if age <= ttl:
+            logger.debug('Using cached service quotas %s (age %ds)', key, age)
+            return value
+        if age > ttl + self._cache_max_stale:
+            logger.debug(
+                'Ignoring expired cached service quotas %s (age %ds)', key, age
+            )
+            return None
+        logger.debug(
+            'Using stale cached service quotas %s (age %ds) and refreshing in '
+            'the background', key, age
+        )
+        t = threading.Thread(
+            target=self._refresh_persistent_cache, args=(key, fetch),
+            name='quotas-refresh-%s' % key
+        )
+        self._refresh_threads.append(t)
+        t.start()
+        return value
+
+    def _refresh_persistent_cache(self, key, fetch):
+        """
+        Re-query a response and store it in the persistent cache. Run in a
+        background thread; errors are logged and otherwise ignored, leaving
+        the stale entry in place.
+
+        :param key: the persistent cache key for the response
+        :type key: str
+        :param fetch: callable taking no arguments, to retrieve the response
+          from the API
+        :type fetch: ``callable``
+        """
+        try:
+            self._persistent_cache_set(key, fetch())
+        except Exception:
+            logger.warning(
+                'Unable to refresh cached service quotas %s', key,
+                exc_info=True
+            )
+
+    def wait_for_refresh(self):
+        """
+        Wait for any background refreshes of the persistent cache started by
+        this instance to finish. Called via
+        :py:meth:`~.AwsLimitChecker.wait_for_cache_refresh`.
+        """
+        while len(self._refresh_threads) > 0:
+            self._refresh_threads.pop(0).join()
+
+    def _find_quota(self, service_code, quota_name, quota_code=None):
+        """
+        Return the quota information for the given quota. If ``quota_code``
+        is given and the quotas for ``service_code`` have not already been
+        listed, retrieve that quota individually with
+        :py:meth:`~.quota_by_code`; otherwise look it up by name in the index
+        of all of the service's quotas, building the index the first time the
+        service is used.
+
+        :param service_code: the service code to get a quota from
+        :type service_code: str
+        :param quota_name: the quota name to get
+        :type quota_name: str
+        :param quota_code: the QuotaCode of the quota, if known
+        :type quota_code: str
+        :return: dictionary of quota information, or None if not found
+        :rtype: dict
+        """
+        if quota_code is not None and service_code not in self._cache:
+            return self.quota_by_code(service_code, quota_code)
+        if service_code not in self._indexed:
+            quotas = self.quotas_for_service(service_code)
+            with self._code_lock(service_code):
+                if service_code not in self._indexed:
+                    for name, item in quotas.items():
+                        self._index[
+                            (service_code, _normalize_quota_name(name))
+                        ] = item
+                    self._indexed.add(service_code)
+        return self._index.get(
+            (service_code, _normalize_quota_name(quota_name)), None
         )
-        return self._cache[service_code]
 
     def get_quota_value(
-        self, service_code, quota_name, units='None', converter=None
+        self, service_code, quota_name, units='None', converter=None,
+        quota_code=None
     ):
         """
         Return a given quota value, or None if it cannot be found. If
@@ -133,22 +566,43 @@ class ServiceQuotasClient(Connectable):
           the quota value from the quota Unit to this class's expected unit.
           If they cannot be converted, it should log an error and return None.
         :type converter: ``callable``
+        :param quota_code: the QuotaCode of the quota, if known; see
+          :py:meth:`~._find_quota`
+        :type quota_code: str
         :return: the quota value
         :rtype: float or None
         """
-        svc = self.quotas_for_service(service_code)
-        if quota_name.lower() not in svc:
+        quota = self._find_quota(service_code, quota_name, quota_code)
+        if quota is None:
             return None
-        val = svc[quota_name.lower()].get('Value', None)
-        if svc[quota_name.lower()]['Unit'] != units:
+        val = quota.get('Value', None)
+        if quota['Unit'] != units:
             if converter is not None:
-                return converter(val, svc[quota_name.lower()]['Unit'], units)
+                return converter(val, quota['Unit'], units)
             logger.error(
                 'ERROR: Service Quota service_code=%s QuotaName="%s" has '
                 'Units set to "%s"; awslimitchecker does not know how to '
                 'handle this. This quota will be ignored. Please open a bug '
-                'report.', service_code, quota_name,
-                svc[quota_name.lower()]['Unit']
+                'report.', service_code, quota_name, quota['Unit']
             )
             return None
         return val
+
+    def update_limits(self, limits):
+        """
+        Resolve the Service Quotas values for all of the given limits at once,
+        and set them via :py:meth:`~.AwsLimit._set_quotas_limit`. Each service
+        code is listed (or each quota retrieved by code) at most once.
+
+        :param limits: dict of limit name to :py:class:`~.AwsLimit`
+        :type limits: dict
+        """
+        for lname in sorted(limits.keys()):
+            lim = limits[lname]
+            val = self.get_quota_value(
+                lim.quotas_service_code, lim.quota_name,
+                units=lim.quotas_unit, converter=lim.quotas_unit_converter,
+                quota_code=lim.quotas_code
+            )
+            if val is not None:
+                lim._set_quotas_limit(val)
@@ -41,14 +41,17 @@ import sys
 import argparse
 import logging
 import json
-import boto3
 import time
 
-from .checker import AwsLimitChecker
+# boto3, the checker, and the alert and metrics providers are imported only
+# where they are needed, so that argument parsing, ``--version`` and
+# ``--list-services`` stay fast.
 from .utils import StoreKeyValuePair, dict2cols, issue_string_tuple
 from .limit import SOURCE_TA, SOURCE_API, SOURCE_QUOTAS
-from .metrics import MetricsProvider
-from .alerts import AlertProvider
+from .cache import CACHE_TYPES
+from .constants import QUOTAS_CACHE_TTL
+from .services import _services
+from .version import _get_version_info, _print_license_notice
 
 try:
     from urllib.parse import urlparse
@@ -200,6 +203,36 @@ class Runner(object):
         p.add_argument('--skip-quotas', action='store_true', default=False,
                        help='Do not attempt to connect to Service Quotas '
                             'service or use its data for current limits')
+        p.add_argument('--parallel', action='store', type=int, default=None,
+                       metavar='N',
+                       help='Check up to N services concurrently, each in its '
+                            'own thread (default: check services serially)')
+        p.add_argument('--asyncio', action='store_true', default=False,
+                       help='Find usage with the asyncio backend, making '
+                            'per-resource API calls concurrently where '
+                            'supported (requires aiobotocore)')
+        p.add_argument('--count-stack-set-instances', action='store_true',
+                       default=False,
+                       help='Also check the CloudFormation "Stack sets" and '
+                            '"Stack instances per stack set" limits; this '
+                            'makes one request per StackSet')
+        p.add_argument('--cache-dir', action='store', type=str, default=None,
+                       metavar='DIR',
+                       help='Keep a persistent cache of rarely-changing API '
+                            'responses (currently Service Quotas) in DIR, '
+                            'to reuse on subsequent runs')
+        p.add_argument('--cache-type', action='store', type=str,
+                       default='json', choices=sorted(CACHE_TYPES.keys()),
+                       help='Type of persistent cache to use with '
+                            '--cache-dir (default: json)')
+        p.add_argument('--quotas-cache-ttl', action='store', type=int,
+                       default=QUOTAS_CACHE_TTL, metavar='SECONDS',
+                       help='Number of seconds that cached Service Quotas '
+                            'responses are fresh for (default: %d)'
+                            '' % QUOTAS_CACHE_TTL)
+        p.add_argument('--refresh-cache', action='store_true', default=False,
+                       help='Ignore any data in the --cache-dir cache; query '
+                            'the APIs and update the cache with the results')
         g = p.add_mutually_exclusive_group()
         g.add_argument('--ta-refresh-wait', dest='ta_refresh_wait',
                        action='store_true', default=False,
@@ -272,14 +305,41 @@ class Runner(object):
             args.ta_refresh_mode = args.ta_refresh_older
         return args
 
-    def list_services(self):
-        for x in sorted(self.checker.get_service_names()):
-            print(x)
+    def list_services(self, skip_services=[]):
+        """
+        Print the names of all known services, without importing them.
+
+        :param skip_services: service names to omit from the list
+        :type skip_services: list
+        """
+        for x in sorted(_services.keys()):
+            if x not in skip_services:
+                print(x)
+
+    def _raise_service_errors(self, errors):
+        """
+        Log each exception in ``errors``, a copy of the checker's
+        ``service_errors`` (the exceptions raised by individual services when
+        they are processed concurrently), then re-raise the first of them by
+        service name. Output for the other services has already been printed;
+        this makes the run exit non-zero, just as when a service raises while
+        services are processed serially.
+
+        :param errors: dict of service name to exception
+        :type errors: dict
+        """
+        if len(errors) < 1:
+            return
+        for sname in sorted(errors.keys()):
+            logger.error('Unable to check service %s: %s', sname,
+                         errors[sname])
+        raise errors[sorted(errors.keys())[0]]
 
     def list_limits(self):
         limits = self.checker.get_limits(
             use_ta=(not self.skip_ta),
             service=self.service_name)
+        errors = dict(self.checker.service_errors)
         data = {}
         for svc in sorted(limits.keys()):
             for lim in sorted(limits[svc].keys()):
@@ -300,15 +360,18 @@ class Runner(object):
                         v=limits[svc][lim].get_limit(),
                         t=src_str)
         print(dict2cols(data))
+        self._raise_service_errors(errors)
 
     def list_defaults(self):
         limits = self.checker.get_limits(service=self.service_name)
+        errors = dict(self.checker.service_errors)
         data = {}
         for svc in sorted(limits.keys()):
             for lim in sorted(limits[svc].keys()):
                 data["{s}/{l}".format(s=svc, l=lim)] = '{v}'.format(
                     v=limits[svc][lim].default_limit)
         print(dict2cols(data))
+        self._raise_service_errors(errors)
 
     def iam_policy(self):
         policy = self.checker.get_required_iam_policy()
@@ -317,14 +380,17 @@ class Runner(object):
     def show_usage(self):
         self.checker.find_usage(
             service=self.service_name, use_ta=(not self.skip_ta))
+        errors = dict(self.checker.service_errors)
         limits = self.checker.get_limits(
             service=self.service_name, use_ta=(not self.skip_ta))
+        errors.update(self.checker.service_errors)
         data = {}
         for svc in sorted(limits.keys()):
             for lim in sorted(limits[svc].keys()):
                 data["{s}/{l}".format(s=svc, l=lim)] = '{v}'.format(
                     v=limits[svc][lim].get_current_usage_str())
         print(dict2cols(data))
+        self._raise_service_errors(errors)
 
     def check_thresholds(self, metrics=None):
         have_warn = False
@@ -333,6 +399,7 @@ class Runner(object):
             use_ta=(not self.skip_ta),
             service=self.service_name
         )
+        errors = dict(self.checker.service_errors)
         if metrics:
             for svc, svc_limits in sorted(self.checker.get_limits().items()):
                 if self.service_name and svc not in self.service_name:
@@ -361,6 +428,7 @@ class Runner(object):
                 columns[k] = v
         d2c = dict2cols(columns)
         print(d2c)
+        self._raise_service_errors(errors)
         # might as well use the Nagios exit codes,
         # even though our output doesn't work for that
         if have_crit:
@@ -369,12 +437,28 @@ class Runner(object):
             return 1, problems, d2c
         return 0, problems, d2c
 
+    def _is_unloaded_service(self, svc):
+        """
+        Return whether ``svc`` is a known service that the checker did not
+        load, because of the ``-S``/``--service`` or ``--skip-service``
+        options; overrides for such services are ignored.
+
+        :param svc: service name
+        :type svc: str
+        :rtype: bool
+        """
+        if svc not in _services:
+            return False
+        return svc not in self.checker.get_service_names()
+
     def set_limit_overrides(self, overrides):
         for key in sorted(overrides.keys()):
             if key.count('/') != 1:
                 raise ValueError("Limit names must be in 'service/limit' "
                                  "format; {k} is invalid.".format(k=key))
             svc, limit = key.split('/')
+            if self._is_unloaded_service(svc):
+                continue
             self.checker.set_limit_override(svc, limit, int(overrides[key]))
 
     def load_json(self, path):
@@ -386,6 +470,7 @@ class Runner(object):
                 'Reading JSON from S3 bucket "%s" key "%s"',
                 parsed.netloc, s3key
             )
+            import boto3
             client = boto3.client('s3')
             resp = client.get_object(Bucket=parsed.netloc, Key=s3key)
             data = resp['Body'].read()
@@ -400,12 +485,18 @@ class Runner(object):
     def set_limit_overrides_from_json(self, path):
         j = self.load_json(path)
         logger.debug('Limit overrides: %s', j)
+        j = dict(
+            (k, v) for k, v in j.items() if not self._is_unloaded_service(k)
+        )
         self.checker.set_limit_overrides(j)
         logger.debug('Done setting limit overrides from JSON.')
 
     def set_threshold_overrides_from_json(self, path):
         j = self.load_json(path)
         logger.debug('Threshold overrides: %s', j)
+        j = dict(
+            (k, v) for k, v in j.items() if not self._is_unloaded_service(k)
+        )
         self.checker.set_threshold_overrides(j)
         logger.debug('Done setting threshold overrides from JSON.')
 
@@ -428,7 +519,26 @@ class Runner(object):
         if args.skip_ta:
             self.skip_ta = True
 
+        cache = None
+        if args.cache_dir is not None:
+            cache = CACHE_TYPES[args.cache_type](args.cache_dir)
+
+        if args.version or args.list_services:
+            # these do not need a checker, but must still show the license
+            # notice that constructing one would print
+            vinfo = _get_version_info()
+            _print_license_notice(vinfo)
+            if args.version:
+                print('awslimitchecker {v} (see <{s}> for source code)'.format(
+                    s=vinfo.url,
+                    v=vinfo.version_str
+                ))
+            else:
+                self.list_services(args.skip_service)
+            raise SystemExit(0)
+
         # the rest of these actually use the checker
+        from .checker import AwsLimitChecker
         self.checker = AwsLimitChecker(
             warning_threshold=args.warning_threshold,
             critical_threshold=args.critical_threshold,
@@ -444,19 +554,17 @@ class Runner(object):
             check_version=args.check_version,
             role_partition=args.role_partition,
             ta_api_region=args.ta_api_region,
-            skip_quotas=args.skip_quotas
+            skip_quotas=args.skip_quotas,
+            parallel=args.parallel,
+            cache=cache,
+            quotas_cache_ttl=args.quotas_cache_ttl,
+            refresh_cache=args.refresh_cache,
+            use_asyncio=args.asyncio,
+            service_names=args.service,
+            skip_services=args.skip_service,
+            count_stack_set_instances=args.count_stack_set_instances
         )
 
-        if args.version:
-            print('awslimitchecker {v} (see <{s}> for source code)'.format(
-                s=self.checker.get_project_url(),
-                v=self.checker.get_version()
-            ))
-            raise SystemExit(0)
-
-        if len(args.skip_service) > 0:
-            self.checker.remove_services(args.skip_service)
-
         if len(args.skip_check) > 0:
             for check in args.skip_check:
                 self.skip_check.append(check)
@@ -472,10 +580,6 @@ class Runner(object):
         if len(args.limit) > 0:
             self.set_limit_overrides(args.limit)
 
-        if args.list_services:
-            self.list_services()
-            raise SystemExit(0)
-
         if args.list_defaults:
             self.list_defaults()
             raise SystemExit(0)
@@ -493,12 +597,14 @@ class Runner(object):
             raise SystemExit(0)
 
         if args.list_metrics_providers:
+            from .metrics import MetricsProvider
             print('Available metrics providers:')
             for p in sorted(MetricsProvider.providers_by_name().keys()):
                 print(p)
             raise SystemExit(0)
 
         if args.list_alert_providers:
+            from .alerts import AlertProvider
             print('Available alert providers:')
             for p in sorted(AlertProvider.providers_by_name().keys()):
                 print(p)
@@ -507,6 +613,7 @@ class Runner(object):
         # else check
         alerter = None
         if args.alert_provider:
+            from .alerts import AlertProvider
             alerter = AlertProvider.get_provider_by_name(
                 args.alert_provider
             )(self.checker.region_name, **args.alert_config)
@@ -514,6 +621,7 @@ class Runner(object):
         try:
             metrics = None
             if args.metrics_provider:
+                from .metrics import MetricsProvider
                 metrics = MetricsProvider.get_provider_by_name(
                     args.metrics_provider
                 )(self.checker.region_name, **args.metrics_config)
@@ -545,7 +653,12 @@ class Runner(object):
 
 def console_entry_point():
     r = Runner()
-    r.console_entry_point()
+    try:
+        r.console_entry_point()
+    finally:
+        # let background refreshes of the persistent cache finish writing
+        if r.checker is not None:
+            r.checker.wait_for_cache_refresh()
 
 
 if __name__ == "__main__":
@@ -37,31 +37,202 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 ################################################################################
 """
 
-from awslimitchecker.services.base import _AwsService
-from awslimitchecker.services.apigateway import _ApigatewayService
-from awslimitchecker.services.autoscaling import _AutoscalingService
-from awslimitchecker.services.cloudformation import _CloudformationService
-from awslimitchecker.services.cloudtrail import _CloudTrailService
-from awslimitchecker.services.directoryservice import _DirectoryserviceService
-from awslimitchecker.services.dynamodb import _DynamodbService
-from awslimitchecker.services.ebs import _EbsService
-from awslimitchecker.services.ec2 import _Ec2Service
-from awslimitchecker.services.ecs import _EcsService
-from awslimitchecker.services.efs import _EfsService
-from awslimitchecker.services.elasticache import _ElastiCacheService
-from awslimitchecker.services.elasticbeanstalk import _ElasticBeanstalkService
-from awslimitchecker.services.elb import _ElbService
-from awslimitchecker.services.firehose import _FirehoseService
-from awslimitchecker.services.iam import _IamService
-from awslimitchecker.services.lambdafunc import _LambdaService
-from awslimitchecker.services.rds import _RDSService
-from awslimitchecker.services.redshift import _RedshiftService
-from awslimitchecker.services.route53 import _Route53Service
-from awslimitchecker.services.s3 import _S3Service
-from awslimitchecker.services.ses import _SesService
-from awslimitchecker.services.vpc import _VpcService
-
-# dynamically generate the service name to class dict
-_services = {}
-for cls in _AwsService.__subclasses__():
-    _services[cls.service_name] = cls
+import importlib
+import logging
+import threading
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # Python 2
+    from collections import MutableMapping
+
+logger = logging.getLogger(__name__)
+
+#: Entry point group that other packages can use to register additional
+#: services. Each entry point's name is the service name, and its value the
+#: :py:class:`~._AwsService` subclass implementing it, i.e.
+#: ``MyService = mypackage.myservice:MyService``.
+SERVICES_ENTRY_POINT_GROUP = 'awslimitchecker.services'
+
+#: Service name to ``module:ClassName`` path, relative to this package, of
+#: every built-in service.
+_SERVICE_PATHS = {
+    'ApiGateway': '.apigateway:_ApigatewayService',
+    'AutoScaling': '.autoscaling:_AutoscalingService',
+    'CloudFormation': '.cloudformation:_CloudformationService',
+    'CloudTrail': '.cloudtrail:_CloudTrailService',
+    'Directory Service': '.directoryservice:_DirectoryserviceService',
+    'DynamoDB': '.dynamodb:_DynamodbService',
+    'EBS': '.ebs:_EbsService',
+    'EC2': '.ec2:_Ec2Service',
+    'ECS': '.ecs:_EcsService',
+    'EFS': '.efs:_EfsService',
+    'ELB': '.elb:_ElbService',
+    'ElastiCache': '.elasticache:_ElastiCacheService',
+    'ElasticBeanstalk': '.elasticbeanstalk:_ElasticBeanstalkService',
+    'Firehose': '.firehose:_FirehoseService',
+    'IAM': '.iam:_IamService',
+    'Lambda': '.lambdafunc:_LambdaService',
+    'RDS': '.rds:_RDSService',
+    'Redshift': '.redshift:_RedshiftService',
+    'Route53': '.route53:_Route53Service',
+    'S3': '.s3:_S3Service',
+    'SES': '.ses:_SesService',
+    'VPC': '.vpc:_VpcService',
+}
+
+
+def _load_class(path):
+    """
+    Import and return the class at ``path``.
+
+    :param path: ``module:ClassName`` path to the class; relative module
+      names are resolved against this package
+    :type path: str
+    :rtype: type
+    """
+    module_name, cls_name = path.split(':', 1)
+    obj = importlib.import_module(module_name, __name__)
+    for attr in cls_name.split('.'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _entry_point_paths(group):
+    """
+    Return a dict of entry point name to ``module:ClassName`` path for all
+    installed entry points in ``group``.
+
+    :param group: entry point group name
+    :type group: str
+    :rtype: dict
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python < 3.8
+        try:
+            import pkg_resources
+        except ImportError:
+            return {}
+        return dict(
+            (ep.name, '%s:%s' % (ep.module_name, '.'.join(ep.attrs)))
+            for ep in pkg_resources.iter_entry_points(group)
+        )
+    eps = entry_points()
+    if hasattr(eps, 'select'):
+        eps = eps.select(group=group)
+    else:
+        eps = eps.get(group, [])
+    return dict((ep.name, ep.value) for ep in eps)
+
+
+class _ServiceRegistry(MutableMapping):
+    """
+    Dict-like mapping of service name to :py:class:`~._AwsService` subclass.
+    Each value may be given as the class itself or as a ``module:ClassName``
+    path; paths are only imported when the service's class is first looked
+    up, so listing service names or using a few services does not pay the
+    import cost of every service module.
+
+    Services registered through the :py:const:`~.SERVICES_ENTRY_POINT_GROUP`
+    entry point group are added the first time the registry is iterated, or
+    a name not already in it is looked up. They cannot replace services that
+    are already registered.
+    """
+
+    def __init__(self, paths, entry_point_group=None):
+        """
+        :param paths: dict of service name to class or ``module:ClassName``
+          path
+        :type paths: dict
+        :param entry_point_group: entry point group to load additional
+          services from, or None
+        :type entry_point_group: str
+        """
+        self._entries = dict(paths)
+        self._entry_point_group = entry_point_group
+        self._entry_points_loaded = entry_point_group is None
+        self._lock = threading.RLock()
+
+    def _load_entry_points(self):
+        """
+        Add the services registered through entry points, if that has not
+        already been done.
+        """
+        with self._lock:
+            if self._entry_points_loaded:
+                return
+            self._entry_points_loaded = True
+            eps = _entry_point_paths(self._entry_point_group)
+            for name in sorted(eps.keys()):
+                if name in self._entries:
+                    logger.warning(
+                        'Ignoring service "%s" from entry point %s; a '
+                        'service with that name is already registered',
+                        name, eps[name]
+                    )
+                    continue
+                logger.debug('Registering service "%s" from entry point %s',
+                             name, eps[name])
+                self._entries[name] = eps[name]
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._entries:
+                self._load_entry_points()
+            target = self._entries[name]
+            if isinstance(target, str):
+                logger.debug('Loading service "%s" from %s', name, target)
+                target = _load_class(target)
+                self._entries[name] = target
+            return target
+
+    def __setitem__(self, name, target):
+        with self._lock:
+            self._entries[name] = target
+
+    def __delitem__(self, name):
+        with self._lock:
+            self._load_entry_points()
+            del self._entries[name]
+
+    def __contains__(self, name):
+        with self._lock:
+            if name not in self._entries:
+                self._load_entry_points()
+            return name in self._entries
+
+    def __iter__(self):
+        with self._lock:
+            self._load_entry_points()
+            return iter(list(self._entries.keys()))
+
+    def __len__(self):
+        with self._lock:
+            self._load_entry_points()
+            return len(self._entries)
+
+    def clear(self):
+        """Remove all services, without importing any of them."""
+        with self._lock:
+            self._entry_points_loaded = True
+            self._entries.clear()
+
+    def copy(self):
+        """
+        Return a plain dict of service name to class or ``module:ClassName``
+        path, without importing any services that are not yet loaded.
+
+        :rtype: dict
+        """
+        with self._lock:
+            self._load_entry_points()
+            return dict(self._entries)
+
+
+#: service name to :py:class:`~._AwsService` subclass, for all built-in
+#: services and those registered through entry points; classes are imported
+#: when first looked up
+_services = _ServiceRegistry(
+    _SERVICE_PATHS, entry_point_group=SERVICES_ENTRY_POINT_GROUP
+)
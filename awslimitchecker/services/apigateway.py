@@ -40,12 +40,26 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 import abc  # noqa
 import logging
 
+from concurrent.futures import ThreadPoolExecutor
+
 from .base import _AwsService
 from ..limit import AwsLimit
-from awslimitchecker.utils import paginate_dict
+from awslimitchecker.utils import paginate_dict_count, TokenBucket
 
 logger = logging.getLogger(__name__)
 
+#: Default number of REST APIs to find per-API usage for concurrently; see
+#: :py:attr:`~._ApigatewayService.rest_api_workers`.
+REST_API_WORKERS = 4
+
+#: Default sustained rate, in requests per second, of per-API requests; see
+#: :py:attr:`~._ApigatewayService.request_rate`.
+REQUEST_RATE = 10
+
+#: Default number of per-API requests that may be made in a burst; see
+#: :py:attr:`~._ApigatewayService.request_burst`.
+REQUEST_BURST = 10
+
 
 class _ApigatewayService(_AwsService):
 
@@ -53,6 +67,17 @@ class _ApigatewayService(_AwsService):
     api_name = 'apigateway'  # AWS API name to connect to (boto3.client)
     quotas_service_code = 'apigateway'
 
+    #: maximum number of REST APIs to find per-API usage for concurrently
+    rest_api_workers = REST_API_WORKERS
+
+    #: sustained rate, in requests per second, of the per-API requests; these
+    #: share one :py:class:`~awslimitchecker.utils.TokenBucket` since API
+    #: Gateway limits the request rate per account and region
+    request_rate = REQUEST_RATE
+
+    #: number of per-API requests that may be made in a burst
+    request_burst = REQUEST_BURST
+
     def find_usage(self):
         """
         Determine the current usage for each limit of this service,
@@ -104,44 +129,34 @@ class _ApigatewayService(_AwsService):
         logger.debug('Found %d APIs', len(api_ids))
         # now the per-API limits...
         warn_stages_paginated = None
-        logger.debug('Finding usage for per-API limits')
-        for api_id in api_ids:
-            res_count = 0
-            paginator = self.conn.get_paginator('get_resources')
-            for resp in paginator.paginate(restApiId=api_id):
-                res_count += len(resp['items'])
+        logger.debug(
+            'Finding usage for per-API limits with %d workers',
+            self.rest_api_workers
+        )
+        bucket = TokenBucket(self.request_rate, capacity=self.request_burst)
+        with ThreadPoolExecutor(
+            max_workers=self.rest_api_workers
+        ) as executor:
+            summaries = list(executor.map(
+                lambda x: self._per_api_usage(x, bucket), api_ids
+            ))
+        for api_id, summary in zip(api_ids, summaries):
+            if summary['extra_stages_keys'] is not None:
+                warn_stages_paginated = summary['extra_stages_keys']
             self.limits['Resources per API']._add_current_usage(
-                res_count, resource_id=api_id,
+                summary['resources'], resource_id=api_id,
                 aws_type='AWS::ApiGateway::Resource'
             )
-            doc_parts = paginate_dict(
-                self.conn.get_documentation_parts,
-                restApiId=api_id,
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            )
             self.limits['Documentation parts per API']._add_current_usage(
-                len(doc_parts), resource_id=api_id,
+                summary['documentation_parts'], resource_id=api_id,
                 aws_type='AWS::ApiGateway::DocumentationPart'
             )
-            # note that per the boto3 docs, there's no pagination of this...
-            stages = self.conn.get_stages(restApiId=api_id)
-            if len(set(stages.keys()) - set(['item', 'ResponseMetadata'])) > 0:
-                warn_stages_paginated = stages.keys()
             self.limits['Stages per API']._add_current_usage(
-                len(stages['item']), resource_id=api_id,
+                summary['stages'], resource_id=api_id,
                 aws_type='AWS::ApiGateway::Stage'
             )
-            authorizers = paginate_dict(
-                self.conn.get_authorizers,
-                restApiId=api_id,
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            )
             self.limits['Custom authorizers per API']._add_current_usage(
-                len(authorizers), resource_id=api_id,
+                summary['authorizers'], resource_id=api_id,
                 aws_type='AWS::ApiGateway::Authorizer'
             )
         if warn_stages_paginated is not None:
@@ -150,6 +165,53 @@ class _ApigatewayService(_AwsService):
                 'boto3 docs: %s', sorted(warn_stages_paginated)
             )
 
+    def _per_api_usage(self, api_id, bucket):
+        """
+        Count the resources, documentation parts, stages and authorizers of
+        one REST API. Every request (including each page of paginated
+        responses) first takes a token from ``bucket``, and throttled requests
+        are retried with backoff.
+
+        :param api_id: REST API ID
+        :type api_id: str
+        :param bucket: rate limiter shared by all per-API requests
+        :type bucket: :py:class:`~awslimitchecker.utils.TokenBucket`
+        :returns: dict with ``resources``, ``documentation_parts``,
+          ``stages`` and ``authorizers`` counts, and ``extra_stages_keys``,
+          the keys of the GetStages response if it has any beyond those
+          documented, otherwise None
+        :rtype: dict
+        """
+        logger.debug('Finding per-API usage for %s', api_id)
+        summary = {'extra_stages_keys': None}
+        summary['resources'] = paginate_dict_count(
+            bucket.wrap(self.conn.get_resources),
+            restApiId=api_id,
+            alc_marker_path=['position'],
+            alc_data_path=['items'],
+            alc_marker_param='position'
+        )
+        summary['documentation_parts'] = paginate_dict_count(
+            bucket.wrap(self.conn.get_documentation_parts),
+            restApiId=api_id,
+            alc_marker_path=['position'],
+            alc_data_path=['items'],
+            alc_marker_param='position'
+        )
+        # note that per the boto3 docs, there's no pagination of this...
+        stages = bucket.wrap(self.conn.get_stages)(restApiId=api_id)
+        if len(set(stages.keys()) - set(['item', 'ResponseMetadata'])) > 0:
+            summary['extra_stages_keys'] = stages.keys()
+        summary['stages'] = len(stages['item'])
+        summary['authorizers'] = paginate_dict_count(
+            bucket.wrap(self.conn.get_authorizers),
+            restApiId=api_id,
+            alc_marker_path=['position'],
+            alc_data_path=['items'],
+            alc_marker_param='position'
+        )
+        return summary
+
     def _find_usage_api_keys(self):
         """
         Find usage on API Keys.
@@ -42,51 +42,72 @@ import logging
 
 from .base import _AwsService
 from ..limit import AwsLimit
-from ..utils import paginate_dict
+from ..utils import paginate_dict_count
 
 logger = logging.getLogger(__name__)
 
 
+#: For each limit, a tuple of the DescribeAccountLimits response key holding
+#: its current usage, and the client method, result key and CloudFormation
+#: type used to count resources by enumeration when that key is absent.
+USAGE_SOURCES = {
+    'Auto Scaling groups': (
+        'NumberOfAutoScalingGroups', 'describe_auto_scaling_groups',
+        'AutoScalingGroups', 'AWS::AutoScaling::AutoScalingGroup'
+    ),
+    'Launch configurations': (
+        'NumberOfLaunchConfigurations', 'describe_launch_configurations',
+        'LaunchConfigurations', 'AWS::AutoScaling::LaunchConfiguration'
+    ),
+}
+
+
 class _AutoscalingService(_AwsService):
 
     service_name = 'AutoScaling'
     api_name = 'autoscaling'
     quotas_service_code = 'autoscaling'
 
+    #: After :py:meth:`~.find_usage`, a dict of limit name to the name of the
+    #: API action its usage was determined from.
+    usage_sources = None
+
     def find_usage(self):
         """
         Determine the current usage for each limit of this service,
         and update corresponding Limit via
         :py:meth:`~.AwsLimit._add_current_usage`.
+
+        Usage is taken from the counts in the DescribeAccountLimits response
+        (which is also used for limits) where present; resources are only
+        enumerated if a count is missing. The source used for each limit is
+        recorded in :py:attr:`~.usage_sources`.
         """
         logger.debug("Checking usage for service %s", self.service_name)
         self.connect()
         for lim in self.limits.values():
             lim._reset_usage()
-
-        self.limits['Auto Scaling groups']._add_current_usage(
-            len(
-                paginate_dict(
-                    self.conn.describe_auto_scaling_groups,
-                    alc_marker_path=['NextToken'],
-                    alc_data_path=['AutoScalingGroups'],
-                    alc_marker_param='NextToken'
-                )['AutoScalingGroups']
-            ),
-            aws_type='AWS::AutoScaling::AutoScalingGroup',
+        lims = self._cached_api_call(
+            'DescribeAccountLimits', self.conn.describe_account_limits
         )
-
-        self.limits['Launch configurations']._add_current_usage(
-            len(
-                paginate_dict(
-                    self.conn.describe_launch_configurations,
+        self.usage_sources = {}
+        for lname, (count_key, method, data_key, aws_type) in sorted(
+            USAGE_SOURCES.items()
+        ):
+            if count_key in lims:
+                count = lims[count_key]
+                source = 'DescribeAccountLimits'
+            else:
+                count = paginate_dict_count(
+                    getattr(self.conn, method),
                     alc_marker_path=['NextToken'],
-                    alc_data_path=['LaunchConfigurations'],
+                    alc_data_path=[data_key],
                     alc_marker_param='NextToken'
-                )['LaunchConfigurations']
-            ),
-            aws_type='AWS::AutoScaling::LaunchConfiguration',
-        )
+                )
+                source = 'Describe%s' % data_key
+            logger.debug('Found usage for %s from %s', lname, source)
+            self.usage_sources[lname] = source
+            self.limits[lname]._add_current_usage(count, aws_type=aws_type)
         self._have_usage = True
         logger.debug("Done checking usage.")
 
@@ -146,7 +167,9 @@ class _AutoscalingService(_AwsService):
         """
         self.connect()
         logger.info("Querying EC2 DescribeAccountAttributes for limits")
-        lims = self.conn.describe_account_limits()
+        lims = self._cached_api_call(
+            'DescribeAccountLimits', self.conn.describe_account_limits
+        )
         self.limits['Auto Scaling groups']._set_api_limit(
             lims['MaxNumberOfAutoScalingGroups'])
         self.limits['Launch configurations']._set_api_limit(
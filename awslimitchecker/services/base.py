@@ -39,10 +39,43 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 
 import abc
 import logging
+import time
+from awslimitchecker.aio import AIO_CONCURRENCY, run_in_executor
 from awslimitchecker.connectable import Connectable
 
 logger = logging.getLogger(__name__)
 
+#: Default number of seconds for which limit information retrieved from a
+#: service's own API, or from Service Quotas, is reused before being
+#: retrieved again; see :py:attr:`~._AwsService.api_cache_ttl`. API responses
+#: are also discarded at the start of every usage collection run (see
+#: :py:meth:`~._AwsService._reset_api_cache`), as some of them carry usage.
+API_CACHE_TTL = 300
+
+
+def _summarize_network_interfaces(ifaces):
+    """
+    Summarize the network interfaces returned by EC2
+    DescribeNetworkInterfaces for the EC2 and VPC services, which share the
+    summary via :py:meth:`~._AwsService._shared_paginated_summary`.
+
+    :param ifaces: iterable of network interface dicts
+    :type ifaces: ``iterable``
+    :returns: dict with ``count``, the total number of interfaces, and
+      ``vpc_security_groups``, a list of (interface ID, number of security
+      groups) tuples for each interface in a VPC
+    :rtype: dict
+    """
+    res = {'count': 0, 'vpc_security_groups': []}
+    for iface in ifaces:
+        res['count'] += 1
+        if iface.get('VpcId') is None:
+            continue
+        res['vpc_security_groups'].append(
+            (iface['NetworkInterfaceId'], len(iface['Groups']))
+        )
+    return res
+
 
 class _AwsService(Connectable):
     __metaclass__ = abc.ABCMeta
@@ -56,6 +89,36 @@ class _AwsService(Connectable):
     #: the service code for Service Quotas, or None
     quotas_service_code = None
 
+    #: whether this service's limits and usage are account-wide (global)
+    #: rather than per-region
+    is_global = False
+
+    #: maximum number of concurrent API requests when fanning out
+    #: per-resource requests in :py:meth:`~.find_usage_async`
+    aio_concurrency = AIO_CONCURRENCY
+
+    #: number of seconds for which responses cached by
+    #: :py:meth:`~._cached_api_call`, and limits set by
+    #: :py:meth:`~._update_service_quotas`, are considered fresh. None
+    #: disables caching.
+    api_cache_ttl = API_CACHE_TTL
+
+    #: optional :py:class:`~.PersistentCache` that services may use (via
+    #: :py:meth:`~._persistent_cache_get` and
+    #: :py:meth:`~._persistent_cache_set`) to keep rarely-changing API
+    #: responses between runs; set by :py:class:`~.AwsLimitChecker` from its
+    #: ``cache`` argument
+    persistent_cache = None
+
+    #: optional :py:class:`~.ResponseCache` shared by the services of one
+    #: :py:class:`~.AwsLimitChecker`, used by :py:meth:`~._cached_api_call`
+    #: and :py:meth:`~._shared_paginated_summary` so that services calling the
+    #: same API operation only make the requests once per run
+    shared_cache = None
+
+    #: whether :py:meth:`~.find_usage` has run; set per-instance
+    _have_usage = False
+
     def __init__(self, warning_threshold, critical_threshold,
                  boto_connection_kwargs, quotas_client):
         """
@@ -90,6 +153,13 @@ class _AwsService(Connectable):
         self.limits = {}
         self.limits = self.get_limits()
         self._have_usage = False
+        #: cache key to (time.time() retrieved, response); see
+        #: :py:meth:`~._cached_api_call`
+        self._api_cache = {}
+        #: time.time() that :py:meth:`~._update_service_quotas` last ran
+        self._quotas_updated_at = None
+        #: account ID, looked up by :py:meth:`~._persistent_cache_key`
+        self._account_id = None
 
     @abc.abstractmethod
     def find_usage(self):
@@ -123,6 +193,30 @@ class _AwsService(Connectable):
         """
         raise NotImplementedError('abstract base class')
 
+    async def find_usage_async(self):
+        """
+        Asynchronous version of :py:meth:`~.find_usage`, used by the asyncio
+        backend (see :py:meth:`~.AwsLimitChecker.find_usage_async`).
+
+        This default implementation runs the synchronous
+        :py:meth:`~.find_usage` in the event loop's default executor. Services
+        that make many per-resource requests override it to make those
+        requests concurrently using an ``aiobotocore`` client from
+        :py:meth:`~.Connectable.connect_async` and
+        :py:func:`~awslimitchecker.aio.gather_bounded`, with at most
+        :py:attr:`~.aio_concurrency` requests in flight.
+        """
+        await run_in_executor(self.find_usage)
+
+    async def _update_limits_from_api_async(self):
+        """
+        Asynchronous version of ``_update_limits_from_api``, for services that
+        implement it. This default implementation runs the synchronous method
+        (if any) in the event loop's default executor.
+        """
+        if hasattr(self, '_update_limits_from_api'):
+            await run_in_executor(self._update_limits_from_api)
+
     @abc.abstractmethod
     def get_limits(self):
         """
@@ -264,17 +358,152 @@ class _AwsService(Connectable):
     def _update_service_quotas(self):
         """
         Update all limits for this service via the Service Quotas service.
+        This is skipped if it was already done within the last
+        :py:attr:`~.api_cache_ttl` seconds.
         """
         if self.quotas_service_code is None:
             return
         if self._quotas_client is None:
             return
+        if self._is_fresh(self._quotas_updated_at):
+            logger.debug(
+                'Service quotas for %s are still fresh; not updating',
+                self.service_name
+            )
+            return
         logger.debug('Updating service quotas for %s', self.service_name)
-        for lname in sorted(self.limits.keys()):
-            lim = self.limits[lname]
-            val = self._quotas_client.get_quota_value(
-                lim.quotas_service_code, lim.quota_name,
-                units=lim.quotas_unit, converter=lim.quotas_unit_converter
+        self._quotas_client.update_limits(self.limits)
+        self._quotas_updated_at = time.time()
+
+    def _is_fresh(self, retrieved_at):
+        """
+        Return whether something retrieved at ``retrieved_at`` is still
+        within :py:attr:`~.api_cache_ttl`.
+
+        :param retrieved_at: ``time.time()`` value, or None if never
+          retrieved
+        :type retrieved_at: float
+        :rtype: bool
+        """
+        if retrieved_at is None or self.api_cache_ttl is None:
+            return False
+        return time.time() - retrieved_at < self.api_cache_ttl
+
+    def _cached_api_call(self, key, function_ref, *argv, **kwargs):
+        """
+        Call ``function_ref`` with the given arguments and return its result,
+        reusing the result of a previous call with the same ``key`` if it was
+        made within the last :py:attr:`~.api_cache_ttl` seconds. This is
+        used for limit information that is retrieved from the service's own
+        API, so that repeated calls to :py:meth:`~._update_limits_from_api`
+        (e.g. from ``find_usage``, ``get_limits`` and ``check_thresholds`` in
+        the same run) only make the underlying API requests once. If
+        :py:attr:`~.shared_cache` is set, results are cached there (keyed by
+        :py:attr:`~.api_name`, ``key`` and ``kwargs``) instead, so they are
+        also shared with other services using the same API.
+
+        :param key: hashable identifier for the request
+        :param function_ref: the function to call
+        :type function_ref: ``function``
+        :param argv: the parameters to pass to the function
+        :type argv: tuple
+        :param kwargs: keyword arguments to pass to the function
+        :type kwargs: dict
+        """
+        if self.shared_cache is not None:
+            return self.shared_cache.call(
+                self.api_name, key, kwargs,
+                lambda: function_ref(*argv, **kwargs)
+            )
+        if key in self._api_cache:
+            retrieved_at, result = self._api_cache[key]
+            if self._is_fresh(retrieved_at):
+                logger.debug('Using cached %s response for %s', key,
+                             self.service_name)
+                return result
+        result = function_ref(*argv, **kwargs)
+        self._api_cache[key] = (time.time(), result)
+        return result
+
+    def _paginated_items(self, operation, result_key, **kwargs):
+        """
+        Generator over the items in the ``result_key`` list of each page of a
+        paginated client operation, yielding each page's items as it is
+        received rather than building the full result in memory.
+
+        :param operation: name of the paginated client operation
+        :type operation: str
+        :param result_key: key of the list of items in each page
+        :type result_key: str
+        :param kwargs: parameters for the operation
+        :type kwargs: dict
+        :returns: generator of item dicts
+        """
+        paginator = self.conn.get_paginator(operation)
+        for page in paginator.paginate(**kwargs):
+            for item in page[result_key]:
+                yield item
+
+    def _shared_paginated_summary(self, operation, result_key, summarize,
+                                  **kwargs):
+        """
+        Return ``summarize(items)``, where ``items`` is the generator of
+        :py:meth:`~._paginated_items` for a paginated client operation, so
+        the items are consumed page by page and never all held in memory. If
+        :py:attr:`~.shared_cache` is set, the summary is computed only once
+        per usage collection pass for all services passing the same
+        ``operation``, parameters and ``summarize`` function. It is stored as
+        a transient entry and discarded at the end of the pass (see
+        :py:meth:`~.ResponseCache.discard_transient`), and must not be
+        modified.
+
+        :param operation: name of the paginated client operation
+        :type operation: str
+        :param result_key: key of the list of items in each page
+        :type result_key: str
+        :param summarize: function taking an iterable of items and returning
+          their summary
+        :type summarize: ``function``
+        :param kwargs: parameters for the operation
+        :type kwargs: dict
+        :returns: return value of ``summarize``
+        """
+        def get_summary():
+            return summarize(
+                self._paginated_items(operation, result_key, **kwargs)
             )
-            if val is not None:
-                lim._set_quotas_limit(val)
+
+        if self.shared_cache is None:
+            return get_summary()
+        return self.shared_cache.call(
+            self.api_name, '%s/%s' % (operation, summarize.__name__), kwargs,
+            get_summary, transient=True
+        )
+
+    def _reset_api_cache(self):
+        """
+        Discard all responses cached by :py:meth:`~._cached_api_call` in this
+        instance, but not limits set from Service Quotas. Some of the cached
+        responses (e.g. IAM ``GetAccountSummary``) include usage as well as
+        limits, so :py:class:`~.AwsLimitChecker` calls this at the start of
+        every usage collection run to make sure usage is read again.
+        """
+        self._api_cache = {}
+
+    def invalidate_api_cache(self):
+        """
+        Discard all responses cached by :py:meth:`~._cached_api_call`, and
+        force the next :py:meth:`~._update_service_quotas` to update limits
+        from Service Quotas.
+        """
+        self._api_cache = {}
+        self._quotas_updated_at = None
+        if self.shared_cache is not None:
+            self.shared_cache.invalidate(self.api_name)
+        if self._quotas_client is None:
+            return
+        for code in set(
+            lim.quotas_service_code for lim in self.limits.values()
+        ):
+            if code is not None:
+                self._quotas_client.invalidate(code)
@@ -42,9 +42,37 @@ import logging
 
 from .base import _AwsService
 from ..limit import AwsLimit
+from ..utils import paginate_dict_items, paginate_dict_count
 
 logger = logging.getLogger(__name__)
 
+#: Stack statuses that count towards the Stacks limit (i.e. every status
+#: except DELETE_COMPLETE), passed as ListStacks' ``StackStatusFilter``.
+COUNTED_STACK_STATUSES = [
+    'CREATE_IN_PROGRESS',
+    'CREATE_FAILED',
+    'CREATE_COMPLETE',
+    'ROLLBACK_IN_PROGRESS',
+    'ROLLBACK_FAILED',
+    'ROLLBACK_COMPLETE',
+    'DELETE_IN_PROGRESS',
+    'DELETE_FAILED',
+    'UPDATE_IN_PROGRESS',
+    'UPDATE_COMPLETE_CLEANUP_IN_PROGRESS',
+    'UPDATE_COMPLETE',
+    'UPDATE_FAILED',
+    'UPDATE_ROLLBACK_IN_PROGRESS',
+    'UPDATE_ROLLBACK_FAILED',
+    'UPDATE_ROLLBACK_COMPLETE_CLEANUP_IN_PROGRESS',
+    'UPDATE_ROLLBACK_COMPLETE',
+    'REVIEW_IN_PROGRESS',
+    'IMPORT_IN_PROGRESS',
+    'IMPORT_COMPLETE',
+    'IMPORT_ROLLBACK_IN_PROGRESS',
+    'IMPORT_ROLLBACK_FAILED',
+    'IMPORT_ROLLBACK_COMPLETE',
+]
+
 
 class _CloudformationService(_AwsService):
 
@@ -52,36 +80,101 @@ class _CloudformationService(_AwsService):
     api_name = 'cloudformation'  # AWS API name to connect to (boto3.client)
     quotas_service_code = 'cloudformation'
 
+    def __init__(self, warning_threshold, critical_threshold,
+                 boto_connection_kwargs, quotas_client,
+                 count_stack_set_instances=False):
+        """
+        :param warning_threshold: the default warning threshold, as an
+          integer percentage, for any limits without a specifically-set
+          threshold.
+        :type warning_threshold: int
+        :param critical_threshold: the default critical threshold, as an
+          integer percentage, for any limits without a specifically-set
+          threshold.
+        :type critical_threshold: int
+        :param boto_connection_kwargs: Dictionary of keyword arguments to
+          pass to boto connection methods.
+        :type boto_connection_kwargs: dict
+        :param quotas_client: Instance of ServiceQuotasClient
+        :type quotas_client: ``ServiceQuotasClient`` or ``None``
+        :param count_stack_set_instances: whether to check the "Stack sets"
+          and "Stack instances per stack set" limits. Counting their usage
+          makes one paginated ListStackInstances query per StackSet, so it is
+          off by default; when it is False, these limits are not registered
+          at all.
+        :type count_stack_set_instances: bool
+        """
+        #: whether the StackSet limits are registered and counted
+        self.count_stack_set_instances = count_stack_set_instances
+        super(_CloudformationService, self).__init__(
+            warning_threshold, critical_threshold, boto_connection_kwargs,
+            quotas_client
+        )
+
     def find_usage(self):
         """
         Determine the current usage for each limit of this service,
         and update corresponding Limit via
         :py:meth:`~.AwsLimit._add_current_usage`.
+
+        Stacks are counted from ListStack summaries, filtered server-side to
+        :py:data:`~.COUNTED_STACK_STATUSES`. StackSets and their instances are
+        only counted if :py:attr:`~.count_stack_set_instances` is True.
         """
-        ignore_statuses = [
-            'DELETE_COMPLETE'
-        ]
         logger.debug("Checking usage for service %s", self.service_name)
         self.connect()
         for lim in self.limits.values():
             lim._reset_usage()
-        count = 0
-        paginator = self.conn.get_paginator('describe_stacks')
-        iter = paginator.paginate()
-        for page in iter:
-            for stk in page['Stacks']:
-                if stk['StackStatus'] not in ignore_statuses:
-                    count += 1
+        count = paginate_dict_count(
+            self.conn.list_stacks,
+            StackStatusFilter=COUNTED_STACK_STATUSES,
+            alc_marker_path=['NextToken'],
+            alc_data_path=['StackSummaries'],
+            alc_marker_param='NextToken'
+        )
         self.limits['Stacks']._add_current_usage(
             count, aws_type='AWS::CloudFormation::Stack'
         )
+        if self.count_stack_set_instances:
+            self._find_usage_stack_sets()
         self._have_usage = True
         logger.debug("Done checking usage.")
 
+    def _find_usage_stack_sets(self):
+        """
+        Count active StackSets, and the stack instances of each one.
+        """
+        logger.debug('Counting CloudFormation StackSet instances')
+        count = 0
+        for stack_set in paginate_dict_items(
+            self.conn.list_stack_sets,
+            Status='ACTIVE',
+            alc_marker_path=['NextToken'],
+            alc_data_path=['Summaries'],
+            alc_marker_param='NextToken'
+        ):
+            count += 1
+            name = stack_set['StackSetName']
+            self.limits['Stack instances per stack set']._add_current_usage(
+                paginate_dict_count(
+                    self.conn.list_stack_instances,
+                    StackSetName=name,
+                    alc_marker_path=['NextToken'],
+                    alc_data_path=['Summaries'],
+                    alc_marker_param='NextToken'
+                ),
+                resource_id=name,
+                aws_type='AWS::CloudFormation::StackSet'
+            )
+        self.limits['Stack sets']._add_current_usage(
+            count, aws_type='AWS::CloudFormation::StackSet'
+        )
+
     def get_limits(self):
         """
         Return all known limits for this service, as a dict of their names
-        to :py:class:`~.AwsLimit` objects.
+        to :py:class:`~.AwsLimit` objects. The StackSet limits are only
+        included if :py:attr:`~.count_stack_set_instances` is True.
 
         :returns: dict of limit names to :py:class:`~.AwsLimit` objects
         :rtype: dict
@@ -96,7 +189,29 @@ class _CloudformationService(_AwsService):
             self.warning_threshold,
             self.critical_threshold,
             limit_type='AWS::CloudFormation::Stack',
-            quotas_name='Stack count'
+            quotas_name='Stack count',
+            quotas_code='L-0485CB21'
+        )
+        if not self.count_stack_set_instances:
+            self.limits = limits
+            return limits
+        limits['Stack sets'] = AwsLimit(
+            'Stack sets',
+            self,
+            1000,
+            self.warning_threshold,
+            self.critical_threshold,
+            limit_type='AWS::CloudFormation::StackSet',
+            quotas_name='Stack sets per administrator account'
+        )
+        limits['Stack instances per stack set'] = AwsLimit(
+            'Stack instances per stack set',
+            self,
+            100000,
+            self.warning_threshold,
+            self.critical_threshold,
+            limit_type='AWS::CloudFormation::StackSet',
+            quotas_name='Stack instances per stack set'
         )
         self.limits = limits
         return limits
@@ -108,7 +223,9 @@ class _CloudformationService(_AwsService):
         """
         logger.debug('Setting CloudFormation limits from API')
         self.connect()
-        resp = self.conn.describe_account_limits()
+        resp = self._cached_api_call(
+            'DescribeAccountLimits', self.conn.describe_account_limits
+        )
         for lim in resp['AccountLimits']:
             if lim['Name'] == 'StackLimit':
                 self.limits['Stacks']._set_api_limit(lim['Value'])
@@ -120,12 +237,19 @@ class _CloudformationService(_AwsService):
         """
         Return a list of IAM Actions required for this Service to function
         properly. All Actions will be shown with an Effect of "Allow"
-        and a Resource of "*".
+        and a Resource of "*". The StackSet actions are only required if
+        :py:attr:`~.count_stack_set_instances` is True.
 
         :returns: list of IAM Action strings
         :rtype: list
         """
-        return [
+        perms = [
             'cloudformation:DescribeAccountLimits',
-            'cloudformation:DescribeStacks'
+            'cloudformation:ListStacks'
         ]
+        if self.count_stack_set_instances:
+            perms.extend([
+                'cloudformation:ListStackInstances',
+                'cloudformation:ListStackSets'
+            ])
+        return sorted(perms)
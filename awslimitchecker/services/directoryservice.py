@@ -62,7 +62,9 @@ class _DirectoryserviceService(_AwsService):
         self.connect()
         for lim in self.limits.values():
             lim._reset_usage()
-        resp = self.conn.get_directory_limits()
+        resp = self._cached_api_call(
+            'GetDirectoryLimits', self.conn.get_directory_limits
+        )
         directory_limits = resp['DirectoryLimits']
         self.limits['CloudOnlyDirectories']._add_current_usage(
             directory_limits['CloudOnlyDirectoriesCurrentCount'],
@@ -124,7 +126,9 @@ class _DirectoryserviceService(_AwsService):
         """
         logger.debug('Setting DirectoryService limits from API')
         self.connect()
-        resp = self.conn.get_directory_limits()
+        resp = self._cached_api_call(
+            'GetDirectoryLimits', self.conn.get_directory_limits
+        )
         directory_limits = resp['DirectoryLimits']
         self.limits['CloudOnlyDirectories']._set_api_limit(
             directory_limits['CloudOnlyDirectoriesLimit']
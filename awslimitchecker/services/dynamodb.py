@@ -40,11 +40,18 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 import abc  # noqa
 import logging
 
+from concurrent.futures import ThreadPoolExecutor
+
 from .base import _AwsService
 from ..limit import AwsLimit
+from ..utils import paginate_dict_items
 
 logger = logging.getLogger(__name__)
 
+#: Default number of concurrent DescribeTable requests; see
+#: :py:attr:`~._DynamodbService.describe_table_workers`.
+DESCRIBE_TABLE_WORKERS = 8
+
 
 class _DynamodbService(_AwsService):
 
@@ -52,6 +59,9 @@ class _DynamodbService(_AwsService):
     api_name = 'dynamodb'
     quotas_service_code = 'dynamodb'
 
+    #: maximum number of DescribeTable requests to run concurrently
+    describe_table_workers = DESCRIBE_TABLE_WORKERS
+
     def find_usage(self):
         """
         Determine the current usage for each limit of this service,
@@ -59,7 +69,7 @@ class _DynamodbService(_AwsService):
         :py:meth:`~.AwsLimit._add_current_usage`.
         """
         logger.debug("Checking usage for service %s", self.service_name)
-        self.connect_resource()
+        self.connect()
         for lim in self.limits.values():
             lim._reset_usage()
         self._find_usage_dynamodb()
@@ -67,58 +77,57 @@ class _DynamodbService(_AwsService):
         logger.debug("Done checking usage.")
 
     def _find_usage_dynamodb(self):
-        """calculates current usage for all DynamoDB limits"""
-        table_count = 0
+        """
+        calculates current usage for all DynamoDB limits
+
+        Table names are listed with ListTables, and then summarized by
+        :py:meth:`~._table_summary` on a pool of
+        :py:attr:`~.describe_table_workers` threads.
+        """
         region_read_capacity = 0
         region_write_capacity = 0
 
         logger.debug("Getting usage for DynamoDB tables")
-        for table in self.resource_conn.tables.all():
-            table_count += 1
-            gsi_write = 0
-            gsi_read = 0
-            gsi_count = 0
-            if table.global_secondary_indexes is not None:
-                for gsi in table.global_secondary_indexes:
-                    gsi_count += 1
-                    gsi_read += gsi['ProvisionedThroughput'][
-                        'ReadCapacityUnits']
-                    gsi_write += gsi['ProvisionedThroughput'][
-                        'WriteCapacityUnits']
-            table_write_capacity = table.provisioned_throughput[
-                                       'WriteCapacityUnits'] + gsi_write
-            table_read_capacity = table.provisioned_throughput[
-                                      'ReadCapacityUnits'] + gsi_read
-            region_write_capacity += table_write_capacity
-            region_read_capacity += table_read_capacity
+        names = list(paginate_dict_items(
+            self.conn.list_tables,
+            alc_marker_path=['LastEvaluatedTableName'],
+            alc_data_path=['TableNames'],
+            alc_marker_param='ExclusiveStartTableName'
+        ))
+        with ThreadPoolExecutor(
+            max_workers=self.describe_table_workers
+        ) as executor:
+            summaries = list(executor.map(self._table_summary, names))
+        for name, summary in zip(names, summaries):
+            region_write_capacity += summary['write_capacity']
+            region_read_capacity += summary['read_capacity']
 
             self.limits['Global Secondary Indexes']._add_current_usage(
-                gsi_count,
-                resource_id=table.name,
+                summary['gsi_count'],
+                resource_id=name,
                 aws_type='AWS::DynamoDB::Table'
             )
 
             self.limits['Local Secondary Indexes']._add_current_usage(
-                len(table.local_secondary_indexes)
-                if table.local_secondary_indexes is not None else 0,
-                resource_id=table.name,
+                summary['lsi_count'],
+                resource_id=name,
                 aws_type='AWS::DynamoDB::Table'
             )
 
             self.limits['Table Max Write Capacity Units']._add_current_usage(
-                table_write_capacity,
-                resource_id=table.name,
+                summary['write_capacity'],
+                resource_id=name,
                 aws_type='AWS::DynamoDB::Table'
             )
 
             self.limits['Table Max Read Capacity Units']._add_current_usage(
-                table_read_capacity,
-                resource_id=table.name,
+                summary['read_capacity'],
+                resource_id=name,
                 aws_type='AWS::DynamoDB::Table'
             )
 
         self.limits['Tables Per Region']._add_current_usage(
-            table_count,
+            len(names),
             aws_type='AWS::DynamoDB::Table'
         )
 
@@ -132,6 +141,35 @@ class _DynamodbService(_AwsService):
             aws_type='AWS::DynamoDB::Table'
         )
 
+    def _table_summary(self, name):
+        """
+        Describe one table and return its index counts and provisioned
+        capacity (including that of global secondary indexes). These are
+        usage figures, so they are never taken from the persistent cache.
+
+        :param name: table name
+        :type name: str
+        :returns: dict with ``gsi_count``, ``lsi_count``, ``read_capacity``
+          and ``write_capacity`` keys
+        :rtype: dict
+        """
+        table = self.conn.describe_table(TableName=name)['Table']
+        summary = {
+            'gsi_count': 0,
+            'lsi_count': len(table.get('LocalSecondaryIndexes', [])),
+            'read_capacity': table['ProvisionedThroughput'][
+                'ReadCapacityUnits'],
+            'write_capacity': table['ProvisionedThroughput'][
+                'WriteCapacityUnits']
+        }
+        for gsi in table.get('GlobalSecondaryIndexes', []):
+            summary['gsi_count'] += 1
+            summary['read_capacity'] += gsi['ProvisionedThroughput'][
+                'ReadCapacityUnits']
+            summary['write_capacity'] += gsi['ProvisionedThroughput'][
+                'WriteCapacityUnits']
+        return summary
+
     def get_limits(self):
         """
         Return all known limits for this service, as a dict of their names
@@ -225,7 +263,9 @@ class _DynamodbService(_AwsService):
         self.connect()
         logger.info("Querying DynamoDB DescribeLimits for limits")
         # no need to paginate
-        lims = self.conn.describe_limits()
+        lims = self._cached_api_call(
+            'DescribeLimits', self.conn.describe_limits
+        )
         self.limits['Account Max Read Capacity Units']._set_api_limit(
             lims['AccountMaxReadCapacityUnits']
         )
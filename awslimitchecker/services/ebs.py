@@ -42,7 +42,7 @@ import logging
 
 from .base import _AwsService
 from ..limit import AwsLimit
-from ..utils import paginate_dict
+from ..utils import paginate_dict, paginate_dict_count
 
 logger = logging.getLogger(__name__)
 
@@ -151,7 +151,7 @@ class _EbsService(_AwsService):
     def _find_usage_snapshots(self):
         """find snapshot usage"""
         logger.debug("Getting usage for EBS snapshots")
-        snaps = paginate_dict(
+        count = paginate_dict_count(
             self.conn.describe_snapshots,
             OwnerIds=['self'],
             alc_marker_path=['NextToken'],
@@ -159,7 +159,7 @@ class _EbsService(_AwsService):
             alc_marker_param='NextToken'
         )
         self.limits['Active snapshots']._add_current_usage(
-            len(snaps['Snapshots']),
+            count,
             aws_type='AWS::EC2::VolumeSnapshot'
         )
 
@@ -45,13 +45,354 @@ from copy import deepcopy
 
 import botocore
 
-from .base import _AwsService
+from .base import _AwsService, _summarize_network_interfaces
 from ..limit import AwsLimit
 
 logger = logging.getLogger(__name__)
 
 RI_NO_AZ = 'xxREGIONAL_BENEFIT-NO_AZxx'
 
+#: Instance states that count towards the Running On-Demand instance limits;
+#: passed to DescribeInstances as an ``instance-state-name`` filter.
+COUNTED_INSTANCE_STATES = ['pending', 'running', 'shutting-down', 'stopping']
+
+#: Number of instances to request per DescribeInstances page; the maximum
+#: the API allows.
+INSTANCE_PAGE_SIZE = 1000
+
+# Known EC2 instance types, by category; combined in INSTANCE_TYPES below.
+GENERAL_TYPES = [
+    'a1.2xlarge',
+    'a1.4xlarge',
+    'a1.large',
+    'a1.medium',
+    'a1.metal',
+    'a1.xlarge',
+    'm3.2xlarge',
+    'm3.large',
+    'm3.medium',
+    'm3.xlarge',
+    'm4.2xlarge',
+    'm4.4xlarge',
+    'm4.10xlarge',
+    'm4.16xlarge',
+    'm4.large',
+    'm4.xlarge',
+    'm5.2xlarge',
+    'm5.4xlarge',
+    'm5.8xlarge',
+    'm5.12xlarge',
+    'm5.16xlarge',
+    'm5.24xlarge',
+    'm5.large',
+    'm5.metal',
+    'm5.xlarge',
+    'm5a.2xlarge',
+    'm5a.4xlarge',
+    'm5a.8xlarge',
+    'm5a.12xlarge',
+    'm5a.16xlarge',
+    'm5a.24xlarge',
+    'm5a.large',
+    'm5a.xlarge',
+    'm5ad.2xlarge',
+    'm5ad.4xlarge',
+    'm5ad.8xlarge',
+    'm5ad.12xlarge',
+    'm5ad.16xlarge',
+    'm5ad.24xlarge',
+    'm5ad.large',
+    'm5ad.xlarge',
+    'm5d.2xlarge',
+    'm5d.4xlarge',
+    'm5d.8xlarge',
+    'm5d.12xlarge',
+    'm5d.16xlarge',
+    'm5d.24xlarge',
+    'm5d.large',
+    'm5d.metal',
+    'm5d.xlarge',
+    'm5dn.2xlarge',
+    'm5dn.4xlarge',
+    'm5dn.8xlarge',
+    'm5dn.12xlarge',
+    'm5dn.16xlarge',
+    'm5dn.24xlarge',
+    'm5dn.large',
+    'm5dn.metal',
+    'm5dn.xlarge',
+    'm5n.2xlarge',
+    'm5n.4xlarge',
+    'm5n.8xlarge',
+    'm5n.12xlarge',
+    'm5n.16xlarge',
+    'm5n.24xlarge',
+    'm5n.large',
+    'm5n.metal',
+    'm5n.xlarge',
+    't2.2xlarge',
+    't2.large',
+    't2.medium',
+    't2.micro',
+    't2.nano',
+    't2.small',
+    't2.xlarge',
+    't3.2xlarge',
+    't3.large',
+    't3.medium',
+    't3.micro',
+    't3.nano',
+    't3.small',
+    't3.xlarge',
+    't3a.2xlarge',
+    't3a.large',
+    't3a.medium',
+    't3a.micro',
+    't3a.nano',
+    't3a.small',
+    't3a.xlarge',
+]
+
+PREV_GENERAL_TYPES = [
+    't1.micro',
+    'm1.small',
+    'm1.medium',
+    'm1.large',
+    'm1.xlarge',
+]
+
+MEMORY_TYPES = [
+    'r3.2xlarge',
+    'r3.4xlarge',
+    'r3.8xlarge',
+    'r3.large',
+    'r3.xlarge',
+    'r4.2xlarge',
+    'r4.4xlarge',
+    'r4.8xlarge',
+    'r4.16xlarge',
+    'r4.large',
+    'r4.xlarge',
+    'r5.2xlarge',
+    'r5.4xlarge',
+    'r5.8xlarge',
+    'r5.12xlarge',
+    'r5.16xlarge',
+    'r5.24xlarge',
+    'r5.large',
+    'r5.metal',
+    'r5.xlarge',
+    'r5a.2xlarge',
+    'r5a.4xlarge',
+    'r5a.8xlarge',
+    'r5a.12xlarge',
+    'r5a.16xlarge',
+    'r5a.24xlarge',
+    'r5a.large',
+    'r5a.xlarge',
+    'r5ad.2xlarge',
+    'r5ad.4xlarge',
+    'r5ad.8xlarge',
+    'r5ad.12xlarge',
+    'r5ad.16xlarge',
+    'r5ad.24xlarge',
+    'r5ad.large',
+    'r5ad.xlarge',
+    'r5d.2xlarge',
+    'r5d.4xlarge',
+    'r5d.8xlarge',
+    'r5d.12xlarge',
+    'r5d.16xlarge',
+    'r5d.24xlarge',
+    'r5d.large',
+    'r5d.metal',
+    'r5d.xlarge',
+    'r5dn.2xlarge',
+    'r5dn.4xlarge',
+    'r5dn.8xlarge',
+    'r5dn.12xlarge',
+    'r5dn.16xlarge',
+    'r5dn.24xlarge',
+    'r5dn.large',
+    'r5dn.metal',
+    'r5dn.xlarge',
+    'r5n.2xlarge',
+    'r5n.4xlarge',
+    'r5n.8xlarge',
+    'r5n.12xlarge',
+    'r5n.16xlarge',
+    'r5n.24xlarge',
+    'r5n.large',
+    'r5n.metal',
+    'r5n.xlarge',
+    'u-18tb1.metal',
+    'u-24tb1.metal',
+    'x1.16xlarge',
+    'x1.32xlarge',
+    'x1e.2xlarge',
+    'x1e.4xlarge',
+    'x1e.8xlarge',
+    'x1e.16xlarge',
+    'x1e.32xlarge',
+    'x1e.xlarge',
+    'z1d.2xlarge',
+    'z1d.3xlarge',
+    'z1d.6xlarge',
+    'z1d.12xlarge',
+    'z1d.large',
+    'z1d.xlarge',
+]
+
+PREV_MEMORY_TYPES = [
+    'm2.xlarge',
+    'm2.2xlarge',
+    'm2.4xlarge',
+    'cr1.8xlarge',
+]
+
+COMPUTE_TYPES = [
+    'c3.2xlarge',
+    'c3.4xlarge',
+    'c3.8xlarge',
+    'c3.large',
+    'c3.xlarge',
+    'c4.2xlarge',
+    'c4.4xlarge',
+    'c4.8xlarge',
+    'c4.large',
+    'c4.xlarge',
+    'c5.2xlarge',
+    'c5.4xlarge',
+    'c5.9xlarge',
+    'c5.12xlarge',
+    'c5.18xlarge',
+    'c5.24xlarge',
+    'c5.large',
+    'c5.metal',
+    'c5.xlarge',
+    'c5d.2xlarge',
+    'c5d.4xlarge',
+    'c5d.9xlarge',
+    'c5d.12xlarge',
+    'c5d.18xlarge',
+    'c5d.24xlarge',
+    'c5d.large',
+    'c5d.metal',
+    'c5d.xlarge',
+    'c5n.2xlarge',
+    'c5n.4xlarge',
+    'c5n.9xlarge',
+    'c5n.18xlarge',
+    'c5n.large',
+    'c5n.metal',
+    'c5n.xlarge',
+]
+
+PREV_COMPUTE_TYPES = [
+    'c1.medium',
+    'c1.xlarge',
+    'cc2.8xlarge',
+    'cc1.4xlarge',
+]
+
+ACCELERATED_COMPUTE_TYPES = [
+    'f1.4xlarge',
+    'p2.xlarge',
+    'p2.8xlarge',
+    'p2.16xlarge',
+    'p3.16xlarge',
+    'p3.2xlarge',
+    'p3.8xlarge',
+    'p3dn.24xlarge',
+]
+
+STORAGE_TYPES = [
+    'h1.2xlarge',
+    'h1.4xlarge',
+    'h1.8xlarge',
+    'h1.16xlarge',
+    'i2.2xlarge',
+    'i2.4xlarge',
+    'i2.8xlarge',
+    'i2.xlarge',
+    'i3.2xlarge',
+    'i3.4xlarge',
+    'i3.8xlarge',
+    'i3.16xlarge',
+    'i3.large',
+    'i3.metal',
+    'i3.xlarge',
+    'i3en.2xlarge',
+    'i3en.3xlarge',
+    'i3en.6xlarge',
+    'i3en.12xlarge',
+    'i3en.24xlarge',
+    'i3en.large',
+    'i3en.xlarge',
+]
+
+PREV_STORAGE_TYPES = [
+    # NOTE hi1.4xlarge is no longer in the instance type listings,
+    # but some accounts might still have a limit for it
+    'hi1.4xlarge',
+    'hs1.8xlarge',
+]
+
+DENSE_STORAGE_TYPES = [
+    'd2.xlarge',
+    'd2.2xlarge',
+    'd2.4xlarge',
+    'd2.8xlarge',
+]
+
+GPU_TYPES = [
+    'g2.2xlarge',
+    'g2.8xlarge',
+    'g3.4xlarge',
+    'g3.8xlarge',
+    'g3.16xlarge',
+    'g3s.xlarge',
+    'g4dn.2xlarge',
+    'g4dn.4xlarge',
+    'g4dn.8xlarge',
+    'g4dn.12xlarge',
+    'g4dn.16xlarge',
+    'g4dn.metal',
+    'g4dn.xlarge',
+]
+
+PREV_GPU_TYPES = [
+    'cg1.4xlarge',
+]
+
+FPGA_TYPES = [
+    # note, as of 2016-12-17, these are still in Developer Preview;
+    # there isn't a published instance limit yet, so we'll assume
+    # it's the default...
+    'f1.2xlarge',
+    'f1.16xlarge',
+]
+
+#: All known EC2 instance types, in the order their limits are defined.
+INSTANCE_TYPES = tuple(
+    GENERAL_TYPES +
+    PREV_GENERAL_TYPES +
+    MEMORY_TYPES +
+    PREV_MEMORY_TYPES +
+    COMPUTE_TYPES +
+    PREV_COMPUTE_TYPES +
+    ACCELERATED_COMPUTE_TYPES +
+    STORAGE_TYPES +
+    PREV_STORAGE_TYPES +
+    DENSE_STORAGE_TYPES +
+    GPU_TYPES +
+    PREV_GPU_TYPES +
+    FPGA_TYPES
+)
+
+#: Set of :py:data:`~.INSTANCE_TYPES`, for membership checks.
+INSTANCE_TYPE_INDEX = frozenset(INSTANCE_TYPES)
+
 
 class _Ec2Service(_AwsService):
 
@@ -59,6 +400,11 @@ class _Ec2Service(_AwsService):
     api_name = 'ec2'
     quotas_service_code = 'ec2'
 
+    #: Number of instances skipped by the last On-Demand instance usage
+    #: calculation, as a dict with ``spot`` (spot instances) and ``state``
+    #: (stopped or terminated instances) keys; None before usage is found.
+    skipped_instances = None
+
     #: Mapping of lower-case instance family character (instance type first
     #: character) to limit name for that family.
     instance_family_to_limit_name = {
@@ -112,7 +458,6 @@ class _Ec2Service(_AwsService):
         """
         logger.debug("Checking usage for service %s", self.service_name)
         self.connect()
-        self.connect_resource()
         for lim in self.limits.values():
             lim._reset_usage()
         if self._use_vcpu_limits:
@@ -162,6 +507,12 @@ class _Ec2Service(_AwsService):
             'Found %d total RIs and %d running/used RIs',
             total_ris, running_ris
         )
+        if len(inst_usage) > 0:
+            # report zero usage for known types without running instances
+            for i_type in INSTANCE_TYPES:
+                if 'Running On-Demand {t} instances'.format(
+                        t=i_type) in self.limits:
+                    ondemand_usage.setdefault(i_type, 0)
         total_instances = 0
         for i_type, usage in ondemand_usage.items():
             key = 'Running On-Demand {t} instances'.format(
@@ -299,35 +650,21 @@ class _Ec2Service(_AwsService):
         Find counts of currently-running EC2 Instances
         (On-Demand or Reserved) by placement (Availability
         Zone) and instance type (size). Return as a nested dict
-        of AZ name to dict of instance type to count.
+        of AZ name to dict of instance type to count; only types with
+        running instances are included.
 
         :rtype: dict
         """
-        # On-Demand instances by type
-        ondemand = {}
-        for t in self._instance_types():
-            ondemand[t] = 0
-        az_to_inst = {}
+        az_to_inst = defaultdict(lambda: defaultdict(int))
         logger.debug("Getting usage for on-demand instances")
-        for inst in self.resource_conn.instances.all():
-            if inst.spot_instance_request_id:
-                logger.info("Spot instance found (%s); skipping from "
-                            "Running On-Demand Instances count", inst.id)
-                continue
-            if inst.state['Name'] in ['stopped', 'terminated']:
-                logger.debug("Ignoring instance %s in state %s", inst.id,
-                             inst.state['Name'])
-                continue
-            if inst.placement['AvailabilityZone'] not in az_to_inst:
-                az_to_inst[
-                    inst.placement['AvailabilityZone']] = deepcopy(ondemand)
-            try:
-                az_to_inst[
-                    inst.placement['AvailabilityZone']][inst.instance_type] += 1
-            except KeyError:
+        for inst in self._counted_instances():
+            itype = inst['InstanceType']
+            if itype not in INSTANCE_TYPE_INDEX:
                 logger.error("ERROR - unknown instance type '%s'; not "
-                             "counting", inst.instance_type)
-        return az_to_inst
+                             "counting", itype)
+                continue
+            az_to_inst[inst['Placement']['AvailabilityZone']][itype] += 1
+        return dict((az, dict(counts)) for az, counts in az_to_inst.items())
 
     def _instance_usage_vcpu(self, ris):
         """
@@ -342,30 +679,73 @@ class _Ec2Service(_AwsService):
         """
         inst_counts = defaultdict(int)
         logger.debug("Getting usage for on-demand instances (vCPU limit)")
-        for inst in self.resource_conn.instances.all():
-            if inst.spot_instance_request_id:
-                logger.info("Spot instance found (%s); skipping from "
-                            "Running On-Demand Instances count", inst.id)
-                continue
-            if inst.state['Name'] in ['stopped', 'terminated']:
-                logger.debug("Ignoring instance %s in state %s", inst.id,
-                             inst.state['Name'])
-                continue
-            az = inst.placement['AvailabilityZone']
-            itype = inst.instance_type
+        for inst in self._counted_instances():
+            az = inst['Placement']['AvailabilityZone']
+            itype = inst['InstanceType']
             if ris.get(az, {}).get(itype, 0) > 0:
                 logger.debug(
-                    'Using RI for %s: %s in %s', inst.id, itype, az
+                    'Using RI for %s: %s in %s', inst['InstanceId'], itype, az
                 )
                 ris[az][itype] -= 1
                 continue
-            inst_counts[inst.instance_type[0]] += (
-                inst.cpu_options['CoreCount'] * inst.cpu_options[
-                    'ThreadsPerCore'
-                ]
+            inst_counts[itype[0]] += (
+                inst['CpuOptions']['CoreCount'] *
+                inst['CpuOptions']['ThreadsPerCore']
             )
         return inst_counts
 
+    def _instances(self):
+        """
+        Generator over the description of every instance in a counted state
+        (see :py:data:`~.COUNTED_INSTANCE_STATES`), from paginated
+        DescribeInstances calls of :py:data:`~.INSTANCE_PAGE_SIZE` instances.
+        Each page is processed as it is received.
+
+        :returns: generator of instance description dicts
+        """
+        for res in self._paginated_items(
+            'describe_instances', 'Reservations',
+            Filters=[{
+                'Name': 'instance-state-name',
+                'Values': COUNTED_INSTANCE_STATES
+            }],
+            PaginationConfig={'PageSize': INSTANCE_PAGE_SIZE}
+        ):
+            for inst in res['Instances']:
+                yield inst
+
+    def _counted_instances(self):
+        """
+        Generator over the instances from :py:meth:`~._instances` that count
+        towards On-Demand instance limits, skipping spot instances. The
+        ``instance-lifecycle`` filter can only select spot instances, not
+        exclude them, so these are skipped here rather than by the API.
+        Stopped and terminated instances are already excluded by the API, but
+        are skipped here too in case they are returned. The numbers skipped
+        are stored in :py:attr:`~.skipped_instances`.
+
+        :returns: generator of instance description dicts
+        """
+        self.skipped_instances = {'spot': 0, 'state': 0}
+        for inst in self._instances():
+            if inst.get('SpotInstanceRequestId'):
+                logger.info("Spot instance found (%s); skipping from "
+                            "Running On-Demand Instances count",
+                            inst['InstanceId'])
+                self.skipped_instances['spot'] += 1
+                continue
+            if inst['State']['Name'] in ['stopped', 'terminated']:
+                logger.debug("Ignoring instance %s in state %s",
+                             inst['InstanceId'], inst['State']['Name'])
+                self.skipped_instances['state'] += 1
+                continue
+            yield inst
+        logger.debug(
+            'Skipped %d spot instances and %d stopped or terminated '
+            'instances', self.skipped_instances['spot'],
+            self.skipped_instances['state']
+        )
+
     @property
     def _use_vcpu_limits(self):
         """
@@ -424,10 +804,11 @@ class _Ec2Service(_AwsService):
         with the quotas returned. Updates ``self.limits``.
         """
         self.connect()
-        self.connect_resource()
         logger.info("Querying EC2 DescribeAccountAttributes for limits")
         # no need to paginate
-        attribs = self.conn.describe_account_attributes()
+        attribs = self._cached_api_call(
+            'DescribeAccountAttributes', self.conn.describe_account_attributes
+        )
         for attrib in attribs['AccountAttributes']:
             aname = attrib['AttributeName']
             val = attrib['AttributeValues'][0]['AttributeValue']
@@ -630,10 +1011,12 @@ class _Ec2Service(_AwsService):
         logger.debug("Getting usage for EC2 VPC resources")
         sgs_per_vpc = defaultdict(int)
         rules_per_sg = defaultdict(int)
-        for sg in self.resource_conn.security_groups.all():
-            if sg.vpc_id is None:
+        for sg in self._paginated_items(
+            'describe_security_groups', 'SecurityGroups'
+        ):
+            if sg.get('VpcId') is None:
                 continue
-            sgs_per_vpc[sg.vpc_id] += 1
+            sgs_per_vpc[sg['VpcId']] += 1
             """
             see: https://github.com/jantman/awslimitchecker/issues/431
 
@@ -653,7 +1036,7 @@ class _Ec2Service(_AwsService):
             UserIdGroupPairs count towards both IPv4 and IPv6.
             """
             counts = []
-            for perm in [sg.ip_permissions, sg.ip_permissions_egress]:
+            for perm in [sg['IpPermissions'], sg['IpPermissionsEgress']]:
                 counts.append(
                     max(
                         sum([len(x.get('IpRanges', [])) for x in perm]),
@@ -662,7 +1045,7 @@ class _Ec2Service(_AwsService):
                     sum([len(x.get('PrefixListIds', [])) for x in perm]) +
                     sum([len(x.get('UserIdGroupPairs', [])) for x in perm])
                 )
-            rules_per_sg[sg.id] = max(counts)
+            rules_per_sg[sg['GroupId']] = max(counts)
         # set usage
         for vpc_id, count in sgs_per_vpc.items():
             self.limits['Security groups per VPC']._add_current_usage(
@@ -679,30 +1062,30 @@ class _Ec2Service(_AwsService):
 
     def _find_usage_networking_eips(self):
         logger.debug("Getting usage for EC2 EIPs")
-        vpc_addrs = self.resource_conn.vpc_addresses.all()
+        addrs = self.conn.describe_addresses()['Addresses']
         self.limits['VPC Elastic IP addresses (EIPs)']._add_current_usage(
-            sum(1 for a in vpc_addrs if a.domain == 'vpc'),
+            sum(1 for a in addrs if a['Domain'] == 'vpc'),
             aws_type='AWS::EC2::EIP',
         )
         # the EC2 limits screen calls this 'EC2-Classic Elastic IPs'
         # but Trusted Advisor just calls it 'Elastic IP addresses (EIPs)'
-        classic_addrs = self.resource_conn.classic_addresses.all()
         self.limits['Elastic IP addresses (EIPs)']._add_current_usage(
-            sum(1 for a in classic_addrs if a.domain == 'standard'),
+            sum(1 for a in addrs if a['Domain'] == 'standard'),
             aws_type='AWS::EC2::EIP',
         )
 
     def _find_usage_networking_eni_sg(self):
         logger.debug("Getting usage for EC2 Network Interfaces")
-        ints = self.resource_conn.network_interfaces.all()
-        for iface in ints:
-            if iface.vpc is None:
-                continue
+        summary = self._shared_paginated_summary(
+            'describe_network_interfaces', 'NetworkInterfaces',
+            _summarize_network_interfaces
+        )
+        for iface_id, num_groups in summary['vpc_security_groups']:
             self.limits['VPC security groups per elastic network '
                         'interface']._add_current_usage(
-                            len(iface.groups),
+                            num_groups,
                             aws_type='AWS::EC2::NetworkInterface',
-                            resource_id=iface.id,
+                            resource_id=iface_id,
                         )
 
     def _get_limits_networking(self):
@@ -798,335 +1181,10 @@ class _Ec2Service(_AwsService):
 
     def _instance_types(self):
         """
-        Return a list of all known EC2 instance types
+        Return a list of all known EC2 instance types; see
+        :py:data:`~.INSTANCE_TYPES`.
 
         :returns: list of all valid known EC2 instance types
         :rtype: list
         """
-        GENERAL_TYPES = [
-            'a1.2xlarge',
-            'a1.4xlarge',
-            'a1.large',
-            'a1.medium',
-            'a1.metal',
-            'a1.xlarge',
-            'm3.2xlarge',
-            'm3.large',
-            'm3.medium',
-            'm3.xlarge',
-            'm4.2xlarge',
-            'm4.4xlarge',
-            'm4.10xlarge',
-            'm4.16xlarge',
-            'm4.large',
-            'm4.xlarge',
-            'm5.2xlarge',
-            'm5.4xlarge',
-            'm5.8xlarge',
-            'm5.12xlarge',
-            'm5.16xlarge',
-            'm5.24xlarge',
-            'm5.large',
-            'm5.metal',
-            'm5.xlarge',
-            'm5a.2xlarge',
-            'm5a.4xlarge',
-            'm5a.8xlarge',
-            'm5a.12xlarge',
-            'm5a.16xlarge',
-            'm5a.24xlarge',
-            'm5a.large',
-            'm5a.xlarge',
-            'm5ad.2xlarge',
-            'm5ad.4xlarge',
-            'm5ad.8xlarge',
-            'm5ad.12xlarge',
-            'm5ad.16xlarge',
-            'm5ad.24xlarge',
-            'm5ad.large',
-            'm5ad.xlarge',
-            'm5d.2xlarge',
-            'm5d.4xlarge',
-            'm5d.8xlarge',
-            'm5d.12xlarge',
-            'm5d.16xlarge',
-            'm5d.24xlarge',
-            'm5d.large',
-            'm5d.metal',
-            'm5d.xlarge',
-            'm5dn.2xlarge',
-            'm5dn.4xlarge',
-            'm5dn.8xlarge',
-            'm5dn.12xlarge',
-            'm5dn.16xlarge',
-            'm5dn.24xlarge',
-            'm5dn.large',
-            'm5dn.metal',
-            'm5dn.xlarge',
-            'm5n.2xlarge',
-            'm5n.4xlarge',
-            'm5n.8xlarge',
-            'm5n.12xlarge',
-            'm5n.16xlarge',
-            'm5n.24xlarge',
-            'm5n.large',
-            'm5n.metal',
-            'm5n.xlarge',
-            't2.2xlarge',
-            't2.large',
-            't2.medium',
-            't2.micro',
-            't2.nano',
-            't2.small',
-            't2.xlarge',
-            't3.2xlarge',
-            't3.large',
-            't3.medium',
-            't3.micro',
-            't3.nano',
-            't3.small',
-            't3.xlarge',
-            't3a.2xlarge',
-            't3a.large',
-            't3a.medium',
-            't3a.micro',
-            't3a.nano',
-            't3a.small',
-            't3a.xlarge',
-        ]
-
-        PREV_GENERAL_TYPES = [
-            't1.micro',
-            'm1.small',
-            'm1.medium',
-            'm1.large',
-            'm1.xlarge',
-        ]
-
-        MEMORY_TYPES = [
-            'r3.2xlarge',
-            'r3.4xlarge',
-            'r3.8xlarge',
-            'r3.large',
-            'r3.xlarge',
-            'r4.2xlarge',
-            'r4.4xlarge',
-            'r4.8xlarge',
-            'r4.16xlarge',
-            'r4.large',
-            'r4.xlarge',
-            'r5.2xlarge',
-            'r5.4xlarge',
-            'r5.8xlarge',
-            'r5.12xlarge',
-            'r5.16xlarge',
-            'r5.24xlarge',
-            'r5.large',
-            'r5.metal',
-            'r5.xlarge',
-            'r5a.2xlarge',
-            'r5a.4xlarge',
-            'r5a.8xlarge',
-            'r5a.12xlarge',
-            'r5a.16xlarge',
-            'r5a.24xlarge',
-            'r5a.large',
-            'r5a.xlarge',
-            'r5ad.2xlarge',
-            'r5ad.4xlarge',
-            'r5ad.8xlarge',
-            'r5ad.12xlarge',
-            'r5ad.16xlarge',
-            'r5ad.24xlarge',
-            'r5ad.large',
-            'r5ad.xlarge',
-            'r5d.2xlarge',
-            'r5d.4xlarge',
-            'r5d.8xlarge',
-            'r5d.12xlarge',
-            'r5d.16xlarge',
-            'r5d.24xlarge',
-            'r5d.large',
-            'r5d.metal',
-            'r5d.xlarge',
-            'r5dn.2xlarge',
-            'r5dn.4xlarge',
-            'r5dn.8xlarge',
-            'r5dn.12xlarge',
-            'r5dn.16xlarge',
-            'r5dn.24xlarge',
-            'r5dn.large',
-            'r5dn.metal',
-            'r5dn.xlarge',
-            'r5n.2xlarge',
-            'r5n.4xlarge',
-            'r5n.8xlarge',
-            'r5n.12xlarge',
-            'r5n.16xlarge',
-            'r5n.24xlarge',
-            'r5n.large',
-            'r5n.metal',
-            'r5n.xlarge',
-            'u-18tb1.metal',
-            'u-24tb1.metal',
-            'x1.16xlarge',
-            'x1.32xlarge',
-            'x1e.2xlarge',
-            'x1e.4xlarge',
-            'x1e.8xlarge',
-            'x1e.16xlarge',
-            'x1e.32xlarge',
-            'x1e.xlarge',
-            'z1d.2xlarge',
-            'z1d.3xlarge',
-            'z1d.6xlarge',
-            'z1d.12xlarge',
-            'z1d.large',
-            'z1d.xlarge',
-        ]
-
-        PREV_MEMORY_TYPES = [
-            'm2.xlarge',
-            'm2.2xlarge',
-            'm2.4xlarge',
-            'cr1.8xlarge',
-        ]
-
-        COMPUTE_TYPES = [
-            'c3.2xlarge',
-            'c3.4xlarge',
-            'c3.8xlarge',
-            'c3.large',
-            'c3.xlarge',
-            'c4.2xlarge',
-            'c4.4xlarge',
-            'c4.8xlarge',
-            'c4.large',
-            'c4.xlarge',
-            'c5.2xlarge',
-            'c5.4xlarge',
-            'c5.9xlarge',
-            'c5.12xlarge',
-            'c5.18xlarge',
-            'c5.24xlarge',
-            'c5.large',
-            'c5.metal',
-            'c5.xlarge',
-            'c5d.2xlarge',
-            'c5d.4xlarge',
-            'c5d.9xlarge',
-            'c5d.12xlarge',
-            'c5d.18xlarge',
-            'c5d.24xlarge',
-            'c5d.large',
-            'c5d.metal',
-            'c5d.xlarge',
-            'c5n.2xlarge',
-            'c5n.4xlarge',
-            'c5n.9xlarge',
-            'c5n.18xlarge',
-            'c5n.large',
-            'c5n.metal',
-            'c5n.xlarge',
-        ]
-
-        PREV_COMPUTE_TYPES = [
-            'c1.medium',
-            'c1.xlarge',
-            'cc2.8xlarge',
-            'cc1.4xlarge',
-        ]
-
-        ACCELERATED_COMPUTE_TYPES = [
-            'f1.4xlarge',
-            'p2.xlarge',
-            'p2.8xlarge',
-            'p2.16xlarge',
-            'p3.16xlarge',
-            'p3.2xlarge',
-            'p3.8xlarge',
-            'p3dn.24xlarge',
-        ]
-
-        STORAGE_TYPES = [
-            'h1.2xlarge',
-            'h1.4xlarge',
-            'h1.8xlarge',
-            'h1.16xlarge',
-            'i2.2xlarge',
-            'i2.4xlarge',
-            'i2.8xlarge',
-            'i2.xlarge',
-            'i3.2xlarge',
-            'i3.4xlarge',
-            'i3.8xlarge',
-            'i3.16xlarge',
-            'i3.large',
-            'i3.metal',
-            'i3.xlarge',
-            'i3en.2xlarge',
-            'i3en.3xlarge',
-            'i3en.6xlarge',
-            'i3en.12xlarge',
-            'i3en.24xlarge',
-            'i3en.large',
-            'i3en.xlarge',
-        ]
-
-        PREV_STORAGE_TYPES = [
-            # NOTE hi1.4xlarge is no longer in the instance type listings,
-            # but some accounts might still have a limit for it
-            'hi1.4xlarge',
-            'hs1.8xlarge',
-        ]
-
-        DENSE_STORAGE_TYPES = [
-            'd2.xlarge',
-            'd2.2xlarge',
-            'd2.4xlarge',
-            'd2.8xlarge',
-        ]
-
-        GPU_TYPES = [
-            'g2.2xlarge',
-            'g2.8xlarge',
-            'g3.4xlarge',
-            'g3.8xlarge',
-            'g3.16xlarge',
-            'g3s.xlarge',
-            'g4dn.2xlarge',
-            'g4dn.4xlarge',
-            'g4dn.8xlarge',
-            'g4dn.12xlarge',
-            'g4dn.16xlarge',
-            'g4dn.metal',
-            'g4dn.xlarge',
-        ]
-
-        PREV_GPU_TYPES = [
-            'cg1.4xlarge',
-        ]
-
-        FPGA_TYPES = [
-            # note, as of 2016-12-17, these are still in Developer Preview;
-            # there isn't a published instance limit yet, so we'll assume
-            # it's the default...
-            'f1.2xlarge',
-            'f1.16xlarge',
-        ]
-
-        return (
-            GENERAL_TYPES +
-            PREV_GENERAL_TYPES +
-            MEMORY_TYPES +
-            PREV_MEMORY_TYPES +
-            COMPUTE_TYPES +
-            PREV_COMPUTE_TYPES +
-            ACCELERATED_COMPUTE_TYPES +
-            STORAGE_TYPES +
-            PREV_STORAGE_TYPES +
-            DENSE_STORAGE_TYPES +
-            GPU_TYPES +
-            PREV_GPU_TYPES +
-            FPGA_TYPES
-        )
+        return list(INSTANCE_TYPES)
@@ -39,13 +39,22 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 import abc  # noqa
+import asyncio
 import logging
 
 from .base import _AwsService
+from ..aio import gather_bounded
 from ..limit import AwsLimit
+from ..utils import chunks
 
 logger = logging.getLogger(__name__)
 
+#: Maximum number of clusters that can be passed to one DescribeClusters call
+DESCRIBE_CLUSTERS_MAX = 100
+
+#: Maximum number of services that can be passed to one DescribeServices call
+DESCRIBE_SERVICES_MAX = 10
+
 
 class _EcsService(_AwsService):
 
@@ -74,77 +83,194 @@ class _EcsService(_AwsService):
         self._have_usage = True
         logger.debug("Done checking usage.")
 
+    async def find_usage_async(self):
+        """
+        Asynchronous version of :py:meth:`~.find_usage`, which describes
+        clusters and services concurrently, with at most
+        :py:attr:`~._AwsService.aio_concurrency` requests in flight.
+        """
+        logger.debug("Checking usage for service %s", self.service_name)
+        for lim in self.limits.values():
+            lim._reset_usage()
+        async with self.connect_async() as conn:
+            await self._find_usage_clusters_async(conn)
+        self._have_usage = True
+        logger.debug("Done checking usage.")
+
     def _find_usage_clusters(self):
         """
-        Find the ECS service usage for clusters. Calls
-        :py:meth:`~._find_usage_one_cluster` for each cluster.
+        Find the ECS service usage for clusters. Clusters are described in
+        batches of up to :py:data:`~.DESCRIBE_CLUSTERS_MAX` per request, and
+        :py:meth:`~._find_usage_one_cluster` is called for each cluster.
         """
         count = 0
         fargate_task_count = 0
         paginator = self.conn.get_paginator('list_clusters')
         for page in paginator.paginate():
-            for cluster_arn in page['clusterArns']:
-                count += 1
+            for arns in chunks(page['clusterArns'], DESCRIBE_CLUSTERS_MAX):
+                count += len(arns)
                 resp = self.conn.describe_clusters(
-                    clusters=[cluster_arn], include=['STATISTICS']
-                )
-                cluster = resp['clusters'][0]
-                self.limits[
-                    'Container Instances per Cluster'
-                ]._add_current_usage(
-                    cluster['registeredContainerInstancesCount'],
-                    aws_type='AWS::ECS::ContainerInstance',
-                    resource_id=cluster['clusterName']
+                    clusters=arns, include=['STATISTICS']
                 )
-                self.limits['Services per Cluster']._add_current_usage(
-                    cluster['activeServicesCount'],
-                    aws_type='AWS::ECS::Service',
-                    resource_id=cluster['clusterName']
-                )
-                # Note: 'statistics' is not always present in API responses,
-                # even if requested. As far as I can tell, it's omitted if
-                # a cluster has no Fargate tasks.
-                for stat in cluster.get('statistics', []):
-                    if stat['name'] != 'runningFargateTasksCount':
-                        continue
-                    logger.debug(
-                        'Found %s Fargate tasks in cluster %s',
-                        stat['value'], cluster_arn
-                    )
-                    fargate_task_count += int(stat['value'])
-                self._find_usage_one_cluster(cluster['clusterName'])
+                for cluster in resp['clusters']:
+                    fargate_task_count += self._add_cluster_usage(cluster)
+                    self._find_usage_one_cluster(cluster['clusterName'])
+        self._add_totals_usage(count, fargate_task_count)
+
+    async def _find_usage_clusters_async(self, conn):
+        """
+        Asynchronous version of :py:meth:`~._find_usage_clusters`. A single
+        semaphore bounds the cluster and service requests together, so at most
+        :py:attr:`~._AwsService.aio_concurrency` of them are in flight.
+
+        :param conn: aiobotocore ECS client
+        """
+        semaphore = asyncio.Semaphore(self.aio_concurrency)
+        cluster_arns = []
+        paginator = conn.get_paginator('list_clusters')
+        async for page in paginator.paginate():
+            cluster_arns.extend(page['clusterArns'])
+        resps = await gather_bounded(
+            [
+                conn.describe_clusters(clusters=x, include=['STATISTICS'])
+                for x in chunks(cluster_arns, DESCRIBE_CLUSTERS_MAX)
+            ],
+            semaphore=semaphore
+        )
+        clusters = [c for resp in resps for c in resp['clusters']]
+        # each of these only holds the semaphore while making a request
+        results = await asyncio.gather(*[
+            self._describe_services_async(
+                conn, x['clusterName'], semaphore
+            ) for x in clusters
+        ])
+        fargate_task_count = 0
+        for cluster, services in zip(clusters, results):
+            fargate_task_count += self._add_cluster_usage(cluster)
+            for svc in services:
+                self._add_service_usage(cluster['clusterName'], svc)
+        self._add_totals_usage(len(cluster_arns), fargate_task_count)
+
+    async def _describe_services_async(self, conn, cluster_name, semaphore):
+        """
+        Describe all of the EC2 services in one cluster, in batches of up to
+        :py:data:`~.DESCRIBE_SERVICES_MAX` per request.
+
+        :param conn: aiobotocore ECS client
+        :param cluster_name: name of the cluster
+        :type cluster_name: str
+        :param semaphore: semaphore bounding concurrent requests
+        :type semaphore: ``asyncio.Semaphore``
+        :returns: list of service descriptions
+        :rtype: list
+        """
+        svc_arns = []
+        paginator = conn.get_paginator('list_services')
+        async with semaphore:
+            async for page in paginator.paginate(
+                cluster=cluster_name, launchType='EC2'
+            ):
+                svc_arns.extend(page['serviceArns'])
+        resps = await gather_bounded(
+            [
+                conn.describe_services(cluster=cluster_name, services=x)
+                for x in chunks(svc_arns, DESCRIBE_SERVICES_MAX)
+            ],
+            semaphore=semaphore
+        )
+        return [svc for resp in resps for svc in resp['services']]
+
+    def _add_cluster_usage(self, cluster):
+        """
+        Add usage for the per-cluster limits from one cluster's description.
+
+        :param cluster: cluster description from DescribeClusters
+        :type cluster: dict
+        :returns: number of running Fargate tasks in the cluster
+        :rtype: int
+        """
+        self.limits[
+            'Container Instances per Cluster'
+        ]._add_current_usage(
+            cluster['registeredContainerInstancesCount'],
+            aws_type='AWS::ECS::ContainerInstance',
+            resource_id=cluster['clusterName']
+        )
+        self.limits['Services per Cluster']._add_current_usage(
+            cluster['activeServicesCount'],
+            aws_type='AWS::ECS::Service',
+            resource_id=cluster['clusterName']
+        )
+        # Note: 'statistics' is not always present in API responses,
+        # even if requested. As far as I can tell, it's omitted if
+        # a cluster has no Fargate tasks.
+        fargate_task_count = 0
+        for stat in cluster.get('statistics', []):
+            if stat['name'] != 'runningFargateTasksCount':
+                continue
+            logger.debug(
+                'Found %s Fargate tasks in cluster %s',
+                stat['value'], cluster['clusterArn']
+            )
+            fargate_task_count += int(stat['value'])
+        return fargate_task_count
+
+    def _add_totals_usage(self, cluster_count, fargate_task_count):
+        """
+        Add usage for the account-wide Clusters and Fargate Tasks limits.
+
+        :param cluster_count: total number of clusters
+        :type cluster_count: int
+        :param fargate_task_count: total number of running Fargate tasks
+        :type fargate_task_count: int
+        """
         self.limits['Fargate Tasks']._add_current_usage(
             fargate_task_count, aws_type='AWS::ECS::Task'
         )
         self.limits['Clusters']._add_current_usage(
-            count, aws_type='AWS::ECS::Cluster'
+            cluster_count, aws_type='AWS::ECS::Cluster'
         )
 
     def _find_usage_one_cluster(self, cluster_name):
         """
-        Find usage for services in each cluster.
+        Find usage for services in each cluster. Services are described in
+        batches of up to :py:data:`~.DESCRIBE_SERVICES_MAX` per request.
 
         :param cluster_name: name of the cluster to find usage for
         :type cluster_name: str
         """
-        tps_lim = self.limits['EC2 Tasks per Service (desired count)']
         paginator = self.conn.get_paginator('list_services')
         for page in paginator.paginate(
             cluster=cluster_name, launchType='EC2'
         ):
-            for svc_arn in page['serviceArns']:
-                svc = self.conn.describe_services(
-                    cluster=cluster_name, services=[svc_arn]
-                )['services'][0]
-                if svc['launchType'] != 'EC2':
-                    continue
-                tps_lim._add_current_usage(
-                    svc['desiredCount'],
-                    aws_type='AWS::ECS::Service',
-                    resource_id='cluster=%s; service=%s' % (
-                        cluster_name, svc['serviceName']
-                    )
+            for arns in chunks(page['serviceArns'], DESCRIBE_SERVICES_MAX):
+                resp = self.conn.describe_services(
+                    cluster=cluster_name, services=arns
                 )
+                for svc in resp['services']:
+                    self._add_service_usage(cluster_name, svc)
+
+    def _add_service_usage(self, cluster_name, svc):
+        """
+        Add usage for the EC2 Tasks per Service limit from one service's
+        description; services with other launch types are ignored.
+
+        :param cluster_name: name of the cluster the service is in
+        :type cluster_name: str
+        :param svc: service description from DescribeServices
+        :type svc: dict
+        """
+        if svc['launchType'] != 'EC2':
+            return
+        self.limits[
+            'EC2 Tasks per Service (desired count)'
+        ]._add_current_usage(
+            svc['desiredCount'],
+            aws_type='AWS::ECS::Service',
+            resource_id='cluster=%s; service=%s' % (
+                cluster_name, svc['serviceName']
+            )
+        )
 
     def get_limits(self):
         """
@@ -39,18 +39,30 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 
 import abc  # noqa
 import logging
-from boto3 import client
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from botocore.config import Config
 
 from .base import _AwsService
+from ..aio import (
+    gather_bounded, paginate_dict_async, run_in_executor,
+    call_with_throttle_backoff_async
+)
+from ..connectable import cached_client
 from ..limit import AwsLimit
-from ..utils import paginate_dict
+from ..utils import (
+    paginate_dict, paginate_dict_count, call_with_throttle_backoff
+)
 
 logger = logging.getLogger(__name__)
 
 #: Override the elbv2 API maximum retry attempts
 ELBV2_MAX_RETRY_ATTEMPTS = 12
 
+#: Default number of worker threads used to describe ELBv2 listeners and
+#: rules concurrently; see :py:attr:`~._ElbService.elbv2_workers`.
+ELBV2_WORKERS = 8
+
 
 class _ElbService(_AwsService):
     """
@@ -63,6 +75,10 @@ class _ElbService(_AwsService):
     api_name = 'elb'
     quotas_service_code = 'elasticloadbalancing'
 
+    #: Number of worker threads used to describe the listeners of each ALB
+    #: and NLB, and the rules of each ALB listener, concurrently.
+    elbv2_workers = ELBV2_WORKERS
+
     def find_usage(self):
         """
         Determine the current usage for each limit of this service,
@@ -74,6 +90,36 @@ class _ElbService(_AwsService):
             lim._reset_usage()
         elb_usage = self._find_usage_elbv1()
         alb_usage = self._find_usage_elbv2()
+        self._add_lb_usage(elb_usage, alb_usage)
+        self._have_usage = True
+        logger.debug("Done checking usage.")
+
+    async def find_usage_async(self):
+        """
+        Asynchronous version of :py:meth:`~.find_usage`, which checks ALBs and
+        their listeners concurrently, with at most
+        :py:attr:`~._AwsService.aio_concurrency` requests in flight. Classic
+        ELB usage (a single paginated call) is found synchronously in the
+        event loop's default executor.
+        """
+        logger.debug("Checking usage for service %s", self.service_name)
+        for lim in self.limits.values():
+            lim._reset_usage()
+        elb_usage = await run_in_executor(self._find_usage_elbv1)
+        alb_usage = await self._find_usage_elbv2_async()
+        self._add_lb_usage(elb_usage, alb_usage)
+        self._have_usage = True
+        logger.debug("Done checking usage.")
+
+    def _add_lb_usage(self, elb_usage, alb_usage):
+        """
+        Add usage for the Classic and Application load balancer count limits.
+
+        :param elb_usage: number of Classic ELBs in use
+        :type elb_usage: int
+        :param alb_usage: number of Application LBs in use
+        :type alb_usage: int
+        """
         logger.debug('ELBs in use: %d, ALBs in use: %d', elb_usage, alb_usage)
         self.limits['Classic load balancers']._add_current_usage(
             elb_usage,
@@ -83,8 +129,6 @@ class _ElbService(_AwsService):
             alb_usage,
             aws_type='AWS::ElasticLoadBalancingV2::LoadBalancer',
         )
-        self._have_usage = True
-        logger.debug("Done checking usage.")
 
     def _find_usage_elbv1(self):
         """
@@ -121,96 +165,259 @@ class _ElbService(_AwsService):
         """
         Find usage for ELBv2 / Application LB and update the appropriate limits.
 
+        The listeners of every ALB and NLB, and then the rules of every ALB
+        listener, are described concurrently on a pool of
+        :py:attr:`~.elbv2_workers` threads.
+
         :returns: number of Application LBs in use
         :rtype: int
         """
         logger.debug('Checking usage for ELBv2')
-        conn2 = client(
-            'elbv2',
-            config=Config(retries={'max_attempts': ELBV2_MAX_RETRY_ATTEMPTS}),
-            **self._boto3_connection_kwargs
+        conn2 = cached_client(
+            'elbv2', self._boto3_connection_kwargs,
+            config=Config(retries={'max_attempts': ELBV2_MAX_RETRY_ATTEMPTS})
         )
         logger.debug("Connected to %s in region %s (with max retry attempts "
                      "overridden to %d)", 'elbv2',
                      conn2._client_config.region_name, ELBV2_MAX_RETRY_ATTEMPTS)
         # Target groups
-        tgroups = paginate_dict(
+        tg_count = paginate_dict_count(
             conn2.describe_target_groups,
             alc_marker_path=['NextMarker'],
             alc_data_path=['TargetGroups'],
             alc_marker_param='Marker'
         )
         self.limits['Target groups']._add_current_usage(
-            len(tgroups['TargetGroups']),
+            tg_count,
             aws_type='AWS::ElasticLoadBalancingV2::TargetGroup'
         )
-        # ALBs
+        # ALBs and NLBs
         lbs = paginate_dict(
             conn2.describe_load_balancers,
             alc_marker_path=['NextMarker'],
             alc_data_path=['LoadBalancers'],
             alc_marker_param='Marker'
-        )
+        )['LoadBalancers']
+        albs = [x for x in lbs if x.get('Type') != 'network']
+        nlbs = [x for x in lbs if x.get('Type') == 'network']
         logger.debug(
-            'Checking usage for each of %d ALBs', len(lbs['LoadBalancers'])
-        )
-        alb_count = 0
-        nlb_count = 0
-        for lb in lbs['LoadBalancers']:
-            if lb.get('Type') == 'network':
-                nlb_count += 1
-            else:
-                alb_count += 1
-                self._update_usage_for_alb(
-                    conn2,
-                    lb['LoadBalancerArn'],
-                    lb['LoadBalancerName']
-                )
-        self.limits['Network load balancers']._add_current_usage(
-            nlb_count,
-            aws_type='AWS::ElasticLoadBalancing::NetworkLoadBalancer'
+            'Checking usage for each of %d ALBs and %d NLBs with %d workers',
+            len(albs), len(nlbs), self.elbv2_workers
         )
+        with ThreadPoolExecutor(max_workers=self.elbv2_workers) as executor:
+            listeners = list(executor.map(
+                lambda x: self._describe_listeners(
+                    conn2, x['LoadBalancerArn']
+                ),
+                albs + nlbs
+            ))
+            rule_counts = list(executor.map(
+                lambda x: self._count_rules(conn2, x['ListenerArn']),
+                [
+                    listener for lb in listeners[:len(albs)]
+                    for listener in lb
+                ]
+            ))
+        self._add_elbv2_usage(albs, nlbs, listeners, rule_counts)
+        logger.debug('Done with ELBv2 usage')
+        return len(albs)
+
+    async def _find_usage_elbv2_async(self):
+        """
+        Asynchronous version of :py:meth:`~._find_usage_elbv2`.
+
+        :returns: number of Application LBs in use
+        :rtype: int
+        """
+        logger.debug('Checking usage for ELBv2')
+        async with self.connect_async(
+            api_name='elbv2',
+            config=Config(retries={'max_attempts': ELBV2_MAX_RETRY_ATTEMPTS})
+        ) as conn2:
+            tgroups = await paginate_dict_async(
+                conn2.describe_target_groups,
+                alc_marker_path=['NextMarker'],
+                alc_data_path=['TargetGroups'],
+                alc_marker_param='Marker'
+            )
+            self.limits['Target groups']._add_current_usage(
+                len(tgroups['TargetGroups']),
+                aws_type='AWS::ElasticLoadBalancingV2::TargetGroup'
+            )
+            lbs = (await paginate_dict_async(
+                conn2.describe_load_balancers,
+                alc_marker_path=['NextMarker'],
+                alc_data_path=['LoadBalancers'],
+                alc_marker_param='Marker'
+            ))['LoadBalancers']
+            albs = [x for x in lbs if x.get('Type') != 'network']
+            nlbs = [x for x in lbs if x.get('Type') == 'network']
+            logger.debug(
+                'Checking usage for each of %d ALBs and %d NLBs',
+                len(albs), len(nlbs)
+            )
+            listeners = await gather_bounded(
+                [
+                    self._describe_listeners_async(
+                        conn2, x['LoadBalancerArn']
+                    ) for x in albs + nlbs
+                ],
+                self.aio_concurrency
+            )
+            rule_counts = await gather_bounded(
+                [
+                    self._count_rules_async(conn2, listener['ListenerArn'])
+                    for lb in listeners[:len(albs)] for listener in lb
+                ],
+                self.aio_concurrency
+            )
+        self._add_elbv2_usage(albs, nlbs, listeners, rule_counts)
         logger.debug('Done with ELBv2 usage')
-        return alb_count
+        return len(albs)
 
-    def _update_usage_for_alb(self, conn, alb_arn, alb_name):
+    def _describe_listeners(self, conn, lb_arn):
         """
-        Update usage for a single ALB.
+        Return the listeners of a single ALB or NLB, retrying each throttled
+        page request via :py:func:`~.utils.call_with_throttle_backoff`.
 
         :param conn: elbv2 API connection
         :type conn: :py:class:`ElasticLoadBalancing.Client`
-        :param alb_arn: Load Balancer ARN
-        :type alb_arn: str
-        :param alb_name: Load Balancer Name
-        :type alb_name: str
+        :param lb_arn: Load Balancer ARN
+        :type lb_arn: str
+        :returns: list of listener descriptions
+        :rtype: list
         """
-        logger.debug('Updating usage for ALB %s', alb_arn)
-        listeners = paginate_dict(
-            conn.describe_listeners,
-            LoadBalancerArn=alb_arn,
+        logger.debug('Describing listeners for %s', lb_arn)
+        return paginate_dict(
+            partial(call_with_throttle_backoff, conn.describe_listeners),
+            LoadBalancerArn=lb_arn,
             alc_marker_path=['NextMarker'],
             alc_data_path=['Listeners'],
             alc_marker_param='Marker'
         )['Listeners']
-        num_rules = 0
-        num_certs = 0
-        for l in listeners:
-            certs = [
-                x for x in l.get('Certificates', [])
-                if x.get('IsDefault', False) is False
-            ]
-            num_certs += len(certs)
-            rules = paginate_dict(
-                conn.describe_rules,
-                ListenerArn=l['ListenerArn'],
-                alc_marker_path=['NextMarker'],
-                alc_data_path=['Rules'],
-                alc_marker_param='Marker'
-            )['Rules']
-            num_rules += len(rules)
+
+    def _count_rules(self, conn, listener_arn):
+        """
+        Return the number of rules on a single ALB listener, retrying each
+        throttled page request via
+        :py:func:`~.utils.call_with_throttle_backoff`.
+
+        :param conn: elbv2 API connection
+        :type conn: :py:class:`ElasticLoadBalancing.Client`
+        :param listener_arn: Listener ARN
+        :type listener_arn: str
+        :rtype: int
+        """
+        return len(paginate_dict(
+            partial(call_with_throttle_backoff, conn.describe_rules),
+            ListenerArn=listener_arn,
+            alc_marker_path=['NextMarker'],
+            alc_data_path=['Rules'],
+            alc_marker_param='Marker'
+        )['Rules'])
+
+    async def _describe_listeners_async(self, conn, lb_arn):
+        """
+        Asynchronous version of :py:meth:`~._describe_listeners`.
+
+        :param conn: aiobotocore elbv2 client
+        :param lb_arn: Load Balancer ARN
+        :type lb_arn: str
+        :returns: list of listener descriptions
+        :rtype: list
+        """
+        logger.debug('Describing listeners for %s', lb_arn)
+        return (await paginate_dict_async(
+            partial(call_with_throttle_backoff_async, conn.describe_listeners),
+            LoadBalancerArn=lb_arn,
+            alc_marker_path=['NextMarker'],
+            alc_data_path=['Listeners'],
+            alc_marker_param='Marker'
+        ))['Listeners']
+
+    async def _count_rules_async(self, conn, listener_arn):
+        """
+        Asynchronous version of :py:meth:`~._count_rules`.
+
+        :param conn: aiobotocore elbv2 client
+        :param listener_arn: Listener ARN
+        :type listener_arn: str
+        :rtype: int
+        """
+        return len((await paginate_dict_async(
+            partial(call_with_throttle_backoff_async, conn.describe_rules),
+            ListenerArn=listener_arn,
+            alc_marker_path=['NextMarker'],
+            alc_data_path=['Rules'],
+            alc_marker_param='Marker'
+        ))['Rules'])
+
+    def _add_elbv2_usage(self, albs, nlbs, listeners, rule_counts):
+        """
+        Add usage for the ELBv2 limits from the results of describing all
+        load balancers, in the order the load balancers were listed.
+
+        :param albs: Application Load Balancer descriptions
+        :type albs: list
+        :param nlbs: Network Load Balancer descriptions
+        :type nlbs: list
+        :param listeners: lists of listener descriptions for each load
+          balancer in ``albs + nlbs``
+        :type listeners: list
+        :param rule_counts: number of rules on each listener of each ALB, in
+          order
+        :type rule_counts: list
+        """
+        idx = 0
+        for lb, lb_listeners in zip(albs, listeners):
+            num_rules = sum(rule_counts[idx:idx + len(lb_listeners)])
+            idx += len(lb_listeners)
+            self._add_alb_usage(
+                lb['LoadBalancerName'], len(lb_listeners), num_rules,
+                sum([self._count_alb_certs(x) for x in lb_listeners])
+            )
+        for lb, lb_listeners in zip(nlbs, listeners[len(albs):]):
+            self.limits[
+                'Listeners per network load balancer']._add_current_usage(
+                len(lb_listeners),
+                aws_type='AWS::ElasticLoadBalancingV2::NetworkLoadBalancer',
+                resource_id=lb['LoadBalancerName']
+            )
+        self.limits['Network load balancers']._add_current_usage(
+            len(nlbs),
+            aws_type='AWS::ElasticLoadBalancing::NetworkLoadBalancer'
+        )
+
+    @staticmethod
+    def _count_alb_certs(listener):
+        """
+        Return the number of non-default certificates on an ALB listener.
+
+        :param listener: listener description from DescribeListeners
+        :type listener: dict
+        :rtype: int
+        """
+        return len([
+            x for x in listener.get('Certificates', [])
+            if x.get('IsDefault', False) is False
+        ])
+
+    def _add_alb_usage(self, alb_name, num_listeners, num_rules, num_certs):
+        """
+        Add usage for the per-ALB limits for a single ALB.
+
+        :param alb_name: Load Balancer Name
+        :type alb_name: str
+        :param num_listeners: number of listeners on the ALB
+        :type num_listeners: int
+        :param num_rules: total number of rules on the ALB's listeners
+        :type num_rules: int
+        :param num_certs: number of non-default certificates on the ALB
+        :type num_certs: int
+        """
         self.limits[
             'Listeners per application load balancer']._add_current_usage(
-            len(listeners),
+            num_listeners,
             aws_type='AWS::ElasticLoadBalancingV2::LoadBalancer',
             resource_id=alb_name,
         )
@@ -227,32 +434,6 @@ class _ElbService(_AwsService):
             resource_id=alb_name
         )
 
-    def _update_usage_for_nlb(self, conn, nlb_arn, nlb_name):
-        """
-        Update usage for a single NLB.
-
-        :param conn: elbv2 API connection
-        :type conn: :py:class:`ElasticLoadBalancing.Client`
-        :param nlb_arn: Load Balancer ARN
-        :type nlb_arn: str
-        :param nlb_name: Load Balancer Name
-        :type nlb_name: str
-        """
-        logger.debug('Updating usage for NLB %s', nlb_arn)
-        listeners = paginate_dict(
-            conn.describe_listeners,
-            LoadBalancerArn=nlb_arn,
-            alc_marker_path=['NextMarker'],
-            alc_data_path=['Listeners'],
-            alc_marker_param='Marker'
-        )['Listeners']
-        self.limits[
-            'Listeners per network load balancer']._add_current_usage(
-            len(listeners),
-            aws_type='AWS::ElasticLoadBalancingV2::NetworkLoadBalancer',
-            resource_id=nlb_name
-        )
-
     def get_limits(self):
         """
         Return all known limits for this service, as a dict of their names
@@ -367,7 +548,9 @@ class _ElbService(_AwsService):
         """
         self.connect()
         logger.debug("Querying ELB DescribeAccountLimits for limits")
-        attribs = self.conn.describe_account_limits()
+        attribs = self._cached_api_call(
+            'DescribeAccountLimits', self.conn.describe_account_limits
+        )
         name_to_limits = {
             'classic-load-balancers': 'Classic load balancers',
             'classic-listeners': 'Listeners per load balancer',
@@ -382,11 +565,13 @@ class _ElbService(_AwsService):
                 continue
             self.limits[name_to_limits[name]]._set_api_limit(int(attrib['Max']))
         # connect to ELBv2 API as well
-        self.conn2 = client('elbv2', **self._boto3_connection_kwargs)
+        self.conn2 = cached_client('elbv2', self._boto3_connection_kwargs)
         logger.debug("Connected to %s in region %s",
                      'elbv2', self.conn2._client_config.region_name)
         logger.debug("Querying ELBv2 (ALB) DescribeAccountLimits for limits")
-        attribs = self.conn2.describe_account_limits()
+        attribs = self._cached_api_call(
+            'DescribeAccountLimitsV2', self.conn2.describe_account_limits
+        )
         name_to_limits = {
             'application-load-balancers': 'Application load balancers',
             'target-groups': 'Target groups',
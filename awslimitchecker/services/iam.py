@@ -51,6 +51,7 @@ class _IamService(_AwsService):
     service_name = 'IAM'
     api_name = 'iam'
     quotas_service_code = 'iam'
+    is_global = True
 
     # mapping of iam.AccountSummary() key to limit name
     API_TO_LIMIT_NAME = {
@@ -158,8 +159,10 @@ class _IamService(_AwsService):
         update AwsLimit objects in ``self.limits`` with this information.
         """
         self.connect_resource()
-        summary = self.resource_conn.AccountSummary()
-        for k, v in sorted(summary.summary_map.items()):
+        summary_map = self._cached_api_call(
+            'GetAccountSummary', self._get_account_summary_map
+        )
+        for k, v in sorted(summary_map.items()):
             if k in self.API_TO_LIMIT_NAME:
                 # this is a usage for one of our limits
                 lname = self.API_TO_LIMIT_NAME[k]
@@ -172,6 +175,14 @@ class _IamService(_AwsService):
             else:
                 logger.debug("Ignoring IAM AccountSummary attribute: %s", k)
 
+    def _get_account_summary_map(self):
+        """
+        Return the ``SummaryMap`` of the IAM AccountSummary.
+
+        :rtype: dict
+        """
+        return self.resource_conn.AccountSummary().summary_map
+
     def required_iam_permissions(self):
         """
         Return a list of IAM Actions required for this Service to function
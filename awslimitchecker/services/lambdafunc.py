@@ -96,7 +96,9 @@ class _LambdaService(_AwsService):
         if len(self.limits) == 2:
             return
         self.connect()
-        lims = self.conn.get_account_settings()['AccountLimit']
+        lims = self._cached_api_call(
+            'GetAccountSettings', self.conn.get_account_settings
+        )['AccountLimit']
         self.limits['Total Code Size (MiB)']._set_api_limit(
             (lims['TotalCodeSize']/1048576))
         self.limits['Code Size Unzipped (MiB) per Function']._set_api_limit(
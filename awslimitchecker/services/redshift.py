@@ -42,7 +42,7 @@ import logging
 
 from .base import _AwsService
 from ..limit import AwsLimit
-from ..utils import paginate_dict
+from ..utils import paginate_dict, paginate_dict_count
 
 logger = logging.getLogger(__name__)
 
@@ -68,7 +68,7 @@ class _RedshiftService(_AwsService):
         logger.debug("Done checking usage.")
 
     def _find_cluster_manual_snapshots(self):
-        results = paginate_dict(
+        count = paginate_dict_count(
             self.conn.describe_cluster_snapshots,
             alc_marker_path=['Marker'],
             alc_data_path=['Snapshots'],
@@ -76,7 +76,7 @@ class _RedshiftService(_AwsService):
             SnapshotType='manual'
         )
         self.limits['Redshift manual snapshots']._add_current_usage(
-            len(results['Snapshots']),
+            count,
             resource_id=self._boto3_connection_kwargs['region_name'],
             aws_type='AWS::Redshift::Snapshot',
         )
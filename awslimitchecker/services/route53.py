@@ -43,13 +43,23 @@ import logging
 from .base import _AwsService
 from ..limit import AwsLimit
 from ..utils import paginate_dict
+from ..aio import gather_bounded, paginate_dict_async, run_in_executor
 
 logger = logging.getLogger(__name__)
 
+#: Default number of seconds that per-hosted-zone record set limits stored in
+#: a :py:class:`~.PersistentCache` are considered fresh.
+HOSTED_ZONE_LIMITS_CACHE_TTL = 86400
+
 
 class _Route53Service(_AwsService):
     service_name = 'Route53'
     api_name = 'route53'  # AWS API name to connect to (boto3.client)
+    is_global = True
+
+    #: number of seconds that each hosted zone's record set limit in
+    #: :py:attr:`~._AwsService.persistent_cache` is fresh for
+    hosted_zone_limits_cache_ttl = HOSTED_ZONE_LIMITS_CACHE_TTL
 
     # Route53 limit types
     MAX_RRSETS_BY_ZONE = {
@@ -81,6 +91,47 @@ class _Route53Service(_AwsService):
         self._find_limit_hosted_zone()
         logger.debug('Done setting limits from API.')
 
+    async def _update_limits_from_api_async(self):
+        """
+        Asynchronous version of :py:meth:`~._update_limits_from_api`, which
+        makes all of the GetHostedZoneLimit queries (see
+        :py:meth:`~._hosted_zone_limit_queries`) concurrently, with at most
+        :py:attr:`~._AwsService.aio_concurrency` requests in flight.
+        """
+        logger.info("Querying Route53 GetHostedZoneLimits for limits")
+        async with self.connect_async() as conn:
+            zones = (await paginate_dict_async(
+                conn.list_hosted_zones,
+                alc_marker_path=['NextMarker'],
+                alc_data_path=['HostedZones'],
+                alc_marker_param='Marker'
+            ))['HostedZones']
+            # look up the account ID for cache keys outside the event loop
+            await run_in_executor(self._persistent_cache_key)
+            zone_limits = dict(
+                (zone['Id'], self._cached_hosted_zone_limits(zone))
+                for zone in zones
+            )
+            queries = self._hosted_zone_limit_queries(zones, zone_limits)
+            results = await gather_bounded(
+                [
+                    conn.get_hosted_zone_limit(
+                        Type=limit_type['type'], HostedZoneId=zone['Id']
+                    ) for zone, limit_type in queries
+                ],
+                self.aio_concurrency
+            )
+        fetched = {}
+        for (zone, limit_type), limit in zip(queries, results):
+            fetched.setdefault(zone['Id'], {})[limit_type['type']] = {
+                'Count': limit['Count'], 'Limit': limit['Limit']
+            }
+        for zone in zones:
+            zone_limits[zone['Id']].update(fetched.get(zone['Id'], {}))
+            self._store_hosted_zone_limits(zone, fetched.get(zone['Id'], {}))
+        self._add_hosted_zones_usage(zones, zone_limits)
+        logger.debug('Done setting limits from API.')
+
     def get_limits(self):
         """
         Return all known limits for this service, as a dict of their names
@@ -141,29 +192,198 @@ class _Route53Service(_AwsService):
     def _find_limit_hosted_zone(self):
         """
         Calculate the max recordsets and vpc associations and the current values
-        per hosted zone
+        per hosted zone. Record set usage is taken from the
+        ``ResourceRecordSetCount`` in the ListHostedZones response, so the
+        record set limit is only queried for zones that do not have a fresh
+        entry in the persistent cache. VPC associations are queried for every
+        private zone on every run.
         """
-        for limit_type in [self.MAX_RRSETS_BY_ZONE,
-                           self.MAX_VPCS_ASSOCIATED_BY_ZONE]:
-            self.limits[limit_type["name"]]._reset_usage()
+        zones = self._cached_api_call('ListHostedZones', self._get_hosted_zones)
+        zone_limits = {}
+        for hosted_zone in zones:
+            zone_limits[hosted_zone['Id']] = self._cached_api_call(
+                ('GetHostedZoneLimits', hosted_zone['Id']),
+                self._get_hosted_zone_limits, hosted_zone
+            )
+        self._add_hosted_zones_usage(zones, zone_limits)
+
+    def _get_hosted_zone_limits(self, hosted_zone):
+        """
+        Return the GetHostedZoneLimit ``Limit`` (and ``Count``, unless the
+        limit came from the persistent cache) for each limit type that
+        applies to ``hosted_zone``. Limits that are not in the persistent
+        cache are retrieved from the API; see
+        :py:meth:`~._store_hosted_zone_limits`.
+
+        :param hosted_zone: hosted zone from ListHostedZones
+        :type hosted_zone: dict
+        :returns: dict of limit type to dict with ``Limit`` and optionally
+          ``Count`` keys
+        :rtype: dict
+        """
+        limits = self._cached_hosted_zone_limits(hosted_zone)
+        fetched = {}
+        for _, limit_type in self._hosted_zone_limit_queries(
+            [hosted_zone], {hosted_zone['Id']: limits}
+        ):
+            resp = self._get_hosted_zone_limit(
+                limit_type['type'], hosted_zone['Id']
+            )
+            fetched[limit_type['type']] = {
+                'Count': resp['Count'], 'Limit': resp['Limit']
+            }
+        limits.update(fetched)
+        self._store_hosted_zone_limits(hosted_zone, fetched)
+        return limits
+
+    def _hosted_zone_limits_cache_key(self, hosted_zone):
+        """
+        Return the persistent cache key for a hosted zone's limits, scoped
+        to the account and region by :py:meth:`~._persistent_cache_key`.
+
+        :param hosted_zone: hosted zone from ListHostedZones
+        :type hosted_zone: dict
+        :rtype: str
+        """
+        return self._persistent_cache_key(
+            'hosted-zone-limits', hosted_zone['Id'].split('/')[-1]
+        )
+
+    def _cacheable_limits(self, hosted_zone, limits):
+        """
+        Return the limit values from ``limits`` that may be kept in the
+        persistent cache. Only the record set limit is cached, and only for
+        zones whose record set usage comes from ``ResourceRecordSetCount``;
+        usage counts are never cached, so they are always current.
+
+        :param hosted_zone: hosted zone from ListHostedZones
+        :type hosted_zone: dict
+        :param limits: dict of limit type to GetHostedZoneLimit ``Count`` and
+          ``Limit``
+        :type limits: dict
+        :returns: dict of limit type to dict with a ``Limit`` key
+        :rtype: dict
+        """
+        res = {}
+        t = self.MAX_RRSETS_BY_ZONE['type']
+        if t in limits and 'ResourceRecordSetCount' in hosted_zone:
+            res[t] = {'Limit': {'Value': limits[t]['Limit']['Value']}}
+        return res
+
+    def _cached_hosted_zone_limits(self, hosted_zone):
+        """
+        Return the cacheable limits (see :py:meth:`~._cacheable_limits`) for
+        ``hosted_zone`` from the persistent cache, or an empty dict if there
+        is no fresh entry for it.
 
-        for hosted_zone in self._get_hosted_zones():
+        :param hosted_zone: hosted zone from ListHostedZones
+        :type hosted_zone: dict
+        :rtype: dict
+        """
+        cached = self._persistent_cache_get(
+            self._hosted_zone_limits_cache_key(hosted_zone),
+            self.hosted_zone_limits_cache_ttl
+        )
+        if cached is None:
+            return {}
+        return self._cacheable_limits(hosted_zone, cached)
+
+    def _store_hosted_zone_limits(self, hosted_zone, fetched):
+        """
+        Store the cacheable limits (see :py:meth:`~._cacheable_limits`) that
+        were just retrieved from the API for ``hosted_zone`` in the
+        persistent cache, if there are any.
+
+        :param hosted_zone: hosted zone from ListHostedZones
+        :type hosted_zone: dict
+        :param fetched: dict of limit type to GetHostedZoneLimit ``Count``
+          and ``Limit`` retrieved in this run
+        :type fetched: dict
+        """
+        limits = self._cacheable_limits(hosted_zone, fetched)
+        if len(limits) == 0:
+            return
+        self._persistent_cache_set(
+            self._hosted_zone_limits_cache_key(hosted_zone), limits
+        )
+
+    def _hosted_zone_limit_queries(self, hosted_zones, zone_limits=None):
+        """
+        Return the list of (hosted zone, limit type) pairs to query
+        GetHostedZoneLimit for. VPC associations are only checked for private
+        zones.
+
+        :param hosted_zones: list of hosted zones from ListHostedZones
+        :type hosted_zones: list
+        :param zone_limits: optional dict of hosted zone ID to dict of limit
+          types already known (i.e. from the persistent cache), which are not
+          queried
+        :type zone_limits: dict
+        :rtype: list
+        """
+        if zone_limits is None:
+            zone_limits = {}
+        queries = []
+        for hosted_zone in hosted_zones:
+            known = zone_limits.get(hosted_zone['Id'], {})
             for limit_type in [self.MAX_RRSETS_BY_ZONE,
                                self.MAX_VPCS_ASSOCIATED_BY_ZONE]:
 
                 if limit_type == self.MAX_VPCS_ASSOCIATED_BY_ZONE and \
                         not hosted_zone["Config"]["PrivateZone"]:
                     continue
+                if limit_type['type'] in known:
+                    continue
+                queries.append((hosted_zone, limit_type))
+        return queries
 
-                limit = self._get_hosted_zone_limit(limit_type["type"],
-                                                    hosted_zone['Id'])
-
-                self.limits[limit_type["name"]]._add_current_usage(
-                    int(limit["Count"]),
-                    maximum=int(limit["Limit"]["Value"]),
-                    aws_type='AWS::Route53::HostedZone',
-                    resource_id=hosted_zone["Name"]
-                )
+    def _add_hosted_zones_usage(self, hosted_zones, zone_limits):
+        """
+        Reset usage for the per-hosted-zone limits, then add usage for each
+        hosted zone.
+
+        :param hosted_zones: list of hosted zones from ListHostedZones
+        :type hosted_zones: list
+        :param zone_limits: dict of hosted zone ID to the return value of
+          :py:meth:`~._get_hosted_zone_limits` for that zone
+        :type zone_limits: dict
+        """
+        for limit_type in [self.MAX_RRSETS_BY_ZONE,
+                           self.MAX_VPCS_ASSOCIATED_BY_ZONE]:
+            self.limits[limit_type["name"]]._reset_usage()
+        for hosted_zone, limit_type in self._hosted_zone_limit_queries(
+            hosted_zones
+        ):
+            limits = zone_limits[hosted_zone['Id']]
+            self._add_hosted_zone_usage(
+                hosted_zone, limit_type, limits[limit_type['type']]
+            )
+
+    def _add_hosted_zone_usage(self, hosted_zone, limit_type, limit):
+        """
+        Add usage for one hosted zone limit. Record set usage is taken from
+        the zone's ``ResourceRecordSetCount`` if present.
+
+        :param hosted_zone: hosted zone from ListHostedZones
+        :type hosted_zone: dict
+        :param limit_type: limit type; one of ``MAX_RRSETS_BY_ZONE`` or
+          ``MAX_VPCS_ASSOCIATED_BY_ZONE``
+        :type limit_type: dict
+        :param limit: GetHostedZoneLimit ``Limit`` and (unless it came from
+          the persistent cache) ``Count``
+        :type limit: dict
+        """
+        if limit_type == self.MAX_RRSETS_BY_ZONE and \
+                'ResourceRecordSetCount' in hosted_zone:
+            count = hosted_zone['ResourceRecordSetCount']
+        else:
+            count = limit["Count"]
+        self.limits[limit_type["name"]]._add_current_usage(
+            int(count),
+            maximum=int(limit["Limit"]["Value"]),
+            aws_type='AWS::Route53::HostedZone',
+            resource_id=hosted_zone["Name"]
+        )
 
     def required_iam_permissions(self):
         """
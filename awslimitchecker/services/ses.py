@@ -64,7 +64,9 @@ class _SesService(_AwsService):
             lim._reset_usage()
         try:
             self.connect()
-            resp = self.conn.get_send_quota()
+            resp = self._cached_api_call(
+                'GetSendQuota', self.conn.get_send_quota
+            )
         except EndpointConnectionError as ex:
             logger.warning('Skipping SES: %s', str(ex))
             return
@@ -108,7 +110,9 @@ class _SesService(_AwsService):
         """
         try:
             self.connect()
-            resp = self.conn.get_send_quota()
+            resp = self._cached_api_call(
+                'GetSendQuota', self.conn.get_send_quota
+            )
         except EndpointConnectionError as ex:
             logger.warning('Skipping SES: %s', str(ex))
             return
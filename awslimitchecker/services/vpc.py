@@ -41,7 +41,7 @@ import abc  # noqa
 import logging
 from collections import defaultdict
 
-from .base import _AwsService
+from .base import _AwsService, _summarize_network_interfaces
 from ..limit import AwsLimit
 from ..utils import paginate_dict
 from botocore.exceptions import ClientError
@@ -216,15 +216,13 @@ class _VpcService(_AwsService):
 
     def _find_usage_network_interfaces(self):
         """find usage of network interfaces"""
-        enis = paginate_dict(
-            self.conn.describe_network_interfaces,
-            alc_marker_path=['NextToken'],
-            alc_data_path=['NetworkInterfaces'],
-            alc_marker_param='NextToken'
+        summary = self._shared_paginated_summary(
+            'describe_network_interfaces', 'NetworkInterfaces',
+            _summarize_network_interfaces
         )
 
         self.limits['Network interfaces per Region']._add_current_usage(
-            len(enis['NetworkInterfaces']),
+            summary['count'],
             aws_type='AWS::EC2::NetworkInterface'
         )
 
@@ -352,7 +350,9 @@ class _VpcService(_AwsService):
         self.connect()
         self.connect_resource()
         logger.info("Querying EC2 DescribeAccountAttributes for limits")
-        attribs = self.conn.describe_account_attributes()
+        attribs = self._cached_api_call(
+            'DescribeAccountAttributes', self.conn.describe_account_attributes
+        )
         for attrib in attribs['AccountAttributes']:
             if attrib['AttributeName'] == 'max-instances':
                 val = attrib['AttributeValues'][0]['AttributeValue']
@@ -37,68 +37,11 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 ################################################################################
 """
 
-import sys
 from datetime import datetime
-import boto3
-from boto3.utils import ServiceContext
-
-# https://code.google.com/p/mock/issues/detail?id=249
-# py>=3.4 should use unittest.mock not the mock package on pypi
-if (
-        sys.version_info[0] < 3 or
-        sys.version_info[0] == 3 and sys.version_info[1] < 4
-):
-    from mock import Mock
-else:
-    from unittest.mock import Mock
 
 # boto3 response fixtures
 
 
-def get_boto3_resource_model(service_name, resource_name):
-    """
-    Return a boto3 resource model class for the given service_name and
-    resource_name (type).
-
-    NOTE that when the boto3.session.Session object is instantiated, the
-     underlying botocore Session will attempt HTTP requests to 169.254.169.254
-     to retrieve Instance Metadata and an IAM Role. In order to prevent this,
-     you should simply export some bogus AWS credential environment variables.
-
-    :param service_name: name of the service
-    :type service_name: str
-    :param resource_name: name of the resource type/model to get
-    :type resource_name: str
-    :return: boto3 resource model class
-    """
-    session = boto3.session.Session(region_name='us-east-1')
-    loader = session._session.get_component('data_loader')
-    json_resource_model = loader.load_service_model(service_name,
-                                                    'resources-1')
-    service_resource = session.resource(service_name)
-    service_model = service_resource.meta.client.meta.service_model
-
-    resource_model = json_resource_model['resources'][resource_name]
-    resource_cls = session.resource_factory.load_from_definition(
-        resource_name=resource_name,
-        single_resource_json_definition=resource_model,
-        service_context=ServiceContext(
-            service_name=service_name,
-            resource_json_definitions=json_resource_model['resources'],
-            service_model=service_model,
-            service_waiter_model=None
-        )
-    )
-    return resource_cls
-
-# get some resource models for specs...
-Instance = get_boto3_resource_model('ec2', 'Instance')
-SecurityGroup = get_boto3_resource_model('ec2', 'SecurityGroup')
-ClassicAddress = get_boto3_resource_model('ec2', 'ClassicAddress')
-VpcAddress = get_boto3_resource_model('ec2', 'VpcAddress')
-NetworkInterface = get_boto3_resource_model('ec2', 'NetworkInterface')
-
-
 class EBS(object):
 
     test_find_usage_ebs = {
@@ -1844,706 +1787,685 @@ class EC2(object):
 
     @property
     def test_instance_usage(self):
-        mock_inst1A = Mock(spec_set=Instance)
-        type(mock_inst1A).id = '1A'
-        type(mock_inst1A).instance_type = 't2.micro'
-        type(mock_inst1A).spot_instance_request_id = None
-        type(mock_inst1A).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst1A).state = {'Code': 16, 'Name': 'running'}
-
-        mock_inst1B = Mock(spec_set=Instance)
-        type(mock_inst1B).id = '1B'
-        type(mock_inst1B).instance_type = 'r3.2xlarge'
-        type(mock_inst1B).spot_instance_request_id = None
-        type(mock_inst1B).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst1B).state = {'Code': 0, 'Name': 'pending'}
-
-        mock_inst2A = Mock(spec_set=Instance)
-        type(mock_inst2A).id = '2A'
-        type(mock_inst2A).instance_type = 'c4.4xlarge'
-        type(mock_inst2A).spot_instance_request_id = None
-        type(mock_inst2A).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst2A).state = {'Code': 32, 'Name': 'shutting-down'}
-
-        mock_inst2B = Mock(spec_set=Instance)
-        type(mock_inst2B).id = '2B'
-        type(mock_inst2B).instance_type = 't2.micro'
-        type(mock_inst2B).spot_instance_request_id = '1234'
-        type(mock_inst2B).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst2B).state = {'Code': 64, 'Name': 'stopping'}
-
-        mock_inst2C = Mock(spec_set=Instance)
-        type(mock_inst2C).id = '2C'
-        type(mock_inst2C).instance_type = 'm4.8xlarge'
-        type(mock_inst2C).spot_instance_request_id = None
-        type(mock_inst2C).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst2C).state = {'Code': 16, 'Name': 'running'}
-
-        mock_instStopped = Mock(spec_set=Instance)
-        type(mock_instStopped).id = '2C'
-        type(mock_instStopped).instance_type = 'm4.8xlarge'
-        type(mock_instStopped).spot_instance_request_id = None
-        type(mock_instStopped).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_instStopped).state = {'Code': 80, 'Name': 'stopped'}
-
-        mock_instTerm = Mock(spec_set=Instance)
-        type(mock_instTerm).id = '2C'
-        type(mock_instTerm).instance_type = 'm4.8xlarge'
-        type(mock_instTerm).spot_instance_request_id = None
-        type(mock_instTerm).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_instTerm).state = {'Code': 48, 'Name': 'terminated'}
-
-        return_value = [
-            mock_inst1A,
-            mock_inst1B,
-            mock_inst2A,
-            mock_inst2B,
-            mock_inst2C,
-            mock_instStopped,
-            mock_instTerm
-        ]
-        return return_value
-
-    @property
-    def test_instance_usage_vcpu(self):
-        mock_inst1A = Mock(spec_set=Instance)
-        type(mock_inst1A).id = '1A'
-        type(mock_inst1A).instance_type = 't2.micro'
-        type(mock_inst1A).spot_instance_request_id = None
-        type(mock_inst1A).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst1A).state = {'Code': 16, 'Name': 'running'}
-        type(mock_inst1A).cpu_options = {'CoreCount': 1, 'ThreadsPerCore': 2}
-
-        mock_inst1B = Mock(spec_set=Instance)
-        type(mock_inst1B).id = '1B'
-        type(mock_inst1B).instance_type = 'r3.2xlarge'
-        type(mock_inst1B).spot_instance_request_id = None
-        type(mock_inst1B).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst1B).state = {'Code': 0, 'Name': 'pending'}
-        type(mock_inst1B).cpu_options = {'CoreCount': 4, 'ThreadsPerCore': 2}
-
-        mock_inst2A = Mock(spec_set=Instance)
-        type(mock_inst2A).id = '2A'
-        type(mock_inst2A).instance_type = 'c4.4xlarge'
-        type(mock_inst2A).spot_instance_request_id = None
-        type(mock_inst2A).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst2A).state = {'Code': 32, 'Name': 'shutting-down'}
-        type(mock_inst2A).cpu_options = {'CoreCount': 8, 'ThreadsPerCore': 2}
-
-        mock_inst2B = Mock(spec_set=Instance)
-        type(mock_inst2B).id = '2B'
-        type(mock_inst2B).instance_type = 't2.micro'
-        type(mock_inst2B).spot_instance_request_id = '1234'
-        type(mock_inst2B).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst2B).state = {'Code': 64, 'Name': 'stopping'}
-        type(mock_inst2B).cpu_options = {'CoreCount': 1, 'ThreadsPerCore': 2}
-
-        mock_inst2C = Mock(spec_set=Instance)
-        type(mock_inst2C).id = '2C'
-        type(mock_inst2C).instance_type = 'm4.8xlarge'
-        type(mock_inst2C).spot_instance_request_id = None
-        type(mock_inst2C).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst2C).state = {'Code': 16, 'Name': 'running'}
-        type(mock_inst2C).cpu_options = {'CoreCount': 16, 'ThreadsPerCore': 2}
-
-        mock_instStopped = Mock(spec_set=Instance)
-        type(mock_instStopped).id = 'instStopped'
-        type(mock_instStopped).instance_type = 'm4.8xlarge'
-        type(mock_instStopped).spot_instance_request_id = None
-        type(mock_instStopped).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_instStopped).state = {'Code': 80, 'Name': 'stopped'}
-        type(mock_instStopped).cpu_options = {
-            'CoreCount': 16, 'ThreadsPerCore': 2
+        inst1A = {
+            'InstanceId': '1A',
+            'InstanceType': 't2.micro',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 16, 'Name': 'running'}
         }
-
-        mock_instTerm = Mock(spec_set=Instance)
-        type(mock_instTerm).id = '2C'
-        type(mock_instTerm).instance_type = 'm4.8xlarge'
-        type(mock_instTerm).spot_instance_request_id = None
-        type(mock_instTerm).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_instTerm).state = {'Code': 48, 'Name': 'terminated'}
-        type(mock_instTerm).cpu_options = {'CoreCount': 16, 'ThreadsPerCore': 2}
-
-        mock_inst2D = Mock(spec_set=Instance)
-        type(mock_inst2D).id = '2D'
-        type(mock_inst2D).instance_type = 'f1.16xlarge'
-        type(mock_inst2D).spot_instance_request_id = None
-        type(mock_inst2D).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst2D).state = {'Code': 16, 'Name': 'running'}
-        type(mock_inst2D).cpu_options = {'CoreCount': 32, 'ThreadsPerCore': 2}
-
-        mock_inst2E = Mock(spec_set=Instance)
-        type(mock_inst2E).id = '2E'
-        type(mock_inst2E).instance_type = 'f1.2xlarge'
-        type(mock_inst2E).spot_instance_request_id = None
-        type(mock_inst2E).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst2E).state = {'Code': 16, 'Name': 'running'}
-        type(mock_inst2E).cpu_options = {'CoreCount': 4, 'ThreadsPerCore': 2}
-
-        mock_inst2F = Mock(spec_set=Instance)
-        type(mock_inst2F).id = '2F'
-        type(mock_inst2F).instance_type = 'g4dn.12xlarge'
-        type(mock_inst2F).spot_instance_request_id = None
-        type(mock_inst2F).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst2F).state = {'Code': 16, 'Name': 'running'}
-        type(mock_inst2F).cpu_options = {'CoreCount': 12, 'ThreadsPerCore': 4}
-
-        mock_inst3A = Mock(spec_set=Instance)
-        type(mock_inst1A).id = '3A'
-        type(mock_inst3A).instance_type = 'p2.16xlarge'
-        type(mock_inst3A).spot_instance_request_id = None
-        type(mock_inst3A).placement = {'AvailabilityZone': 'az1c'}
-        type(mock_inst3A).state = {'Code': 16, 'Name': 'running'}
-        type(mock_inst3A).cpu_options = {'CoreCount': 32, 'ThreadsPerCore': 2}
-
-        mock_inst3F = Mock(spec_set=Instance)
-        type(mock_inst3F).id = '3F'
-        type(mock_inst3F).instance_type = 'p2.8xlarge'
-        type(mock_inst3F).spot_instance_request_id = None
-        type(mock_inst3F).placement = {'AvailabilityZone': 'az1c'}
-        type(mock_inst3F).state = {'Code': 16, 'Name': 'running'}
-        type(mock_inst3F).cpu_options = {'CoreCount': 16, 'ThreadsPerCore': 2}
-
-        mock_inst3G = Mock(spec_set=Instance)
-        type(mock_inst3G).id = '3G'
-        type(mock_inst3G).instance_type = 'p2.8xlarge'
-        type(mock_inst3G).spot_instance_request_id = None
-        type(mock_inst3G).placement = {'AvailabilityZone': 'az1c'}
-        type(mock_inst3G).state = {'Code': 16, 'Name': 'running'}
-        type(mock_inst3G).cpu_options = {'CoreCount': 16, 'ThreadsPerCore': 2}
-
-        mock_inst3B = Mock(spec_set=Instance)
-        type(mock_inst3B).id = '3B'
-        type(mock_inst3B).instance_type = 'r3.2xlarge'
-        type(mock_inst3B).spot_instance_request_id = None
-        type(mock_inst3B).placement = {'AvailabilityZone': 'az1c'}
-        type(mock_inst3B).state = {'Code': 16, 'Name': 'running'}
-        type(mock_inst3B).cpu_options = {'CoreCount': 4, 'ThreadsPerCore': 2}
-
-        mock_inst3C = Mock(spec_set=Instance)
-        type(mock_inst3C).id = '3C'
-        type(mock_inst3C).instance_type = 'x1e.32xlarge'
-        type(mock_inst3C).spot_instance_request_id = None
-        type(mock_inst3C).placement = {'AvailabilityZone': 'az1c'}
-        type(mock_inst3C).state = {'Code': 32, 'Name': 'stopped'}
-        type(mock_inst3C).cpu_options = {'CoreCount': 32, 'ThreadsPerCore': 4}
-
-        mock_inst3D = Mock(spec_set=Instance)
-        type(mock_inst3D).id = '3D'
-        type(mock_inst3D).instance_type = 'x1e.32xlarge'
-        type(mock_inst3D).spot_instance_request_id = None
-        type(mock_inst3D).placement = {'AvailabilityZone': 'az1c'}
-        type(mock_inst3D).state = {'Code': 16, 'Name': 'running'}
-        type(mock_inst3D).cpu_options = {'CoreCount': 32, 'ThreadsPerCore': 4}
-
-        mock_inst3E = Mock(spec_set=Instance)
-        type(mock_inst3E).id = '3E'
-        type(mock_inst3E).instance_type = 'x1e.32xlarge'
-        type(mock_inst3E).spot_instance_request_id = None
-        type(mock_inst3E).placement = {'AvailabilityZone': 'az1c'}
-        type(mock_inst3E).state = {'Code': 16, 'Name': 'running'}
-        type(mock_inst3E).cpu_options = {'CoreCount': 32, 'ThreadsPerCore': 4}
-
-        return_value = [
-            mock_inst1A,
-            mock_inst1B,
-            mock_inst2A,
-            mock_inst2B,
-            mock_inst2C,
-            mock_instStopped,
-            mock_instTerm,
-            mock_inst2D,
-            mock_inst2E,
-            mock_inst2F,
-            mock_inst3A,
-            mock_inst3B,
-            mock_inst3C,
-            mock_inst3D,
-            mock_inst3E,
-            mock_inst3F,
-            mock_inst3G,
-        ]
-        return return_value
-
-    @property
-    def test_instance_usage_key_error(self):
-        mock_inst1A = Mock(spec_set=Instance)
-        type(mock_inst1A).id = '1A'
-        type(mock_inst1A).instance_type = 'foobar'
-        type(mock_inst1A).spot_instance_request_id = None
-        type(mock_inst1A).placement = {'AvailabilityZone': 'az1a'}
-        type(mock_inst1A).state = {'Code': 16, 'Name': 'running'}
-        return [mock_inst1A]
-
-    @property
-    def test_find_usage_networking_sgs(self):
-        mock_sg1 = Mock(spec_set=SecurityGroup)
-        type(mock_sg1).id = 'sg-1'
-        type(mock_sg1).vpc_id = 'vpc-aaa'
-        type(mock_sg1).ip_permissions = []
-        type(mock_sg1).ip_permissions_egress = []
-        mock_sg2 = Mock(spec_set=SecurityGroup)
-        type(mock_sg2).id = 'sg-2'
-        type(mock_sg2).vpc_id = 'vpc-aaa'
-        type(mock_sg2).ip_permissions = [
-            {
-                'FromPort': 1,
-                'ToPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {1: 1}, {2: 2}, {3: 3}, {4: 4}
-                ],
-                'Ipv6Ranges': [
-                    {1: 1}, {2: 2}
-                ],
-                'PrefixListIds': [
-                    {'p1': 'p1'},
-                ],
-                'UserIdGroupPairs': [
-                    {'a': 'a'}, {'b': 'b'}
-                ]
-            },
-            {
-                'FromPort': 2,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {1: 1},
-                ],
-                'Ipv6Ranges': [],
-                'PrefixListIds': [],
-                'ToPort': 123,
-                'UserIdGroupPairs': []
-            },
-            {
-                'FromPort': 3,
-                'IpProtocol': 'string',
-                'IpRanges': [],
-                'Ipv6Ranges': [
-                    {1: 1},
-                ],
-                'PrefixListIds': [],
-                'ToPort': 123,
-                'UserIdGroupPairs': [
-                    {'a': 'a'},
-                ]
-            },
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [],
-                'Ipv6Ranges': [],
-                'PrefixListIds': [
-                    {'a': 'a'},
-                ],
-                'ToPort': 1,
-                'UserIdGroupPairs': [
-                    {'b': 'b'},
-                ]
-            },
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {'c': 'c'},
-                ],
-                'Ipv6Ranges': [
-                    {4: 4},
-                ],
-                'PrefixListIds': [
-                    {5: 5}, {6: 6}
-                ],
-                'ToPort': 2,
-                'UserIdGroupPairs': []
-            },
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [],
-                'Ipv6Ranges': [],
-                'PrefixListIds': [
-                    {2: 2},
-                ],
-                'ToPort': 3,
-                'UserIdGroupPairs': []
-            }
-        ]
-        type(mock_sg2).ip_permissions_egress = [
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {1: 1},
-                ],
-                'Ipv6Ranges': [
-                    {2: 2}, {3: 3}, {4: 4}
-                ],
-                'PrefixListIds': [
-                    {5: 5},
-                ],
-                'ToPort': 1,
-                'UserIdGroupPairs': [
-                    {6: 6},
-                ]
-            },
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [],
-                'Ipv6Ranges': [
-                    {7: 7},
-                ],
-                'PrefixListIds': [],
-                'ToPort': 2,
-                'UserIdGroupPairs': []
-            },
+        inst1B = {
+            'InstanceId': '1B',
+            'InstanceType': 'r3.2xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 0, 'Name': 'pending'}
+        }
+        inst2A = {
+            'InstanceId': '2A',
+            'InstanceType': 'c4.4xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 32, 'Name': 'shutting-down'}
+        }
+        inst2B = {
+            'InstanceId': '2B',
+            'InstanceType': 't2.micro',
+            'SpotInstanceRequestId': '1234',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 64, 'Name': 'stopping'}
+        }
+        inst2C = {
+            'InstanceId': '2C',
+            'InstanceType': 'm4.8xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 16, 'Name': 'running'}
+        }
+        instStopped = {
+            'InstanceId': '2C',
+            'InstanceType': 'm4.8xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 80, 'Name': 'stopped'}
+        }
+        instTerm = {
+            'InstanceId': '2C',
+            'InstanceType': 'm4.8xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 48, 'Name': 'terminated'}
+        }
+        return [
+            {'Reservations': [{'Instances': [inst1A, inst1B, inst2A]}]},
             {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [],
-                'Ipv6Ranges': [
-                    {8: 8},
-                ],
-                'PrefixListIds': [],
-                'ToPort': 3,
-                'UserIdGroupPairs': []
-            }
-        ]
-        mock_sg3 = Mock(spec_set=SecurityGroup)
-        type(mock_sg3).id = 'sg-3'
-        type(mock_sg3).vpc_id = 'vpc-bbb'
-        type(mock_sg3).ip_permissions = [
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {1: 1},
-                ],
-                'Ipv6Ranges': [],
-                'PrefixListIds': [
-                    {'a': 'a'},
-                ],
-                'ToPort': 123,
-                'UserIdGroupPairs': [
-                    {2: 2},
+                'Reservations': [
+                    {'Instances': [inst2B, inst2C]},
+                    {'Instances': [instStopped, instTerm]}
                 ]
-            },
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [],
-                'Ipv6Ranges': [
-                    {3: 3}, {6: 6}
-                ],
-                'PrefixListIds': [
-                    {4: 4},
-                ],
-                'ToPort': 123,
-                'UserIdGroupPairs': []
             }
         ]
-        type(mock_sg3).ip_permissions_egress = [
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {1: 1},
-                    {2: 2},
-                    {3: 3},
-                    {4: 4},
-                    {5: 5},
-                    {6: 6},
-                ],
-                'Ipv6Ranges': [
-                    {1: 1},
-                    {2: 2},
-                    {3: 3},
-                    {4: 4},
-                    {5: 5},
-                    {6: 6},
-                    {7: 7},
-                    {8: 8},
-                    {9: 9},
-                    {10: 10},
-                    {11: 11},
-                    {12: 12},
-                    {13: 13}
-                ],
-                'PrefixListIds': [
-                    {1: 1},
-                    {2: 2},
-                    {3: 3},
-                    {4: 4},
-                    {5: 5},
-                    {6: 6},
-                    {7: 7},
-                    {8: 8},
-                    {9: 9},
-                    {10: 10}
-                ],
-                'ToPort': 123,
-                'UserIdGroupPairs': [
-                    {1: 1},
-                    {2: 2},
-                    {3: 3},
-                    {4: 4},
-                    {5: 5},
-                    {6: 6},
-                ]
+
+    @property
+    def test_instance_usage_vcpu(self):
+        inst1A = {
+            'InstanceId': '1A',
+            'InstanceType': 't2.micro',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 16, 'Name': 'running'},
+            'CpuOptions': {'CoreCount': 1, 'ThreadsPerCore': 2}
+        }
+        inst1B = {
+            'InstanceId': '1B',
+            'InstanceType': 'r3.2xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 0, 'Name': 'pending'},
+            'CpuOptions': {'CoreCount': 4, 'ThreadsPerCore': 2}
+        }
+        inst2A = {
+            'InstanceId': '2A',
+            'InstanceType': 'c4.4xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 32, 'Name': 'shutting-down'},
+            'CpuOptions': {'CoreCount': 8, 'ThreadsPerCore': 2}
+        }
+        inst2B = {
+            'InstanceId': '2B',
+            'InstanceType': 't2.micro',
+            'SpotInstanceRequestId': '1234',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 64, 'Name': 'stopping'},
+            'CpuOptions': {'CoreCount': 1, 'ThreadsPerCore': 2}
+        }
+        inst2C = {
+            'InstanceId': '2C',
+            'InstanceType': 'm4.8xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 16, 'Name': 'running'},
+            'CpuOptions': {'CoreCount': 16, 'ThreadsPerCore': 2}
+        }
+        instStopped = {
+            'InstanceId': 'instStopped',
+            'InstanceType': 'm4.8xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 80, 'Name': 'stopped'},
+            'CpuOptions': {
+                'CoreCount': 16, 'ThreadsPerCore': 2
             }
-        ]
-        mock_sg4 = Mock(spec_set=SecurityGroup)
-        type(mock_sg4).id = 'sg-4'
-        type(mock_sg4).vpc_id = None
-        type(mock_sg4).ip_permissions = [
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {
-                        'CidrIp': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'Ipv6Ranges': [
-                    {
-                        'CidrIpv6': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'PrefixListIds': [
-                    {
-                        'Description': 'string',
-                        'PrefixListId': 'string'
-                    },
-                ],
-                'ToPort': 123,
-                'UserIdGroupPairs': [
-                    {
-                        'Description': 'string',
-                        'GroupId': 'string',
-                        'GroupName': 'string',
-                        'PeeringStatus': 'string',
-                        'UserId': 'string',
-                        'VpcId': 'string',
-                        'VpcPeeringConnectionId': 'string'
-                    },
-                ]
-            },
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {
-                        'CidrIp': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'Ipv6Ranges': [
-                    {
-                        'CidrIpv6': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'PrefixListIds': [
-                    {
-                        'Description': 'string',
-                        'PrefixListId': 'string'
-                    },
-                ],
-                'ToPort': 123,
-                'UserIdGroupPairs': [
-                    {
-                        'Description': 'string',
-                        'GroupId': 'string',
-                        'GroupName': 'string',
-                        'PeeringStatus': 'string',
-                        'UserId': 'string',
-                        'VpcId': 'string',
-                        'VpcPeeringConnectionId': 'string'
-                    },
-                ]
-            },
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {
-                        'CidrIp': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'Ipv6Ranges': [
-                    {
-                        'CidrIpv6': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'PrefixListIds': [
-                    {
-                        'Description': 'string',
-                        'PrefixListId': 'string'
-                    },
-                ],
-                'ToPort': 123,
-                'UserIdGroupPairs': [
-                    {
-                        'Description': 'string',
-                        'GroupId': 'string',
-                        'GroupName': 'string',
-                        'PeeringStatus': 'string',
-                        'UserId': 'string',
-                        'VpcId': 'string',
-                        'VpcPeeringConnectionId': 'string'
-                    },
-                ]
-            },
-        ]
-        type(mock_sg4).ip_permissions_egress = [
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {
-                        'CidrIp': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'Ipv6Ranges': [
-                    {
-                        'CidrIpv6': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'PrefixListIds': [
-                    {
-                        'Description': 'string',
-                        'PrefixListId': 'string'
-                    },
-                ],
-                'ToPort': 123,
-                'UserIdGroupPairs': [
-                    {
-                        'Description': 'string',
-                        'GroupId': 'string',
-                        'GroupName': 'string',
-                        'PeeringStatus': 'string',
-                        'UserId': 'string',
-                        'VpcId': 'string',
-                        'VpcPeeringConnectionId': 'string'
-                    },
-                ]
-            },
-            {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {
-                        'CidrIp': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'Ipv6Ranges': [
-                    {
-                        'CidrIpv6': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'PrefixListIds': [
-                    {
-                        'Description': 'string',
-                        'PrefixListId': 'string'
-                    },
-                ],
-                'ToPort': 123,
-                'UserIdGroupPairs': [
-                    {
-                        'Description': 'string',
-                        'GroupId': 'string',
-                        'GroupName': 'string',
-                        'PeeringStatus': 'string',
-                        'UserId': 'string',
-                        'VpcId': 'string',
-                        'VpcPeeringConnectionId': 'string'
-                    },
-                ]
-            },
+        }
+        instTerm = {
+            'InstanceId': '2C',
+            'InstanceType': 'm4.8xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 48, 'Name': 'terminated'},
+            'CpuOptions': {'CoreCount': 16, 'ThreadsPerCore': 2}
+        }
+        inst2D = {
+            'InstanceId': '2D',
+            'InstanceType': 'f1.16xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 16, 'Name': 'running'},
+            'CpuOptions': {'CoreCount': 32, 'ThreadsPerCore': 2}
+        }
+        inst2E = {
+            'InstanceId': '2E',
+            'InstanceType': 'f1.2xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 16, 'Name': 'running'},
+            'CpuOptions': {'CoreCount': 4, 'ThreadsPerCore': 2}
+        }
+        inst2F = {
+            'InstanceId': '2F',
+            'InstanceType': 'g4dn.12xlarge',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 16, 'Name': 'running'},
+            'CpuOptions': {'CoreCount': 12, 'ThreadsPerCore': 4}
+        }
+        inst3A = {
+            'InstanceId': '3A',
+            'InstanceType': 'p2.16xlarge',
+            'Placement': {'AvailabilityZone': 'az1c'},
+            'State': {'Code': 16, 'Name': 'running'},
+            'CpuOptions': {'CoreCount': 32, 'ThreadsPerCore': 2}
+        }
+        inst3F = {
+            'InstanceId': '3F',
+            'InstanceType': 'p2.8xlarge',
+            'Placement': {'AvailabilityZone': 'az1c'},
+            'State': {'Code': 16, 'Name': 'running'},
+            'CpuOptions': {'CoreCount': 16, 'ThreadsPerCore': 2}
+        }
+        inst3G = {
+            'InstanceId': '3G',
+            'InstanceType': 'p2.8xlarge',
+            'Placement': {'AvailabilityZone': 'az1c'},
+            'State': {'Code': 16, 'Name': 'running'},
+            'CpuOptions': {'CoreCount': 16, 'ThreadsPerCore': 2}
+        }
+        inst3B = {
+            'InstanceId': '3B',
+            'InstanceType': 'r3.2xlarge',
+            'Placement': {'AvailabilityZone': 'az1c'},
+            'State': {'Code': 16, 'Name': 'running'},
+            'CpuOptions': {'CoreCount': 4, 'ThreadsPerCore': 2}
+        }
+        inst3C = {
+            'InstanceId': '3C',
+            'InstanceType': 'x1e.32xlarge',
+            'Placement': {'AvailabilityZone': 'az1c'},
+            'State': {'Code': 32, 'Name': 'stopped'},
+            'CpuOptions': {'CoreCount': 32, 'ThreadsPerCore': 4}
+        }
+        inst3D = {
+            'InstanceId': '3D',
+            'InstanceType': 'x1e.32xlarge',
+            'Placement': {'AvailabilityZone': 'az1c'},
+            'State': {'Code': 16, 'Name': 'running'},
+            'CpuOptions': {'CoreCount': 32, 'ThreadsPerCore': 4}
+        }
+        inst3E = {
+            'InstanceId': '3E',
+            'InstanceType': 'x1e.32xlarge',
+            'Placement': {'AvailabilityZone': 'az1c'},
+            'State': {'Code': 16, 'Name': 'running'},
+            'CpuOptions': {'CoreCount': 32, 'ThreadsPerCore': 4}
+        }
+        return [
             {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {
-                        'CidrIp': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'Ipv6Ranges': [
+                'Reservations': [
                     {
-                        'CidrIpv6': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'PrefixListIds': [
-                    {
-                        'Description': 'string',
-                        'PrefixListId': 'string'
-                    },
-                ],
-                'ToPort': 123,
-                'UserIdGroupPairs': [
-                    {
-                        'Description': 'string',
-                        'GroupId': 'string',
-                        'GroupName': 'string',
-                        'PeeringStatus': 'string',
-                        'UserId': 'string',
-                        'VpcId': 'string',
-                        'VpcPeeringConnectionId': 'string'
+                        'Instances': [
+                            inst1A, inst1B, inst2A, inst2B, inst2C,
+                            instStopped, instTerm
+                        ]
                     },
+                    {'Instances': [inst2D, inst2E, inst2F]}
                 ]
             },
             {
-                'FromPort': 123,
-                'IpProtocol': 'string',
-                'IpRanges': [
-                    {
-                        'CidrIp': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'Ipv6Ranges': [
-                    {
-                        'CidrIpv6': 'string',
-                        'Description': 'string'
-                    },
-                ],
-                'PrefixListIds': [
-                    {
-                        'Description': 'string',
-                        'PrefixListId': 'string'
-                    },
-                ],
-                'ToPort': 123,
-                'UserIdGroupPairs': [
+                'Reservations': [
                     {
-                        'Description': 'string',
-                        'GroupId': 'string',
-                        'GroupName': 'string',
-                        'PeeringStatus': 'string',
-                        'UserId': 'string',
-                        'VpcId': 'string',
-                        'VpcPeeringConnectionId': 'string'
-                    },
+                        'Instances': [
+                            inst3A, inst3B, inst3C, inst3D, inst3E, inst3F,
+                            inst3G
+                        ]
+                    }
                 ]
             }
         ]
 
-        return_value = [
-            mock_sg1,
-            mock_sg2,
-            mock_sg3,
-            mock_sg4,
+    @property
+    def test_instance_usage_key_error(self):
+        inst1A = {
+            'InstanceId': '1A',
+            'InstanceType': 'foobar',
+            'Placement': {'AvailabilityZone': 'az1a'},
+            'State': {'Code': 16, 'Name': 'running'}
+        }
+        return [{'Reservations': [{'Instances': [inst1A]}]}]
+
+    @property
+    def test_find_usage_networking_sgs(self):
+        sg1 = {
+            'GroupId': 'sg-1',
+            'VpcId': 'vpc-aaa',
+            'IpPermissions': [],
+            'IpPermissionsEgress': []
+        }
+        sg2 = {
+            'GroupId': 'sg-2',
+            'VpcId': 'vpc-aaa',
+            'IpPermissions': [
+                {
+                    'FromPort': 1,
+                    'ToPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {1: 1}, {2: 2}, {3: 3}, {4: 4}
+                    ],
+                    'Ipv6Ranges': [
+                        {1: 1}, {2: 2}
+                    ],
+                    'PrefixListIds': [
+                        {'p1': 'p1'},
+                    ],
+                    'UserIdGroupPairs': [
+                        {'a': 'a'}, {'b': 'b'}
+                    ]
+                },
+                {
+                    'FromPort': 2,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {1: 1},
+                    ],
+                    'Ipv6Ranges': [],
+                    'PrefixListIds': [],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': []
+                },
+                {
+                    'FromPort': 3,
+                    'IpProtocol': 'string',
+                    'IpRanges': [],
+                    'Ipv6Ranges': [
+                        {1: 1},
+                    ],
+                    'PrefixListIds': [],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': [
+                        {'a': 'a'},
+                    ]
+                },
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [],
+                    'Ipv6Ranges': [],
+                    'PrefixListIds': [
+                        {'a': 'a'},
+                    ],
+                    'ToPort': 1,
+                    'UserIdGroupPairs': [
+                        {'b': 'b'},
+                    ]
+                },
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {'c': 'c'},
+                    ],
+                    'Ipv6Ranges': [
+                        {4: 4},
+                    ],
+                    'PrefixListIds': [
+                        {5: 5}, {6: 6}
+                    ],
+                    'ToPort': 2,
+                    'UserIdGroupPairs': []
+                },
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [],
+                    'Ipv6Ranges': [],
+                    'PrefixListIds': [
+                        {2: 2},
+                    ],
+                    'ToPort': 3,
+                    'UserIdGroupPairs': []
+                }
+            ],
+            'IpPermissionsEgress': [
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {1: 1},
+                    ],
+                    'Ipv6Ranges': [
+                        {2: 2}, {3: 3}, {4: 4}
+                    ],
+                    'PrefixListIds': [
+                        {5: 5},
+                    ],
+                    'ToPort': 1,
+                    'UserIdGroupPairs': [
+                        {6: 6},
+                    ]
+                },
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [],
+                    'Ipv6Ranges': [
+                        {7: 7},
+                    ],
+                    'PrefixListIds': [],
+                    'ToPort': 2,
+                    'UserIdGroupPairs': []
+                },
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [],
+                    'Ipv6Ranges': [
+                        {8: 8},
+                    ],
+                    'PrefixListIds': [],
+                    'ToPort': 3,
+                    'UserIdGroupPairs': []
+                }
+            ]
+        }
+        sg3 = {
+            'GroupId': 'sg-3',
+            'VpcId': 'vpc-bbb',
+            'IpPermissions': [
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {1: 1},
+                    ],
+                    'Ipv6Ranges': [],
+                    'PrefixListIds': [
+                        {'a': 'a'},
+                    ],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': [
+                        {2: 2},
+                    ]
+                },
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [],
+                    'Ipv6Ranges': [
+                        {3: 3}, {6: 6}
+                    ],
+                    'PrefixListIds': [
+                        {4: 4},
+                    ],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': []
+                }
+            ],
+            'IpPermissionsEgress': [
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {1: 1},
+                        {2: 2},
+                        {3: 3},
+                        {4: 4},
+                        {5: 5},
+                        {6: 6},
+                    ],
+                    'Ipv6Ranges': [
+                        {1: 1},
+                        {2: 2},
+                        {3: 3},
+                        {4: 4},
+                        {5: 5},
+                        {6: 6},
+                        {7: 7},
+                        {8: 8},
+                        {9: 9},
+                        {10: 10},
+                        {11: 11},
+                        {12: 12},
+                        {13: 13}
+                    ],
+                    'PrefixListIds': [
+                        {1: 1},
+                        {2: 2},
+                        {3: 3},
+                        {4: 4},
+                        {5: 5},
+                        {6: 6},
+                        {7: 7},
+                        {8: 8},
+                        {9: 9},
+                        {10: 10}
+                    ],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': [
+                        {1: 1},
+                        {2: 2},
+                        {3: 3},
+                        {4: 4},
+                        {5: 5},
+                        {6: 6},
+                    ]
+                }
+            ]
+        }
+        sg4 = {
+            'GroupId': 'sg-4',
+            'IpPermissions': [
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {
+                            'CidrIp': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'Ipv6Ranges': [
+                        {
+                            'CidrIpv6': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'PrefixListIds': [
+                        {
+                            'Description': 'string',
+                            'PrefixListId': 'string'
+                        },
+                    ],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': [
+                        {
+                            'Description': 'string',
+                            'GroupId': 'string',
+                            'GroupName': 'string',
+                            'PeeringStatus': 'string',
+                            'UserId': 'string',
+                            'VpcId': 'string',
+                            'VpcPeeringConnectionId': 'string'
+                        },
+                    ]
+                },
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {
+                            'CidrIp': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'Ipv6Ranges': [
+                        {
+                            'CidrIpv6': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'PrefixListIds': [
+                        {
+                            'Description': 'string',
+                            'PrefixListId': 'string'
+                        },
+                    ],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': [
+                        {
+                            'Description': 'string',
+                            'GroupId': 'string',
+                            'GroupName': 'string',
+                            'PeeringStatus': 'string',
+                            'UserId': 'string',
+                            'VpcId': 'string',
+                            'VpcPeeringConnectionId': 'string'
+                        },
+                    ]
+                },
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {
+                            'CidrIp': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'Ipv6Ranges': [
+                        {
+                            'CidrIpv6': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'PrefixListIds': [
+                        {
+                            'Description': 'string',
+                            'PrefixListId': 'string'
+                        },
+                    ],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': [
+                        {
+                            'Description': 'string',
+                            'GroupId': 'string',
+                            'GroupName': 'string',
+                            'PeeringStatus': 'string',
+                            'UserId': 'string',
+                            'VpcId': 'string',
+                            'VpcPeeringConnectionId': 'string'
+                        },
+                    ]
+                },
+            ],
+            'IpPermissionsEgress': [
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {
+                            'CidrIp': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'Ipv6Ranges': [
+                        {
+                            'CidrIpv6': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'PrefixListIds': [
+                        {
+                            'Description': 'string',
+                            'PrefixListId': 'string'
+                        },
+                    ],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': [
+                        {
+                            'Description': 'string',
+                            'GroupId': 'string',
+                            'GroupName': 'string',
+                            'PeeringStatus': 'string',
+                            'UserId': 'string',
+                            'VpcId': 'string',
+                            'VpcPeeringConnectionId': 'string'
+                        },
+                    ]
+                },
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {
+                            'CidrIp': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'Ipv6Ranges': [
+                        {
+                            'CidrIpv6': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'PrefixListIds': [
+                        {
+                            'Description': 'string',
+                            'PrefixListId': 'string'
+                        },
+                    ],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': [
+                        {
+                            'Description': 'string',
+                            'GroupId': 'string',
+                            'GroupName': 'string',
+                            'PeeringStatus': 'string',
+                            'UserId': 'string',
+                            'VpcId': 'string',
+                            'VpcPeeringConnectionId': 'string'
+                        },
+                    ]
+                },
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {
+                            'CidrIp': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'Ipv6Ranges': [
+                        {
+                            'CidrIpv6': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'PrefixListIds': [
+                        {
+                            'Description': 'string',
+                            'PrefixListId': 'string'
+                        },
+                    ],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': [
+                        {
+                            'Description': 'string',
+                            'GroupId': 'string',
+                            'GroupName': 'string',
+                            'PeeringStatus': 'string',
+                            'UserId': 'string',
+                            'VpcId': 'string',
+                            'VpcPeeringConnectionId': 'string'
+                        },
+                    ]
+                },
+                {
+                    'FromPort': 123,
+                    'IpProtocol': 'string',
+                    'IpRanges': [
+                        {
+                            'CidrIp': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'Ipv6Ranges': [
+                        {
+                            'CidrIpv6': 'string',
+                            'Description': 'string'
+                        },
+                    ],
+                    'PrefixListIds': [
+                        {
+                            'Description': 'string',
+                            'PrefixListId': 'string'
+                        },
+                    ],
+                    'ToPort': 123,
+                    'UserIdGroupPairs': [
+                        {
+                            'Description': 'string',
+                            'GroupId': 'string',
+                            'GroupName': 'string',
+                            'PeeringStatus': 'string',
+                            'UserId': 'string',
+                            'VpcId': 'string',
+                            'VpcPeeringConnectionId': 'string'
+                        },
+                    ]
+                }
+            ]
+        }
+        return [
+            {'SecurityGroups': [sg1, sg2]},
+            {'SecurityGroups': [sg3, sg4]}
         ]
-        return return_value
 
     test_get_reserved_instance_count = {
         'ReservedInstances': [
@@ -2613,39 +2535,42 @@ class EC2(object):
 
     @property
     def test_find_usage_networking_eips(self):
-        mock_addr1 = Mock(spec_set=VpcAddress)
-        type(mock_addr1).domain = 'vpc'
-        mock_addr2 = Mock(spec_set=VpcAddress)
-        type(mock_addr2).domain = 'vpc'
-        mock_addr3 = Mock(spec_set=ClassicAddress)
-        type(mock_addr3).domain = 'standard'
-        return {
-            'Classic': [mock_addr3],
-            'Vpc': [mock_addr1, mock_addr2]
+        addr1 = {
+            'Domain': 'vpc'
         }
+        addr2 = {
+            'Domain': 'vpc'
+        }
+        addr3 = {
+            'Domain': 'standard'
+        }
+        return {'Addresses': [addr1, addr3, addr2]}
 
     @property
     def test_find_usage_networking_eni_sg(self):
-        mock_if1 = Mock(spec_set=NetworkInterface)
-        type(mock_if1).id = 'if-1'
-        type(mock_if1).groups = []
-        type(mock_if1).vpc = Mock()
-
-        mock_if2 = Mock(spec_set=NetworkInterface)
-        type(mock_if2).id = 'if-2'
-        type(mock_if2).groups = [1, 2, 3]
-        type(mock_if2).vpc = Mock()
-
-        mock_if3 = Mock(spec_set=NetworkInterface)
-        type(mock_if3).id = 'if-3'
-        type(mock_if3).groups = [1, 2, 3, 4, 5, 6, 7, 8]
-        type(mock_if3).vpc = Mock()
-
-        mock_if4 = Mock(spec_set=NetworkInterface)
-        type(mock_if4).id = 'if-4'
-        type(mock_if4).groups = [1, 2, 3, 4, 5, 6, 7, 8]
-        type(mock_if4).vpc = None
-        return [mock_if1, mock_if2, mock_if3, mock_if4]
+        if1 = {
+            'NetworkInterfaceId': 'if-1',
+            'Groups': [],
+            'VpcId': 'vpc-1'
+        }
+        if2 = {
+            'NetworkInterfaceId': 'if-2',
+            'Groups': [1, 2, 3],
+            'VpcId': 'vpc-1'
+        }
+        if3 = {
+            'NetworkInterfaceId': 'if-3',
+            'Groups': [1, 2, 3, 4, 5, 6, 7, 8],
+            'VpcId': 'vpc-1'
+        }
+        if4 = {
+            'NetworkInterfaceId': 'if-4',
+            'Groups': [1, 2, 3, 4, 5, 6, 7, 8]
+        }
+        return [
+            {'NetworkInterfaces': [if1, if2]},
+            {'NetworkInterfaces': [if3, if4]}
+        ]
 
     test_update_limits_from_api = {
         'ResponseMetadata': {
@@ -4173,10 +4098,10 @@ class DynamoDB(object):
         'TableMaxWriteCapacityUnits': 444
     }
 
-    test_find_usage_dynamodb = [
-        Mock(
-            name='table1',
-            global_secondary_indexes=[
+    test_find_usage_dynamodb = {
+        'table1': {'Table': {
+            'TableName': 'table1',
+            'GlobalSecondaryIndexes': [
                 {
                     'IndexName': 't1gi1',
                     'KeySchema': [],
@@ -4212,7 +4137,7 @@ class DynamoDB(object):
                     'IndexArn': 't1gi2arn'
                 }
             ],
-            local_secondary_indexes=[
+            'LocalSecondaryIndexes': [
                 {
                     'IndexName': 't1li1',
                     'KeySchema': [],
@@ -4238,17 +4163,17 @@ class DynamoDB(object):
                     'IndexArn': 't1li1arn'
                 }
             ],
-            provisioned_throughput={
+            'ProvisionedThroughput': {
                 'LastIncreaseDateTime': datetime(2015, 1, 1),
                 'LastDecreaseDateTime': datetime(2016, 1, 1),
                 'NumberOfDecreasesToday': 0,
                 'ReadCapacityUnits': 10,
                 'WriteCapacityUnits': 20
             }
-        ),
-        Mock(
-            name='table2',
-            global_secondary_indexes=[
+        }},
+        'table2': {'Table': {
+            'TableName': 'table2',
+            'GlobalSecondaryIndexes': [
                 {
                     'IndexName': 't2gi1',
                     'KeySchema': [],
@@ -4267,7 +4192,7 @@ class DynamoDB(object):
                     'IndexArn': 't1gi1arn'
                 }
             ],
-            local_secondary_indexes=[
+            'LocalSecondaryIndexes': [
                 {
                     'IndexName': 't2li1',
                     'KeySchema': [],
@@ -4277,30 +4202,25 @@ class DynamoDB(object):
                     'IndexArn': 't1li1arn'
                 }
             ],
-            provisioned_throughput={
+            'ProvisionedThroughput': {
                 'LastIncreaseDateTime': datetime(2015, 1, 1),
                 'LastDecreaseDateTime': datetime(2016, 1, 1),
                 'NumberOfDecreasesToday': 0,
                 'ReadCapacityUnits': 333,
                 'WriteCapacityUnits': 444
             }
-        ),
-        Mock(
-            name='table3',
-            global_secondary_indexes=None,
-            local_secondary_indexes=None,
-            provisioned_throughput={
+        }},
+        'table3': {'Table': {
+            'TableName': 'table3',
+            'ProvisionedThroughput': {
                 'LastIncreaseDateTime': datetime(2015, 1, 1),
                 'LastDecreaseDateTime': datetime(2016, 1, 1),
                 'NumberOfDecreasesToday': 0,
                 'ReadCapacityUnits': 600,
                 'WriteCapacityUnits': 800
             }
-        )
-    ]
-    type(test_find_usage_dynamodb[0]).name = 'table1'
-    type(test_find_usage_dynamodb[1]).name = 'table2'
-    type(test_find_usage_dynamodb[2]).name = 'table3'
+        }}
+    }
 
 
 class Route53(object):
@@ -4311,21 +4231,24 @@ class Route53(object):
                     'PrivateZone': True
                 },
                 'Id': '/hostedzone/ABC',
-                'Name': 'abc.example.com.'
+                'Name': 'abc.example.com.',
+                'ResourceRecordSetCount': 7501
             },
             {
                 'Config': {
                     'PrivateZone': True
                 },
                 'Id': '/hostedzone/DEF',
-                'Name': 'def.example.com.'
+                'Name': 'def.example.com.',
+                'ResourceRecordSetCount': 2501
             },
             {
                 'Config': {
                     'PrivateZone': False
                 },
                 'Id': '/hostedzone/GHI',
-                'Name': 'ghi.example.com.'
+                'Name': 'ghi.example.com.',
+                'ResourceRecordSetCount': 5679
             }
         ]
     }
@@ -55,6 +55,7 @@ else:
 
 pbm = 'awslimitchecker.services.apigateway'  # module patch base
 pb = '%s._ApigatewayService' % pbm  # class patch pase
+pbm_utils = 'awslimitchecker.utils'
 
 
 class Test_ApigatewayService(object):
@@ -125,42 +126,53 @@ class Test_ApigatewayService(object):
         assert mocks['_find_usage_plans'].mock_calls == [call(cls)]
         assert mocks['_find_usage_vpc_links'].mock_calls == [call(cls)]
 
-    def test_find_usage_apis(self):
+    def _mock_apis_conn(self, stages_extra_key=False):
+        """
+        Return a mock connection returning the ApiGateway result fixtures
+        for the calls made by ``_find_usage_apis``.
+        """
         mock_conn = Mock()
-        res = result_fixtures.ApiGateway.get_rest_apis
         mock_paginator = Mock()
-        mock_paginator.paginate.return_value = res
-
-        def se_res_paginate(restApiId=None):
-            return result_fixtures.ApiGateway.get_resources[restApiId]
+        mock_paginator.paginate.return_value = \
+            result_fixtures.ApiGateway.get_rest_apis
 
-        mock_res_paginator = Mock()
-        mock_res_paginator.paginate.side_effect = se_res_paginate
+        def se_get_resources(restApiId=None, position=None):
+            pages = result_fixtures.ApiGateway.get_resources[restApiId]
+            idx = 0 if position is None else int(position)
+            page = dict(pages[idx])
+            if idx + 1 < len(pages):
+                page['position'] = str(idx + 1)
+            return page
 
-        def se_get_paginator(api_name):
-            if api_name == 'get_rest_apis':
-                return mock_paginator
-            elif api_name == 'get_resources':
-                return mock_res_paginator
+        def se_get_documentation_parts(restApiId=None):
+            return {'items': result_fixtures.ApiGateway.doc_parts[restApiId]}
 
-        def se_paginate_dict(*args, **kwargs):
-            if args[0] == mock_conn.get_documentation_parts:
-                return result_fixtures.ApiGateway.doc_parts[kwargs['restApiId']]
-            if args[0] == mock_conn.get_authorizers:
-                return result_fixtures.ApiGateway.authorizers[
-                    kwargs['restApiId']
-                ]
+        def se_get_authorizers(restApiId=None):
+            return {
+                'items': result_fixtures.ApiGateway.authorizers[restApiId]
+            }
 
         def se_get_stages(restApiId=None):
-            return result_fixtures.ApiGateway.stages[restApiId]
+            r = deepcopy(result_fixtures.ApiGateway.stages[restApiId])
+            if stages_extra_key:
+                r['position'] = 'foo'
+            return r
 
-        mock_conn.get_paginator.side_effect = se_get_paginator
+        mock_conn.get_paginator.return_value = mock_paginator
+        mock_conn.get_resources.side_effect = se_get_resources
+        mock_conn.get_documentation_parts.side_effect = \
+            se_get_documentation_parts
+        mock_conn.get_authorizers.side_effect = se_get_authorizers
         mock_conn.get_stages.side_effect = se_get_stages
+        return mock_conn
+
+    def test_find_usage_apis(self):
+        mock_conn = self._mock_apis_conn()
         cls = _ApigatewayService(21, 43, {}, None)
         cls.conn = mock_conn
-        with patch('%s.paginate_dict' % pbm, autospec=True) as mock_pd:
-            with patch('%s.logger' % pbm) as mock_logger:
-                mock_pd.side_effect = se_paginate_dict
+        with patch('%s.logger' % pbm) as mock_logger:
+            with patch('%s.TokenBucket' % pbm, autospec=True) as mock_tb:
+                mock_tb.return_value.wrap.side_effect = lambda x: x
                 cls._find_usage_apis()
         # APIs usage
         usage = cls.limits['Regional APIs per account'].get_current_usage()
@@ -221,148 +233,72 @@ class Test_ApigatewayService(object):
         assert usage[3].get_value() == 0
         assert usage[4].resource_id == 'api5'
         assert usage[4].get_value() == 0
-        assert mock_conn.mock_calls == [
-            call.get_paginator('get_rest_apis'),
-            call.get_paginator('get_resources'),
-            call.get_stages(restApiId='api3'),
-            call.get_paginator('get_resources'),
-            call.get_stages(restApiId='api2'),
-            call.get_paginator('get_resources'),
-            call.get_stages(restApiId='api1'),
-            call.get_paginator('get_resources'),
-            call.get_stages(restApiId='api4'),
-            call.get_paginator('get_resources'),
-            call.get_stages(restApiId='api5')
-        ]
-        assert mock_paginator.mock_calls == [call.paginate()]
-        assert mock_res_paginator.mock_calls == [
-            call.paginate(restApiId='api3'),
-            call.paginate(restApiId='api2'),
-            call.paginate(restApiId='api1'),
-            call.paginate(restApiId='api4'),
-            call.paginate(restApiId='api5')
+        assert mock_conn.get_paginator.mock_calls == [
+            call('get_rest_apis'), call().paginate()
         ]
-        assert mock_pd.mock_calls == [
-            call(
-                mock_conn.get_documentation_parts,
-                restApiId='api3',
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            ),
-            call(
-                mock_conn.get_authorizers,
-                restApiId='api3',
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            ),
-            call(
-                mock_conn.get_documentation_parts,
-                restApiId='api2',
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            ),
-            call(
-                mock_conn.get_authorizers,
-                restApiId='api2',
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            ),
-            call(
-                mock_conn.get_documentation_parts,
-                restApiId='api1',
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            ),
-            call(
-                mock_conn.get_authorizers,
-                restApiId='api1',
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            ),
-            call(
-                mock_conn.get_documentation_parts,
-                restApiId='api4',
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            ),
-            call(
-                mock_conn.get_authorizers,
-                restApiId='api4',
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            ),
-            call(
-                mock_conn.get_documentation_parts,
-                restApiId='api5',
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            ),
-            call(
-                mock_conn.get_authorizers,
-                restApiId='api5',
-                alc_marker_path=['position'],
-                alc_data_path=['items'],
-                alc_marker_param='position'
-            )
+        assert sorted(mock_conn.get_resources.mock_calls, key=str) == [
+            call(restApiId='api1'),
+            call(position='1', restApiId='api1'),
+            call(restApiId='api2'),
+            call(position='1', restApiId='api2'),
+            call(restApiId='api3'),
+            call(restApiId='api4'),
+            call(restApiId='api5')
         ]
-        assert mock_logger.mock_calls == [
+        for api_id in ['api1', 'api2', 'api3', 'api4', 'api5']:
+            assert call(restApiId=api_id) in \
+                mock_conn.get_documentation_parts.mock_calls
+            assert call(restApiId=api_id) in mock_conn.get_stages.mock_calls
+            assert call(restApiId=api_id) in \
+                mock_conn.get_authorizers.mock_calls
+        assert mock_conn.get_documentation_parts.call_count == 5
+        assert mock_conn.get_stages.call_count == 5
+        assert mock_conn.get_authorizers.call_count == 5
+        assert mock_tb.mock_calls[0] == call(10, capacity=10)
+        assert mock_tb.return_value.wrap.call_count == 20
+        assert mock_logger.mock_calls[:3] == [
             call.debug('Finding usage for APIs'),
             call.debug('Found %d APIs', 5),
-            call.debug('Finding usage for per-API limits')
+            call.debug('Finding usage for per-API limits with %d workers', 4)
         ]
+        assert len(mock_logger.mock_calls) == 8
+        assert mock_logger.warning.mock_calls == []
 
-    def test_find_usage_apis_stages_now_paginated(self):
-        mock_conn = Mock()
-        res = result_fixtures.ApiGateway.get_rest_apis
-        mock_paginator = Mock()
-        mock_paginator.paginate.return_value = res
-
-        def se_res_paginate(restApiId=None):
-            return result_fixtures.ApiGateway.get_resources[restApiId]
-
-        mock_res_paginator = Mock()
-        mock_res_paginator.paginate.side_effect = se_res_paginate
-
-        def se_get_paginator(api_name):
-            if api_name == 'get_rest_apis':
-                return mock_paginator
-            elif api_name == 'get_resources':
-                return mock_res_paginator
-
-        def se_paginate_dict(*args, **kwargs):
-            if args[0] == mock_conn.get_documentation_parts:
-                return result_fixtures.ApiGateway.doc_parts[kwargs['restApiId']]
-            if args[0] == mock_conn.get_authorizers:
-                return result_fixtures.ApiGateway.authorizers[
-                    kwargs['restApiId']
-                ]
-
-        def se_get_stages(restApiId=None):
-            r = deepcopy(result_fixtures.ApiGateway.stages[restApiId])
-            r['position'] = 'foo'
-            return r
+    def test_find_usage_apis_rate_limited(self):
+        mock_conn = self._mock_apis_conn()
+        cls = _ApigatewayService(21, 43, {}, None)
+        cls.conn = mock_conn
+        cls.rest_api_workers = 2
+        cls.request_rate = 3
+        cls.request_burst = 5
+        with patch('%s.TokenBucket.acquire' % pbm_utils) as mock_acquire:
+            cls._find_usage_apis()
+        # one request per API for each of documentation parts, stages and
+        # authorizers, plus seven pages of resources
+        assert mock_acquire.call_count == 22
+        usage = cls.limits['Resources per API'].get_current_usage()
+        assert [u.resource_id for u in usage] == [
+            'api3', 'api2', 'api1', 'api4', 'api5'
+        ]
 
-        mock_conn.get_paginator.side_effect = se_get_paginator
-        mock_conn.get_stages.side_effect = se_get_stages
+    def test_find_usage_apis_stages_now_paginated(self):
+        mock_conn = self._mock_apis_conn(stages_extra_key=True)
         cls = _ApigatewayService(21, 43, {}, None)
         cls.conn = mock_conn
-        with patch('%s.paginate_dict' % pbm, autospec=True) as mock_pd:
-            with patch('%s.logger' % pbm) as mock_logger:
-                mock_pd.side_effect = se_paginate_dict
+        cls.rest_api_workers = 1
+        with patch('%s.logger' % pbm) as mock_logger:
+            with patch('%s.TokenBucket' % pbm, autospec=True) as mock_tb:
+                mock_tb.return_value.wrap.side_effect = lambda x: x
                 cls._find_usage_apis()
         assert mock_logger.mock_calls == [
             call.debug('Finding usage for APIs'),
             call.debug('Found %d APIs', 5),
-            call.debug('Finding usage for per-API limits'),
+            call.debug('Finding usage for per-API limits with %d workers', 1),
+            call.debug('Finding per-API usage for %s', 'api3'),
+            call.debug('Finding per-API usage for %s', 'api2'),
+            call.debug('Finding per-API usage for %s', 'api1'),
+            call.debug('Finding per-API usage for %s', 'api4'),
+            call.debug('Finding per-API usage for %s', 'api5'),
             call.warning(
                 'APIGateway get_stages returned more keys than present in '
                 'boto3 docs: %s', ['item', 'position']
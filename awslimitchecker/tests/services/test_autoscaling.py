@@ -88,48 +88,47 @@ class Test_AutoscalingService(object):
 
     def test_find_usage(self):
         mock_conn = Mock()
-
-        def se_wrapper(func, *args, **kwargs):
-            if func == mock_conn.describe_auto_scaling_groups:
-                return {
-                    'AutoScalingGroups': [
-                        {'AutoScalingGroupName': 'foo'},
-                        {'AutoScalingGroupName': 'bar'},
-                        {'AutoScalingGroupName': 'baz'},
-                    ],
-                }
-            elif func == mock_conn.describe_launch_configurations:
-                return {
-                    'LaunchConfigurations': [
-                        {'LaunchConfigurationName': 'foo'},
-                        {'LaunchConfigurationName': 'bar'},
-                    ],
-                }
-            return None
+        mock_conn.describe_auto_scaling_groups.side_effect = [
+            {
+                'AutoScalingGroups': [
+                    {'AutoScalingGroupName': 'foo'},
+                    {'AutoScalingGroupName': 'bar'},
+                ],
+                'NextToken': 'tok1'
+            },
+            {
+                'AutoScalingGroups': [
+                    {'AutoScalingGroupName': 'baz'},
+                ],
+            }
+        ]
+        mock_conn.describe_launch_configurations.return_value = {
+            'LaunchConfigurations': [
+                {'LaunchConfigurationName': 'foo'},
+                {'LaunchConfigurationName': 'bar'},
+            ],
+        }
+        mock_conn.describe_account_limits.return_value = {
+            'MaxNumberOfAutoScalingGroups': 11,
+            'MaxNumberOfLaunchConfigurations': 22
+        }
 
         with patch('%s.connect' % self.pb) as mock_connect:
-            with patch('%s.paginate_dict' % self.pbm) as mock_paginate:
-                cls = _AutoscalingService(21, 43, {}, None)
-                cls.conn = mock_conn
-                mock_paginate.side_effect = se_wrapper
-                assert cls._have_usage is False
-                cls.find_usage()
+            cls = _AutoscalingService(21, 43, {}, None)
+            cls.conn = mock_conn
+            assert cls._have_usage is False
+            cls.find_usage()
         assert mock_connect.mock_calls == [call()]
-        assert mock_conn.mock_calls == []
-        assert mock_paginate.mock_calls == [
-            call(
-                mock_conn.describe_auto_scaling_groups,
-                alc_marker_path=['NextToken'],
-                alc_data_path=['AutoScalingGroups'],
-                alc_marker_param='NextToken'
-            ),
-            call(
-                mock_conn.describe_launch_configurations,
-                alc_marker_path=['NextToken'],
-                alc_data_path=['LaunchConfigurations'],
-                alc_marker_param='NextToken'
-            )
+        assert mock_conn.mock_calls == [
+            call.describe_account_limits(),
+            call.describe_auto_scaling_groups(),
+            call.describe_auto_scaling_groups(NextToken='tok1'),
+            call.describe_launch_configurations()
         ]
+        assert cls.usage_sources == {
+            'Auto Scaling groups': 'DescribeAutoScalingGroups',
+            'Launch configurations': 'DescribeLaunchConfigurations'
+        }
         assert cls._have_usage is True
         asgs = sorted(cls.limits['Auto Scaling groups'].get_current_usage())
         assert len(asgs) == 1
@@ -138,6 +137,35 @@ class Test_AutoscalingService(object):
         assert len(lcs) == 1
         assert lcs[0].get_value() == 2
 
+    def test_find_usage_account_limits(self):
+        mock_conn = Mock()
+        mock_conn.describe_account_limits.return_value = {
+            'MaxNumberOfAutoScalingGroups': 11,
+            'MaxNumberOfLaunchConfigurations': 22,
+            'NumberOfAutoScalingGroups': 5,
+            'NumberOfLaunchConfigurations': 6
+        }
+
+        with patch('%s.connect' % self.pb):
+            cls = _AutoscalingService(21, 43, {}, None)
+            cls.conn = mock_conn
+            cls.find_usage()
+            # limits reuse the same response
+            cls._update_limits_from_api()
+        assert mock_conn.mock_calls == [call.describe_account_limits()]
+        assert cls.usage_sources == {
+            'Auto Scaling groups': 'DescribeAccountLimits',
+            'Launch configurations': 'DescribeAccountLimits'
+        }
+        asgs = cls.limits['Auto Scaling groups'].get_current_usage()
+        assert len(asgs) == 1
+        assert asgs[0].get_value() == 5
+        assert cls.limits['Auto Scaling groups'].api_limit == 11
+        lcs = cls.limits['Launch configurations'].get_current_usage()
+        assert len(lcs) == 1
+        assert lcs[0].get_value() == 6
+        assert cls.limits['Launch configurations'].api_limit == 22
+
     def test_required_iam_permissions(self):
         cls = _AutoscalingService(21, 43, {}, None)
         assert cls.required_iam_permissions() == [
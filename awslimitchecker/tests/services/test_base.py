@@ -40,6 +40,8 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 from awslimitchecker.services.base import _AwsService
 from awslimitchecker.limit import AwsLimit
 from awslimitchecker.quotas import ServiceQuotasClient
+from awslimitchecker.cache import ResponseCache
+from awslimitchecker import aio
 import pytest
 import sys
 
@@ -53,6 +55,8 @@ if (
 else:
     from unittest.mock import patch, call, Mock, PropertyMock
 
+pbm = 'awslimitchecker.services.base'
+
 
 class AwsServiceTester(_AwsService):
     """class to test non-abstract methods on base class"""
@@ -259,62 +263,188 @@ class Test_AwsService(object):
         assert res == {'foo': mock_limit1, 'foo4': mock_limit4}
         assert mock_find_usage.mock_calls == [call()]
 
+    def test_find_usage_async(self):
+        cls = AwsServiceTester(1, 2, {}, None)
+        aio.run(cls.find_usage_async())
+        assert cls._have_usage is True
+
+    def test_update_limits_from_api_async(self):
+        cls = AwsServiceTester(1, 2, {}, None)
+        mock_update = Mock()
+        cls._update_limits_from_api = mock_update
+        aio.run(cls._update_limits_from_api_async())
+        assert mock_update.mock_calls == [call()]
+
+    def test_update_limits_from_api_async_none(self):
+        cls = AwsServiceTester(1, 2, {}, None)
+        assert aio.run(cls._update_limits_from_api_async()) is None
+
     def test_update_service_quotas(self):
+        mock_client = Mock(spec_set=ServiceQuotasClient)
+        mock_limit1 = Mock(spec_set=AwsLimit)
+        mock_limit2 = Mock(spec_set=AwsLimit)
+        cls = AwsServiceTester(1, 2, {}, mock_client)
+        cls.quotas_service_code = 'qsc'
+        cls.limits = {'limit1': mock_limit1, 'limit2': mock_limit2}
+        cls._update_service_quotas()
+        assert mock_client.mock_calls == [call.update_limits(cls.limits)]
 
-        def se_get_quota_value(_, quota_name, **kwargs):
-            if quota_name == 'qn1':
-                return 12.4
-            return None
+    def test_update_service_quotas_fresh(self):
+        mock_client = Mock(spec_set=ServiceQuotasClient)
+        cls = AwsServiceTester(1, 2, {}, mock_client)
+        cls.quotas_service_code = 'qsc'
+        cls.limits = {'limit1': Mock(spec_set=AwsLimit)}
+        with patch('%s.time.time' % pbm) as m_time:
+            m_time.side_effect = [1000.0, 1299.0, 1300.0, 1301.0]
+            cls._update_service_quotas()
+            cls._update_service_quotas()
+            cls._update_service_quotas()
+        assert mock_client.mock_calls == [
+            call.update_limits(cls.limits),
+            call.update_limits(cls.limits)
+        ]
+        assert cls._quotas_updated_at == 1301.0
 
+    def test_update_service_quotas_ttl_none(self):
+        mock_client = Mock(spec_set=ServiceQuotasClient)
+        cls = AwsServiceTester(1, 2, {}, mock_client)
+        cls.quotas_service_code = 'qsc'
+        cls.api_cache_ttl = None
+        cls.limits = {'limit1': Mock(spec_set=AwsLimit)}
+        cls._update_service_quotas()
+        cls._update_service_quotas()
+        assert mock_client.mock_calls == [
+            call.update_limits(cls.limits),
+            call.update_limits(cls.limits)
+        ]
+
+    def test_cached_api_call(self):
+        cls = AwsServiceTester(1, 2, {}, None)
+        mock_func = Mock()
+        mock_func.side_effect = ['r1', 'r2', 'r3']
+        with patch('%s.time.time' % pbm) as m_time:
+            m_time.side_effect = [1000.0, 1100.0, 1100.0, 1400.0, 1400.0]
+            assert cls._cached_api_call('k1', mock_func, 'a', b='c') == 'r1'
+            assert cls._cached_api_call('k1', mock_func, 'a', b='c') == 'r1'
+            assert cls._cached_api_call('k2', mock_func) == 'r2'
+            assert cls._cached_api_call('k1', mock_func, 'a', b='c') == 'r3'
+        assert mock_func.mock_calls == [
+            call('a', b='c'),
+            call(),
+            call('a', b='c')
+        ]
+        assert cls._api_cache == {
+            'k1': (1400.0, 'r3'),
+            'k2': (1100.0, 'r2')
+        }
+
+    def test_cached_api_call_ttl_none(self):
+        cls = AwsServiceTester(1, 2, {}, None)
+        cls.api_cache_ttl = None
+        mock_func = Mock()
+        mock_func.side_effect = ['r1', 'r2']
+        assert cls._cached_api_call('k1', mock_func) == 'r1'
+        assert cls._cached_api_call('k1', mock_func) == 'r2'
+        assert mock_func.mock_calls == [call(), call()]
+
+    def test_invalidate_api_cache(self):
         mock_client = Mock(spec_set=ServiceQuotasClient)
-        mock_client.get_quota_value.side_effect = se_get_quota_value
         mock_limit1 = Mock(spec_set=AwsLimit)
         type(mock_limit1).quotas_service_code = PropertyMock(
             return_value='qsc'
         )
-        type(mock_limit1).quota_name = PropertyMock(return_value='qn1')
-        type(mock_limit1).quotas_unit = PropertyMock(return_value='None')
-        type(mock_limit1).quotas_unit_converter = PropertyMock(
-            return_value=None
-        )
         mock_limit2 = Mock(spec_set=AwsLimit)
         type(mock_limit2).quotas_service_code = PropertyMock(
             return_value='qsc'
         )
-        type(mock_limit2).quota_name = PropertyMock(return_value='qn2')
-        type(mock_limit2).quotas_unit = PropertyMock(return_value='None')
-        type(mock_limit2).quotas_unit_converter = PropertyMock(
-            return_value=None
-        )
-        mock_limit3 = Mock(spec_set=AwsLimit)
-        type(mock_limit3).quotas_service_code = PropertyMock(
-            return_value='qsc'
-        )
-        type(mock_limit3).quota_name = PropertyMock(return_value='qn3')
-        type(mock_limit3).quotas_unit = PropertyMock(return_value='Foo')
-        mock_conv = Mock()
-        type(mock_limit3).quotas_unit_converter = PropertyMock(
-            return_value=mock_conv
-        )
         cls = AwsServiceTester(1, 2, {}, mock_client)
-        cls.quotas_service_code = 'qsc'
-        cls.limits = {
-            'limit1': mock_limit1,
-            'limit2': mock_limit2,
-            'limit3': mock_limit3
-        }
-        cls._update_service_quotas()
-        assert mock_client.mock_calls == [
-            call.get_quota_value('qsc', 'qn1', units='None', converter=None),
-            call.get_quota_value('qsc', 'qn2', units='None', converter=None),
-            call.get_quota_value(
-                'qsc', 'qn3', units='Foo', converter=mock_conv
-            )
+        cls.limits = {'limit1': mock_limit1, 'limit2': mock_limit2}
+        cls._api_cache = {'k1': (1000.0, 'r1')}
+        cls._quotas_updated_at = 1000.0
+        cls.invalidate_api_cache()
+        assert cls._api_cache == {}
+        assert cls._quotas_updated_at is None
+        assert mock_client.mock_calls == [call.invalidate('qsc')]
+
+    def test_reset_api_cache(self):
+        mock_client = Mock(spec_set=ServiceQuotasClient)
+        cls = AwsServiceTester(1, 2, {}, mock_client)
+        cls._api_cache = {'k1': (1000.0, 'r1')}
+        cls._quotas_updated_at = 1000.0
+        cls._reset_api_cache()
+        assert cls._api_cache == {}
+        assert cls._quotas_updated_at == 1000.0
+        assert mock_client.mock_calls == []
+
+    def test_cached_api_call_shared(self):
+        shared = ResponseCache()
+        cls = AwsServiceTester(1, 2, {}, None)
+        cls.shared_cache = shared
+        other = AwsServiceTester(1, 2, {}, None)
+        other.shared_cache = shared
+        mock_func = Mock()
+        mock_func.side_effect = ['r1', 'r2']
+        assert cls._cached_api_call('k1', mock_func, 'a', b='c') == 'r1'
+        assert other._cached_api_call('k1', mock_func, 'a', b='c') == 'r1'
+        assert other._cached_api_call('k1', mock_func, 'a', b='d') == 'r2'
+        assert mock_func.mock_calls == [call('a', b='c'), call('a', b='d')]
+        assert cls._api_cache == {}
+
+    def test_invalidate_api_cache_no_client(self):
+        cls = AwsServiceTester(1, 2, {}, None)
+        cls._api_cache = {'k1': (1000.0, 'r1')}
+        cls.invalidate_api_cache()
+        assert cls._api_cache == {}
+
+    def test_invalidate_api_cache_shared(self):
+        mock_shared = Mock(spec_set=ResponseCache)
+        cls = AwsServiceTester(1, 2, {}, None)
+        cls.shared_cache = mock_shared
+        cls.invalidate_api_cache()
+        assert mock_shared.mock_calls == [call.invalidate('awsservicetester')]
+
+    def test_paginated_summary(self):
+        mock_conn = Mock()
+        mock_conn.get_paginator.return_value.paginate.return_value = [
+            {'Things': [1, 2]},
+            {'Things': [3]}
         ]
-        assert mock_limit1.mock_calls == [
-            call._set_quotas_limit(12.4)
+        cls = AwsServiceTester(1, 2, {}, None)
+        cls.conn = mock_conn
+        res = cls._shared_paginated_summary(
+            'describe_things', 'Things', sum, A='b'
+        )
+        assert res == 6
+        assert mock_conn.mock_calls == [
+            call.get_paginator('describe_things'),
+            call.get_paginator().paginate(A='b')
         ]
-        assert mock_limit2.mock_calls == []
+
+    def test_shared_paginated_summary(self):
+        mock_conn = Mock()
+        mock_conn.get_paginator.return_value.paginate.return_value = [
+            {'Things': [1, 2]},
+            {'Things': [3]}
+        ]
+        cls = AwsServiceTester(1, 2, {}, None)
+        cls.conn = mock_conn
+        cls.shared_cache = ResponseCache()
+        assert cls._shared_paginated_summary(
+            'describe_things', 'Things', sum
+        ) == 6
+        assert cls._shared_paginated_summary(
+            'describe_things', 'Things', sum
+        ) == 6
+        assert mock_conn.mock_calls == [
+            call.get_paginator('describe_things'),
+            call.get_paginator().paginate()
+        ]
+        assert len(cls.shared_cache._transient) == 1
+        # a different summary of the same operation is computed separately
+        assert cls._shared_paginated_summary(
+            'describe_things', 'Things', max
+        ) == 3
+        assert len(mock_conn.mock_calls) == 4
 
     def test_update_service_quotas_no_code(self):
 
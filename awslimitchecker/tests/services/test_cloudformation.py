@@ -38,7 +38,9 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 import sys
-from awslimitchecker.services.cloudformation import _CloudformationService
+from awslimitchecker.services.cloudformation import (
+    _CloudformationService, COUNTED_STACK_STATUSES
+)
 
 # https://code.google.com/p/mock/issues/detail?id=249
 # py>=3.4 should use unittest.mock not the mock package on pypi
@@ -65,20 +67,32 @@ class Test_CloudformationService(object):
         assert cls.conn is None
         assert cls.warning_threshold == 21
         assert cls.critical_threshold == 43
+        assert cls.count_stack_set_instances is False
 
     def test_get_limits(self):
         cls = _CloudformationService(21, 43, {}, None)
         cls.limits = {}
         res = cls.get_limits()
-        assert sorted(res.keys()) == sorted([
-            'Stacks',
-        ])
+        assert sorted(res.keys()) == ['Stacks']
         limit = cls.limits['Stacks']
         assert limit.service == cls
         assert limit.def_warning_threshold == 21
         assert limit.def_critical_threshold == 43
         assert limit.default_limit == 200
 
+    def test_get_limits_stack_sets(self):
+        cls = _CloudformationService(
+            21, 43, {}, None, count_stack_set_instances=True
+        )
+        assert sorted(cls.limits.keys()) == sorted([
+            'Stacks',
+            'Stack sets',
+            'Stack instances per stack set',
+        ])
+        assert cls.limits['Stack sets'].default_limit == 1000
+        assert cls.limits[
+            'Stack instances per stack set'].default_limit == 100000
+
     def test_get_limits_again(self):
         """test that existing limits dict is returned on subsequent calls"""
         mock_limits = Mock()
@@ -88,26 +102,24 @@ class Test_CloudformationService(object):
         assert res == mock_limits
 
     def test_find_usage(self):
-        mock_paginator = Mock()
-        mock_paginator.paginate.return_value = [
+        mock_conn = Mock()
+        mock_conn.list_stacks.side_effect = [
             {
-                'Stacks': [
+                'StackSummaries': [
                     {'StackStatus': 'CREATE_IN_PROGRESS'},
-                    {'StackStatus': 'DELETE_COMPLETE'},
                     {'StackStatus': 'DELETE_IN_PROGRESS'},
                     {'StackStatus': 'CREATE_FAILED'},
-                ]
+                ],
+                'NextToken': 'tok1'
             },
             {
-                'Stacks': [
+                'StackSummaries': [
                     {'StackStatus': 'UPDATE_COMPLETE_CLEANUP_IN_PROGRESS'},
                     {'StackStatus': 'ROLLBACK_COMPLETE'},
                     {'StackStatus': 'DELETE_FAILED'},
                 ]
             },
         ]
-        mock_conn = Mock()
-        mock_conn.get_paginator.return_value = mock_paginator
         with patch('%s.connect' % pb) as mock_connect:
             cls = _CloudformationService(21, 43, {}, None)
             cls.conn = mock_conn
@@ -116,12 +128,59 @@ class Test_CloudformationService(object):
         assert mock_connect.mock_calls == [call()]
         assert cls._have_usage is True
         assert mock_conn.mock_calls == [
-            call.get_paginator('describe_stacks'),
-            call.get_paginator().paginate()
+            call.list_stacks(StackStatusFilter=COUNTED_STACK_STATUSES),
+            call.list_stacks(
+                StackStatusFilter=COUNTED_STACK_STATUSES, NextToken='tok1'
+            )
         ]
-        assert mock_paginator.mock_calls == [call.paginate()]
+        assert 'DELETE_COMPLETE' not in COUNTED_STACK_STATUSES
         assert len(cls.limits['Stacks'].get_current_usage()) == 1
         assert cls.limits['Stacks'].get_current_usage()[0].get_value() == 6
+        assert 'Stack sets' not in cls.limits
+
+    def test_find_usage_stack_sets(self):
+        mock_conn = Mock()
+        mock_conn.list_stacks.return_value = {'StackSummaries': []}
+        mock_conn.list_stack_sets.side_effect = [
+            {
+                'Summaries': [{'StackSetName': 'ss1'}],
+                'NextToken': 'tok1'
+            },
+            {
+                'Summaries': [{'StackSetName': 'ss2'}]
+            },
+        ]
+        instances = {
+            'ss1': {'Summaries': [{}, {}, {}]},
+            'ss2': {'Summaries': [{}]}
+        }
+        mock_conn.list_stack_instances.side_effect = \
+            lambda StackSetName: instances[StackSetName]
+        cls = _CloudformationService(
+            21, 43, {}, None, count_stack_set_instances=True
+        )
+        with patch('%s.connect' % pb):
+            cls.conn = mock_conn
+            cls.find_usage()
+        assert mock_conn.mock_calls == [
+            call.list_stacks(StackStatusFilter=COUNTED_STACK_STATUSES),
+            call.list_stack_sets(Status='ACTIVE'),
+            call.list_stack_instances(StackSetName='ss1'),
+            call.list_stack_sets(Status='ACTIVE', NextToken='tok1'),
+            call.list_stack_instances(StackSetName='ss2')
+        ]
+        assert cls.limits['Stacks'].get_current_usage()[0].get_value() == 0
+        usage = cls.limits['Stack sets'].get_current_usage()
+        assert len(usage) == 1
+        assert usage[0].get_value() == 2
+        usage = sorted(
+            cls.limits['Stack instances per stack set'].get_current_usage()
+        )
+        assert len(usage) == 2
+        assert usage[0].resource_id == 'ss2'
+        assert usage[0].get_value() == 1
+        assert usage[1].resource_id == 'ss1'
+        assert usage[1].get_value() == 3
 
     def test_update_limits_from_api(self):
         mock_conn = Mock()
@@ -154,5 +213,16 @@ class Test_CloudformationService(object):
         cls = _CloudformationService(21, 43, {}, None)
         assert cls.required_iam_permissions() == [
             'cloudformation:DescribeAccountLimits',
-            'cloudformation:DescribeStacks'
+            'cloudformation:ListStacks'
+        ]
+
+    def test_required_iam_permissions_stack_sets(self):
+        cls = _CloudformationService(
+            21, 43, {}, None, count_stack_set_instances=True
+        )
+        assert cls.required_iam_permissions() == [
+            'cloudformation:DescribeAccountLimits',
+            'cloudformation:ListStackInstances',
+            'cloudformation:ListStackSets',
+            'cloudformation:ListStacks'
         ]
@@ -198,16 +198,12 @@ class Test_DynamodbService(object):
 
         with patch('%s.connect' % pb, autospec=True) as mock_connect:
             with patch('%s._find_usage_dynamodb' % pb, autospec=True) as m_fud:
-                with patch(
-                    '%s.connect_resource' % pb, autospec=True
-                ) as mock_conn_res:
-                    mock_connect.side_effect = se_conn
-                    cls = _DynamodbService(21, 43, {}, None)
-                    cls.conn = mock_conn
-                    assert cls._have_usage is False
-                    cls.find_usage()
-        assert mock_connect.mock_calls == [call(cls)]
-        assert mock_conn_res.mock_calls == [call(cls)]
+                mock_connect.side_effect = se_conn
+                cls = _DynamodbService(21, 43, {}, None)
+                cls.conn = mock_conn
+                assert cls._have_usage is False
+                cls.find_usage()
+        assert mock_connect.mock_calls == [call(cls), call(cls)]
         assert mock_conn.mock_calls == []
         assert m_client.mock_calls == []
         assert m_fud.mock_calls == [call(cls)]
@@ -224,17 +220,30 @@ class Test_DynamodbService(object):
         def se_conn(cls):
             cls.conn = mock_conn
 
-        mock_tables = Mock()
-        mock_tables.all.return_value = response
-        mock_res_conn = Mock()
-        type(mock_res_conn).tables = mock_tables
+        mock_conn.list_tables.side_effect = [
+            {
+                'TableNames': ['table1', 'table2'],
+                'LastEvaluatedTableName': 'table2'
+            },
+            {'TableNames': ['table3']}
+        ]
+        mock_conn.describe_table.side_effect = \
+            lambda TableName: response[TableName]
 
         with patch('%s.connect' % pb, autospec=True) as mock_connect:
             mock_connect.side_effect = se_conn
             cls = _DynamodbService(21, 43, {}, None)
             cls.conn = mock_conn
-            cls.resource_conn = mock_res_conn
+            cls.describe_table_workers = 2
             cls._find_usage_dynamodb()
+        assert mock_conn.list_tables.mock_calls == [
+            call(), call(ExclusiveStartTableName='table2')
+        ]
+        assert sorted(mock_conn.describe_table.mock_calls, key=str) == [
+            call(TableName='table1'),
+            call(TableName='table2'),
+            call(TableName='table3')
+        ]
         # Account/Region wide limits
         u = cls.limits['Tables Per Region'].get_current_usage()
         assert len(u) == 1
@@ -203,8 +203,8 @@ class Test_EbsService(object):
         cls = _EbsService(21, 43, {}, None)
         cls.conn = mock_conn
         with patch('awslimitchecker.services.ebs.logger') as mock_logger:
-            with patch('%s.paginate_dict' % self.pbm) as mock_paginate:
-                mock_paginate.return_value = response
+            with patch('%s.paginate_dict_count' % self.pbm) as mock_count:
+                mock_count.return_value = len(response['Snapshots'])
                 cls._find_usage_snapshots()
         assert mock_logger.mock_calls == [
             call.debug("Getting usage for EBS snapshots"),
@@ -213,7 +213,7 @@ class Test_EbsService(object):
         assert cls.limits['Active snapshots'
                           ''].get_current_usage()[0].get_value() == 3
         assert mock_conn.mock_calls == []
-        assert mock_paginate.mock_calls == [
+        assert mock_count.mock_calls == [
             call(
                 mock_conn.describe_snapshots,
                 OwnerIds=['self'],
@@ -45,7 +45,9 @@ import botocore
 from awslimitchecker.tests.services import result_fixtures
 from awslimitchecker.services.ec2 import _Ec2Service
 from awslimitchecker.limit import AwsLimit
-from awslimitchecker.services.ec2 import RI_NO_AZ
+from awslimitchecker.services.ec2 import (
+    RI_NO_AZ, INSTANCE_TYPES, INSTANCE_TYPE_INDEX
+)
 
 # https://code.google.com/p/mock/issues/detail?id=249
 # py>=3.4 should use unittest.mock not the mock package on pypi
@@ -100,6 +102,15 @@ class TestInstanceTypes(object):
         assert 'u-24tb1.metal' in types
         assert 'm5n.metal' in types
 
+    def test_index(self):
+        cls = _Ec2Service(21, 43, {}, None)
+        types = cls._instance_types()
+        assert types == list(INSTANCE_TYPES)
+        assert INSTANCE_TYPE_INDEX == frozenset(types)
+        # callers get their own copy of the list
+        types.append('foo.bar')
+        assert 'foo.bar' not in cls._instance_types()
+
 
 class TestGetLimits(object):
 
@@ -397,19 +408,18 @@ class TestInstanceUsage(object):
         mock_conn = Mock()
 
         retval = fixtures.test_instance_usage
-        mock_conn.instances.all.return_value = retval
+        mock_conn.get_paginator.return_value.paginate.return_value = retval
 
-        cls.resource_conn = mock_conn
+        cls.conn = mock_conn
         cls.limits = limits
 
-        with patch('awslimitchecker.services.ec2._Ec2Service._instance_types',
-                   autospec=True) as mock_itypes:
-            mock_itypes.return_value = [
-                't2.micro',
-                'r3.2xlarge',
-                'c4.4xlarge',
-                'm4.8xlarge',
-            ]
+        with patch('awslimitchecker.services.ec2.INSTANCE_TYPE_INDEX',
+                   frozenset([
+                       't2.micro',
+                       'r3.2xlarge',
+                       'c4.4xlarge',
+                       'm4.8xlarge',
+                   ])):
             res = cls._instance_usage()
         assert res == {
             'az1a': {
@@ -419,31 +429,50 @@ class TestInstanceUsage(object):
                 'm4.8xlarge': 1,
             }
         }
+        assert cls.skipped_instances == {'spot': 1, 'state': 2}
         assert mock_conn.mock_calls == [
-            call.instances.all()
+            call.get_paginator('describe_instances'),
+            call.get_paginator().paginate(
+                Filters=[{
+                    'Name': 'instance-state-name',
+                    'Values': [
+                        'pending', 'running', 'shutting-down', 'stopping'
+                    ]
+                }],
+                PaginationConfig={'PageSize': 1000}
+            )
         ]
 
     def test_key_error(self):
         mock_conn = Mock()
         data = fixtures.test_instance_usage_key_error
-        mock_conn.instances.all.return_value = data
+        mock_conn.get_paginator.return_value.paginate.return_value = data
         cls = _Ec2Service(21, 43, {}, None)
-        cls.resource_conn = mock_conn
+        cls.conn = mock_conn
         cls.limits = {'Running On-Demand t2.micro instances': Mock()}
 
-        with patch(
-                '%s._instance_types' % pb,
-                autospec=True) as mock_itypes:
-            with patch('awslimitchecker.services.ec2.logger') as mock_logger:
-                mock_itypes.return_value = ['t2.micro']
-                cls._instance_usage()
+        with patch('awslimitchecker.services.ec2.logger') as mock_logger:
+            res = cls._instance_usage()
+        assert res == {}
         assert mock_logger.mock_calls == [
             call.debug('Getting usage for on-demand instances'),
             call.error("ERROR - unknown instance type '%s'; not counting",
                        'foobar'),
+            call.debug('Skipped %d spot instances and %d stopped or '
+                       'terminated instances', 0, 0)
         ]
+        assert cls.skipped_instances == {'spot': 0, 'state': 0}
         assert mock_conn.mock_calls == [
-            call.instances.all()
+            call.get_paginator('describe_instances'),
+            call.get_paginator().paginate(
+                Filters=[{
+                    'Name': 'instance-state-name',
+                    'Values': [
+                        'pending', 'running', 'shutting-down', 'stopping'
+                    ]
+                }],
+                PaginationConfig={'PageSize': 1000}
+            )
         ]
 
 
@@ -453,8 +482,8 @@ class TestInstanceUsageVcpu(object):
         cls = _Ec2Service(21, 43, {}, None)
         mock_conn = Mock()
         retval = fixtures.test_instance_usage_vcpu
-        mock_conn.instances.all.return_value = retval
-        cls.resource_conn = mock_conn
+        mock_conn.get_paginator.return_value.paginate.return_value = retval
+        cls.conn = mock_conn
 
         res = cls._instance_usage_vcpu({})
         assert res == {
@@ -467,16 +496,26 @@ class TestInstanceUsageVcpu(object):
             'p': 128,
             'x': 256,
         }
+        assert cls.skipped_instances == {'spot': 1, 'state': 3}
         assert mock_conn.mock_calls == [
-            call.instances.all()
+            call.get_paginator('describe_instances'),
+            call.get_paginator().paginate(
+                Filters=[{
+                    'Name': 'instance-state-name',
+                    'Values': [
+                        'pending', 'running', 'shutting-down', 'stopping'
+                    ]
+                }],
+                PaginationConfig={'PageSize': 1000}
+            )
         ]
 
     def test_with_RIs(self):
         cls = _Ec2Service(21, 43, {}, None)
         mock_conn = Mock()
         retval = fixtures.test_instance_usage_vcpu
-        mock_conn.instances.all.return_value = retval
-        cls.resource_conn = mock_conn
+        mock_conn.get_paginator.return_value.paginate.return_value = retval
+        cls.conn = mock_conn
 
         res = cls._instance_usage_vcpu({
             'az1a': {
@@ -500,7 +539,16 @@ class TestInstanceUsageVcpu(object):
             'x': 128,
         }
         assert mock_conn.mock_calls == [
-            call.instances.all()
+            call.get_paginator('describe_instances'),
+            call.get_paginator().paginate(
+                Filters=[{
+                    'Name': 'instance-state-name',
+                    'Values': [
+                        'pending', 'running', 'shutting-down', 'stopping'
+                    ]
+                }],
+                PaginationConfig={'PageSize': 1000}
+            )
         ]
 
 
@@ -513,8 +561,6 @@ class TestGetReservedInstanceCount(object):
         mock_client_conn = Mock()
         cls.conn = mock_client_conn
         mock_client_conn.describe_reserved_instances.return_value = response
-        mock_conn = Mock()
-        cls.resource_conn = mock_conn
 
         res = cls._get_reserved_instance_count()
         assert res == {
@@ -529,7 +575,6 @@ class TestGetReservedInstanceCount(object):
                 'it3': 6
             }
         }
-        assert mock_conn.mock_calls == []
         assert mock_client_conn.mock_calls == [
             call.describe_reserved_instances()
         ]
@@ -585,8 +630,6 @@ class TestFindUsageInstancesNonvcpu(object):
         }
 
         cls = _Ec2Service(21, 43, {}, None)
-        mock_conn = Mock()
-        cls.resource_conn = mock_conn
         cls.limits = limits
         with patch('%s._instance_usage' % pb,
                    autospec=True) as mock_inst_usage:
@@ -617,7 +660,38 @@ class TestFindUsageInstancesNonvcpu(object):
         )]
         assert mock_inst_usage.mock_calls == [call(cls)]
         assert mock_res_inst_count.mock_calls == [call(cls)]
-        assert mock_conn.mock_calls == []
+
+    def test_zero_usage(self):
+        mock_t2_micro = Mock(spec_set=AwsLimit)
+        mock_c4_large = Mock(spec_set=AwsLimit)
+        mock_all_ec2 = Mock(spec_set=AwsLimit)
+        limits = {
+            'Running On-Demand t2.micro instances': mock_t2_micro,
+            'Running On-Demand c4.large instances': mock_c4_large,
+            'Running On-Demand EC2 instances': mock_all_ec2,
+        }
+
+        cls = _Ec2Service(21, 43, {}, None)
+        cls.limits = limits
+        with patch('%s._instance_usage' % pb,
+                   autospec=True) as mock_inst_usage:
+            with patch('%s._get_reserved_instance_count' % pb,
+                       autospec=True) as mock_res_inst_count:
+                mock_inst_usage.return_value = {'az1': {'t2.micro': 3}}
+                mock_res_inst_count.return_value = {}
+                cls._find_usage_instances_nonvcpu()
+        assert mock_t2_micro.mock_calls == [call._add_current_usage(
+            3,
+            aws_type='AWS::EC2::Instance'
+        )]
+        assert mock_c4_large.mock_calls == [call._add_current_usage(
+            0,
+            aws_type='AWS::EC2::Instance'
+        )]
+        assert mock_all_ec2.mock_calls == [call._add_current_usage(
+            3,
+            aws_type='AWS::EC2::Instance'
+        )]
 
 
 class TestFindUsageInstancesVcpu(object):
@@ -767,10 +841,10 @@ class TestFindUsageNetworkingSgs(object):
         mocks = fixtures.test_find_usage_networking_sgs
 
         mock_conn = Mock()
-        mock_conn.security_groups.all.return_value = mocks
+        mock_conn.get_paginator.return_value.paginate.return_value = mocks
 
         cls = _Ec2Service(21, 43, {}, None)
-        cls.resource_conn = mock_conn
+        cls.conn = mock_conn
 
         with patch('awslimitchecker.services.ec2.logger') as mock_logger:
             cls._find_usage_networking_sgs()
@@ -807,7 +881,8 @@ class TestFindUsageNetworkingSgs(object):
         # egress: IPv4 = 22; IPv6 = 29
         assert sorted_usage[2].get_value() == 29
         assert mock_conn.mock_calls == [
-            call.security_groups.all()
+            call.get_paginator('describe_security_groups'),
+            call.get_paginator().paginate()
         ]
 
 
@@ -817,10 +892,9 @@ class TestFindUsageNetworkingEips(object):
         mocks = fixtures.test_find_usage_networking_eips
 
         mock_conn = Mock()
-        mock_conn.classic_addresses.all.return_value = mocks['Classic']
-        mock_conn.vpc_addresses.all.return_value = mocks['Vpc']
+        mock_conn.describe_addresses.return_value = mocks
         cls = _Ec2Service(21, 43, {}, None)
-        cls.resource_conn = mock_conn
+        cls.conn = mock_conn
 
         with patch('awslimitchecker.services.ec2.logger') as mock_logger:
             cls._find_usage_networking_eips()
@@ -844,8 +918,7 @@ class TestFindUsageNetworkingEips(object):
         assert usage[0].aws_type == 'AWS::EC2::EIP'
 
         assert mock_conn.mock_calls == [
-            call.vpc_addresses.all(),
-            call.classic_addresses.all()
+            call.describe_addresses()
         ]
 
 
@@ -855,9 +928,9 @@ class TestFindUsageNetworkingEniSg(object):
         mocks = fixtures.test_find_usage_networking_eni_sg
 
         mock_conn = Mock()
-        mock_conn.network_interfaces.all.return_value = mocks
+        mock_conn.get_paginator.return_value.paginate.return_value = mocks
         cls = _Ec2Service(21, 43, {}, None)
-        cls.resource_conn = mock_conn
+        cls.conn = mock_conn
         with patch('awslimitchecker.services.ec2.logger') as mock_logger:
             cls._find_usage_networking_eni_sg()
         assert mock_logger.mock_calls == [
@@ -876,7 +949,8 @@ class TestFindUsageNetworkingEniSg(object):
         assert sorted_usage[2].resource_id == 'if-3'
         assert sorted_usage[2].get_value() == 8
         assert mock_conn.mock_calls == [
-            call.network_interfaces.all()
+            call.get_paginator('describe_network_interfaces'),
+            call.get_paginator().paginate()
         ]
 
 
@@ -934,15 +1008,12 @@ class TestFindUsageSpotInstances(object):
 
     def test_happy_path(self):
         data = fixtures.test_find_usage_spot_instances
-        mock_conn = Mock()
         mock_client_conn = Mock()
         mock_client_conn.describe_spot_instance_requests.return_value = data
         cls = _Ec2Service(21, 43, {}, None)
-        cls.resource_conn = mock_conn
         cls.conn = mock_client_conn
         with patch('awslimitchecker.services.ec2.logger') as mock_logger:
             cls._find_usage_spot_instances()
-        assert mock_conn.mock_calls == []
         assert mock_client_conn.mock_calls == [
             call.describe_spot_instance_requests()
         ]
@@ -1002,15 +1073,12 @@ class TestFindUsageSpotFleets(object):
 
     def test_simple(self):
         data = fixtures.test_find_usage_spot_fleets
-        mock_conn = Mock()
         mock_client_conn = Mock()
         mock_client_conn.describe_spot_fleet_requests.return_value = data
         cls = _Ec2Service(21, 43, {}, None)
-        cls.resource_conn = mock_conn
         cls.conn = mock_client_conn
         with patch('awslimitchecker.services.ec2.logger') as mock_logger:
             cls._find_usage_spot_fleets()
-        assert mock_conn.mock_calls == []
         assert mock_client_conn.mock_calls == [
             call.describe_spot_fleet_requests()
         ]
@@ -1052,15 +1120,12 @@ class TestFindUsageSpotFleets(object):
     def test_paginated(self):
         data = deepcopy(fixtures.test_find_usage_spot_fleets)
         data['NextToken'] = 'string'
-        mock_conn = Mock()
         mock_client_conn = Mock()
         mock_client_conn.describe_spot_fleet_requests.return_value = data
         cls = _Ec2Service(21, 43, {}, None)
-        cls.resource_conn = mock_conn
         cls.conn = mock_client_conn
         with patch('awslimitchecker.services.ec2.logger') as mock_logger:
             cls._find_usage_spot_fleets()
-        assert mock_conn.mock_calls == []
         assert mock_client_conn.mock_calls == [
             call.describe_spot_fleet_requests()
         ]
@@ -1141,7 +1206,6 @@ class TestUpdateLimitsFromApi(object):
 
     def test_happy_path(self):
         data = fixtures.test_update_limits_from_api
-        mock_conn = Mock()
         mock_client_conn = Mock()
         mock_client_conn.describe_account_attributes.return_value = data
 
@@ -1150,11 +1214,9 @@ class TestUpdateLimitsFromApi(object):
         ) as m_use_vcpu:
             m_use_vcpu.return_value = False
             cls = _Ec2Service(21, 43, {}, None)
-            cls.resource_conn = mock_conn
             cls.conn = mock_client_conn
             with patch('awslimitchecker.services.ec2.logger') as mock_logger:
                 cls._update_limits_from_api()
-        assert mock_conn.mock_calls == []
         assert mock_client_conn.mock_calls == [
             call.describe_account_attributes()
         ]
@@ -1170,7 +1232,6 @@ class TestUpdateLimitsFromApi(object):
 
     def test_vcpu(self):
         data = fixtures.test_update_limits_from_api_vcpu
-        mock_conn = Mock()
         mock_client_conn = Mock()
         mock_client_conn.describe_account_attributes.return_value = data
 
@@ -1179,11 +1240,9 @@ class TestUpdateLimitsFromApi(object):
         ) as m_use_vcpu:
             m_use_vcpu.return_value = False
             cls = _Ec2Service(21, 43, {}, None)
-            cls.resource_conn = mock_conn
             cls.conn = mock_client_conn
             with patch('awslimitchecker.services.ec2.logger') as mock_logger:
                 cls._update_limits_from_api()
-        assert mock_conn.mock_calls == []
         assert mock_client_conn.mock_calls == [
             call.describe_account_attributes()
         ]
@@ -38,8 +38,11 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 ################################################################################
 """
 
+import asyncio
 import sys
 from awslimitchecker.services.ecs import _EcsService
+from awslimitchecker.aio import run
+from awslimitchecker.tests.support import AsyncClientStub
 
 # https://code.google.com/p/mock/issues/detail?id=249
 # py>=3.4 should use unittest.mock not the mock package on pypi
@@ -105,9 +108,142 @@ class Test_EcsService(object):
         assert cls._have_usage is True
         assert mocks['connect'].return_value.mock_calls == []
 
+    def test_find_usage_async(self):
+
+        def se_clusters(*_, **kwargs):
+            return {
+                'clusters': [
+                    {
+                        'clusterArn': arn,
+                        'clusterName': arn.replace('arn', 'name'),
+                        'registeredContainerInstancesCount': int(arn[1]),
+                        'activeServicesCount': 10 + int(arn[1]),
+                        'statistics': [
+                            {
+                                'name': 'runningFargateTasksCount',
+                                'value': arn[1]
+                            }
+                        ]
+                    } for arn in kwargs['clusters']
+                ]
+            }
+
+        def se_services(*_, **kwargs):
+            return {
+                'services': [
+                    {
+                        'launchType': 'EC2',
+                        'serviceName': name,
+                        'desiredCount': 5
+                    } for name in kwargs['services']
+                ]
+            }
+
+        def se_paginator(name):
+            m = Mock()
+            if name == 'list_clusters':
+                m.paginate.return_value = [
+                    {'clusterArns': ['c1arn']}, {'clusterArns': ['c2arn']}
+                ]
+            else:
+                m.paginate.return_value = [{'serviceArns': ['s1', 's2']}]
+            return m
+
+        mock_conn = Mock()
+        mock_conn.describe_clusters.side_effect = se_clusters
+        mock_conn.describe_services.side_effect = se_services
+        mock_conn.get_paginator.side_effect = se_paginator
+        cls = _EcsService(21, 43, {}, None)
+        with patch('%s.connect_async' % pb, autospec=True) as m_conn:
+            m_conn.return_value = AsyncClientStub(mock_conn)
+            run(cls.find_usage_async())
+        assert m_conn.mock_calls == [call(cls)]
+        assert cls._have_usage is True
+        assert mock_conn.describe_clusters.mock_calls == [
+            call(clusters=['c1arn', 'c2arn'], include=['STATISTICS'])
+        ]
+        assert mock_conn.describe_services.mock_calls == [
+            call(cluster='c1name', services=['s1', 's2']),
+            call(cluster='c2name', services=['s1', 's2'])
+        ]
+        c = cls.limits['Container Instances per Cluster'].get_current_usage()
+        assert [(x.resource_id, x.get_value()) for x in c] == [
+            ('c1name', 1), ('c2name', 2)
+        ]
+        s = cls.limits['Services per Cluster'].get_current_usage()
+        assert [(x.resource_id, x.get_value()) for x in s] == [
+            ('c1name', 11), ('c2name', 12)
+        ]
+        t = cls.limits[
+            'EC2 Tasks per Service (desired count)'
+        ].get_current_usage()
+        assert [x.resource_id for x in t] == [
+            'cluster=c1name; service=s1', 'cluster=c1name; service=s2',
+            'cluster=c2name; service=s1', 'cluster=c2name; service=s2'
+        ]
+        f = cls.limits['Fargate Tasks'].get_current_usage()
+        assert f[0].get_value() == 3
+        u = cls.limits['Clusters'].get_current_usage()
+        assert u[0].get_value() == 2
+
+    def test_find_usage_async_bounded(self):
+        """requests at both levels share one aio_concurrency bound"""
+        state = {'running': 0, 'max': 0}
+
+        class SlowStub(AsyncClientStub):
+
+            def __getattr__(self, name):
+                meth = getattr(self.mock, name)
+
+                async def _call(*args, **kwargs):
+                    state['running'] += 1
+                    state['max'] = max(state['max'], state['running'])
+                    await asyncio.sleep(0.001)
+                    state['running'] -= 1
+                    return meth(*args, **kwargs)
+
+                return _call
+
+        def se_clusters(*_, **kwargs):
+            return {
+                'clusters': [
+                    {
+                        'clusterArn': arn,
+                        'clusterName': arn,
+                        'registeredContainerInstancesCount': 1,
+                        'activeServicesCount': 1
+                    } for arn in kwargs['clusters']
+                ]
+            }
+
+        def se_paginator(name):
+            m = Mock()
+            if name == 'list_clusters':
+                m.paginate.return_value = [
+                    {'clusterArns': ['c%d' % i for i in range(250)]}
+                ]
+            else:
+                m.paginate.return_value = [
+                    {'serviceArns': ['s%d' % i for i in range(25)]}
+                ]
+            return m
+
+        mock_conn = Mock()
+        mock_conn.describe_clusters.side_effect = se_clusters
+        mock_conn.describe_services.return_value = {'services': []}
+        mock_conn.get_paginator.side_effect = se_paginator
+        cls = _EcsService(21, 43, {}, None)
+        cls.aio_concurrency = 3
+        with patch('%s.connect_async' % pb, autospec=True) as m_conn:
+            m_conn.return_value = SlowStub(mock_conn)
+            run(cls.find_usage_async())
+        assert len(mock_conn.describe_clusters.mock_calls) == 3
+        assert len(mock_conn.describe_services.mock_calls) == 750
+        assert state['max'] == 3
+
     def test_find_usage_clusters(self):
         def se_clusters(*_, **kwargs):
-            if kwargs['clusters'] == ['c1arn']:
+            if kwargs['clusters'] == ['c1arn', 'c2arn']:
                 return {
                     'clusters': [
                         {
@@ -130,12 +266,7 @@ class Test_EcsService(object):
                                     'value': '2'
                                 }
                             ]
-                        }
-                    ]
-                }
-            elif kwargs['clusters'] == ['c2arn']:
-                return {
-                    'clusters': [
+                        },
                         {
                             'clusterArn': 'c2arn',
                             'clusterName': 'c2name',
@@ -169,10 +300,7 @@ class Test_EcsService(object):
             call.get_paginator('list_clusters'),
             call.get_paginator().paginate(),
             call.describe_clusters(
-                clusters=['c1arn'], include=['STATISTICS']
-            ),
-            call.describe_clusters(
-                clusters=['c2arn'], include=['STATISTICS']
+                clusters=['c1arn', 'c2arn'], include=['STATISTICS']
             )
         ]
         c = cls.limits['Container Instances per Cluster'].get_current_usage()
@@ -203,29 +331,19 @@ class Test_EcsService(object):
     def test_find_usage_one_cluster(self):
 
         def se_cluster(*_, **kwargs):
-            if kwargs['services'] == ['s1arn']:
+            if kwargs['services'] == ['s1arn', 's2arn', 's3arn']:
                 return {
                     'services': [
                         {
                             'launchType': 'EC2',
                             'serviceName': 's1',
                             'desiredCount': 4
-                        }
-                    ]
-                }
-            elif kwargs['services'] == ['s2arn']:
-                return {
-                    'services': [
+                        },
                         {
                             'launchType': 'Fargate',
                             'serviceName': 's2',
                             'desiredCount': 26
-                        }
-                    ]
-                }
-            elif kwargs['services'] == ['s3arn']:
-                return {
-                    'services': [
+                        },
                         {
                             'launchType': 'EC2',
                             'serviceName': 's3',
@@ -258,9 +376,9 @@ class Test_EcsService(object):
             call.get_paginator().paginate(
                 cluster='cName', launchType='EC2'
             ),
-            call.describe_services(cluster='cName', services=['s1arn']),
-            call.describe_services(cluster='cName', services=['s2arn']),
-            call.describe_services(cluster='cName', services=['s3arn'])
+            call.describe_services(
+                cluster='cName', services=['s1arn', 's2arn', 's3arn']
+            )
         ]
         u = cls.limits[
             'EC2 Tasks per Service (desired count)'
@@ -273,6 +391,74 @@ class Test_EcsService(object):
         assert u[1].resource_id == 'cluster=cName; service=s3'
         assert u[1].aws_type == 'AWS::ECS::Service'
 
+    def test_find_usage_clusters_batched(self):
+        arns = ['c%darn' % x for x in range(250)]
+
+        def se_clusters(*_, **kwargs):
+            return {
+                'clusters': [
+                    {
+                        'clusterArn': x,
+                        'clusterName': x,
+                        'registeredContainerInstancesCount': 1,
+                        'activeServicesCount': 1
+                    } for x in kwargs['clusters']
+                ]
+            }
+
+        mock_conn = Mock()
+        mock_conn.describe_clusters.side_effect = se_clusters
+        mock_paginator = Mock()
+        mock_paginator.paginate.return_value = [
+            {'clusterArns': arns[:120]}, {'clusterArns': arns[120:]}
+        ]
+        mock_conn.get_paginator.return_value = mock_paginator
+        cls = _EcsService(21, 43, {}, None)
+        cls.conn = mock_conn
+        with patch('%s._find_usage_one_cluster' % pb, autospec=True) as m_fuoc:
+            cls._find_usage_clusters()
+        assert mock_conn.describe_clusters.mock_calls == [
+            call(clusters=arns[:100], include=['STATISTICS']),
+            call(clusters=arns[100:120], include=['STATISTICS']),
+            call(clusters=arns[120:220], include=['STATISTICS']),
+            call(clusters=arns[220:], include=['STATISTICS'])
+        ]
+        assert m_fuoc.mock_calls == [call(cls, x) for x in arns]
+        u = cls.limits['Clusters'].get_current_usage()
+        assert u[0].get_value() == 250
+
+    def test_find_usage_one_cluster_batched(self):
+        arns = ['s%d' % x for x in range(23)]
+
+        def se_services(*_, **kwargs):
+            return {
+                'services': [
+                    {
+                        'launchType': 'EC2',
+                        'serviceName': x,
+                        'desiredCount': 2
+                    } for x in kwargs['services']
+                ]
+            }
+
+        mock_conn = Mock()
+        mock_conn.describe_services.side_effect = se_services
+        mock_paginator = Mock()
+        mock_paginator.paginate.return_value = [{'serviceArns': arns}]
+        mock_conn.get_paginator.return_value = mock_paginator
+        cls = _EcsService(21, 43, {}, None)
+        cls.conn = mock_conn
+        cls._find_usage_one_cluster('cName')
+        assert mock_conn.describe_services.mock_calls == [
+            call(cluster='cName', services=arns[:10]),
+            call(cluster='cName', services=arns[10:20]),
+            call(cluster='cName', services=arns[20:])
+        ]
+        u = cls.limits[
+            'EC2 Tasks per Service (desired count)'
+        ].get_current_usage()
+        assert len(u) == 23
+
     def test_required_iam_permissions(self):
         cls = _EcsService(21, 43, {}, None)
         assert sorted(cls.required_iam_permissions()) == [
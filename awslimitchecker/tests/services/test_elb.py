@@ -40,6 +40,9 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 import sys
 from awslimitchecker.tests.services import result_fixtures
 from awslimitchecker.services.elb import _ElbService
+from awslimitchecker.aio import run
+from awslimitchecker.tests.support import AsyncClientStub
+from botocore.exceptions import ClientError
 
 # https://code.google.com/p/mock/issues/detail?id=249
 # py>=3.4 should use unittest.mock not the mock package on pypi
@@ -47,9 +50,9 @@ if (
         sys.version_info[0] < 3 or
         sys.version_info[0] == 3 and sys.version_info[1] < 4
 ):
-    from mock import patch, call, Mock, PropertyMock
+    from mock import patch, call, Mock, PropertyMock, DEFAULT
 else:
-    from unittest.mock import patch, call, Mock, PropertyMock
+    from unittest.mock import patch, call, Mock, PropertyMock, DEFAULT
 
 
 pbm = 'awslimitchecker.services.elb'  # patch base path - module
@@ -103,7 +106,7 @@ class Test_ElbService(object):
         mock_conn.describe_account_limits.return_value = r1
 
         with patch('%s.connect' % pb) as mock_connect:
-            with patch('%s.client' % pbm) as mock_client:
+            with patch('%s.cached_client' % pbm) as mock_client:
                 m_cli = mock_client.return_value
                 m_cli._client_config.region_name = PropertyMock(
                     return_value='rname'
@@ -117,7 +120,7 @@ class Test_ElbService(object):
         assert mock_connect.mock_calls == [call()]
         assert mock_conn.mock_calls == [call.describe_account_limits()]
         assert mock_client.mock_calls == [
-            call('elbv2', foo='bar', baz='blam'),
+            call('elbv2', {'foo': 'bar', 'baz': 'blam'}),
             call().describe_account_limits()
         ]
         assert cls.limits['Classic load balancers'].api_limit == 3
@@ -153,6 +156,66 @@ class Test_ElbService(object):
         assert cls.limits['Application load balancers'
                           ].get_current_usage()[0].get_value() == 5
 
+    def test_find_usage_async(self):
+        rules = result_fixtures.ELB.test_usage_alb_rules
+
+        def se_rules(ListenerArn=None):
+            return rules[int(ListenerArn[-1]) - 1]
+
+        mock_conn = Mock()
+        mock_conn.describe_target_groups.return_value = \
+            result_fixtures.ELB.test_find_usage_elbv2_target_groups
+        mock_conn.describe_load_balancers.return_value = \
+            result_fixtures.ELB.test_find_usage_elbv2_elbs
+        mock_conn.describe_listeners.return_value = \
+            result_fixtures.ELB.test_usage_alb_listeners
+        mock_conn.describe_rules.side_effect = se_rules
+        with patch('%s._find_usage_elbv1' % pb, autospec=True) as mock_v1:
+            with patch('%s.connect_async' % pb, autospec=True) as m_conn:
+                with patch('%s.Config' % pbm, autospec=True) as mock_conf:
+                    m_conn.return_value = AsyncClientStub(mock_conn)
+                    mock_v1.return_value = 3
+                    cls = _ElbService(21, 43, {}, None)
+                    run(cls.find_usage_async())
+        assert cls._have_usage is True
+        assert mock_v1.mock_calls == [call(cls)]
+        assert m_conn.mock_calls == [
+            call(cls, api_name='elbv2', config=mock_conf.return_value)
+        ]
+        assert mock_conf.mock_calls == [call(retries={'max_attempts': 12})]
+        assert mock_conn.describe_listeners.mock_calls == [
+            call(LoadBalancerArn='lb-arn1'),
+            call(LoadBalancerArn='lb-arn2'),
+            call(LoadBalancerArn='lb-arn3')
+        ]
+        assert len(mock_conn.describe_rules.mock_calls) == 6
+        assert cls.limits['Classic load balancers'].get_current_usage()[
+            0].get_value() == 3
+        assert cls.limits['Application load balancers'].get_current_usage()[
+            0].get_value() == 2
+        assert cls.limits['Network load balancers'].get_current_usage()[
+            0].get_value() == 1
+        assert cls.limits['Target groups'].get_current_usage()[
+            0].get_value() == 3
+        lim = cls.limits[
+            'Listeners per application load balancer'].get_current_usage()
+        assert [(x.resource_id, x.get_value()) for x in lim] == [
+            ('lb1', 3), ('lb2', 3)
+        ]
+        lim = cls.limits[
+            'Rules per application load balancer'].get_current_usage()
+        assert [(x.resource_id, x.get_value()) for x in lim] == [
+            ('lb1', 7), ('lb2', 7)
+        ]
+        lim = cls.limits[
+            'Certificates per application load balancer'].get_current_usage()
+        assert [(x.resource_id, x.get_value()) for x in lim] == [
+            ('lb1', 3), ('lb2', 3)
+        ]
+        lim = cls.limits[
+            'Listeners per network load balancer'].get_current_usage()
+        assert [(x.resource_id, x.get_value()) for x in lim] == [('lb3', 3)]
+
     def test_find_usage_elbv1(self):
         mock_conn = Mock()
 
@@ -201,149 +264,221 @@ class Test_ElbService(object):
     def test_find_usage_elbv2(self):
         lbs_res = result_fixtures.ELB.test_find_usage_elbv2_elbs
         tgs_res = result_fixtures.ELB.test_find_usage_elbv2_target_groups
+        listeners = {
+            'lb-arn1': [{'ListenerArn': 'l1'}, {'ListenerArn': 'l2'}],
+            'lb-arn2': [{'ListenerArn': 'l3'}],
+            'lb-arn3': [{'ListenerArn': 'l4'}]
+        }
+
+        def se_listeners(_, conn, arn):
+            return listeners[arn]
+
+        def se_rules(_, conn, arn):
+            return int(arn[1:])
 
         with patch('%s.connect' % pb) as mock_connect:
-            with patch('%s.client' % pbm) as mock_client:
+            with patch('%s.cached_client' % pbm) as mock_client:
                 mock_client.return_value._client_config.region_name = \
                     PropertyMock(return_value='rname')
-                with patch('%s.paginate_dict' % pbm) as mock_paginate:
-                    with patch(
-                        '%s._update_usage_for_alb' % pb, autospec=True
-                    ) as mock_u:
+                with patch.multiple(
+                    pbm,
+                    paginate_dict=DEFAULT,
+                    paginate_dict_count=DEFAULT
+                ) as utils_mocks:
+                    mock_paginate = utils_mocks['paginate_dict']
+                    mock_count = utils_mocks['paginate_dict_count']
+                    with patch.multiple(
+                        pb,
+                        autospec=True,
+                        _describe_listeners=DEFAULT,
+                        _count_rules=DEFAULT,
+                        _add_elbv2_usage=DEFAULT
+                    ) as mocks:
                         with patch(
                             '%s.Config' % pbm, autospec=True
                         ) as mock_conf:
-                            mock_paginate.side_effect = [
-                                tgs_res,
-                                lbs_res
-                            ]
+                            mocks['_describe_listeners'].side_effect = \
+                                se_listeners
+                            mocks['_count_rules'].side_effect = se_rules
+                            mock_count.return_value = len(
+                                tgs_res['TargetGroups']
+                            )
+                            mock_paginate.return_value = lbs_res
                             cls = _ElbService(21, 43, {}, None)
                             cls._boto3_connection_kwargs = {
                                 'foo': 'bar',
                                 'baz': 'blam'
                             }
+                            cls.elbv2_workers = 2
                             res = cls._find_usage_elbv2()
         assert res == 2
         assert mock_conf.mock_calls == [
             call(retries={'max_attempts': 12})
         ]
         assert mock_connect.mock_calls == []
+        conn = mock_client.return_value
         assert mock_client.mock_calls == [
-            call('elbv2', foo='bar', baz='blam', config=mock_conf.return_value),
+            call('elbv2', {'foo': 'bar', 'baz': 'blam'},
+                 config=mock_conf.return_value),
         ]
-        assert mock_paginate.mock_calls == [
+        assert mock_count.mock_calls == [
             call(
-                mock_client.return_value.describe_target_groups,
+                conn.describe_target_groups,
                 alc_marker_path=['NextMarker'],
                 alc_data_path=['TargetGroups'],
                 alc_marker_param='Marker'
-            ),
+            )
+        ]
+        assert mock_paginate.mock_calls == [
             call(
-                mock_client.return_value.describe_load_balancers,
+                conn.describe_load_balancers,
                 alc_marker_path=['NextMarker'],
                 alc_data_path=['LoadBalancers'],
                 alc_marker_param='Marker'
             )
         ]
-        assert mock_u.mock_calls == [
-            call(cls, mock_client.return_value, 'lb-arn1', 'lb1'),
-            call(cls, mock_client.return_value, 'lb-arn2', 'lb2')
+        assert sorted(
+            [x[1][2] for x in mocks['_describe_listeners'].mock_calls]
+        ) == ['lb-arn1', 'lb-arn2', 'lb-arn3']
+        assert sorted(
+            [x[1][2] for x in mocks['_count_rules'].mock_calls]
+        ) == ['l1', 'l2', 'l3']
+        albs = [lbs_res['LoadBalancers'][0], lbs_res['LoadBalancers'][2]]
+        nlbs = [lbs_res['LoadBalancers'][1]]
+        assert mocks['_add_elbv2_usage'].mock_calls == [
+            call(
+                cls, albs, nlbs,
+                [listeners['lb-arn1'], listeners['lb-arn2'],
+                 listeners['lb-arn3']],
+                [1, 2, 3]
+            )
         ]
         lim = cls.limits['Target groups'].get_current_usage()
         assert len(lim) == 1
         assert lim[0].get_value() == 3
         assert lim[0].aws_type == 'AWS::ElasticLoadBalancingV2::TargetGroup'
-        lim = cls.limits['Network load balancers'].get_current_usage()
-        assert len(lim) == 1
-        assert lim[0].get_value() == 1
-        assert lim[0].aws_type == \
-            'AWS::ElasticLoadBalancing::NetworkLoadBalancer'
 
-    def test_update_usage_for_alb(self):
+    def test_describe_listeners(self):
         conn = Mock()
-        with patch('%s.paginate_dict' % pbm) as mock_paginate:
-            mock_paginate.side_effect = [
-                result_fixtures.ELB.test_usage_alb_listeners,
-                result_fixtures.ELB.test_usage_alb_rules[0],
-                result_fixtures.ELB.test_usage_alb_rules[1],
-                result_fixtures.ELB.test_usage_alb_rules[2]
-            ]
+        conn.describe_listeners.return_value = \
+            result_fixtures.ELB.test_usage_alb_listeners
+        cls = _ElbService(21, 43, {}, None)
+        res = cls._describe_listeners(conn, 'myarn')
+        assert res == result_fixtures.ELB.test_usage_alb_listeners[
+            'Listeners']
+        assert conn.mock_calls == [
+            call.describe_listeners(LoadBalancerArn='myarn')
+        ]
+
+    def test_describe_listeners_throttled(self):
+        """a throttled page is retried without restarting pagination"""
+        conn = Mock()
+        throttled = ClientError(
+            {'Error': {'Code': 'Throttling', 'Message': 'Rate exceeded'}},
+            'DescribeListeners'
+        )
+        listeners = result_fixtures.ELB.test_usage_nlb_listeners['Listeners']
+        conn.describe_listeners.side_effect = [
+            {'Listeners': listeners[:1], 'NextMarker': 'm1'},
+            throttled,
+            {'Listeners': listeners[1:]}
+        ]
+        with patch('awslimitchecker.utils.time.sleep') as mock_sleep:
             cls = _ElbService(21, 43, {}, None)
-            cls._update_usage_for_alb(conn, 'myarn', 'albname')
-        assert mock_paginate.mock_calls == [
-            call(
-                conn.describe_listeners,
-                LoadBalancerArn='myarn',
-                alc_marker_path=['NextMarker'],
-                alc_data_path=['Listeners'],
-                alc_marker_param='Marker'
-            ),
-            call(
-                conn.describe_rules,
-                ListenerArn='listener1',
-                alc_marker_path=['NextMarker'],
-                alc_data_path=['Rules'],
-                alc_marker_param='Marker'
-            ),
-            call(
-                conn.describe_rules,
-                ListenerArn='listener2',
-                alc_marker_path=['NextMarker'],
-                alc_data_path=['Rules'],
-                alc_marker_param='Marker'
-            ),
-            call(
-                conn.describe_rules,
-                ListenerArn='listener3',
-                alc_marker_path=['NextMarker'],
-                alc_data_path=['Rules'],
-                alc_marker_param='Marker'
-            )
+            res = cls._describe_listeners(conn, 'myarn')
+        assert res == listeners
+        assert conn.mock_calls == [
+            call.describe_listeners(LoadBalancerArn='myarn'),
+            call.describe_listeners(LoadBalancerArn='myarn', Marker='m1'),
+            call.describe_listeners(LoadBalancerArn='myarn', Marker='m1')
+        ]
+        assert mock_sleep.call_count == 1
+
+    def test_count_rules(self):
+        conn = Mock()
+        conn.describe_rules.return_value = \
+            result_fixtures.ELB.test_usage_alb_rules[0]
+        cls = _ElbService(21, 43, {}, None)
+        res = cls._count_rules(conn, 'listener1')
+        assert res == len(
+            result_fixtures.ELB.test_usage_alb_rules[0]['Rules']
+        )
+        assert conn.mock_calls == [
+            call.describe_rules(ListenerArn='listener1')
+        ]
+
+    def test_count_rules_async_throttled(self):
+        throttled = ClientError(
+            {'Error': {'Code': 'Throttling', 'Message': 'Rate exceeded'}},
+            'DescribeRules'
+        )
+        m = Mock(side_effect=[
+            {'Rules': [1, 2], 'NextMarker': 'm1'},
+            throttled,
+            {'Rules': [3]}
+        ])
+
+        async def describe_rules(**kwargs):
+            return m(**kwargs)
+
+        async def no_sleep(_):
+            return None
+
+        conn = Mock()
+        conn.describe_rules = describe_rules
+        cls = _ElbService(21, 43, {}, None)
+        with patch('awslimitchecker.aio.asyncio.sleep') as mock_sleep:
+            mock_sleep.side_effect = no_sleep
+            res = run(cls._count_rules_async(conn, 'listener1'))
+        assert res == 3
+        assert m.mock_calls == [
+            call(ListenerArn='listener1'),
+            call(ListenerArn='listener1', Marker='m1'),
+            call(ListenerArn='listener1', Marker='m1')
         ]
+        assert mock_sleep.call_count == 1
+
+    def test_add_elbv2_usage(self):
+        alb_listeners = result_fixtures.ELB.test_usage_alb_listeners[
+            'Listeners']
+        nlb_listeners = result_fixtures.ELB.test_usage_nlb_listeners[
+            'Listeners']
+        cls = _ElbService(21, 43, {}, None)
+        cls._add_elbv2_usage(
+            [{'LoadBalancerName': 'alb1'}, {'LoadBalancerName': 'alb2'}],
+            [{'LoadBalancerName': 'nlb1'}],
+            [alb_listeners, alb_listeners[:1], nlb_listeners],
+            [1, 2, 4, 8]
+        )
         lim = cls.limits[
             'Listeners per application load balancer'].get_current_usage()
-        assert len(lim) == 1
-        assert lim[0].get_value() == 3
+        assert [(x.resource_id, x.get_value()) for x in lim] == [
+            ('alb1', 3), ('alb2', 1)
+        ]
         assert lim[0].aws_type == 'AWS::ElasticLoadBalancingV2::LoadBalancer'
-        assert lim[0].resource_id == 'albname'
         r = cls.limits[
             'Rules per application load balancer'].get_current_usage()
-        assert len(r) == 1
-        assert r[0].get_value() == 7
-        assert r[0].aws_type == 'AWS::ElasticLoadBalancingV2::LoadBalancer'
-        assert r[0].resource_id == 'albname'
+        assert [(x.resource_id, x.get_value()) for x in r] == [
+            ('alb1', 7), ('alb2', 8)
+        ]
         certs = cls.limits[
             'Certificates per application load balancer'
         ].get_current_usage()
-        assert len(certs) == 1
-        assert certs[0].get_value() == 3
-        assert certs[0].aws_type == 'AWS::ElasticLoadBalancingV2::LoadBalancer'
-        assert certs[0].resource_id == 'albname'
-
-    def test_update_usage_for_nlb(self):
-        conn = Mock()
-        with patch('%s.paginate_dict' % pbm) as mock_paginate:
-            mock_paginate.side_effect = [
-                result_fixtures.ELB.test_usage_nlb_listeners
-            ]
-            cls = _ElbService(21, 43, {}, None)
-            cls._update_usage_for_nlb(conn, 'mynarn', 'nlbname')
-        assert mock_paginate.mock_calls == [
-            call(
-                conn.describe_listeners,
-                LoadBalancerArn='mynarn',
-                alc_marker_path=['NextMarker'],
-                alc_data_path=['Listeners'],
-                alc_marker_param='Marker'
-            )
+        assert [(x.resource_id, x.get_value()) for x in certs] == [
+            ('alb1', 3), ('alb2', cls._count_alb_certs(alb_listeners[0]))
         ]
         lim = cls.limits[
             'Listeners per network load balancer'].get_current_usage()
-        assert len(lim) == 1
-        assert lim[0].get_value() == 2
+        assert [(x.resource_id, x.get_value()) for x in lim] == [
+            ('nlb1', 2)
+        ]
         assert lim[0].aws_type == \
             'AWS::ElasticLoadBalancingV2::NetworkLoadBalancer'
-        assert lim[0].resource_id == 'nlbname'
+        lim = cls.limits['Network load balancers'].get_current_usage()
+        assert len(lim) == 1
+        assert lim[0].get_value() == 1
+        assert lim[0].aws_type == \
+            'AWS::ElasticLoadBalancing::NetworkLoadBalancer'
 
     def test_required_iam_permissions(self):
         cls = _ElbService(21, 43, {}, None)
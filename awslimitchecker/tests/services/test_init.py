@@ -0,0 +1,200 @@
+"""
+awslimitchecker/tests/services/test_init.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+################################################################################
+Copyright 2015-2018 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+################################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+################################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+################################################################################
+"""
+
+import sys
+from awslimitchecker.services import (
+    _ServiceRegistry, _SERVICE_PATHS, _load_class, _entry_point_paths,
+    SERVICES_ENTRY_POINT_GROUP
+)
+from awslimitchecker.services.base import _AwsService
+from awslimitchecker.services.ec2 import _Ec2Service
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch, call, Mock, DEFAULT
+else:
+    from unittest.mock import patch, call, Mock, DEFAULT
+
+
+pbm = 'awslimitchecker.services'  # module patch base
+pb = '%s._ServiceRegistry' % pbm  # class patch base
+
+
+class TestServicePaths(object):
+
+    def test_paths(self):
+        for name, path in _SERVICE_PATHS.items():
+            cls = _load_class(path)
+            assert issubclass(cls, _AwsService)
+            assert cls.service_name == name
+
+    def test_load_class(self):
+        res = _load_class('awslimitchecker.services.ec2:_Ec2Service')
+        assert res is _Ec2Service
+
+    def test_load_class_relative(self):
+        res = _load_class('.ec2:_Ec2Service')
+        assert res is _Ec2Service
+
+
+class TestEntryPointPaths(object):
+
+    def test_select(self):
+        ep = Mock(value='foo.bar:Baz')
+        ep.name = 'Foo'
+        eps = Mock()
+        eps.select.return_value = [ep]
+        with patch('importlib.metadata.entry_points') as mock_eps:
+            mock_eps.return_value = eps
+            res = _entry_point_paths('grp')
+        assert res == {'Foo': 'foo.bar:Baz'}
+        assert eps.mock_calls == [call.select(group='grp')]
+
+    def test_dict(self):
+        ep = Mock(value='foo.bar:Baz')
+        ep.name = 'Foo'
+        with patch('importlib.metadata.entry_points') as mock_eps:
+            mock_eps.return_value = {'grp': [ep], 'other': []}
+            res = _entry_point_paths('grp')
+        assert res == {'Foo': 'foo.bar:Baz'}
+
+
+class TestServiceRegistry(object):
+
+    def setup(self):
+        self.paths = {
+            'EC2': '.ec2:_Ec2Service',
+            'Foo': 'foo.bar:FooService'
+        }
+
+    def test_lazy_load(self):
+        cls = _ServiceRegistry(self.paths)
+        with patch('%s._load_class' % pbm) as mock_load:
+            mock_load.return_value = _Ec2Service
+            assert cls['EC2'] is _Ec2Service
+            assert cls['EC2'] is _Ec2Service
+        assert mock_load.mock_calls == [
+            call('.ec2:_Ec2Service')
+        ]
+        assert cls._entries['Foo'] == 'foo.bar:FooService'
+
+    def test_class_value(self):
+        cls = _ServiceRegistry({'EC2': _Ec2Service})
+        with patch('%s._load_class' % pbm) as mock_load:
+            assert cls['EC2'] is _Ec2Service
+        assert mock_load.mock_calls == []
+
+    def test_no_import(self):
+        cls = _ServiceRegistry(self.paths)
+        with patch('%s._load_class' % pbm) as mock_load:
+            assert sorted(cls.keys()) == ['EC2', 'Foo']
+            assert len(cls) == 2
+            assert 'Foo' in cls
+            assert 'Bar' not in cls
+            del cls['Foo']
+            assert cls.copy() == {
+                'EC2': '.ec2:_Ec2Service'
+            }
+            cls.clear()
+            assert len(cls) == 0
+        assert mock_load.mock_calls == []
+
+    def test_setitem(self):
+        cls = _ServiceRegistry(self.paths)
+        cls['Bar'] = _Ec2Service
+        assert cls['Bar'] is _Ec2Service
+
+    def test_entry_points(self):
+        eps = {
+            'EC2': 'other.module:_Ec2Service',
+            'Baz': 'baz.module:BazService'
+        }
+        cls = _ServiceRegistry(self.paths, entry_point_group='grp')
+        with patch.multiple(
+            pbm,
+            _entry_point_paths=DEFAULT,
+            _load_class=DEFAULT,
+            logger=DEFAULT
+        ) as mocks:
+            mocks['_entry_point_paths'].return_value = eps
+            mocks['_load_class'].return_value = _Ec2Service
+            assert cls['EC2'] is _Ec2Service
+            assert mocks['_entry_point_paths'].mock_calls == []
+            assert sorted(cls.keys()) == ['Baz', 'EC2', 'Foo']
+            assert sorted(cls.keys()) == ['Baz', 'EC2', 'Foo']
+        assert mocks['_entry_point_paths'].mock_calls == [call('grp')]
+        assert mocks['_load_class'].mock_calls == [
+            call('.ec2:_Ec2Service')
+        ]
+        assert cls._entries['Baz'] == 'baz.module:BazService'
+        assert mocks['logger'].mock_calls == [
+            call.debug('Loading service "%s" from %s', 'EC2',
+                       '.ec2:_Ec2Service'),
+            call.debug('Registering service "%s" from entry point %s',
+                       'Baz', 'baz.module:BazService'),
+            call.warning(
+                'Ignoring service "%s" from entry point %s; a service with '
+                'that name is already registered', 'EC2',
+                'other.module:_Ec2Service'
+            )
+        ]
+
+    def test_entry_points_unknown_name(self):
+        cls = _ServiceRegistry(self.paths, entry_point_group='grp')
+        with patch.multiple(
+            pbm,
+            _entry_point_paths=DEFAULT,
+            _load_class=DEFAULT
+        ) as mocks:
+            mocks['_entry_point_paths'].return_value = {
+                'Baz': 'baz.module:BazService'
+            }
+            mocks['_load_class'].return_value = _Ec2Service
+            assert cls['Baz'] is _Ec2Service
+        assert mocks['_entry_point_paths'].mock_calls == [call('grp')]
+        assert mocks['_load_class'].mock_calls == [
+            call('baz.module:BazService')
+        ]
+
+    def test_services_group(self):
+        assert SERVICES_ENTRY_POINT_GROUP == 'awslimitchecker.services'
@@ -250,6 +250,27 @@ class Test_RDSService(object):
         assert usage[4].resource_id == 'SecurityGroup2'
         assert usage[4].aws_type == 'AWS::RDS::DBSecurityGroup'
 
+    def test_update_limits_from_api_cached(self):
+        response = result_fixtures.RDS.test_update_limits_from_api
+
+        mock_conn = Mock()
+        mock_conn.describe_account_attributes.return_value = response
+        with patch('%s.connect' % self.pb):
+            cls = _RDSService(21, 43, {}, None)
+            cls.conn = mock_conn
+            cls._update_limits_from_api()
+            cls._update_limits_from_api()
+            assert mock_conn.mock_calls == [
+                call.describe_account_attributes()
+            ]
+            cls.invalidate_api_cache()
+            cls._update_limits_from_api()
+        assert mock_conn.mock_calls == [
+            call.describe_account_attributes(),
+            call.describe_account_attributes()
+        ]
+        assert cls.limits['DB instances'].api_limit == 200
+
     def test_update_limits_from_api(self):
         response = result_fixtures.RDS.test_update_limits_from_api
 
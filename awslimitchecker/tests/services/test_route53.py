@@ -40,6 +40,9 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 import sys
 from awslimitchecker.tests.services import result_fixtures
 from awslimitchecker.services.route53 import _Route53Service
+from awslimitchecker.aio import run
+from awslimitchecker.tests.support import AsyncClientStub
+from awslimitchecker.cache import PersistentCache
 
 # https://code.google.com/p/mock/issues/detail?id=249
 # py>=3.4 should use unittest.mock not the mock package on pypi
@@ -128,17 +131,17 @@ class Test_Route53Service(object):
         assert cls.limits[limit_key].default_limit == 10000
 
         usage1 = cls.limits[limit_key].get_current_usage()[0]
-        assert usage1.get_value() == 7500
+        assert usage1.get_value() == 7501
         assert usage1.resource_id == "abc.example.com."
         assert usage1.get_maximum() == 10000
 
         usage2 = cls.limits[limit_key].get_current_usage()[1]
-        assert usage2.get_value() == 2500
+        assert usage2.get_value() == 2501
         assert usage2.resource_id == "def.example.com."
         assert usage2.get_maximum() == 10001
 
         usage2 = cls.limits[limit_key].get_current_usage()[2]
-        assert usage2.get_value() == 5678
+        assert usage2.get_value() == 5679
         assert usage2.resource_id == "ghi.example.com."
         assert usage2.get_maximum() == 10002
 
@@ -160,6 +163,221 @@ class Test_Route53Service(object):
         assert usage2.resource_id == "def.example.com."
         assert usage2.get_maximum() == 101
 
+    def test_find_limit_hosted_zone_persistent_cache(self):
+        cached = {
+            # entry from an older version, including usage counts
+            'route53/123/rname/hosted-zone-limits/ABC': (
+                {
+                    'MAX_RRSETS_BY_ZONE': {
+                        'Count': 1, 'Limit': {'Value': 20000}
+                    },
+                    'MAX_VPCS_ASSOCIATED_BY_ZONE': {
+                        'Count': 3, 'Limit': {'Value': 300}
+                    }
+                },
+                10
+            ),
+            # expired
+            'route53/123/rname/hosted-zone-limits/DEF': (
+                {'MAX_RRSETS_BY_ZONE': {'Limit': {'Value': 20001}}},
+                90000
+            )
+        }
+        mock_cache = Mock(spec_set=PersistentCache)
+        mock_cache.get.side_effect = lambda k: cached.get(k, (None, None))
+        cls = _Route53Service(21, 43, {'region_name': 'rname'}, None)
+        cls._account_id = '123'
+        cls.persistent_cache = mock_cache
+        self._mock_reponse_init(cls)
+        mock_gzl = Mock(side_effect=self._mock_get_hosted_zone_limit)
+        cls.conn.get_hosted_zone_limit = mock_gzl
+        cls._find_limit_hosted_zone()
+        # VPC association usage is never taken from the cache
+        assert mock_gzl.mock_calls == [
+            call(
+                Type='MAX_VPCS_ASSOCIATED_BY_ZONE',
+                HostedZoneId='/hostedzone/ABC'
+            ),
+            call(Type='MAX_RRSETS_BY_ZONE', HostedZoneId='/hostedzone/DEF'),
+            call(
+                Type='MAX_VPCS_ASSOCIATED_BY_ZONE',
+                HostedZoneId='/hostedzone/DEF'
+            ),
+            call(Type='MAX_RRSETS_BY_ZONE', HostedZoneId='/hostedzone/GHI')
+        ]
+        assert mock_cache.set.mock_calls == [
+            call('route53/123/rname/hosted-zone-limits/DEF', {
+                'MAX_RRSETS_BY_ZONE': {'Limit': {'Value': 10001}}
+            }),
+            call('route53/123/rname/hosted-zone-limits/GHI', {
+                'MAX_RRSETS_BY_ZONE': {'Limit': {'Value': 10002}}
+            })
+        ]
+        rrsets = cls.limits[cls.MAX_RRSETS_BY_ZONE["name"]].get_current_usage()
+        assert [
+            (x.resource_id, x.get_value(), x.get_maximum()) for x in rrsets
+        ] == [
+            ('abc.example.com.', 7501, 20000),
+            ('def.example.com.', 2501, 10001),
+            ('ghi.example.com.', 5679, 10002)
+        ]
+        vpcs = cls.limits[
+            cls.MAX_VPCS_ASSOCIATED_BY_ZONE["name"]
+        ].get_current_usage()
+        assert [
+            (x.resource_id, x.get_value(), x.get_maximum()) for x in vpcs
+        ] == [
+            ('abc.example.com.', 10, 100), ('def.example.com.', 2, 101)
+        ]
+
+    def test_hosted_zone_limits_cache_key(self):
+        cls = _Route53Service(21, 43, {'region_name': 'rname'}, None)
+        cls.persistent_cache = Mock(spec_set=PersistentCache)
+        with patch(
+            'awslimitchecker.connectable.cached_client'
+        ) as mock_client:
+            mock_client.return_value.get_caller_identity.return_value = {
+                'Account': '456'
+            }
+            res = cls._hosted_zone_limits_cache_key(
+                {'Id': '/hostedzone/ABC'}
+            )
+        assert res == 'route53/456/rname/hosted-zone-limits/ABC'
+        assert mock_client.mock_calls == [
+            call('sts', {'region_name': 'rname'}),
+            call().get_caller_identity()
+        ]
+
+    def test_find_limit_hosted_zone_no_record_set_count(self):
+        mock_cache = Mock(spec_set=PersistentCache)
+        mock_cache.get.return_value = (
+            {'MAX_RRSETS_BY_ZONE': {'Limit': {'Value': 20000}}}, 10
+        )
+        cls = _Route53Service(21, 43, {'region_name': 'rname'}, None)
+        cls._account_id = '123'
+        cls.persistent_cache = mock_cache
+        zone = {
+            'Id': '/hostedzone/XYZ',
+            'Name': 'xyz.example.com.',
+            'Config': {'PrivateZone': False}
+        }
+        cls.conn = Mock()
+        cls.conn.get_hosted_zone_limit.return_value = {
+            'Count': 12, 'Limit': {'Value': 10000}
+        }
+        res = cls._get_hosted_zone_limits(zone)
+        assert res == {
+            'MAX_RRSETS_BY_ZONE': {'Count': 12, 'Limit': {'Value': 10000}}
+        }
+        assert mock_cache.set.mock_calls == []
+
+    def test_find_limit_hosted_zone_refresh_cache(self):
+        mock_cache = Mock(spec_set=PersistentCache)
+        cls = _Route53Service(21, 43, {'region_name': 'rname'}, None)
+        cls._account_id = '123'
+        cls.persistent_cache = mock_cache
+        cls.refresh_cache = True
+        self._mock_reponse_init(cls)
+        cls._find_limit_hosted_zone()
+        assert mock_cache.get.mock_calls == []
+        assert len(mock_cache.set.mock_calls) == 3
+
+    def test_update_limits_from_api_async_persistent_cache(self):
+        mock_conn = Mock()
+        mock_conn.list_hosted_zones.return_value = \
+            result_fixtures.Route53.test_get_hosted_zones
+        mock_conn.get_hosted_zone_limit.side_effect = \
+            self._mock_get_hosted_zone_limit
+        cached = {'MAX_RRSETS_BY_ZONE': {'Limit': {'Value': 20000}}}
+        mock_cache = Mock(spec_set=PersistentCache)
+        mock_cache.get.side_effect = lambda k: (cached, 10) \
+            if k != 'route53/123/rname/hosted-zone-limits/GHI' else (None, None)
+        cls = _Route53Service(21, 43, {'region_name': 'rname'}, None)
+        cls._account_id = '123'
+        cls.persistent_cache = mock_cache
+        with patch('%s.connect_async' % pb, autospec=True) as m_conn:
+            m_conn.return_value = AsyncClientStub(mock_conn)
+            run(cls._update_limits_from_api_async())
+        assert mock_conn.mock_calls == [
+            call.list_hosted_zones(),
+            call.get_hosted_zone_limit(
+                Type='MAX_VPCS_ASSOCIATED_BY_ZONE',
+                HostedZoneId='/hostedzone/ABC'
+            ),
+            call.get_hosted_zone_limit(
+                Type='MAX_VPCS_ASSOCIATED_BY_ZONE',
+                HostedZoneId='/hostedzone/DEF'
+            ),
+            call.get_hosted_zone_limit(
+                Type='MAX_RRSETS_BY_ZONE', HostedZoneId='/hostedzone/GHI'
+            )
+        ]
+        assert mock_cache.set.mock_calls == [
+            call('route53/123/rname/hosted-zone-limits/GHI', {
+                'MAX_RRSETS_BY_ZONE': {'Limit': {'Value': 10002}}
+            })
+        ]
+        rrsets = cls.limits[cls.MAX_RRSETS_BY_ZONE["name"]].get_current_usage()
+        assert [
+            (x.resource_id, x.get_value(), x.get_maximum()) for x in rrsets
+        ] == [
+            ('abc.example.com.', 7501, 20000),
+            ('def.example.com.', 2501, 20000),
+            ('ghi.example.com.', 5679, 10002)
+        ]
+        vpcs = cls.limits[
+            cls.MAX_VPCS_ASSOCIATED_BY_ZONE["name"]
+        ].get_current_usage()
+        assert [(x.resource_id, x.get_value()) for x in vpcs] == [
+            ('abc.example.com.', 10), ('def.example.com.', 2)
+        ]
+
+    def test_update_limits_from_api_async(self):
+        mock_conn = Mock()
+        mock_conn.list_hosted_zones.return_value = \
+            result_fixtures.Route53.test_get_hosted_zones
+        mock_conn.get_hosted_zone_limit.side_effect = \
+            self._mock_get_hosted_zone_limit
+        cls = _Route53Service(21, 43, {}, None)
+        with patch('%s.connect_async' % pb, autospec=True) as m_conn:
+            m_conn.return_value = AsyncClientStub(mock_conn)
+            run(cls._update_limits_from_api_async())
+        assert m_conn.mock_calls == [call(cls)]
+        assert mock_conn.mock_calls == [
+            call.list_hosted_zones(),
+            call.get_hosted_zone_limit(
+                Type='MAX_RRSETS_BY_ZONE', HostedZoneId='/hostedzone/ABC'
+            ),
+            call.get_hosted_zone_limit(
+                Type='MAX_VPCS_ASSOCIATED_BY_ZONE',
+                HostedZoneId='/hostedzone/ABC'
+            ),
+            call.get_hosted_zone_limit(
+                Type='MAX_RRSETS_BY_ZONE', HostedZoneId='/hostedzone/DEF'
+            ),
+            call.get_hosted_zone_limit(
+                Type='MAX_VPCS_ASSOCIATED_BY_ZONE',
+                HostedZoneId='/hostedzone/DEF'
+            ),
+            call.get_hosted_zone_limit(
+                Type='MAX_RRSETS_BY_ZONE', HostedZoneId='/hostedzone/GHI'
+            )
+        ]
+        rrsets = cls.limits[cls.MAX_RRSETS_BY_ZONE["name"]].get_current_usage()
+        assert [
+            (x.resource_id, x.get_value(), x.get_maximum()) for x in rrsets
+        ] == [
+            ('abc.example.com.', 7501, 10000),
+            ('def.example.com.', 2501, 10001),
+            ('ghi.example.com.', 5679, 10002)
+        ]
+        vpcs = cls.limits[
+            cls.MAX_VPCS_ASSOCIATED_BY_ZONE["name"]
+        ].get_current_usage()
+        assert [(x.resource_id, x.get_value()) for x in vpcs] == [
+            ('abc.example.com.', 10), ('def.example.com.', 2)
+        ]
+
     def test_required_iam_permissions(self):
         cls = _Route53Service(21, 43, {}, None)
         assert cls.required_iam_permissions() == [
@@ -40,6 +40,8 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 import sys
 from awslimitchecker.tests.services import result_fixtures
 from awslimitchecker.services.vpc import _VpcService, DEFAULT_ENI_LIMIT
+from awslimitchecker.services.ec2 import _Ec2Service
+from awslimitchecker.cache import ResponseCache
 
 from botocore.exceptions import ClientError
 
@@ -346,7 +348,9 @@ class Test_VpcService(object):
         response = result_fixtures.VPC.test_find_usage_network_interfaces
 
         mock_conn = Mock()
-        mock_conn.describe_network_interfaces.return_value = response
+        mock_conn.get_paginator.return_value.paginate.return_value = [
+            response
+        ]
 
         cls = _VpcService(21, 43, {}, None)
         cls.conn = mock_conn
@@ -358,7 +362,36 @@ class Test_VpcService(object):
         assert cls.limits['Network interfaces per Region'].get_current_usage()[
             0].get_value() == 1
         assert mock_conn.mock_calls == [
-            call.describe_network_interfaces(),
+            call.get_paginator('describe_network_interfaces'),
+            call.get_paginator().paginate()
+        ]
+
+    def test_find_usage_network_interfaces_shared(self):
+        eni_sg = result_fixtures.EC2().test_find_usage_networking_eni_sg
+
+        mock_conn = Mock()
+        mock_conn.get_paginator.return_value.paginate.return_value = eni_sg
+        shared = ResponseCache(ttl=300)
+
+        vpc = _VpcService(21, 43, {}, None)
+        vpc.conn = mock_conn
+        vpc.shared_cache = shared
+        ec2 = _Ec2Service(21, 43, {}, None)
+        ec2.conn = mock_conn
+        ec2.shared_cache = shared
+
+        vpc._find_usage_network_interfaces()
+        ec2._find_usage_networking_eni_sg()
+
+        assert vpc.limits['Network interfaces per Region'].get_current_usage()[
+            0].get_value() == 4
+        assert len(ec2.limits[
+            'VPC security groups per elastic network interface'
+        ].get_current_usage()) == 3
+        # network interfaces are only described once for both services
+        assert mock_conn.mock_calls == [
+            call.get_paginator('describe_network_interfaces'),
+            call.get_paginator().paginate()
         ]
 
     def test_update_limits_from_api_high_max_instances(self):
@@ -386,3 +386,58 @@ def quotas_response():
             }
         }
     )
+
+
+class AsyncClientStub(object):
+    """
+    Minimal stand-in for an aiobotocore client, for testing the asyncio
+    backend without aiobotocore. Calls to client methods are recorded on
+    ``self.mock`` and return whatever the corresponding Mock method returns
+    (or raise its side_effect), via a coroutine. Paginators return async
+    iterators over the pages returned by the Mock paginator. The stub is also
+    its own async context manager, like ``create_client()``.
+    """
+
+    def __init__(self, mock):
+        self.mock = mock
+
+    def __getattr__(self, name):
+        meth = getattr(self.mock, name)
+
+        async def _call(*args, **kwargs):
+            return meth(*args, **kwargs)
+
+        return _call
+
+    def get_paginator(self, name):
+        paginator = self.mock.get_paginator(name)
+        stub = self
+
+        class _Paginator(object):
+
+            def paginate(self, *args, **kwargs):
+                return stub._aiter(paginator.paginate(*args, **kwargs))
+
+        return _Paginator()
+
+    def _aiter(self, pages):
+        pages = iter(pages)
+
+        class _AsyncIterator(object):
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                try:
+                    return next(pages)
+                except StopIteration:
+                    raise StopAsyncIteration
+
+        return _AsyncIterator()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
@@ -0,0 +1,238 @@
+"""
+awslimitchecker/tests/test_aio.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2019 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import sys
+import asyncio
+import pytest
+from botocore.exceptions import ClientError
+
+from awslimitchecker import aio
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch, call, Mock
+else:
+    from unittest.mock import patch, call, Mock
+
+pbm = 'awslimitchecker.aio'
+
+
+class TestGetAioSession(object):
+
+    def test_not_installed(self):
+        with patch('%s.get_session' % pbm, None):
+            with pytest.raises(RuntimeError) as excinfo:
+                aio.get_aio_session()
+        assert 'aiobotocore' in str(excinfo.value)
+
+    def test_shared(self):
+        with patch('%s.get_session' % pbm) as m_get:
+            with patch('%s._session' % pbm, None):
+                res1 = aio.get_aio_session()
+                res2 = aio.get_aio_session()
+        assert res1 is m_get.return_value
+        assert res2 is m_get.return_value
+        assert m_get.mock_calls == [call()]
+
+
+class TestCreateClient(object):
+
+    def test_create_client(self):
+        with patch('%s.get_aio_session' % pbm) as m_sess:
+            res = aio.create_client('foo', {'region_name': 'bar'})
+        assert res is m_sess.return_value.create_client.return_value
+        assert m_sess.mock_calls == [
+            call(),
+            call().create_client('foo', region_name='bar')
+        ]
+
+    def test_create_client_config(self):
+        config = Mock(retries={'max_attempts': 3})
+        with patch('%s.get_aio_session' % pbm) as m_sess:
+            with patch('%s.AioConfig' % pbm) as m_conf:
+                aio.create_client('foo', {}, config=config)
+        assert m_conf.mock_calls == [call(retries={'max_attempts': 3})]
+        assert m_sess.mock_calls == [
+            call(),
+            call().create_client('foo', config=m_conf.return_value)
+        ]
+
+
+class TestGatherBounded(object):
+
+    def test_order_and_limit(self):
+        state = {'running': 0, 'max': 0}
+
+        async def work(i):
+            state['running'] += 1
+            state['max'] = max(state['max'], state['running'])
+            await asyncio.sleep(0.001 * (10 - i))
+            state['running'] -= 1
+            return i * 2
+
+        res = aio.run(aio.gather_bounded([work(i) for i in range(10)], 3))
+        assert res == [i * 2 for i in range(10)]
+        assert state['max'] == 3
+
+    def test_shared_semaphore(self):
+        state = {'running': 0, 'max': 0}
+
+        async def work(i):
+            state['running'] += 1
+            state['max'] = max(state['max'], state['running'])
+            await asyncio.sleep(0.001)
+            state['running'] -= 1
+            return i
+
+        async def both():
+            sem = asyncio.Semaphore(2)
+            return await asyncio.gather(
+                aio.gather_bounded([work(i) for i in range(5)], semaphore=sem),
+                aio.gather_bounded([work(i) for i in range(5)], semaphore=sem)
+            )
+
+        res = aio.run(both())
+        assert res == [list(range(5)), list(range(5))]
+        assert state['max'] == 2
+
+    def test_exception(self):
+
+        async def work(i):
+            if i == 2:
+                raise RuntimeError('foo')
+            return i
+
+        with pytest.raises(RuntimeError):
+            aio.run(aio.gather_bounded([work(i) for i in range(4)], 2))
+
+
+class TestRunInExecutor(object):
+
+    def test_run_in_executor(self):
+        m = Mock(return_value=5)
+        assert aio.run(aio.run_in_executor(m, 1, 2)) == 5
+        assert m.mock_calls == [call(1, 2)]
+
+    def test_run_in_executor_running_loop(self):
+        # uses the loop running the coroutine, not the current event loop
+        other = asyncio.new_event_loop()
+        asyncio.set_event_loop(other)
+        try:
+            m = Mock(return_value=5)
+            assert aio.run(aio.run_in_executor(m)) == 5
+        finally:
+            asyncio.set_event_loop(None)
+            other.close()
+        assert m.mock_calls == [call()]
+
+
+class TestPaginateDictAsync(object):
+
+    def test_no_marker(self):
+        m = Mock(return_value={'Items': [1, 2]})
+
+        async def func(**kwargs):
+            return m(**kwargs)
+
+        res = aio.run(aio.paginate_dict_async(
+            func, Foo='bar', alc_marker_path=['Next'],
+            alc_data_path=['Items'], alc_marker_param='Marker'
+        ))
+        assert res == {'Items': [1, 2]}
+        assert m.mock_calls == [call(Foo='bar')]
+
+    def test_marker(self):
+        m = Mock(side_effect=[
+            {'Items': [1, 2], 'Next': 'a'},
+            {'Items': [3], 'Next': 'b'},
+            {'Items': [4]}
+        ])
+
+        async def func(**kwargs):
+            return m(**kwargs)
+
+        res = aio.run(aio.paginate_dict_async(
+            func, alc_marker_path=['Next'],
+            alc_data_path=['Items'], alc_marker_param='Marker'
+        ))
+        assert res == {'Items': [1, 2, 3, 4]}
+        assert m.mock_calls == [call(), call(Marker='a'), call(Marker='b')]
+
+    def test_missing_kwarg(self):
+
+        async def func(**kwargs):
+            return {}
+
+        with pytest.raises(Exception) as excinfo:
+            aio.run(aio.paginate_dict_async(
+                func, alc_marker_path=['Next'], alc_data_path=['Items']
+            ))
+        assert 'alc_marker_param' in str(excinfo.value)
+
+
+class TestCallWithThrottleBackoffAsync(object):
+
+    def test_throttled(self):
+        throttled = ClientError(
+            {'Error': {'Code': 'Throttling', 'Message': 'msg'}}, 'Op'
+        )
+        m = Mock(side_effect=[throttled, 'foo'])
+
+        async def func(*args):
+            return m(*args)
+
+        with patch('%s.throttle_backoff_delay' % pbm) as mock_delay:
+            mock_delay.return_value = 0
+            res = aio.run(aio.call_with_throttle_backoff_async(func, 'a'))
+        assert res == 'foo'
+        assert m.mock_calls == [call('a'), call('a')]
+        assert mock_delay.mock_calls == [call(0)]
+
+    def test_other_error(self):
+        ex = ClientError({'Error': {'Code': 'Foo', 'Message': 'msg'}}, 'Op')
+
+        async def func():
+            raise ex
+
+        with pytest.raises(ClientError):
+            aio.run(aio.call_with_throttle_backoff_async(func))
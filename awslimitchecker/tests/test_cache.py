@@ -0,0 +1,227 @@
+"""
+awslimitchecker/tests/test_cache.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2019 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import sys
+import os
+import threading
+import pytest
+
+from awslimitchecker.cache import JsonFileCache, SqliteCache, ResponseCache
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch, Mock
+else:
+    from unittest.mock import patch, Mock
+
+pbm = 'awslimitchecker.cache'
+
+
+class CacheTests(object):
+    """tests common to all PersistentCache implementations"""
+
+    def make_cache(self, directory):
+        raise NotImplementedError()
+
+    def test_get_missing(self, tmpdir):
+        cls = self.make_cache(str(tmpdir.join('cache')))
+        assert cls.get('foo') == (None, None)
+
+    def test_set_get(self, tmpdir):
+        cls = self.make_cache(str(tmpdir.join('cache')))
+        with patch('%s.time.time' % pbm) as m_time:
+            m_time.return_value = 1000.0
+            cls.set('foo/bar', {'a': [1, 2]})
+            cls.set('baz', 'blam')
+            m_time.return_value = 1010.5
+            assert cls.get('foo/bar') == ({'a': [1, 2]}, 10.5)
+            assert cls.get('baz') == ('blam', 10.5)
+
+    def test_replace(self, tmpdir):
+        cls = self.make_cache(str(tmpdir.join('cache')))
+        cls.set('foo', 1)
+        cls.set('foo', 2)
+        assert cls.get('foo')[0] == 2
+
+    def test_persists(self, tmpdir):
+        self.make_cache(str(tmpdir.join('cache'))).set('foo', [1])
+        assert self.make_cache(str(tmpdir.join('cache'))).get('foo')[0] == [1]
+
+    def test_delete(self, tmpdir):
+        cls = self.make_cache(str(tmpdir.join('cache')))
+        cls.set('foo', 1)
+        cls.delete('foo')
+        cls.delete('bar')
+        assert cls.get('foo') == (None, None)
+
+
+class TestJsonFileCache(CacheTests):
+
+    def make_cache(self, directory):
+        return JsonFileCache(directory)
+
+    def test_key_collision(self, tmpdir):
+        cls = self.make_cache(str(tmpdir))
+        cls.set('foo/bar', 1)
+        assert cls.get('foo_bar') == (None, None)
+
+    def test_corrupt_file(self, tmpdir):
+        cls = self.make_cache(str(tmpdir))
+        tmpdir.join('foo.json').write('{not json')
+        with patch('%s.logger' % pbm) as m_logger:
+            assert cls.get('foo') == (None, None)
+        assert len(m_logger.warning.mock_calls) == 1
+
+    def test_no_temp_files_left(self, tmpdir):
+        cls = self.make_cache(str(tmpdir))
+        cls.set('foo', 1)
+        assert os.listdir(str(tmpdir)) == ['foo.json']
+
+
+class TestSqliteCache(CacheTests):
+
+    def make_cache(self, directory):
+        return SqliteCache(directory)
+
+    def test_path(self, tmpdir):
+        cls = self.make_cache(str(tmpdir))
+        cls.set('foo', 1)
+        assert os.listdir(str(tmpdir)) == ['awslimitchecker_cache.sqlite']
+
+
+class TestResponseCache(object):
+
+    def test_call_cached(self):
+        func = Mock(return_value={'foo': 'bar'})
+        cls = ResponseCache(ttl=60)
+        with patch('%s.time.time' % pbm) as m_time:
+            m_time.return_value = 1000.0
+            assert cls.call('ec2', 'Op', {'A': 1, 'B': 2}, func) == {
+                'foo': 'bar'
+            }
+            m_time.return_value = 1059.0
+            assert cls.call('ec2', 'Op', {'B': 2, 'A': 1}, func) == {
+                'foo': 'bar'
+            }
+        assert func.call_count == 1
+
+    def test_call_keyed(self):
+        func = Mock(side_effect=[1, 2, 3, 4])
+        cls = ResponseCache()
+        assert cls.call('ec2', 'Op', {}, func) == 1
+        assert cls.call('ec2', 'Op', {'A': 1}, func) == 2
+        assert cls.call('ec2', 'Other', {}, func) == 3
+        assert cls.call('rds', 'Op', {}, func) == 4
+        assert cls.call('ec2', 'Op', {}, func) == 1
+        assert func.call_count == 4
+
+    def test_call_expired(self):
+        func = Mock(side_effect=[1, 2])
+        cls = ResponseCache(ttl=60)
+        with patch('%s.time.time' % pbm) as m_time:
+            m_time.return_value = 1000.0
+            assert cls.call('ec2', 'Op', {}, func) == 1
+            m_time.return_value = 1061.0
+            assert cls.call('ec2', 'Op', {}, func) == 2
+        assert func.call_count == 2
+
+    def test_call_exception(self):
+        func = Mock(side_effect=[RuntimeError('foo'), 2])
+        cls = ResponseCache()
+        with pytest.raises(RuntimeError):
+            cls.call('ec2', 'Op', {}, func)
+        assert cls._pending == {}
+        assert cls.call('ec2', 'Op', {}, func) == 2
+
+    def test_call_coalesced(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'result'
+
+        cls = ResponseCache()
+        results = []
+
+        def target():
+            results.append(cls.call('ec2', 'Op', {}, func))
+
+        first = threading.Thread(target=target)
+        first.start()
+        assert started.wait(5)
+        waiters = [threading.Thread(target=target) for _ in range(3)]
+        for t in waiters:
+            t.start()
+        release.set()
+        for t in [first] + waiters:
+            t.join(5)
+        assert calls == [1]
+        assert results == ['result'] * 4
+
+    def test_invalidate(self):
+        func = Mock(side_effect=[1, 2, 3])
+        cls = ResponseCache()
+        cls.call('ec2', 'Op', {}, func)
+        cls.call('rds', 'Op', {}, func)
+        cls.invalidate('ec2')
+        assert cls.call('rds', 'Op', {}, func) == 2
+        assert cls.call('ec2', 'Op', {}, func) == 3
+        cls.invalidate()
+        assert cls._entries == {}
+
+    def test_discard_transient(self):
+        func = Mock(side_effect=[1, 2, 3, 4])
+        cls = ResponseCache()
+        cls.call('ec2', 'Op', {}, func)
+        cls.call('ec2', 'List', {}, func, transient=True)
+        cls.call('rds', 'List', {}, func, transient=True)
+        cls.invalidate('rds')
+        assert len(cls._transient) == 1
+        cls.discard_transient()
+        assert cls._transient == set()
+        assert cls.call('ec2', 'Op', {}, func) == 1
+        assert cls.call('ec2', 'List', {}, func, transient=True) == 4
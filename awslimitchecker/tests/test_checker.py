@@ -38,12 +38,15 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 import sys
+import pytest
 
+from awslimitchecker.services import _ServiceRegistry
 from awslimitchecker.services.base import _AwsService
 from awslimitchecker.checker import AwsLimitChecker
 from awslimitchecker.version import _get_version_info
 from awslimitchecker.limit import AwsLimit
 from awslimitchecker.trustedadvisor import TrustedAdvisor
+from awslimitchecker.cache import ResponseCache
 from .support import sample_limits
 
 
@@ -83,6 +86,10 @@ class TestAwsLimitChecker(object):
         )
         self.mock_svc1 = Mock(spec_set=_AwsService)
         self.mock_svc2 = Mock(spec_set=ApiServiceSpec)
+        self.mock_svc1.quotas_service_code = None
+        self.mock_svc2.quotas_service_code = None
+        self.mock_svc1.api_name = 'foo'
+        self.mock_svc2.api_name = 'bar'
         self.mock_foo = Mock(spec_set=_AwsService)
         self.mock_bar = Mock(spec_set=_AwsService)
         self.mock_ta = Mock(spec_set=TrustedAdvisor)
@@ -125,7 +132,8 @@ class TestAwsLimitChecker(object):
         ]
         assert self.mock_ta_constr.mock_calls == [
             call(services, {'region_name': None}, ta_api_region='us-east-1',
-                 ta_refresh_mode=None, ta_refresh_timeout=None)
+                 ta_refresh_mode=None, ta_refresh_timeout=None,
+                 cache=None, refresh_cache=False)
         ]
         assert self.mock_svc1.mock_calls == []
         assert self.mock_svc2.mock_calls == []
@@ -137,8 +145,19 @@ class TestAwsLimitChecker(object):
             call.debug('Connecting to region %s', None)
         ]
         assert self.cls.role_partition == 'aws'
+        assert self.cls.api_cache_ttl == 300
+        assert self.mock_svc1.api_cache_ttl == 300
+        assert self.mock_svc1.persistent_cache is None
+        assert self.mock_svc1.refresh_cache is False
+        assert isinstance(self.cls._response_cache, ResponseCache)
+        assert self.cls._response_cache.ttl == 300
+        assert self.mock_svc1.shared_cache is self.cls._response_cache
+        assert self.mock_svc2.shared_cache is self.cls._response_cache
         assert self.mock_quotas.mock_calls == [
-            call({'region_name': None})
+            call(
+                {'region_name': None}, cache=None, cache_ttl=86400,
+                cache_ttls=None, refresh_cache=False
+            )
         ]
 
     def test_init_AGPL_message(self, capsys):
@@ -156,6 +175,60 @@ class TestAwsLimitChecker(object):
             "all users have a right to the full source code of "
             "this version. See <http://myurl>\n")
 
+    def test_init_service_names(self):
+        svcs = _ServiceRegistry({
+            'SvcFoo': self.mock_foo,
+            'SvcBar': 'awslimitchecker.services.nonexistent:_BarService',
+            'SvcBaz': 'awslimitchecker.services.nonexistent:_BazService'
+        })
+        with patch('%s._services' % pbm, svcs):
+            with patch.multiple(
+                    'awslimitchecker.checker',
+                    logger=DEFAULT,
+                    _get_version_info=DEFAULT,
+                    TrustedAdvisor=DEFAULT,
+                    ServiceQuotasClient=DEFAULT,
+                    autospec=True,
+            ) as mocks:
+                mocks['_get_version_info'].return_value = self.mock_ver_info
+                cls = AwsLimitChecker(
+                    check_version=False, service_names=['SvcFoo', 'SvcBar'],
+                    skip_services=['SvcBar']
+                )
+        assert cls.services == {'SvcFoo': self.mock_svc1}
+        assert cls.service_names == ['SvcFoo', 'SvcBar']
+        assert cls.skip_services == ['SvcBar']
+        assert mocks['logger'].mock_calls == [
+            call.warning('Skipping service: %s', 'SvcBar'),
+            call.debug('Connecting to region %s', None)
+        ]
+
+    def test_init_count_stack_set_instances(self):
+        mock_foo = Mock()
+        mock_cfn = Mock()
+        svcs = {'SvcFoo': mock_foo, 'CloudFormation': mock_cfn}
+        with patch.dict('%s._services' % pbm, values=svcs, clear=True):
+            with patch.multiple(
+                    'awslimitchecker.checker',
+                    logger=DEFAULT,
+                    _get_version_info=DEFAULT,
+                    TrustedAdvisor=DEFAULT,
+                    ServiceQuotasClient=DEFAULT,
+                    autospec=True,
+            ) as mocks:
+                mocks['_get_version_info'].return_value = self.mock_ver_info
+                AwsLimitChecker(
+                    check_version=False, count_stack_set_instances=True
+                )
+        quotas = mocks['ServiceQuotasClient'].return_value
+        assert mock_foo.mock_calls == [
+            call(80, 99, {'region_name': None}, quotas)
+        ]
+        assert mock_cfn.mock_calls == [
+            call(80, 99, {'region_name': None}, quotas,
+                 count_stack_set_instances=True)
+        ]
+
     def test_check_version_old(self):
         with patch.multiple(
             'awslimitchecker.checker',
@@ -243,7 +316,8 @@ class TestAwsLimitChecker(object):
         ]
         assert mock_ta_constr.mock_calls == [
             call(services, {'region_name': None}, ta_api_region='us-east-1',
-                 ta_refresh_mode=None, ta_refresh_timeout=None)
+                 ta_refresh_mode=None, ta_refresh_timeout=None,
+                 cache=None, refresh_cache=False)
         ]
         assert mock_svc1.mock_calls == []
         assert mock_svc2.mock_calls == []
@@ -302,7 +376,9 @@ class TestAwsLimitChecker(object):
                 {'region_name': 'rName'},
                 ta_api_region='taRegion',
                 ta_refresh_mode=None,
-                ta_refresh_timeout=None
+                ta_refresh_timeout=None,
+                cache=None,
+                refresh_cache=False
             )
         ]
 
@@ -315,8 +391,8 @@ class TestAwsLimitChecker(object):
         mock_foo.return_value = mock_svc1
         mock_bar.return_value = mock_svc2
         svcs = {'SvcFoo': mock_foo, 'SvcBar': mock_bar}
-        with patch('%s.boto3' % pbm) as mock_boto:
-            mock_boto.client.return_value.assume_role.return_value = {
+        with patch('%s.cached_client' % pbm) as mock_boto:
+            mock_boto.return_value.assume_role.return_value = {
                 'Credentials': {
                     'AccessKeyId': 'akid',
                     'SecretAccessKey': 'sk',
@@ -357,8 +433,8 @@ class TestAwsLimitChecker(object):
         assert self.mock_version.mock_calls == [call()]
         assert self.cls.vinfo == self.mock_ver_info
         assert mock_boto.mock_calls == [
-            call.client('sts', region_name='myregion'),
-            call.client().assume_role(
+            call('sts', {'region_name': 'myregion'}),
+            call().assume_role(
                 RoleArn='arn:aws:iam::123456789012:role/myrole',
                 RoleSessionName='awslimitchecker'
             )
@@ -373,8 +449,8 @@ class TestAwsLimitChecker(object):
         mock_foo.return_value = mock_svc1
         mock_bar.return_value = mock_svc2
         svcs = {'SvcFoo': mock_foo, 'SvcBar': mock_bar}
-        with patch('%s.boto3' % pbm) as mock_boto:
-            mock_boto.client.return_value.assume_role.return_value = {
+        with patch('%s.cached_client' % pbm) as mock_boto:
+            mock_boto.return_value.assume_role.return_value = {
                 'Credentials': {
                     'AccessKeyId': 'akid',
                     'SecretAccessKey': 'sk',
@@ -421,8 +497,8 @@ class TestAwsLimitChecker(object):
         assert self.mock_version.mock_calls == [call()]
         assert self.cls.vinfo == self.mock_ver_info
         assert mock_boto.mock_calls == [
-            call.client('sts', region_name='myregion'),
-            call.client().assume_role(
+            call('sts', {'region_name': 'myregion'}),
+            call().assume_role(
                 ExternalId='myextid',
                 RoleArn='arn:mypart:iam::123456789012:role/myrole',
                 RoleSessionName='awslimitchecker',
@@ -527,6 +603,125 @@ class TestAwsLimitChecker(object):
             'aws_session_token': 'sts_token'
         }
 
+    def test_copy_for_region(self):
+        self.mock_foo.is_global = False
+        self.mock_bar.is_global = True
+        with patch.dict('%s._services' % pbm, values=self.svcs, clear=True):
+            with patch.multiple(
+                'awslimitchecker.checker',
+                TrustedAdvisor=DEFAULT,
+                ServiceQuotasClient=DEFAULT,
+                autospec=True,
+            ) as mocks:
+                res = self.cls._copy_for_region('us-west-2', skip_global=True)
+        assert res is not self.cls
+        assert res.region == 'us-west-2'
+        assert res.vinfo == self.mock_ver_info
+        assert res.services == {'SvcFoo': self.mock_svc1}
+        assert self.cls.region is None
+        assert self.cls.services == {
+            'SvcFoo': self.mock_svc1,
+            'SvcBar': self.mock_svc2
+        }
+        assert self.cls.ta == self.mock_ta
+        assert self.mock_foo.mock_calls[-1] == call(
+            80, 99, {'region_name': 'us-west-2'},
+            mocks['ServiceQuotasClient'].return_value
+        )
+        assert mocks['ServiceQuotasClient'].mock_calls == [
+            call(
+                {'region_name': 'us-west-2'}, cache=None, cache_ttl=86400,
+                cache_ttls=None, refresh_cache=False
+            )
+        ]
+        assert mocks['TrustedAdvisor'].mock_calls == [
+            call({'SvcFoo': self.mock_svc1}, {'region_name': 'us-west-2'},
+                 ta_api_region='us-east-1', ta_refresh_mode=None,
+                 ta_refresh_timeout=None, cache=None,
+                 refresh_cache=False)
+        ]
+        assert res.ta == mocks['TrustedAdvisor'].return_value
+        # no new version check or license notice
+        assert self.mock_version.mock_calls == [call()]
+
+    def test_get_sts_token_cached(self):
+        mock_creds = Mock()
+        mock_creds.expires_within.return_value = False
+        key = ('arn:aws:iam::123:role/myrole', None, None)
+        self.cls.account_id = '123'
+        self.cls.account_role = 'myrole'
+        with patch.dict(
+            '%s._sts_credentials' % pbm, {key: mock_creds}, clear=True
+        ):
+            with patch('%s.cached_client' % pbm) as mock_boto:
+                res = self.cls._get_sts_token()
+        assert res == mock_creds
+        assert mock_boto.mock_calls == []
+        assert mock_creds.mock_calls == [call.expires_within(300)]
+
+    def test_get_sts_token_expiring(self):
+        mock_creds = Mock()
+        mock_creds.expires_within.return_value = True
+        key = ('arn:aws:iam::123:role/myrole', 'eid', None)
+        self.cls.account_id = '123'
+        self.cls.account_role = 'myrole'
+        self.cls.external_id = 'eid'
+        with patch.dict(
+            '%s._sts_credentials' % pbm, {key: mock_creds}, clear=True
+        ) as cache:
+            with patch('%s.cached_client' % pbm) as mock_boto:
+                with patch('%s.ConnectableCredentials' % pbm) as mock_cc:
+                    res = self.cls._get_sts_token()
+                    assert cache == {key: mock_cc.return_value}
+        assert res == mock_cc.return_value
+        assert res.account_id == '123'
+        assert mock_boto.mock_calls == [
+            call('sts', {'region_name': None}),
+            call().assume_role(
+                RoleArn='arn:aws:iam::123:role/myrole',
+                RoleSessionName='awslimitchecker',
+                ExternalId='eid'
+            )
+        ]
+        assert mock_cc.mock_calls[0] == call(
+            mock_boto.return_value.assume_role.return_value
+        )
+
+    def test_copy_for_account(self):
+        with patch.dict('%s._services' % pbm, values=self.svcs, clear=True):
+            with patch.multiple(
+                'awslimitchecker.checker',
+                TrustedAdvisor=DEFAULT,
+                ServiceQuotasClient=DEFAULT,
+                autospec=True,
+            ) as mocks:
+                with patch(
+                    '%s._boto_conn_kwargs' % pb, new_callable=PropertyMock
+                ) as mock_bck:
+                    mock_bck.return_value = {'foo': 'bar'}
+                    res = self.cls._copy_for_account('123', 'myrole')
+        assert res is not self.cls
+        assert res.account_id == '123'
+        assert res.account_role == 'myrole'
+        assert self.cls.account_id is None
+        assert res.services == {
+            'SvcFoo': self.mock_svc1,
+            'SvcBar': self.mock_svc2
+        }
+        assert mocks['ServiceQuotasClient'].mock_calls == [
+            call(
+                {'foo': 'bar'}, cache=None, cache_ttl=86400, cache_ttls=None,
+                refresh_cache=False
+            )
+        ]
+        assert self.mock_version.mock_calls == [call()]
+
+    def test_discard_connections(self):
+        self.cls._conn_kwargs = {'region_name': 'foo'}
+        with patch('%s.discard_connections' % pbm) as mock_discard:
+            self.cls._discard_connections()
+        assert mock_discard.mock_calls == [call({'region_name': 'foo'})]
+
     def test_get_version(self):
         with patch('%s._get_version_info' % pbm,
                    spec_set=_get_version_info) as mock_version:
@@ -564,6 +759,105 @@ class TestAwsLimitChecker(object):
         res = self.cls.get_service_names()
         assert res == ['SvcBar', 'SvcFoo']
 
+    def test_init_api_cache_ttl_and_cache(self):
+        mock_cache = Mock()
+        with patch.dict('%s._services' % pbm, values=self.svcs, clear=True):
+            with patch.multiple(
+                    'awslimitchecker.checker',
+                    logger=DEFAULT,
+                    _get_version_info=DEFAULT,
+                    TrustedAdvisor=DEFAULT,
+                    _get_latest_version=DEFAULT,
+                    ServiceQuotasClient=DEFAULT,
+                    autospec=True,
+            ):
+                cls = AwsLimitChecker(
+                    check_version=False, api_cache_ttl=60,
+                    cache=mock_cache, refresh_cache=True
+                )
+        assert cls.api_cache_ttl == 60
+        assert self.mock_svc1.api_cache_ttl == 60
+        assert self.mock_svc2.api_cache_ttl == 60
+        assert self.mock_svc1.persistent_cache is mock_cache
+        assert self.mock_svc2.persistent_cache is mock_cache
+        assert self.mock_svc1.refresh_cache is True
+        assert self.mock_svc1.shared_cache.ttl == 60
+
+    def test_init_api_cache_ttl_none(self):
+        with patch.dict('%s._services' % pbm, values=self.svcs, clear=True):
+            with patch.multiple(
+                    'awslimitchecker.checker',
+                    logger=DEFAULT,
+                    _get_version_info=DEFAULT,
+                    TrustedAdvisor=DEFAULT,
+                    _get_latest_version=DEFAULT,
+                    ServiceQuotasClient=DEFAULT,
+                    autospec=True,
+            ):
+                cls = AwsLimitChecker(check_version=False, api_cache_ttl=None)
+        assert cls._response_cache is None
+        assert self.mock_svc1.shared_cache is None
+
+    def test_invalidate_api_cache(self):
+        mock_rc = Mock(spec_set=ResponseCache)
+        self.cls._response_cache = mock_rc
+        self.cls.invalidate_api_cache()
+        assert self.mock_svc1.mock_calls == [call.invalidate_api_cache()]
+        assert self.mock_svc2.mock_calls == [call.invalidate_api_cache()]
+        assert self.mock_quotas.return_value.mock_calls == [call.invalidate()]
+        assert mock_rc.mock_calls == [call.invalidate()]
+
+    def test_start_usage_run(self):
+        mock_rc = Mock(spec_set=ResponseCache)
+        self.cls._response_cache = mock_rc
+        self.cls._start_usage_run(self.cls.services)
+        assert self.mock_svc1.mock_calls == [call._reset_api_cache()]
+        assert self.mock_svc2.mock_calls == [call._reset_api_cache()]
+        assert mock_rc.mock_calls == [
+            call.invalidate('bar'),
+            call.invalidate('foo')
+        ]
+        assert self.mock_quotas.return_value.mock_calls == []
+
+    def test_end_usage_run(self):
+        mock_rc = Mock(spec_set=ResponseCache)
+        self.cls._response_cache = mock_rc
+        self.cls._end_usage_run()
+        assert mock_rc.mock_calls == [call.discard_transient()]
+        self.cls._response_cache = None
+        self.cls._end_usage_run()
+
+    def test_find_usage_end_usage_run_on_error(self):
+        ex = RuntimeError('foo')
+        self.mock_svc1.find_usage.side_effect = ex
+        with patch('%s._end_usage_run' % pb, autospec=True) as mock_end:
+            with pytest.raises(RuntimeError) as excinfo:
+                self.cls.find_usage(service=['SvcFoo'])
+        assert excinfo.value == ex
+        assert mock_end.mock_calls == [call(self.cls)]
+
+    def test_start_usage_run_no_response_cache(self):
+        self.cls._response_cache = None
+        self.cls._start_usage_run({'SvcFoo': self.mock_svc1})
+        assert self.mock_svc1.mock_calls == [call._reset_api_cache()]
+        assert self.mock_svc2.mock_calls == []
+
+    def test_invalidate_api_cache_no_quotas(self):
+        self.cls._quotas_client = None
+        self.cls.invalidate_api_cache()
+        assert self.mock_svc1.mock_calls == [call.invalidate_api_cache()]
+        assert self.mock_svc2.mock_calls == [call.invalidate_api_cache()]
+
+    def test_wait_for_cache_refresh(self):
+        self.cls.wait_for_cache_refresh()
+        assert self.mock_quotas.return_value.mock_calls == [
+            call.wait_for_refresh()
+        ]
+
+    def test_wait_for_cache_refresh_no_quotas(self):
+        self.cls._quotas_client = None
+        self.cls.wait_for_cache_refresh()
+
     def test_get_limits(self):
         limits = sample_limits()
         self.mock_svc1.get_limits.return_value = limits['SvcFoo']
@@ -634,25 +928,66 @@ class TestAwsLimitChecker(object):
     def test_find_usage(self):
         self.cls.find_usage()
         assert self.mock_svc1.mock_calls == [
+            call._reset_api_cache(),
             call._update_service_quotas(),
             call.find_usage()
         ]
         assert self.mock_svc2.mock_calls == [
+            call._reset_api_cache(),
             call._update_limits_from_api(),
             call._update_service_quotas(),
             call.find_usage()
         ]
         assert self.mock_ta.mock_calls == [
+            call.start_update(),
             call.update_limits()
         ]
 
+    def test_find_usage_ta_overlaps(self):
+        mgr = Mock()
+        mgr.attach_mock(self.mock_ta, 'ta')
+        mgr.attach_mock(self.mock_svc1, 'svc1')
+        self.cls.find_usage(service=['SvcFoo'])
+        assert mgr.mock_calls == [
+            call.ta.start_update(),
+            call.svc1._reset_api_cache(),
+            call.svc1._update_service_quotas(),
+            call.svc1.find_usage(),
+            call.ta.update_limits()
+        ]
+
+    def test_prefetch_quotas(self):
+        mock_lim = Mock(spec_set=AwsLimit)
+        self.mock_svc2.quotas_service_code = 'svc2'
+        self.mock_svc2.get_limits.return_value = {'lim': mock_lim}
+        self.cls._prefetch_quotas(self.cls.services)
+        assert self.mock_quotas.return_value.mock_calls == [
+            call.prefetch([mock_lim])
+        ]
+        assert self.mock_svc1.mock_calls == []
+        assert self.mock_svc2.mock_calls == [call.get_limits()]
+
+    def test_prefetch_quotas_no_client(self):
+        self.cls._quotas_client = None
+        self.cls._prefetch_quotas(self.cls.services)
+        assert self.mock_quotas.return_value.mock_calls == []
+
+    def test_find_usage_prefetches_quotas(self):
+        with patch('%s._prefetch_quotas' % pb, autospec=True) as m_pq:
+            self.cls.find_usage(service=['SvcFoo'])
+        assert m_pq.mock_calls == [
+            call(self.cls, {'SvcFoo': self.mock_svc1})
+        ]
+
     def test_find_usage_no_ta(self):
         self.cls.find_usage(use_ta=False)
         assert self.mock_svc1.mock_calls == [
+            call._reset_api_cache(),
             call._update_service_quotas(),
             call.find_usage()
         ]
         assert self.mock_svc2.mock_calls == [
+            call._reset_api_cache(),
             call._update_limits_from_api(),
             call._update_service_quotas(),
             call.find_usage()
@@ -662,11 +997,13 @@ class TestAwsLimitChecker(object):
     def test_find_usage_service(self):
         self.cls.find_usage(service=['SvcFoo'])
         assert self.mock_svc1.mock_calls == [
+            call._reset_api_cache(),
             call._update_service_quotas(),
             call.find_usage()
         ]
         assert self.mock_svc2.mock_calls == []
         assert self.mock_ta.mock_calls == [
+            call.start_update(),
             call.update_limits()
         ]
 
@@ -674,14 +1011,112 @@ class TestAwsLimitChecker(object):
         self.cls.find_usage(service=['SvcBar'])
         assert self.mock_svc1.mock_calls == []
         assert self.mock_svc2.mock_calls == [
+            call._reset_api_cache(),
             call._update_limits_from_api(),
             call._update_service_quotas(),
             call.find_usage()
         ]
         assert self.mock_ta.mock_calls == [
+            call.start_update(),
             call.update_limits()
         ]
 
+    def test_find_usage_parallel(self):
+        self.cls.parallel = 4
+        self.cls.find_usage()
+        assert self.mock_svc1.mock_calls == [
+            call._reset_api_cache(),
+            call._update_service_quotas(),
+            call.find_usage()
+        ]
+        assert self.mock_svc2.mock_calls == [
+            call._reset_api_cache(),
+            call._update_limits_from_api(),
+            call._update_service_quotas(),
+            call.find_usage()
+        ]
+        assert self.mock_ta.mock_calls == [
+            call.start_update(),
+            call.update_limits()
+        ]
+        assert self.cls.service_errors == {}
+
+    def test_find_usage_parallel_errors(self):
+        ex1 = RuntimeError('foo')
+        ex2 = RuntimeError('bar')
+        self.mock_svc1.find_usage.side_effect = ex1
+        self.mock_svc2.find_usage.side_effect = ex2
+        self.cls.parallel = 2
+        self.cls.find_usage()
+        assert self.cls.service_errors == {'SvcFoo': ex1, 'SvcBar': ex2}
+        assert self.mock_svc1.mock_calls == [
+            call._reset_api_cache(),
+            call._update_service_quotas(),
+            call.find_usage()
+        ]
+        assert self.mock_svc2.mock_calls == [
+            call._reset_api_cache(),
+            call._update_limits_from_api(),
+            call._update_service_quotas(),
+            call.find_usage()
+        ]
+
+    def test_find_usage_asyncio(self):
+        self.cls.use_asyncio = True
+        self.cls.find_usage()
+        assert self.mock_svc1.mock_calls == [
+            call._reset_api_cache(),
+            call._update_limits_from_api_async(),
+            call._update_service_quotas(),
+            call.find_usage_async()
+        ]
+        assert self.mock_svc2.mock_calls == [
+            call._reset_api_cache(),
+            call._update_limits_from_api_async(),
+            call._update_service_quotas(),
+            call.find_usage_async()
+        ]
+        assert self.mock_ta.mock_calls == [
+            call.start_update(),
+            call.update_limits()
+        ]
+        assert self.cls.service_errors == {}
+
+    def test_find_usage_asyncio_service_no_ta(self):
+        self.cls.use_asyncio = True
+        self.cls.find_usage(service=['SvcFoo'], use_ta=False)
+        assert self.mock_svc1.mock_calls == [
+            call._reset_api_cache(),
+            call._update_limits_from_api_async(),
+            call._update_service_quotas(),
+            call.find_usage_async()
+        ]
+        assert self.mock_svc2.mock_calls == []
+        assert self.mock_ta.mock_calls == []
+
+    def test_find_usage_asyncio_errors(self):
+        ex1 = RuntimeError('foo')
+        ex2 = RuntimeError('bar')
+        self.mock_svc1.find_usage_async.side_effect = ex1
+        self.mock_svc2.find_usage_async.side_effect = ex2
+        self.cls.use_asyncio = True
+        self.cls.find_usage()
+        assert self.cls.service_errors == {'SvcFoo': ex1, 'SvcBar': ex2}
+
+    def test_find_usage_asyncio_parallel_errors(self):
+        ex1 = RuntimeError('foo')
+        self.mock_svc1.find_usage_async.side_effect = ex1
+        self.cls.use_asyncio = True
+        self.cls.parallel = 1
+        self.cls.find_usage()
+        assert self.cls.service_errors == {'SvcFoo': ex1}
+        assert self.mock_svc2.mock_calls == [
+            call._reset_api_cache(),
+            call._update_limits_from_api_async(),
+            call._update_service_quotas(),
+            call.find_usage_async()
+        ]
+
     def test_set_threshold_overrides(self):
         limits = sample_limits()
         limits['SvcFoo']['zz3'] = AwsLimit(
@@ -850,6 +1285,7 @@ class TestAwsLimitChecker(object):
                     'ec2:foo',
                     'foo:perm1',
                     'foo:perm2',
+                    'servicequotas:GetServiceQuota',
                     'servicequotas:ListServiceQuotas',
                     'support:*',
                     'trustedadvisor:Describe*',
@@ -885,7 +1321,7 @@ class TestAwsLimitChecker(object):
             }
         }
         assert self.mock_ta.mock_calls == [
-            call.update_limits(),
+            call.update_limits()
         ]
         assert self.mock_svc1.mock_calls == [
             call._update_service_quotas(),
@@ -959,6 +1395,54 @@ class TestAwsLimitChecker(object):
             call.check_thresholds()
         ]
 
+    def test_check_thresholds_parallel(self):
+        self.mock_svc1.check_thresholds.return_value = {
+            'foo': 'bar',
+            'baz': 'blam',
+        }
+        self.mock_svc2.check_thresholds.return_value = {}
+        self.cls.parallel = 2
+        res = self.cls.check_thresholds()
+        assert res == {
+            'SvcFoo': {
+                'foo': 'bar',
+                'baz': 'blam',
+            }
+        }
+        assert self.mock_svc1.mock_calls == [
+            call._update_service_quotas(),
+            call.check_thresholds()
+        ]
+        assert self.mock_svc2.mock_calls == [
+            call._update_limits_from_api(),
+            call._update_service_quotas(),
+            call.check_thresholds()
+        ]
+
+    def test_check_thresholds_errors(self):
+        ex = RuntimeError('foo')
+        self.mock_svc1.check_thresholds.side_effect = ex
+        self.mock_svc2.check_thresholds.return_value = {'baz': 'blam'}
+        self.cls.service_errors = {'SvcBar': RuntimeError('stale')}
+        with pytest.raises(RuntimeError) as excinfo:
+            self.cls.check_thresholds(service=['SvcFoo'])
+        assert excinfo.value == ex
+        assert self.cls.service_errors == {}
+
+    def test_check_thresholds_parallel_errors(self):
+        ex = RuntimeError('foo')
+        self.mock_svc1.check_thresholds.side_effect = ex
+        self.mock_svc2.check_thresholds.return_value = {'baz': 'blam'}
+        self.cls.parallel = 2
+        self.cls.service_errors = {'SvcBar': RuntimeError('stale')}
+        res = self.cls.check_thresholds()
+        assert res == {'SvcBar': {'baz': 'blam'}}
+        assert self.cls.service_errors == {'SvcFoo': ex}
+        self.mock_svc1.check_thresholds.side_effect = None
+        self.mock_svc1.check_thresholds.return_value = {}
+        self.cls.check_thresholds()
+        assert self.cls.service_errors == {}
+
     def test_region_name(self):
         mock_client = Mock(
             _client_config=Mock(region_name='rname')
@@ -967,7 +1451,8 @@ class TestAwsLimitChecker(object):
             '%s._boto_conn_kwargs' % pb, new_callable=PropertyMock
         ) as mock_bck:
             mock_bck.return_value = {'foo': 'bar'}
-            with patch('%s.boto3.client' % pbm) as m_client:
+            with patch('%s.cached_client' % pbm) as m_client:
                 m_client.return_value = mock_client
                 res = self.cls.region_name
         assert res == 'rname'
+        assert m_client.mock_calls == [call('ec2', {'foo': 'bar'})]
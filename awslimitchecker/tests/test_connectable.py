@@ -37,9 +37,16 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 ################################################################################
 """
 
-from awslimitchecker.connectable import Connectable, ConnectableCredentials
-from datetime import datetime
+from awslimitchecker.connectable import (
+    Connectable, ConnectableCredentials, cached_client, cached_resource,
+    clear_connection_cache, discard_connections
+)
+from awslimitchecker.cache import PersistentCache
+from botocore.config import Config
+from datetime import datetime, timedelta
+from pytz import utc
 import sys
+import threading
 import os
 
 # https://code.google.com/p/mock/issues/detail?id=249
@@ -140,7 +147,7 @@ class Test_Connectable(object):
                    new_callable=PropertyMock, create=True) as mock_kwargs:
             mock_kwargs.return_value = kwargs
             with patch('%s.logger' % pbm) as mock_logger:
-                with patch('%s.boto3.client' % pbm) as mock_client:
+                with patch('%s.cached_client' % pbm) as mock_client:
                     with patch(
                         '%s._max_retries_config' % pb, new_callable=PropertyMock
                     ) as m_mrc:
@@ -156,8 +163,8 @@ class Test_Connectable(object):
         assert mock_client.mock_calls == [
             call(
                 'myapi',
-                foo='fooval',
-                bar='barval'
+                {'foo': 'fooval', 'bar': 'barval'},
+                config=None
             )
         ]
         assert m_mrc.mock_calls == [call()]
@@ -178,7 +185,7 @@ class Test_Connectable(object):
                    new_callable=PropertyMock, create=True) as mock_kwargs:
             mock_kwargs.return_value = kwargs
             with patch('%s.logger' % pbm) as mock_logger:
-                with patch('%s.boto3.client' % pbm) as mock_client:
+                with patch('%s.cached_client' % pbm) as mock_client:
                     with patch(
                         '%s._max_retries_config' % pb, new_callable=PropertyMock
                     ) as m_mrc:
@@ -194,12 +201,11 @@ class Test_Connectable(object):
         assert mock_client.mock_calls == [
             call(
                 'myapi',
-                foo='fooval',
-                bar='barval',
+                {'foo': 'fooval', 'bar': 'barval'},
                 config=mock_conf
             )
         ]
-        assert m_mrc.mock_calls == [call(), call()]
+        assert m_mrc.mock_calls == [call()]
         assert cls.conn == mock_client.return_value
 
     def test_connect_again(self):
@@ -217,7 +223,7 @@ class Test_Connectable(object):
                    new_callable=PropertyMock, create=True) as mock_kwargs:
             mock_kwargs.return_value = kwargs
             with patch('%s.logger' % pbm) as mock_logger:
-                with patch('%s.boto3.client' % pbm) as mock_client:
+                with patch('%s.cached_client' % pbm) as mock_client:
                     with patch(
                             '%s._max_retries_config' % pb,
                             new_callable=PropertyMock
@@ -249,7 +255,7 @@ class Test_Connectable(object):
                    new_callable=PropertyMock, create=True) as mock_kwargs:
             mock_kwargs.return_value = kwargs
             with patch('%s.logger' % pbm) as mock_logger:
-                with patch('%s.boto3.resource' % pbm) as mock_resource:
+                with patch('%s.cached_resource' % pbm) as mock_resource:
                     with patch(
                             '%s._max_retries_config' % pb,
                             new_callable=PropertyMock
@@ -266,8 +272,8 @@ class Test_Connectable(object):
         assert mock_resource.mock_calls == [
             call(
                 'myapi',
-                foo='fooval',
-                bar='barval'
+                {'foo': 'fooval', 'bar': 'barval'},
+                config=None
             )
         ]
         assert m_mrc.mock_calls == [call()]
@@ -292,7 +298,7 @@ class Test_Connectable(object):
                    new_callable=PropertyMock, create=True) as mock_kwargs:
             mock_kwargs.return_value = kwargs
             with patch('%s.logger' % pbm) as mock_logger:
-                with patch('%s.boto3.resource' % pbm) as mock_resource:
+                with patch('%s.cached_resource' % pbm) as mock_resource:
                     with patch(
                             '%s._max_retries_config' % pb,
                             new_callable=PropertyMock
@@ -309,12 +315,11 @@ class Test_Connectable(object):
         assert mock_resource.mock_calls == [
             call(
                 'myapi',
-                foo='fooval',
-                bar='barval',
+                {'foo': 'fooval', 'bar': 'barval'},
                 config=mock_conf
             )
         ]
-        assert m_mrc.mock_calls == [call(), call()]
+        assert m_mrc.mock_calls == [call()]
         assert cls.resource_conn == mock_resource.return_value
 
     def test_connect_resource_again(self):
@@ -337,7 +342,7 @@ class Test_Connectable(object):
                    new_callable=PropertyMock, create=True) as mock_kwargs:
             mock_kwargs.return_value = kwargs
             with patch('%s.logger' % pbm) as mock_logger:
-                with patch('%s.boto3.resource' % pbm) as mock_resource:
+                with patch('%s.cached_resource' % pbm) as mock_resource:
                     with patch(
                             '%s._max_retries_config' % pb,
                             new_callable=PropertyMock
@@ -351,6 +356,117 @@ class Test_Connectable(object):
         assert m_mrc.mock_calls == []
         assert cls.resource_conn == mock_conn
 
+    def test_connect_async(self):
+        cls = ConnectableTester()
+        cls.api_name = 'myapi'
+        kwargs = {'foo': 'fooval'}
+        mock_conf = Mock()
+
+        with patch('%s._boto3_connection_kwargs' % pb,
+                   new_callable=PropertyMock, create=True) as mock_kwargs:
+            mock_kwargs.return_value = kwargs
+            with patch('%s.aio.create_client' % pbm) as mock_create:
+                with patch(
+                    '%s._max_retries_config' % pb, new_callable=PropertyMock
+                ) as m_mrc:
+                    m_mrc.return_value = mock_conf
+                    res = cls.connect_async()
+        assert res is mock_create.return_value
+        assert mock_create.mock_calls == [
+            call('myapi', {'foo': 'fooval'}, config=mock_conf)
+        ]
+        assert m_mrc.mock_calls == [call()]
+
+    def test_connect_async_api_name(self):
+        cls = ConnectableTester()
+        cls.api_name = 'myapi'
+        kwargs = {'foo': 'fooval'}
+        mock_conf = Mock()
+
+        with patch('%s._boto3_connection_kwargs' % pb,
+                   new_callable=PropertyMock, create=True) as mock_kwargs:
+            mock_kwargs.return_value = kwargs
+            with patch('%s.aio.create_client' % pbm) as mock_create:
+                with patch(
+                    '%s._max_retries_config' % pb, new_callable=PropertyMock
+                ) as m_mrc:
+                    res = cls.connect_async(api_name='other', config=mock_conf)
+        assert res is mock_create.return_value
+        assert mock_create.mock_calls == [
+            call('other', {'foo': 'fooval'}, config=mock_conf)
+        ]
+        assert m_mrc.mock_calls == []
+
+
+class TestPersistentCache(object):
+
+    def setup(self):
+        self.mock_cache = Mock(spec_set=PersistentCache)
+        self.cls = ConnectableTester()
+        self.cls.api_name = 'myapi'
+        self.cls._boto3_connection_kwargs = {'region_name': 'us-west-2'}
+        self.cls.persistent_cache = self.mock_cache
+
+    def test_key(self):
+        mock_sts = Mock()
+        mock_sts.get_caller_identity.return_value = {'Account': '5678'}
+        with patch('%s.cached_client' % pbm, autospec=True) as m_cc:
+            m_cc.return_value = mock_sts
+            assert self.cls._persistent_cache_key('foo') == \
+                'myapi/5678/us-west-2/foo'
+            assert self.cls._persistent_cache_key('bar', 'baz') == \
+                'myapi/5678/us-west-2/bar/baz'
+            assert self.cls._persistent_cache_key() == 'myapi/5678/us-west-2'
+        assert m_cc.mock_calls == [call('sts', {'region_name': 'us-west-2'})]
+        assert mock_sts.mock_calls == [call.get_caller_identity()]
+
+    def test_key_client_region(self):
+        self.cls._boto3_connection_kwargs = {}
+        self.cls._account_id = '1234'
+        mock_conn = Mock()
+        mock_conn._client_config.region_name = 'us-east-2'
+
+        def se_connect(cls):
+            cls.conn = mock_conn
+
+        with patch('%s.connect' % pb, autospec=True) as m_connect:
+            m_connect.side_effect = se_connect
+            assert self.cls._persistent_cache_key('foo') == \
+                'myapi/1234/us-east-2/foo'
+        assert m_connect.mock_calls == [call(self.cls)]
+
+    def test_key_no_cache(self):
+        self.cls.persistent_cache = None
+        with patch('%s.cached_client' % pbm, autospec=True) as m_cc:
+            assert self.cls._persistent_cache_key('foo') is None
+        assert m_cc.mock_calls == []
+
+    def test_get(self):
+        self.mock_cache.get.return_value = ({'foo': 'bar'}, 30)
+        assert self.cls._persistent_cache_get('k', 60) == {'foo': 'bar'}
+        assert self.cls._persistent_cache_get('k', 5) is None
+        assert self.cls._persistent_cache_get('k', None) == {'foo': 'bar'}
+        assert self.cls._persistent_cache_get(None, 60) is None
+        self.cls.refresh_cache = True
+        assert self.cls._persistent_cache_get('k', 60) is None
+        assert self.mock_cache.mock_calls == [
+            call.get('k'), call.get('k'), call.get('k')
+        ]
+
+    def test_get_missing(self):
+        self.mock_cache.get.return_value = (None, None)
+        assert self.cls._persistent_cache_get('k', 60) is None
+        self.cls.persistent_cache = None
+        assert self.cls._persistent_cache_get('k', 60) is None
+        assert self.mock_cache.mock_calls == [call.get('k')]
+
+    def test_set(self):
+        self.cls._persistent_cache_set('k', 'v')
+        self.cls._persistent_cache_set(None, 'v')
+        self.cls.persistent_cache = None
+        self.cls._persistent_cache_set('k', 'v')
+        assert self.mock_cache.mock_calls == [call.set('k', 'v')]
+
 
 class TestConnectableCredentials(object):
 
@@ -375,3 +491,177 @@ class TestConnectableCredentials(object):
         assert c.expiration == datetime(2015, 1, 1)
         assert c.assumed_role_id == 'roleid'
         assert c.assumed_role_arn == 'arn'
+
+    def test_expires_within(self):
+        result = {
+            'Credentials': {
+                'AccessKeyId': 'akid',
+                'SecretAccessKey': 'secret',
+                'SessionToken': 'token',
+                'Expiration': datetime.now(utc) + timedelta(seconds=600)
+            },
+            'AssumedRoleUser': {
+                'AssumedRoleId': 'roleid',
+                'Arn': 'arn'
+            }
+        }
+        c = ConnectableCredentials(result)
+        assert c.expires_within(300) is False
+        assert c.expires_within(900) is True
+
+    def test_expires_within_naive(self):
+        result = {
+            'Credentials': {
+                'AccessKeyId': 'akid',
+                'SecretAccessKey': 'secret',
+                'SessionToken': 'token',
+                'Expiration': datetime(2015, 1, 1)
+            },
+            'AssumedRoleUser': {
+                'AssumedRoleId': 'roleid',
+                'Arn': 'arn'
+            }
+        }
+        c = ConnectableCredentials(result)
+        assert c.expires_within(0) is True
+
+    def test_expires_within_unknown(self):
+        result = {
+            'Credentials': {
+                'AccessKeyId': 'akid',
+                'SecretAccessKey': 'secret',
+                'SessionToken': 'token',
+                'Expiration': '0'
+            },
+            'AssumedRoleUser': {
+                'AssumedRoleId': 'roleid',
+                'Arn': 'arn'
+            }
+        }
+        c = ConnectableCredentials(result)
+        assert c.expires_within(0) is True
+
+
+class TestConnectionCache(object):
+
+    def setup(self):
+        clear_connection_cache()
+
+    def teardown(self):
+        clear_connection_cache()
+
+    def test_cached_client(self):
+        with patch('%s.boto3.session.Session' % pbm) as m_sess:
+            m_sess.return_value.client.side_effect = [Mock(), Mock()]
+            res1 = cached_client('myapi', {'region_name': 'r1'})
+            res2 = cached_client('myapi', {'region_name': 'r1'})
+            res3 = cached_client('myapi', {'region_name': 'r2'})
+        assert res1 is res2
+        assert res1 is not res3
+        assert m_sess.mock_calls == [
+            call(),
+            call().client('myapi', region_name='r1'),
+            call().client('myapi', region_name='r2')
+        ]
+
+    def test_cached_client_config(self):
+        conf1 = Config(retries={'max_attempts': 3})
+        conf2 = Config(retries={'max_attempts': 3})
+        conf3 = Config(retries={'max_attempts': 5})
+        with patch('%s.boto3.session.Session' % pbm) as m_sess:
+            m_sess.return_value.client.side_effect = [Mock(), Mock(), Mock()]
+            res1 = cached_client('myapi', {}, config=conf1)
+            res2 = cached_client('myapi', {}, config=conf2)
+            res3 = cached_client('myapi', {}, config=conf3)
+            res4 = cached_client('myapi', {})
+        assert res1 is res2
+        assert len(set([id(res1), id(res3), id(res4)])) == 3
+        assert m_sess.mock_calls == [
+            call(),
+            call().client('myapi', config=conf1),
+            call().client('myapi', config=conf3),
+            call().client('myapi')
+        ]
+
+    def test_cached_resource(self):
+        with patch('%s.boto3.session.Session' % pbm) as m_sess:
+            m_sess.return_value.client.return_value = Mock()
+            m_sess.return_value.resource.return_value = Mock()
+            res1 = cached_resource('myapi', {'region_name': 'r1'})
+            res2 = cached_resource('myapi', {'region_name': 'r1'})
+            res3 = cached_client('myapi', {'region_name': 'r1'})
+        assert res1 is res2
+        assert res1 is not res3
+        assert m_sess.mock_calls == [
+            call(),
+            call().resource('myapi', region_name='r1'),
+            call().client('myapi', region_name='r1')
+        ]
+
+    def test_cached_resource_per_thread(self):
+        res = {}
+
+        def get_resource(name):
+            res[name] = cached_resource('myapi', {'region_name': 'r1'})
+
+        with patch('%s.boto3.session.Session' % pbm) as m_sess:
+            m_sess.return_value.resource.side_effect = [Mock(), Mock()]
+            get_resource('main')
+            t = threading.Thread(target=get_resource, args=['other'])
+            t.start()
+            t.join()
+            res1 = cached_resource('myapi', {'region_name': 'r1'})
+        assert res['main'] is res1
+        assert res['main'] is not res['other']
+        assert m_sess.return_value.resource.call_count == 2
+
+    def test_cached_client_lru(self):
+        with patch('%s.CONNECTION_CACHE_SIZE' % pbm, 2):
+            with patch('%s.boto3.session.Session' % pbm) as m_sess:
+                m_sess.return_value.client.side_effect = [
+                    Mock(), Mock(), Mock(), Mock()
+                ]
+                res1 = cached_client('myapi', {'region_name': 'r1'})
+                cached_client('myapi', {'region_name': 'r2'})
+                # use r1 again, so r2 is the least recently used
+                assert cached_client('myapi', {'region_name': 'r1'}) is res1
+                cached_client('myapi', {'region_name': 'r3'})
+                assert cached_client('myapi', {'region_name': 'r1'}) is res1
+                cached_client('myapi', {'region_name': 'r2'})
+        assert m_sess.return_value.client.mock_calls == [
+            call('myapi', region_name='r1'),
+            call('myapi', region_name='r2'),
+            call('myapi', region_name='r3'),
+            call('myapi', region_name='r2')
+        ]
+
+    def test_discard_connections(self):
+        acct1 = {'aws_access_key_id': 'a1', 'aws_secret_access_key': 's1'}
+        acct2 = {'aws_access_key_id': 'a2', 'aws_secret_access_key': 's2'}
+        with patch('%s.boto3.session.Session' % pbm) as m_sess:
+            m_sess.return_value.client.side_effect = lambda *a, **k: Mock()
+            m_sess.return_value.resource.side_effect = lambda *a, **k: Mock()
+            a1r1 = cached_client('myapi', dict(acct1, region_name='r1'))
+            a1r2 = cached_resource('myapi', dict(acct1, region_name='r2'))
+            a2r1 = cached_client('myapi', dict(acct2, region_name='r1'))
+            dflt = cached_client('myapi', {'region_name': 'r1'})
+            discard_connections(dict(acct1, region_name='r1'))
+            assert cached_client(
+                'myapi', dict(acct1, region_name='r1')
+            ) is not a1r1
+            assert cached_resource(
+                'myapi', dict(acct1, region_name='r2')
+            ) is not a1r2
+            assert cached_client(
+                'myapi', dict(acct2, region_name='r1')
+            ) is a2r1
+            assert cached_client('myapi', {'region_name': 'r1'}) is dflt
+
+    def test_clear_connection_cache(self):
+        with patch('%s.boto3.session.Session' % pbm) as m_sess:
+            m_sess.side_effect = [Mock(), Mock()]
+            res1 = cached_client('myapi', {})
+            clear_connection_cache()
+            res2 = cached_client('myapi', {})
+        assert res1 is not res2
+        assert m_sess.call_count == 2
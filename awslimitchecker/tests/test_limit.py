@@ -93,6 +93,7 @@ class TestInit(AwsLimitTester):
         assert limit._quotas_unit == 'None'
         assert limit.quotas_limit is None
         assert limit.quotas_unit_converter is None
+        assert limit.quotas_code is None
 
     def test_ta_names(self):
         m_foo = Mock()
@@ -107,7 +108,8 @@ class TestInit(AwsLimitTester):
             quotas_service_code='baz',
             quotas_name='blam',
             quotas_unit='blarg',
-            quotas_unit_converter=m_foo
+            quotas_unit_converter=m_foo,
+            quotas_code='qcode'
         )
         assert limit.name == 'limitname'
         assert limit.service == self.mock_svc
@@ -127,6 +129,7 @@ class TestInit(AwsLimitTester):
         assert limit._quotas_unit == 'blarg'
         assert limit.quotas_limit is None
         assert limit.quotas_unit_converter == m_foo
+        assert limit.quotas_code == 'qcode'
 
     def test_valueerror(self):
         with pytest.raises(ValueError) as excinfo:
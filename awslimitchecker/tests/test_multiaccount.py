@@ -0,0 +1,198 @@
+"""
+awslimitchecker/tests/test_multiaccount.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2019 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import sys
+import threading
+
+from awslimitchecker.checker import AwsLimitChecker
+from awslimitchecker.multiaccount import MultiAccountLimitChecker
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch, call, Mock
+else:
+    from unittest.mock import patch, call, Mock
+
+pbm = 'awslimitchecker.multiaccount'
+pb = '%s.MultiAccountLimitChecker' % pbm
+
+
+class TestMultiAccountLimitChecker(object):
+
+    def setup(self):
+        self.checkers = {}
+        self.mock_checker = Mock(spec_set=AwsLimitChecker)
+
+        def se_copy(account_id, account_role):
+            c = Mock(spec_set=AwsLimitChecker)
+            c.check_thresholds.return_value = {'acct': account_id}
+            c.get_limits.return_value = {'limits': account_id}
+            self.checkers[account_id] = c
+            return c
+
+        self.mock_checker._copy_for_account.side_effect = se_copy
+        with patch('%s.AwsLimitChecker' % pbm, autospec=True) as m_alc:
+            m_alc.return_value = self.mock_checker
+            self.cls = MultiAccountLimitChecker(
+                [('111', 'role1'), ('222', 'role2'), ('333', 'role3')],
+                max_workers=2, region='us-east-1'
+            )
+        self.m_alc = m_alc
+
+    def test_init(self):
+        assert self.m_alc.mock_calls == [call(region='us-east-1')]
+        assert self.cls.accounts == [
+            ('111', 'role1'), ('222', 'role2'), ('333', 'role3')
+        ]
+        assert self.cls.max_workers == 2
+        assert self.mock_checker._copy_for_account.mock_calls == []
+
+    def test_check_thresholds(self):
+        res = sorted(self.cls.check_thresholds(service=['EC2']))
+        assert res == [
+            ('111', {'acct': '111'}, None),
+            ('222', {'acct': '222'}, None),
+            ('333', {'acct': '333'}, None)
+        ]
+        assert self.mock_checker._copy_for_account.mock_calls == [
+            call('111', 'role1'),
+            call('222', 'role2'),
+            call('333', 'role3')
+        ]
+        assert self.checkers['222'].mock_calls == [
+            call.check_thresholds(service=['EC2'], use_ta=True),
+            call._discard_connections()
+        ]
+
+    def test_find_usage(self):
+        res = sorted(self.cls.find_usage(use_ta=False))
+        assert res == [
+            ('111', {'limits': '111'}, None),
+            ('222', {'limits': '222'}, None),
+            ('333', {'limits': '333'}, None)
+        ]
+        assert self.checkers['111'].mock_calls == [
+            call.find_usage(service=None, use_ta=False),
+            call.get_limits(service=None, use_ta=False),
+            call._discard_connections()
+        ]
+
+    def test_discard_connections_on_error(self):
+        ex = RuntimeError('foo')
+
+        def se_copy(account_id, account_role):
+            c = Mock(spec_set=AwsLimitChecker)
+            c.get_limits.side_effect = ex
+            self.checkers[account_id] = c
+            return c
+
+        self.mock_checker._copy_for_account.side_effect = se_copy
+        res = sorted(self.cls.get_limits(), key=lambda x: x[0])
+        assert res == [
+            ('111', None, ex),
+            ('222', None, ex),
+            ('333', None, ex)
+        ]
+        for acct in ['111', '222', '333']:
+            assert self.checkers[acct].mock_calls == [
+                call.get_limits(service=None, use_ta=True),
+                call._discard_connections()
+            ]
+
+    def test_get_limits_error(self):
+        ex = RuntimeError('foo')
+
+        def se_copy(account_id, account_role):
+            if account_id == '222':
+                raise ex
+            c = Mock(spec_set=AwsLimitChecker)
+            c.get_limits.return_value = {'limits': account_id}
+            return c
+
+        self.mock_checker._copy_for_account.side_effect = se_copy
+        res = sorted(
+            self.cls.get_limits(), key=lambda x: x[0]
+        )
+        assert res == [
+            ('111', {'limits': '111'}, None),
+            ('222', None, ex),
+            ('333', {'limits': '333'}, None)
+        ]
+
+    def test_bounded_in_progress(self):
+        lock = threading.Lock()
+        state = {'current': 0, 'max': 0}
+
+        def se_copy(account_id, account_role):
+            with lock:
+                state['current'] += 1
+                state['max'] = max(state['max'], state['current'])
+            c = Mock(spec_set=AwsLimitChecker)
+
+            def se_check(service=None, use_ta=True):
+                with lock:
+                    state['current'] -= 1
+                return {}
+
+            c.check_thresholds.side_effect = se_check
+            return c
+
+        self.mock_checker._copy_for_account.side_effect = se_copy
+        self.cls.accounts = [(str(x), 'role') for x in range(20)]
+        res = list(self.cls.check_thresholds())
+        assert len(res) == 20
+        assert state['max'] <= 2
+
+    def test_overrides_and_removed_services(self):
+        self.cls.remove_services(['IAM'])
+        self.cls.set_limit_overrides({'EC2': {'foo': 1}}, override_ta=False)
+        self.cls.set_threshold_overrides({'EC2': {'bar': {}}})
+        self.cls.accounts = [('111', 'role1')]
+        list(self.cls.check_thresholds())
+        assert self.checkers['111'].mock_calls == [
+            call.remove_services(['IAM']),
+            call.set_limit_overrides({'EC2': {'foo': 1}}, override_ta=False),
+            call.set_threshold_overrides({'EC2': {'bar': {}}}),
+            call.check_thresholds(service=None, use_ta=True),
+            call._discard_connections()
+        ]
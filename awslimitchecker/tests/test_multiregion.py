@@ -0,0 +1,190 @@
+"""
+awslimitchecker/tests/test_multiregion.py
+
+The latest version of this package is available at:
+<https://github.com/jantman/awslimitchecker>
+
+##############################################################################
+Copyright 2015-2019 Jason Antman <jason@jasonantman.com>
+
+    This file is part of awslimitchecker, also known as awslimitchecker.
+
+    awslimitchecker is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Affero General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    awslimitchecker is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Affero General Public License for more details.
+
+    You should have received a copy of the GNU Affero General Public License
+    along with awslimitchecker.  If not, see <http://www.gnu.org/licenses/>.
+
+The Copyright and Authors attributions contained herein may not be removed or
+otherwise altered, except to add the Author attribution of a contributor to
+this work. (Additional Terms pursuant to Section 7b of the AGPL v3)
+##############################################################################
+While not legally required, I sincerely request that anyone who finds
+bugs please submit them at <https://github.com/jantman/awslimitchecker> or
+to me via email, and that you send any contributions or improvements
+either as a pull request on GitHub, or to me via email.
+##############################################################################
+
+AUTHORS:
+Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
+##############################################################################
+"""
+
+import sys
+import pytest
+
+from awslimitchecker.checker import AwsLimitChecker
+from awslimitchecker.multiregion import MultiRegionLimitChecker
+
+# https://code.google.com/p/mock/issues/detail?id=249
+# py>=3.4 should use unittest.mock not the mock package on pypi
+if (
+        sys.version_info[0] < 3 or
+        sys.version_info[0] == 3 and sys.version_info[1] < 4
+):
+    from mock import patch, call, Mock
+else:
+    from unittest.mock import patch, call, Mock
+
+pbm = 'awslimitchecker.multiregion'
+pb = '%s.MultiRegionLimitChecker' % pbm
+
+
+class TestMultiRegionLimitChecker(object):
+
+    def setup(self):
+        self.mock_primary = Mock(spec=AwsLimitChecker)
+        self.mock_primary.services = {'IAM': 1, 'EC2': 2}
+        self.mock_west = Mock(spec=AwsLimitChecker)
+        self.mock_west.services = {'EC2': 3}
+        self.mock_eu = Mock(spec=AwsLimitChecker)
+        self.mock_eu.services = {'EC2': 4}
+        self.mock_primary._copy_for_region.side_effect = [
+            self.mock_west, self.mock_eu
+        ]
+        with patch('%s.AwsLimitChecker' % pbm, autospec=True) as m_alc:
+            m_alc.return_value = self.mock_primary
+            self.cls = MultiRegionLimitChecker(
+                ['us-east-1', 'us-west-2', 'eu-west-1'],
+                warning_threshold=5, parallel=3
+            )
+        self.m_alc = m_alc
+
+    def test_init(self):
+        assert self.m_alc.mock_calls[0] == call(
+            region='us-east-1', warning_threshold=5, parallel=3
+        )
+        assert self.mock_primary._copy_for_region.mock_calls == [
+            call('us-west-2', skip_global=True),
+            call('eu-west-1', skip_global=True)
+        ]
+        assert self.cls.regions == ['us-east-1', 'us-west-2', 'eu-west-1']
+        assert self.cls.checkers == {
+            'us-east-1': self.mock_primary,
+            'us-west-2': self.mock_west,
+            'eu-west-1': self.mock_eu
+        }
+        assert self.cls.max_region_workers is None
+        assert self.cls.region_errors == {}
+
+    def test_init_no_regions(self):
+        with pytest.raises(ValueError):
+            MultiRegionLimitChecker([])
+
+    def test_find_usage(self):
+        self.cls.find_usage(use_ta=False)
+        assert self.mock_primary.find_usage.mock_calls == [
+            call(service=None, use_ta=False)
+        ]
+        assert self.mock_west.find_usage.mock_calls == [
+            call(service=None, use_ta=False)
+        ]
+        assert self.mock_eu.find_usage.mock_calls == [
+            call(service=None, use_ta=False)
+        ]
+
+    def test_find_usage_global_service(self):
+        self.cls.max_region_workers = 1
+        self.cls.find_usage(service=['IAM'])
+        assert self.mock_primary.find_usage.mock_calls == [
+            call(service=['IAM'], use_ta=True)
+        ]
+        assert self.mock_west.find_usage.mock_calls == []
+        assert self.mock_eu.find_usage.mock_calls == []
+
+    def test_get_limits(self):
+        self.mock_primary.get_limits.return_value = {
+            'IAM': {'lim1': 'a'},
+            'EC2': {'lim2': 'b'}
+        }
+        self.mock_west.get_limits.return_value = {'EC2': {'lim2': 'c'}}
+        self.mock_eu.get_limits.return_value = {'EC2': {'lim2': 'd'}}
+        res = self.cls.get_limits(service=['EC2', 'IAM'])
+        assert res == {
+            ('us-east-1', 'IAM', 'lim1'): 'a',
+            ('us-east-1', 'EC2', 'lim2'): 'b',
+            ('us-west-2', 'EC2', 'lim2'): 'c',
+            ('eu-west-1', 'EC2', 'lim2'): 'd'
+        }
+        assert self.mock_primary.get_limits.mock_calls == [
+            call(service=['EC2', 'IAM'], use_ta=True)
+        ]
+        assert self.mock_west.get_limits.mock_calls == [
+            call(service=['EC2'], use_ta=True)
+        ]
+
+    def test_check_thresholds_errors(self):
+        ex1 = RuntimeError('west')
+        ex2 = RuntimeError('eu')
+        self.mock_primary.check_thresholds.return_value = {
+            'EC2': {'lim2': 'b'}
+        }
+        self.mock_west.check_thresholds.side_effect = ex1
+        self.mock_eu.check_thresholds.side_effect = ex2
+        with pytest.raises(RuntimeError) as excinfo:
+            self.cls.check_thresholds()
+        assert excinfo.value == ex2
+        assert self.cls.region_errors == {
+            'us-west-2': ex1,
+            'eu-west-1': ex2
+        }
+        assert self.mock_primary.check_thresholds.mock_calls == [
+            call(service=None, use_ta=True)
+        ]
+
+    def test_remove_services(self):
+        self.cls.remove_services(['IAM', 'EC2'])
+        assert self.mock_primary.remove_services.mock_calls == [
+            call(['IAM', 'EC2'])
+        ]
+        assert self.mock_west.remove_services.mock_calls == [call(['EC2'])]
+        assert self.mock_eu.remove_services.mock_calls == [call(['EC2'])]
+
+    def test_set_limit_overrides(self):
+        self.cls.set_limit_overrides(
+            {'IAM': {'foo': 1}, 'EC2': {'bar': 2}}, override_ta=False
+        )
+        assert self.mock_primary.set_limit_overrides.mock_calls == [
+            call({'IAM': {'foo': 1}, 'EC2': {'bar': 2}}, override_ta=False)
+        ]
+        assert self.mock_west.set_limit_overrides.mock_calls == [
+            call({'EC2': {'bar': 2}}, override_ta=False)
+        ]
+
+    def test_set_threshold_overrides(self):
+        self.cls.set_threshold_overrides(
+            {'IAM': {'foo': 1}, 'EC2': {'bar': 2}}
+        )
+        assert self.mock_primary.set_threshold_overrides.mock_calls == [
+            call({'IAM': {'foo': 1}, 'EC2': {'bar': 2}})
+        ]
+        assert self.mock_eu.set_threshold_overrides.mock_calls == [
+            call({'EC2': {'bar': 2}})
+        ]
@@ -38,10 +38,12 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 import sys
+import threading
 from botocore.exceptions import ClientError
 import pytest
 
 from awslimitchecker.quotas import ServiceQuotasClient
+from awslimitchecker.limit import AwsLimit
 from awslimitchecker.tests.support import quotas_response
 
 # https://code.google.com/p/mock/issues/detail?id=249
@@ -50,9 +52,9 @@ if (
         sys.version_info[0] < 3 or
         sys.version_info[0] == 3 and sys.version_info[1] < 4
 ):
-    from mock import patch, call, Mock
+    from mock import patch, call, Mock, PropertyMock
 else:
-    from unittest.mock import patch, call, Mock
+    from unittest.mock import patch, call, Mock, PropertyMock
 
 pbm = 'awslimitchecker.quotas'
 pb = '%s.ServiceQuotasClient' % pbm
@@ -171,6 +173,114 @@ class TestQuotasForService(object):
         ]
 
 
+class TestPersistentCache(object):
+
+    def setup(self):
+        self.mock_cache = Mock()
+        self.cls = ServiceQuotasClient(
+            {'region_name': 'rname'}, cache=self.mock_cache, cache_ttl=100,
+            cache_ttls={'other': 10}, cache_max_stale=1000
+        )
+        self.cls._account_id = '123'
+        self.cls.conn = Mock()
+        self.cls.conn._client_config.region_name = 'rname'
+
+    def test_persistent_cache_key(self):
+        self.cls._account_id = None
+        with patch('awslimitchecker.connectable.cached_client') as m_client:
+            m_client.return_value.get_caller_identity.return_value = {
+                'Account': '456'
+            }
+            res = self.cls._persistent_cache_key('scode')
+            res2 = self.cls._persistent_cache_key('other', 'qc')
+        assert res == 'service-quotas/456/rname/scode'
+        assert res2 == 'service-quotas/456/rname/other/qc'
+        assert m_client.mock_calls == [
+            call('sts', {'region_name': 'rname'}),
+            call().get_caller_identity()
+        ]
+
+    def test_fresh(self):
+        self.mock_cache.get.return_value = ({'a': 1}, 99)
+        with patch('%s._get_quotas' % pb, autospec=True) as m_get:
+            res = self.cls.quotas_for_service('scode')
+        assert res == {'a': 1}
+        assert self.cls._cache == {'scode': {'a': 1}}
+        assert m_get.mock_calls == []
+        assert self.mock_cache.mock_calls == [
+            call.get('service-quotas/123/rname/scode')
+        ]
+
+    def test_missing(self):
+        self.mock_cache.get.return_value = (None, None)
+        with patch('%s._get_quotas' % pb, autospec=True) as m_get:
+            m_get.return_value = {'b': 2}
+            res = self.cls.quotas_for_service('scode')
+        assert res == {'b': 2}
+        assert self.cls._cache == {'scode': {'b': 2}}
+        assert m_get.mock_calls == [call(self.cls, 'scode')]
+        assert self.mock_cache.mock_calls == [
+            call.get('service-quotas/123/rname/scode'),
+            call.set('service-quotas/123/rname/scode', {'b': 2})
+        ]
+
+    def test_expired(self):
+        # per-service-code TTL of 10, plus max stale of 1000
+        self.mock_cache.get.return_value = ({'a': 1}, 1011)
+        with patch('%s._get_quotas' % pb, autospec=True) as m_get:
+            m_get.return_value = {'b': 2}
+            res = self.cls.quotas_for_service('other')
+        assert res == {'b': 2}
+        assert m_get.mock_calls == [call(self.cls, 'other')]
+        assert self.mock_cache.mock_calls == [
+            call.get('service-quotas/123/rname/other'),
+            call.set('service-quotas/123/rname/other', {'b': 2})
+        ]
+
+    def test_stale(self):
+        self.mock_cache.get.return_value = ({'a': 1}, 101)
+        with patch('%s._get_quotas' % pb, autospec=True) as m_get:
+            m_get.return_value = {'b': 2}
+            res = self.cls.quotas_for_service('scode')
+            self.cls.wait_for_refresh()
+        assert res == {'a': 1}
+        assert self.cls._refresh_threads == []
+        assert self.cls._cache == {'scode': {'a': 1}}
+        assert m_get.mock_calls == [call(self.cls, 'scode')]
+        assert self.mock_cache.mock_calls == [
+            call.get('service-quotas/123/rname/scode'),
+            call.set('service-quotas/123/rname/scode', {'b': 2})
+        ]
+
+    def test_stale_refresh_error(self):
+        self.mock_cache.get.return_value = ({'a': 1}, 101)
+        with patch('%s._get_quotas' % pb, autospec=True) as m_get:
+            m_get.side_effect = RuntimeError('foo')
+            with patch('%s.logger' % pbm) as m_logger:
+                res = self.cls.quotas_for_service('scode')
+                self.cls.wait_for_refresh()
+        assert res == {'a': 1}
+        assert self.mock_cache.mock_calls == [
+            call.get('service-quotas/123/rname/scode')
+        ]
+        assert m_logger.warning.mock_calls == [
+            call(
+                'Unable to refresh cached service quotas %s',
+                'service-quotas/123/rname/scode', exc_info=True
+            )
+        ]
+
+    def test_refresh_cache(self):
+        self.cls.refresh_cache = True
+        with patch('%s._get_quotas' % pb, autospec=True) as m_get:
+            m_get.return_value = {'b': 2}
+            res = self.cls.quotas_for_service('scode')
+        assert res == {'b': 2}
+        assert self.mock_cache.mock_calls == [
+            call.set('service-quotas/123/rname/scode', {'b': 2})
+        ]
+
+
 class TestGetQuotaValue(object):
 
     def setup(self):
@@ -238,3 +348,390 @@ class TestGetQuotaValue(object):
         assert m_conv.mock_calls == [
             call(12.3, 'Foo', 'None')
         ]
+
+    def test_normalized_name(self):
+        self.cls._cache = {
+            'scode': {
+                'q  name': {
+                    'QuotaName': 'Q  Name',
+                    'QuotaCode': 'qcode',
+                    'Value': 12.3,
+                    'Unit': 'None'
+                }
+            }
+        }
+        res = self.cls.get_quota_value('scode', 'q Name')
+        assert res == 12.3
+        assert self.cls._indexed == set(['scode'])
+
+    def test_indexed_once(self):
+        quotas = {
+            'qname': {
+                'QuotaName': 'qname',
+                'QuotaCode': 'qcode',
+                'Value': 12.3,
+                'Unit': 'None'
+            }
+        }
+        with patch('%s.quotas_for_service' % pb, autospec=True) as m_qfs:
+            m_qfs.return_value = quotas
+            assert self.cls.get_quota_value('scode', 'qname') == 12.3
+            assert self.cls.get_quota_value('scode', 'other') is None
+        assert m_qfs.mock_calls == [call(self.cls, 'scode')]
+
+    def test_quota_code(self):
+        with patch('%s.quota_by_code' % pb, autospec=True) as m_qbc:
+            m_qbc.return_value = {
+                'QuotaName': 'qname',
+                'QuotaCode': 'qcode',
+                'Value': 4.0,
+                'Unit': 'None'
+            }
+            res = self.cls.get_quota_value('scode', 'qname', quota_code='qc')
+        assert res == 4.0
+        assert m_qbc.mock_calls == [call(self.cls, 'scode', 'qc')]
+
+    def test_quota_code_already_listed(self):
+        self.cls._cache = {
+            'scode': {
+                'qname': {
+                    'QuotaName': 'qname',
+                    'QuotaCode': 'qcode',
+                    'Value': 12.3,
+                    'Unit': 'None'
+                }
+            }
+        }
+        with patch('%s.quota_by_code' % pb, autospec=True) as m_qbc:
+            res = self.cls.get_quota_value('scode', 'qname', quota_code='qc')
+        assert res == 12.3
+        assert m_qbc.mock_calls == []
+
+
+class TestQuotaByCode(object):
+
+    def setup(self):
+        self.cls = ServiceQuotasClient({'foo': 'bar'})
+        self.mock_conn = Mock()
+
+        def se_connect(cls):
+            cls.conn = self.mock_conn
+
+        self.se_connect = se_connect
+
+    def test_not_cached(self):
+        quota = {'QuotaCode': 'qc', 'Value': 3.0, 'Unit': 'None'}
+        self.mock_conn.get_service_quota.return_value = {'Quota': quota}
+        with patch('%s.connect' % pb, autospec=True) as m_connect:
+            m_connect.side_effect = self.se_connect
+            res = self.cls.quota_by_code('scode', 'qc')
+            res2 = self.cls.quota_by_code('scode', 'qc')
+        assert res == quota
+        assert res2 == quota
+        assert self.cls._code_cache == {('scode', 'qc'): quota}
+        assert self.mock_conn.mock_calls == [
+            call.get_service_quota(ServiceCode='scode', QuotaCode='qc')
+        ]
+
+    def test_no_such_resource(self):
+        self.mock_conn.get_service_quota.side_effect = ClientError(
+            {
+                'Error': {
+                    'Code': 'NoSuchResourceException',
+                    'Message': 'The request failed because the specified '
+                               'service does not exist.'
+                }
+            },
+            'GetServiceQuota'
+        )
+        with patch('%s.connect' % pb, autospec=True) as m_connect:
+            m_connect.side_effect = self.se_connect
+            res = self.cls.quota_by_code('scode', 'qc')
+        assert res is None
+        assert self.cls._code_cache == {('scode', 'qc'): {}}
+
+    def test_other_exception(self):
+        self.mock_conn.get_service_quota.side_effect = ClientError(
+            {'Error': {'Code': 'AccessDenied', 'Message': 'foo'}},
+            'GetServiceQuota'
+        )
+        with patch('%s.connect' % pb, autospec=True) as m_connect:
+            m_connect.side_effect = self.se_connect
+            with pytest.raises(ClientError):
+                self.cls.quota_by_code('scode', 'qc')
+        assert self.cls._code_cache == {}
+
+    def test_persistent_cache(self):
+        mock_cache = Mock()
+        mock_cache.get.return_value = ({'QuotaCode': 'qc'}, 10)
+        self.cls.persistent_cache = mock_cache
+        self.cls._account_id = '123'
+        self.mock_conn._client_config.region_name = 'rname'
+        with patch('%s.connect' % pb, autospec=True) as m_connect:
+            m_connect.side_effect = self.se_connect
+            res = self.cls.quota_by_code('scode', 'qc')
+        assert res == {'QuotaCode': 'qc'}
+        assert mock_cache.mock_calls == [
+            call.get('service-quotas/123/rname/scode/qc')
+        ]
+        assert self.mock_conn.mock_calls == []
+
+
+class TestUpdateLimits(object):
+
+    def test_update_limits(self):
+
+        def se_get_quota_value(_, quota_name, **kwargs):
+            if quota_name == 'qn1':
+                return 12.4
+            if quota_name == 'qn3':
+                return 5.0
+            return None
+
+        cls = ServiceQuotasClient({'foo': 'bar'})
+        limits = {}
+        for idx, unit, conv, code in [
+            (1, 'None', None, None),
+            (2, 'None', None, None),
+            (3, 'Foo', Mock(), 'qc3')
+        ]:
+            lim = Mock(spec_set=AwsLimit)
+            type(lim).quotas_service_code = PropertyMock(return_value='qsc')
+            type(lim).quota_name = PropertyMock(return_value='qn%d' % idx)
+            type(lim).quotas_unit = PropertyMock(return_value=unit)
+            type(lim).quotas_unit_converter = PropertyMock(return_value=conv)
+            type(lim).quotas_code = PropertyMock(return_value=code)
+            limits['limit%d' % idx] = lim
+        with patch('%s.get_quota_value' % pb) as m_gqv:
+            m_gqv.side_effect = se_get_quota_value
+            cls.update_limits(limits)
+        assert m_gqv.mock_calls == [
+            call('qsc', 'qn1', units='None', converter=None, quota_code=None),
+            call('qsc', 'qn2', units='None', converter=None, quota_code=None),
+            call(
+                'qsc', 'qn3', units='Foo',
+                converter=limits['limit3'].quotas_unit_converter,
+                quota_code='qc3'
+            )
+        ]
+        assert limits['limit1'].mock_calls == [call._set_quotas_limit(12.4)]
+        assert limits['limit2'].mock_calls == []
+        assert limits['limit3'].mock_calls == [call._set_quotas_limit(5.0)]
+
+
+class TestPrefetch(object):
+
+    def setup(self):
+        self.cls = ServiceQuotasClient({'foo': 'bar'})
+
+    def _limit(self, service_code, quota_code):
+        lim = Mock(spec_set=AwsLimit)
+        type(lim).quotas_service_code = PropertyMock(
+            return_value=service_code
+        )
+        type(lim).quotas_code = PropertyMock(return_value=quota_code)
+        return lim
+
+    def test_prefetch(self):
+        self.cls._cache['cached'] = {}
+        limits = [
+            self._limit('ec2', 'L-1'),
+            self._limit('ec2', None),
+            self._limit('ec2', 'L-2'),
+            self._limit('vpc', 'L-4'),
+            self._limit('vpc', 'L-3'),
+            self._limit(None, None),
+            self._limit('cached', None)
+        ]
+        with patch('%s._load_quotas' % pb, autospec=True) as m_load:
+            with patch('%s.quota_by_code' % pb, autospec=True) as m_qbc:
+                futures = self.cls.prefetch(limits)
+                for f in futures:
+                    f.result()
+        assert len(futures) == 2
+        assert m_load.mock_calls == [call(self.cls, 'ec2')]
+        assert m_qbc.mock_calls == [
+            call(self.cls, 'vpc', 'L-3'),
+            call(self.cls, 'vpc', 'L-4')
+        ]
+
+    def test_prefetch_nothing(self):
+        with patch('%s.ThreadPoolExecutor' % pbm, autospec=True) as m_tpe:
+            assert self.cls.prefetch([self._limit(None, 'L-1')]) == []
+        assert m_tpe.mock_calls == []
+
+    def test_prefetch_error(self):
+        self.cls._cache['ec2'] = {}
+        ex = RuntimeError('foo')
+        with patch('%s._get_quotas' % pb, autospec=True) as m_get:
+            with patch('%s.logger' % pbm, autospec=True) as mock_logger:
+                m_get.side_effect = ex
+                self.cls._prefetch_code('vpc', None)
+        assert self.cls._cache == {'ec2': {}}
+        assert self.cls._prefetch_errors == {'vpc': ex}
+        assert mock_logger.mock_calls == [
+            call.debug(
+                'Unable to prefetch service quotas for service code %s',
+                'vpc', exc_info=True
+            )
+        ]
+
+    def test_prefetch_error_raised_once(self):
+        mock_paginator = Mock()
+        mock_paginator.paginate.side_effect = [
+            ClientError(
+                {'Error': {'Code': 'AccessDenied', 'Message': 'no'}},
+                'ListServiceQuotas'
+            ),
+            [{'Quotas': [{'QuotaName': 'Foo', 'QuotaCode': 'L-1'}]}]
+        ]
+        mock_conn = Mock()
+        mock_conn.get_paginator.return_value = mock_paginator
+
+        def se_connect(cls):
+            cls.conn = mock_conn
+
+        with patch('%s.connect' % pb, autospec=True) as m_connect:
+            m_connect.side_effect = se_connect
+            for f in self.cls.prefetch([self._limit('ec2', None)]):
+                f.result()
+            assert 'ec2' not in self.cls._cache
+            with pytest.raises(ClientError):
+                self.cls.quotas_for_service('ec2')
+            assert self.cls._prefetch_errors == {}
+            # once raised, the next lookup makes the request itself
+            assert self.cls.quotas_for_service('ec2') == {
+                'foo': {'QuotaName': 'Foo', 'QuotaCode': 'L-1'}
+            }
+        assert mock_paginator.paginate.call_count == 2
+
+    def test_prefetch_error_contended(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def se_get_quotas(service_code):
+            calls.append(service_code)
+            started.set()
+            release.wait(5)
+            raise RuntimeError('foo')
+
+        with patch.object(
+            self.cls, '_get_quotas', side_effect=se_get_quotas
+        ):
+            futures = self.cls.prefetch([self._limit('ec2', None)])
+            assert started.wait(5)
+            errors = []
+
+            def lookup():
+                try:
+                    self.cls.quotas_for_service('ec2')
+                except RuntimeError as ex:
+                    errors.append(ex)
+
+            t = threading.Thread(target=lookup)
+            t.start()
+            # the lookup waits on the lock held by the failing prefetch
+            t.join(0.1)
+            assert t.is_alive()
+            release.set()
+            t.join(5)
+            futures[0].result()
+        assert calls == ['ec2']
+        assert [str(x) for x in errors] == ['foo']
+        assert self.cls._cache == {}
+        assert self.cls._prefetch_errors == {}
+
+    def test_prefetch_error_cleared_on_success(self):
+        self.cls._prefetch_errors['ec2'] = RuntimeError('foo')
+        with patch('%s._get_quotas' % pb, autospec=True) as m_get:
+            m_get.return_value = {'qname': {'Value': 1}}
+            self.cls._prefetch_code('ec2', None)
+        assert self.cls._prefetch_errors == {}
+        assert self.cls.quotas_for_service('ec2') == {'qname': {'Value': 1}}
+        assert m_get.mock_calls == [call(self.cls, 'ec2')]
+
+    def test_prefetch_error_quota_by_code(self):
+        ex = RuntimeError('foo')
+        self.cls._prefetch_errors['ec2'] = ex
+        with patch('%s._get_quota' % pb, autospec=True) as m_get:
+            m_get.return_value = {'Value': 1}
+            with pytest.raises(RuntimeError):
+                self.cls.quota_by_code('ec2', 'L-1')
+            assert self.cls.quota_by_code('ec2', 'L-1') == {'Value': 1}
+        assert m_get.mock_calls == [call(self.cls, 'ec2', 'L-1')]
+
+    def test_concurrent_lookup_waits(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def se_get_quotas(service_code):
+            calls.append(service_code)
+            started.set()
+            release.wait(5)
+            return {'qname': {'Value': 1}}
+
+        with patch.object(
+            self.cls, '_get_quotas', side_effect=se_get_quotas
+        ):
+            futures = self.cls.prefetch([self._limit('ec2', None)])
+            assert started.wait(5)
+            results = []
+            t = threading.Thread(
+                target=lambda: results.append(
+                    self.cls.quotas_for_service('ec2')
+                )
+            )
+            t.start()
+            release.set()
+            t.join(5)
+            futures[0].result()
+        assert calls == ['ec2']
+        assert results == [{'qname': {'Value': 1}}]
+
+
+class TestInvalidate(object):
+
+    def setup(self):
+        self.cls = ServiceQuotasClient({'foo': 'bar'})
+        for scode in ['sc1', 'sc2']:
+            self.cls._cache[scode] = {'qname': {}}
+            self.cls._code_cache[(scode, 'qc')] = {}
+            self.cls._index[(scode, 'qname')] = {}
+            self.cls._indexed.add(scode)
+
+    def test_all(self):
+        self.cls.invalidate()
+        assert self.cls._cache == {}
+        assert self.cls._code_cache == {}
+        assert self.cls._index == {}
+        assert self.cls._indexed == set()
+
+    def test_service_code(self):
+        self.cls.invalidate('sc1')
+        assert self.cls._cache == {'sc2': {'qname': {}}}
+        assert self.cls._code_cache == {('sc2', 'qc'): {}}
+        assert self.cls._index == {('sc2', 'qname'): {}}
+        assert self.cls._indexed == set(['sc2'])
+
+    def test_prefetch_errors(self):
+        self.cls._prefetch_errors = {'sc1': RuntimeError(), 'sc3': None}
+        self.cls.invalidate('sc1')
+        assert self.cls._prefetch_errors == {'sc3': None}
+        self.cls.invalidate()
+        assert self.cls._prefetch_errors == {}
+
+    def test_holds_lock(self):
+        lock = self.cls._code_lock('sc1')
+        done = threading.Event()
+        with lock:
+            t = threading.Thread(
+                target=lambda: (self.cls.invalidate('sc1'), done.set())
+            )
+            t.start()
+            assert done.wait(0.2) is False
+            assert 'sc1' in self.cls._cache
+        t.join(5)
+        assert done.is_set()
+        assert 'sc1' not in self.cls._cache
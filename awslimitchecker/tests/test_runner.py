@@ -72,6 +72,9 @@ def yellow(s):
 
 # patch base
 pb = 'awslimitchecker.runner'
+pbc = 'awslimitchecker.checker'
+pba = 'awslimitchecker.alerts'
+pbm = 'awslimitchecker.metrics'
 
 
 class RunnerTester(object):
@@ -95,6 +98,28 @@ class TestModule(RunnerTester):
         assert mock_runner.mock_calls == [
             call(),
             call().console_entry_point(),
+            call().checker.wait_for_cache_refresh()
+        ]
+
+    def test_module_entry_point_exit(self):
+        with patch('%s.Runner' % pb) as mock_runner:
+            mock_runner.return_value.console_entry_point.side_effect = \
+                SystemExit(2)
+            with pytest.raises(SystemExit):
+                console_entry_point()
+        assert mock_runner.mock_calls == [
+            call(),
+            call().console_entry_point(),
+            call().checker.wait_for_cache_refresh()
+        ]
+
+    def test_module_entry_point_no_checker(self):
+        with patch('%s.Runner' % pb) as mock_runner:
+            mock_runner.return_value.checker = None
+            console_entry_point()
+        assert mock_runner.mock_calls == [
+            call(),
+            call().console_entry_point()
         ]
 
 
@@ -128,6 +153,12 @@ class TestParseArgs(RunnerTester):
         assert res.role_partition == 'aws'
         assert res.ta_api_region == 'us-east-1'
         assert res.skip_quotas is False
+        assert res.parallel is None
+        assert res.cache_dir is None
+        assert res.cache_type == 'json'
+        assert res.quotas_cache_ttl == 86400
+        assert res.refresh_cache is False
+        assert res.asyncio is False
 
     def test_parser(self):
         argv = ['-V']
@@ -250,6 +281,43 @@ class TestParseArgs(RunnerTester):
                                 help='Do not attempt to connect to Service '
                                      'Quotas service or use its data for '
                                      'current limits'),
+            call().add_argument('--parallel', action='store', type=int,
+                                default=None, metavar='N',
+                                help='Check up to N services concurrently, '
+                                     'each in its own thread (default: check '
+                                     'services serially)'),
+            call().add_argument('--asyncio', action='store_true',
+                                default=False,
+                                help='Find usage with the asyncio backend, '
+                                     'making per-resource API calls '
+                                     'concurrently where supported (requires '
+                                     'aiobotocore)'),
+            call().add_argument('--count-stack-set-instances',
+                                action='store_true', default=False,
+                                help='Also check the CloudFormation "Stack '
+                                     'sets" and "Stack instances per stack '
+                                     'set" limits; this makes one request '
+                                     'per StackSet'),
+            call().add_argument('--cache-dir', action='store', type=str,
+                                default=None, metavar='DIR',
+                                help='Keep a persistent cache of '
+                                     'rarely-changing API responses '
+                                     '(currently Service Quotas) in DIR, to '
+                                     'reuse on subsequent runs'),
+            call().add_argument('--cache-type', action='store', type=str,
+                                default='json', choices=['json', 'sqlite'],
+                                help='Type of persistent cache to use with '
+                                     '--cache-dir (default: json)'),
+            call().add_argument('--quotas-cache-ttl', action='store',
+                                type=int, default=86400, metavar='SECONDS',
+                                help='Number of seconds that cached Service '
+                                     'Quotas responses are fresh for '
+                                     '(default: 86400)'),
+            call().add_argument('--refresh-cache', action='store_true',
+                                default=False,
+                                help='Ignore any data in the --cache-dir '
+                                     'cache; query the APIs and update the '
+                                     'cache with the results'),
             call().add_mutually_exclusive_group(),
             call().add_mutually_exclusive_group().add_argument(
                 '--ta-refresh-wait', action='store_true', default=False,
@@ -351,6 +419,36 @@ class TestParseArgs(RunnerTester):
         assert isinstance(res, argparse.Namespace)
         assert res.skip_quotas is True
 
+    def test_parallel(self):
+        argv = ['--parallel', '8']
+        res = self.cls.parse_args(argv)
+        assert isinstance(res, argparse.Namespace)
+        assert res.parallel == 8
+
+    def test_asyncio(self):
+        argv = ['--asyncio']
+        res = self.cls.parse_args(argv)
+        assert isinstance(res, argparse.Namespace)
+        assert res.asyncio is True
+
+    def test_count_stack_set_instances(self):
+        argv = ['--count-stack-set-instances']
+        res = self.cls.parse_args(argv)
+        assert isinstance(res, argparse.Namespace)
+        assert res.count_stack_set_instances is True
+
+    def test_cache(self):
+        argv = [
+            '--cache-dir', '/tmp/foo', '--cache-type', 'sqlite',
+            '--quotas-cache-ttl', '60', '--refresh-cache'
+        ]
+        res = self.cls.parse_args(argv)
+        assert isinstance(res, argparse.Namespace)
+        assert res.cache_dir == '/tmp/foo'
+        assert res.cache_type == 'sqlite'
+        assert res.quotas_cache_ttl == 60
+        assert res.refresh_cache is True
+
     def test_ta_refresh_older(self):
         argv = ['--ta-refresh-older=123']
         res = self.cls.parse_args(argv)
@@ -433,19 +531,20 @@ class TestParseArgs(RunnerTester):
 class TestListServices(RunnerTester):
 
     def test_happy_path(self, capsys):
+        expected = 'Bar\nBaz\nFoo\n'
+        svcs = {'Foo': 'a:Foo', 'Bar': 'b:Bar', 'Baz': 'c:Baz'}
+        with patch.dict('%s._services' % pb, svcs, clear=True):
+            self.cls.list_services()
+        out, err = capsys.readouterr()
+        assert out == expected
+
+    def test_skip(self, capsys):
         expected = 'Bar\nFoo\n'
-        mock_checker = Mock(spec_set=AwsLimitChecker)
-        mock_checker.get_service_names.return_value = [
-            'Foo',
-            'Bar'
-        ]
-        self.cls.checker = mock_checker
-        self.cls.list_services()
+        svcs = {'Foo': 'a:Foo', 'Bar': 'b:Bar', 'Baz': 'c:Baz'}
+        with patch.dict('%s._services' % pb, svcs, clear=True):
+            self.cls.list_services(['Baz'])
         out, err = capsys.readouterr()
         assert out == expected
-        assert mock_checker.mock_calls == [
-            call.get_service_names()
-        ]
 
 
 class TestIamPolicy(RunnerTester):
@@ -470,6 +569,7 @@ class TestListDefaults(RunnerTester):
 
     def test_simple(self, capsys):
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.get_limits.return_value = sample_limits()
         self.cls.checker = mock_checker
         with patch('awslimitchecker.runner.dict2cols',
@@ -491,6 +591,7 @@ class TestListDefaults(RunnerTester):
 
     def test_one_service(self, capsys):
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.get_limits.return_value = {
             'SvcFoo': sample_limits()['SvcFoo'],
         }
@@ -516,6 +617,7 @@ class TestListLimits(RunnerTester):
 
     def test_simple(self, capsys):
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.get_limits.return_value = sample_limits_api()
         self.cls.checker = mock_checker
         with patch('awslimitchecker.runner.dict2cols') as mock_d2c:
@@ -539,6 +641,7 @@ class TestListLimits(RunnerTester):
 
     def test_one_service(self, capsys):
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.get_limits.return_value = {
             'SvcFoo': sample_limits_api()['SvcFoo'],
         }
@@ -561,6 +664,22 @@ class TestListLimits(RunnerTester):
             })
         ]
 
+    def test_service_errors(self, capsys):
+        ex = RuntimeError('foo')
+        mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {'SvcFoo': ex}
+        mock_checker.get_limits.return_value = {
+            'SvcBar': sample_limits_api()['SvcBar'],
+        }
+        self.cls.checker = mock_checker
+        with patch('awslimitchecker.runner.dict2cols') as mock_d2c:
+            mock_d2c.return_value = 'd2cval'
+            with pytest.raises(RuntimeError) as excinfo:
+                self.cls.list_limits()
+        out, err = capsys.readouterr()
+        assert out == 'd2cval\n'
+        assert excinfo.value == ex
+
 
 class TestSetLimitOverride(RunnerTester):
 
@@ -570,10 +689,32 @@ class TestSetLimitOverride(RunnerTester):
             'ElastiCache/Cache cluster subnet groups': "100",
         }
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.get_service_names.return_value = ['EC2', 'ElastiCache']
         self.cls.checker = mock_checker
         self.cls.set_limit_overrides(overrides)
         assert mock_checker.mock_calls == [
+            call.get_service_names(),
             call.set_limit_override('EC2', 'Foo bar', 2),
+            call.get_service_names(),
+            call.set_limit_override(
+                'ElastiCache',
+                'Cache cluster subnet groups',
+                100
+            )
+        ]
+
+    def test_unloaded_service(self):
+        overrides = {
+            'EC2/Foo bar': "2",
+            'ElastiCache/Cache cluster subnet groups': "100",
+        }
+        mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.get_service_names.return_value = ['ElastiCache']
+        self.cls.checker = mock_checker
+        self.cls.set_limit_overrides(overrides)
+        assert mock_checker.mock_calls == [
+            call.get_service_names(),
+            call.get_service_names(),
             call.set_limit_override(
                 'ElastiCache',
                 'Cache cluster subnet groups',
@@ -609,7 +750,7 @@ class TestLoadJson(RunnerTester):
         with patch(
             '%s.open' % pb, mock_open(read_data=data), create=True
         ) as m_open:
-            with patch('%s.boto3.client' % pb) as m_client:
+            with patch('boto3.client') as m_client:
                 m_client.return_value = mock_client
                 res = self.cls.load_json('/foo/bar/baz.json')
         assert m_open.mock_calls == [
@@ -633,7 +774,7 @@ class TestLoadJson(RunnerTester):
         with patch(
             '%s.open' % pb, mock_open(read_data=data), create=True
         ) as m_open:
-            with patch('%s.boto3.client' % pb) as m_client:
+            with patch('boto3.client') as m_client:
                 m_client.return_value = mock_client
                 res = self.cls.load_json(
                     's3://bucketname/key/foo/bar/baz.json'
@@ -657,7 +798,7 @@ class TestLoadJson(RunnerTester):
         with patch(
             '%s.open' % pb, mock_open(read_data=data), create=True
         ) as m_open:
-            with patch('%s.boto3.client' % pb) as m_client:
+            with patch('boto3.client') as m_client:
                 m_client.return_value = mock_client
                 res = self.cls.load_json('/foo/bar/baz.json')
         assert m_open.mock_calls == [
@@ -681,7 +822,7 @@ class TestLoadJson(RunnerTester):
         with patch(
             '%s.open' % pb, mock_open(read_data=data), create=True
         ) as m_open:
-            with patch('%s.boto3.client' % pb) as m_client:
+            with patch('boto3.client') as m_client:
                 m_client.return_value = mock_client
                 res = self.cls.load_json(
                     's3://bucketname/key/foo/bar/baz.json'
@@ -718,6 +859,22 @@ class TestSetLimitOverridesFromJson(RunnerTester):
             })
         ]
 
+    def test_unloaded_service(self):
+        mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.get_service_names.return_value = ['EC2']
+        self.cls.checker = mock_checker
+        with patch('%s.Runner.load_json' % pb, autospec=True) as m_load:
+            m_load.return_value = {
+                'EC2': {'bar': 23},
+                'VPC': {'Blarg': 73}
+            }
+            self.cls.set_limit_overrides_from_json('/foo/bar/baz.json')
+        assert self.cls.checker.mock_calls == [
+            call.get_service_names(),
+            call.get_service_names(),
+            call.set_limit_overrides({'EC2': {'bar': 23}})
+        ]
+
 
 class TestSetThresholdOverridesFromJson(RunnerTester):
 
@@ -767,6 +924,7 @@ class TestShowUsage(RunnerTester):
         limits['SvcBar']['bar limit2']._add_current_usage(22)
         limits['SvcBar']['barlimit1']._add_current_usage(11)
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.get_limits.return_value = limits
         self.cls.checker = mock_checker
         with patch('awslimitchecker.runner.dict2cols') as mock_d2c:
@@ -792,6 +950,7 @@ class TestShowUsage(RunnerTester):
         }
         limits['SvcFoo']['foo limit3']._add_current_usage(33)
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.get_limits.return_value = limits
         self.cls.checker = mock_checker
         self.cls.service_name = ['SvcFoo']
@@ -811,12 +970,41 @@ class TestShowUsage(RunnerTester):
             })
         ]
 
+    def test_service_errors(self, capsys):
+        """errors from find_usage are kept when get_limits resets them"""
+        ex = RuntimeError('foo')
+        mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
+
+        def se_find_usage(**kwargs):
+            mock_checker.service_errors = {'SvcFoo': ex}
+
+        def se_get_limits(**kwargs):
+            mock_checker.service_errors = {}
+            return {'SvcBar': sample_limits()['SvcBar']}
+
+        mock_checker.find_usage.side_effect = se_find_usage
+        mock_checker.get_limits.side_effect = se_get_limits
+        self.cls.checker = mock_checker
+        with patch('awslimitchecker.runner.dict2cols') as mock_d2c:
+            mock_d2c.return_value = 'd2cval'
+            with patch('%s.logger' % pb, autospec=True) as mock_logger:
+                with pytest.raises(RuntimeError) as excinfo:
+                    self.cls.show_usage()
+        out, err = capsys.readouterr()
+        assert out == 'd2cval\n'
+        assert excinfo.value == ex
+        assert mock_logger.mock_calls == [
+            call.error('Unable to check service %s: %s', 'SvcFoo', ex)
+        ]
+
 
 class TestCheckThresholds(RunnerTester):
 
     def test_ok(self, capsys):
         """no problems, return 0 and print nothing"""
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.check_thresholds.return_value = {}
         mock_checker.get_limits.return_value = {}
         self.cls.checker = mock_checker
@@ -833,6 +1021,7 @@ class TestCheckThresholds(RunnerTester):
     def test_metrics(self, capsys):
         """no problems, return 0 and print nothing; send metrics"""
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.check_thresholds.return_value = {}
         mock_lim1 = Mock()
         mock_lim2 = Mock()
@@ -892,6 +1081,7 @@ class TestCheckThresholds(RunnerTester):
         mock_limit4.get_criticals.return_value = [mock_c2]
 
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.check_thresholds.return_value = {
             'svc2': {
                 'limit3': mock_limit3,
@@ -968,6 +1158,7 @@ class TestCheckThresholds(RunnerTester):
         mock_limit2.get_criticals.return_value = []
 
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.check_thresholds.return_value = {
             'svc1': {
                 'limit1': mock_limit1,
@@ -1022,6 +1213,7 @@ class TestCheckThresholds(RunnerTester):
         mock_limit2.get_criticals.return_value = []
 
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.check_thresholds.return_value = {
             'svc2': {
                 'limit2': mock_limit2,
@@ -1074,6 +1266,7 @@ class TestCheckThresholds(RunnerTester):
         mock_limit2.get_criticals.return_value = []
 
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.check_thresholds.return_value = {
             'svc2': {
                 'limit2': mock_limit2,
@@ -1112,6 +1305,7 @@ class TestCheckThresholds(RunnerTester):
         mock_limit1.get_criticals.return_value = [mock_c1, mock_c2]
 
         mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {}
         mock_checker.check_thresholds.return_value = {
             'svc1': {
                 'limit1': mock_limit1,
@@ -1142,6 +1336,27 @@ class TestCheckThresholds(RunnerTester):
             },
         }, '  \n')
 
+    def test_service_errors(self, capsys):
+        """services failed concurrently; print the rest, then raise"""
+        ex1 = RuntimeError('foo')
+        ex2 = RuntimeError('bar')
+        mock_checker = Mock(spec_set=AwsLimitChecker)
+        mock_checker.service_errors = {'SvcFoo': ex1, 'SvcBar': ex2}
+        mock_checker.check_thresholds.return_value = {}
+        self.cls.checker = mock_checker
+        with patch('awslimitchecker.runner.dict2cols') as mock_d2c:
+            mock_d2c.return_value = 'd2cval'
+            with patch('%s.logger' % pb, autospec=True) as mock_logger:
+                with pytest.raises(RuntimeError) as excinfo:
+                    self.cls.check_thresholds()
+        out, err = capsys.readouterr()
+        assert out == 'd2cval\n'
+        assert excinfo.value == ex2
+        assert mock_logger.mock_calls == [
+            call.error('Unable to check service %s: %s', 'SvcBar', ex2),
+            call.error('Unable to check service %s: %s', 'SvcFoo', ex1)
+        ]
+
 
 class TestConsoleEntryPoint(RunnerTester):
 
@@ -1149,39 +1364,44 @@ class TestConsoleEntryPoint(RunnerTester):
         argv = ['awslimitchecker', '-V']
         expected = 'awslimitchecker ver (see <foo> for source code)\n'
         with patch.object(sys, 'argv', argv):
-            with patch('%s.AwsLimitChecker' % pb,
-                       spec_set=AwsLimitChecker) as mock_alc:
-                mock_alc.return_value.get_project_url.return_value = 'foo'
-                mock_alc.return_value.get_version.return_value = 'ver'
-                with pytest.raises(SystemExit) as excinfo:
-                    self.cls.console_entry_point()
+            with patch('%s._get_version_info' % pb) as mock_ver:
+                mock_ver.return_value.url = 'foo'
+                mock_ver.return_value.version_str = 'ver'
+                with patch('%s.AwsLimitChecker' % pbc,
+                           spec_set=AwsLimitChecker) as mock_alc:
+                    with pytest.raises(SystemExit) as excinfo:
+                        self.cls.console_entry_point()
         out, err = capsys.readouterr()
         assert out == expected
+        assert 'AGPL-licensed free software' in err
         assert excinfo.value.code == 0
-        assert mock_alc.mock_calls == [
-            call(
-                warning_threshold=80,
-                critical_threshold=99,
-                account_id=None,
-                account_role=None,
-                region=None,
-                external_id=None,
-                mfa_serial_number=None,
-                mfa_token=None,
-                profile_name=None,
-                ta_refresh_mode=None,
-                ta_refresh_timeout=None,
-                check_version=True,
-                role_partition='aws',
-                ta_api_region='us-east-1',
-                skip_quotas=False
-            ),
-            call().get_project_url(),
-            call().get_version()
-        ]
+        assert mock_ver.mock_calls == [call()]
+        assert mock_alc.mock_calls == []
 
-    def test_list_services(self):
+    def test_list_services(self, capsys):
         argv = ['awslimitchecker', '-s']
+        with patch.object(sys, 'argv', argv):
+            with patch('%s.Runner.list_services' % pb,
+                       autospec=True) as mock_list:
+                with patch('%s.AwsLimitChecker' % pbc,
+                           spec_set=AwsLimitChecker) as mock_alc:
+                    with patch('%s._get_version_info' % pb) as mock_ver:
+                        mock_ver.return_value.url = 'foo'
+                        mock_ver.return_value.version_str = 'ver'
+                        with pytest.raises(SystemExit) as excinfo:
+                            self.cls.console_entry_point()
+        out, err = capsys.readouterr()
+        assert err == 'awslimitchecker ver is AGPL-licensed free software; ' \
+            'all users have a right to the full source code of this ' \
+            'version. See <foo>\n'
+        assert excinfo.value.code == 0
+        assert mock_list.mock_calls == [
+            call(self.cls, [])
+        ]
+        assert mock_alc.mock_calls == []
+
+    def test_list_services_skip(self):
+        argv = ['awslimitchecker', '-s', '--skip-service=EC2']
         with patch.object(sys, 'argv', argv):
             with patch('%s.Runner.list_services' % pb,
                        autospec=True) as mock_list:
@@ -1189,7 +1409,7 @@ class TestConsoleEntryPoint(RunnerTester):
                     self.cls.console_entry_point()
         assert excinfo.value.code == 0
         assert mock_list.mock_calls == [
-            call(self.cls)
+            call(self.cls, ['EC2'])
         ]
 
     def test_iam_policy(self):
@@ -1233,7 +1453,7 @@ class TestConsoleEntryPoint(RunnerTester):
             with patch('%s.Runner.check_thresholds' % pb,
                        autospec=True) as mock_check:
                 mock_check.return_value = 2, {'Foo': {'Bar': Mock()}}, 'foo'
-                with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_c:
+                with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_c:
                     with pytest.raises(SystemExit) as excinfo:
                         self.cls.console_entry_point()
         assert excinfo.value.code == 2
@@ -1243,7 +1463,12 @@ class TestConsoleEntryPoint(RunnerTester):
                  profile_name=None, region=None, ta_refresh_mode=None,
                  ta_refresh_timeout=None, warning_threshold=80,
                  check_version=True, role_partition='aws',
-                 ta_api_region='us-east-1', skip_quotas=False)
+                 ta_api_region='us-east-1', skip_quotas=False, parallel=None,
+                 cache=None, quotas_cache_ttl=86400,
+                 refresh_cache=False,
+                 use_asyncio=False, service_names=None,
+                 skip_services=[],
+                 count_stack_set_instances=False)
         ]
 
     def test_role_partition(self):
@@ -1252,7 +1477,7 @@ class TestConsoleEntryPoint(RunnerTester):
             with patch('%s.Runner.check_thresholds' % pb,
                        autospec=True) as mock_check:
                 mock_check.return_value = 2, {'Foo': {'Bar': Mock()}}, 'foo'
-                with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_c:
+                with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_c:
                     with pytest.raises(SystemExit) as excinfo:
                         self.cls.console_entry_point()
         assert excinfo.value.code == 2
@@ -1262,7 +1487,12 @@ class TestConsoleEntryPoint(RunnerTester):
                  profile_name=None, region=None, ta_refresh_mode=None,
                  ta_refresh_timeout=None, warning_threshold=80,
                  check_version=True, role_partition='foo',
-                 ta_api_region='us-east-1', skip_quotas=False)
+                 ta_api_region='us-east-1', skip_quotas=False, parallel=None,
+                 cache=None, quotas_cache_ttl=86400,
+                 refresh_cache=False,
+                 use_asyncio=False, service_names=None,
+                 skip_services=[],
+                 count_stack_set_instances=False)
         ]
 
     def test_ta_api_region_skip_quotas(self):
@@ -1271,7 +1501,7 @@ class TestConsoleEntryPoint(RunnerTester):
             with patch('%s.Runner.check_thresholds' % pb,
                        autospec=True) as mock_check:
                 mock_check.return_value = 2, {'Foo': {'Bar': Mock()}}, 'foo'
-                with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_c:
+                with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_c:
                     with pytest.raises(SystemExit) as excinfo:
                         self.cls.console_entry_point()
         assert excinfo.value.code == 2
@@ -1281,7 +1511,44 @@ class TestConsoleEntryPoint(RunnerTester):
                  profile_name=None, region=None, ta_refresh_mode=None,
                  ta_refresh_timeout=None, warning_threshold=80,
                  check_version=True, role_partition='aws',
-                 ta_api_region='foo', skip_quotas=True)
+                 ta_api_region='foo', skip_quotas=True, parallel=None,
+                 cache=None, quotas_cache_ttl=86400,
+                 refresh_cache=False,
+                 use_asyncio=False, service_names=None,
+                 skip_services=[],
+                 count_stack_set_instances=False)
+        ]
+
+    def test_cache_dir(self):
+        argv = [
+            'awslimitchecker', '--cache-dir=/foo', '--cache-type=sqlite',
+            '--quotas-cache-ttl=60', '--refresh-cache'
+        ]
+        mock_sqlite = Mock()
+        with patch.object(sys, 'argv', argv):
+            with patch('%s.Runner.check_thresholds' % pb,
+                       autospec=True) as mock_check:
+                mock_check.return_value = 2, {'Foo': {'Bar': Mock()}}, 'foo'
+                with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_c:
+                    with patch.dict(
+                        '%s.CACHE_TYPES' % pb, {'sqlite': mock_sqlite}
+                    ):
+                        with pytest.raises(SystemExit) as excinfo:
+                            self.cls.console_entry_point()
+        assert excinfo.value.code == 2
+        assert mock_sqlite.mock_calls == [call('/foo')]
+        assert mock_c.mock_calls == [
+            call(account_id=None, account_role=None, critical_threshold=99,
+                 external_id=None, mfa_serial_number=None, mfa_token=None,
+                 profile_name=None, region=None, ta_refresh_mode=None,
+                 ta_refresh_timeout=None, warning_threshold=80,
+                 check_version=True, role_partition='aws',
+                 ta_api_region='us-east-1', skip_quotas=False, parallel=None,
+                 cache=mock_sqlite.return_value,
+                 quotas_cache_ttl=60, refresh_cache=True,
+                 use_asyncio=False, service_names=None,
+                 skip_services=[],
+                 count_stack_set_instances=False)
         ]
 
     def test_skip_service(self):
@@ -1290,7 +1557,7 @@ class TestConsoleEntryPoint(RunnerTester):
             with patch('%s.Runner.check_thresholds' % pb,
                        autospec=True) as mock_check:
                 mock_check.return_value = 2, {'Foo': {'Bar': Mock()}}, 'foo'
-                with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_c:
+                with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_c:
                     with pytest.raises(SystemExit) as excinfo:
                         self.cls.console_entry_point()
         assert excinfo.value.code == 2
@@ -1300,8 +1567,12 @@ class TestConsoleEntryPoint(RunnerTester):
                  profile_name=None, region=None, ta_refresh_mode=None,
                  ta_refresh_timeout=None, warning_threshold=80,
                  check_version=True, role_partition='aws',
-                 ta_api_region='us-east-1', skip_quotas=False),
-            call().remove_services(['foo'])
+                 ta_api_region='us-east-1', skip_quotas=False, parallel=None,
+                 cache=None, quotas_cache_ttl=86400,
+                 refresh_cache=False,
+                 use_asyncio=False, service_names=None,
+                 skip_services=['foo'],
+                 count_stack_set_instances=False)
         ]
 
     def test_skip_service_multi(self):
@@ -1314,7 +1585,7 @@ class TestConsoleEntryPoint(RunnerTester):
             with patch('%s.Runner.check_thresholds' % pb,
                        autospec=True) as mock_check:
                 mock_check.return_value = 2, {'Foo': {'Bar': Mock()}}, 'foo'
-                with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_c:
+                with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_c:
                     with pytest.raises(SystemExit) as excinfo:
                         self.cls.console_entry_point()
         assert excinfo.value.code == 2
@@ -1324,8 +1595,12 @@ class TestConsoleEntryPoint(RunnerTester):
                  profile_name=None, region=None, ta_refresh_mode=None,
                  ta_refresh_timeout=None, warning_threshold=80,
                  check_version=True, role_partition='aws',
-                 ta_api_region='us-east-1', skip_quotas=False),
-            call().remove_services(['foo', 'bar'])
+                 ta_api_region='us-east-1', skip_quotas=False, parallel=None,
+                 cache=None, quotas_cache_ttl=86400,
+                 refresh_cache=False,
+                 use_asyncio=False, service_names=None,
+                 skip_services=['foo', 'bar'],
+                 count_stack_set_instances=False)
         ]
 
     def test_skip_check(self):
@@ -1337,7 +1612,7 @@ class TestConsoleEntryPoint(RunnerTester):
             with patch('%s.Runner.check_thresholds' % pb,
                        autospec=True) as mock_check:
                 mock_check.return_value = 2, {'Foo': {'Bar': Mock()}}, 'foo'
-                with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_c:
+                with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_c:
                     with pytest.raises(SystemExit) as excinfo:
                         self.cls.console_entry_point()
         assert excinfo.value.code == 2
@@ -1347,7 +1622,12 @@ class TestConsoleEntryPoint(RunnerTester):
                  profile_name=None, region=None, ta_refresh_mode=None,
                  ta_refresh_timeout=None, warning_threshold=80,
                  check_version=True, role_partition='aws',
-                 ta_api_region='us-east-1', skip_quotas=False),
+                 ta_api_region='us-east-1', skip_quotas=False, parallel=None,
+                 cache=None, quotas_cache_ttl=86400,
+                 refresh_cache=False,
+                 use_asyncio=False, service_names=None,
+                 skip_services=[],
+                 count_stack_set_instances=False),
         ]
         assert self.cls.skip_check == [
             'EC2/Max launch specifications per spot fleet',
@@ -1363,7 +1643,7 @@ class TestConsoleEntryPoint(RunnerTester):
             with patch('%s.Runner.check_thresholds' % pb,
                        autospec=True) as mock_check:
                 mock_check.return_value = 2, {'Foo': {'Bar': Mock()}}, 'foo'
-                with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_c:
+                with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_c:
                     with pytest.raises(SystemExit) as excinfo:
                         self.cls.console_entry_point()
         assert excinfo.value.code == 2
@@ -1373,7 +1653,12 @@ class TestConsoleEntryPoint(RunnerTester):
                  profile_name=None, region=None, ta_refresh_mode=None,
                  ta_refresh_timeout=None, warning_threshold=80,
                  check_version=True, role_partition='aws',
-                 ta_api_region='us-east-1', skip_quotas=False),
+                 ta_api_region='us-east-1', skip_quotas=False, parallel=None,
+                 cache=None, quotas_cache_ttl=86400,
+                 refresh_cache=False,
+                 use_asyncio=False, service_names=None,
+                 skip_services=[],
+                 count_stack_set_instances=False),
         ]
         assert self.cls.skip_check == [
             'EC2/Max launch specifications per spot fleet',
@@ -1476,13 +1761,17 @@ class TestConsoleEntryPoint(RunnerTester):
         with patch.object(sys, 'argv', argv):
             with patch('%s.Runner.check_thresholds' % pb,
                        autospec=True) as mock_ct:
-                with pytest.raises(SystemExit) as excinfo:
-                    mock_ct.return_value = 6, {'Foo': {'Bar': Mock()}}, 'foo'
-                    self.cls.console_entry_point()
+                with patch('%s.AwsLimitChecker' % pbc,
+                           spec_set=AwsLimitChecker) as mock_alc:
+                    with pytest.raises(SystemExit) as excinfo:
+                        mock_ct.return_value = 6, {'Foo': {'Bar': Mock()}}, 'f'
+                        self.cls.console_entry_point()
         out, err = capsys.readouterr()
         assert out == ''
         assert excinfo.value.code == 6
         assert self.cls.service_name == ['foo']
+        assert mock_alc.mock_calls[0][2]['service_names'] == ['foo']
+        assert mock_alc.mock_calls[0][2]['skip_services'] == []
 
     def test_no_service_name(self, capsys):
         argv = ['awslimitchecker']
@@ -1502,7 +1791,7 @@ class TestConsoleEntryPoint(RunnerTester):
         with patch.object(sys, 'argv', argv):
             with patch('%s.Runner.check_thresholds' % pb,
                        autospec=True) as mock_ct:
-                with patch('%s.AwsLimitChecker' % pb,
+                with patch('%s.AwsLimitChecker' % pbc,
                            spec_set=AwsLimitChecker) as mock_alc:
                     with pytest.raises(SystemExit) as excinfo:
                         mock_ct.return_value = 6, {'Foo': {'Bar': Mock()}}, 'f'
@@ -1526,7 +1815,15 @@ class TestConsoleEntryPoint(RunnerTester):
                 check_version=True,
                 role_partition='aws',
                 ta_api_region='us-east-1',
-                skip_quotas=False
+                skip_quotas=False,
+                parallel=None,
+                cache=None,
+                quotas_cache_ttl=86400,
+                refresh_cache=False,
+                use_asyncio=False,
+                service_names=None,
+                skip_services=[],
+                count_stack_set_instances=False
             )
         ]
         assert self.cls.service_name is None
@@ -1544,7 +1841,7 @@ class TestConsoleEntryPoint(RunnerTester):
         with patch.object(sys, 'argv', argv):
             with patch('%s.Runner.check_thresholds' % pb,
                        autospec=True) as mock_ct:
-                with patch('%s.AwsLimitChecker' % pb,
+                with patch('%s.AwsLimitChecker' % pbc,
                            spec_set=AwsLimitChecker) as mock_alc:
                     with pytest.raises(SystemExit) as excinfo:
                         mock_ct.return_value = 6, {'Foo': {'Bar': Mock()}}, 'f'
@@ -1568,7 +1865,15 @@ class TestConsoleEntryPoint(RunnerTester):
                 check_version=True,
                 role_partition='aws',
                 ta_api_region='us-east-1',
-                skip_quotas=False
+                skip_quotas=False,
+                parallel=None,
+                cache=None,
+                quotas_cache_ttl=86400,
+                refresh_cache=False,
+                use_asyncio=False,
+                service_names=None,
+                skip_services=[],
+                count_stack_set_instances=False
             )
         ]
         assert self.cls.service_name is None
@@ -1589,7 +1894,7 @@ class TestConsoleEntryPoint(RunnerTester):
         with patch.object(sys, 'argv', argv):
             with patch('%s.Runner.check_thresholds' % pb,
                        autospec=True) as mock_ct:
-                with patch('%s.AwsLimitChecker' % pb,
+                with patch('%s.AwsLimitChecker' % pbc,
                            spec_set=AwsLimitChecker) as mock_alc:
                     with pytest.raises(SystemExit) as excinfo:
                         mock_ct.return_value = 6, {'Foo': {'Bar': Mock()}}, 'f'
@@ -1613,7 +1918,15 @@ class TestConsoleEntryPoint(RunnerTester):
                 check_version=False,
                 role_partition='aws',
                 ta_api_region='us-east-1',
-                skip_quotas=False
+                skip_quotas=False,
+                parallel=None,
+                cache=None,
+                quotas_cache_ttl=86400,
+                refresh_cache=False,
+                use_asyncio=False,
+                service_names=None,
+                skip_services=[],
+                count_stack_set_instances=False
             )
         ]
         assert self.cls.service_name is None
@@ -1651,7 +1964,7 @@ class TestConsoleEntryPoint(RunnerTester):
     def test_warning(self):
         argv = ['awslimitchecker', '-W', '50']
         with patch.object(sys, 'argv', argv):
-            with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_alc:
+            with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_alc:
                 with patch('%s.Runner.check_thresholds' % pb,
                            autospec=True) as mock_ct:
                     with pytest.raises(SystemExit) as excinfo:
@@ -1674,14 +1987,22 @@ class TestConsoleEntryPoint(RunnerTester):
                 check_version=True,
                 role_partition='aws',
                 ta_api_region='us-east-1',
-                skip_quotas=False
+                skip_quotas=False,
+                parallel=None,
+                cache=None,
+                quotas_cache_ttl=86400,
+                refresh_cache=False,
+                use_asyncio=False,
+                service_names=None,
+                skip_services=[],
+                count_stack_set_instances=False
             )
         ]
 
     def test_warning_profile_name(self):
         argv = ['awslimitchecker', '-W', '50', '-P', 'myprof']
         with patch.object(sys, 'argv', argv):
-            with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_alc:
+            with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_alc:
                 with patch('%s.Runner.check_thresholds' % pb,
                            autospec=True) as mock_ct:
                     with pytest.raises(SystemExit) as excinfo:
@@ -1704,14 +2025,22 @@ class TestConsoleEntryPoint(RunnerTester):
                 check_version=True,
                 role_partition='aws',
                 ta_api_region='us-east-1',
-                skip_quotas=False
+                skip_quotas=False,
+                parallel=None,
+                cache=None,
+                quotas_cache_ttl=86400,
+                refresh_cache=False,
+                use_asyncio=False,
+                service_names=None,
+                skip_services=[],
+                count_stack_set_instances=False
             )
         ]
 
     def test_critical(self):
         argv = ['awslimitchecker', '-C', '95']
         with patch.object(sys, 'argv', argv):
-            with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_alc:
+            with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_alc:
                 with patch('%s.Runner.check_thresholds' % pb,
                            autospec=True) as mock_ct:
                     with pytest.raises(SystemExit) as excinfo:
@@ -1734,7 +2063,15 @@ class TestConsoleEntryPoint(RunnerTester):
                 check_version=True,
                 role_partition='aws',
                 ta_api_region='us-east-1',
-                skip_quotas=False
+                skip_quotas=False,
+                parallel=None,
+                cache=None,
+                quotas_cache_ttl=86400,
+                refresh_cache=False,
+                use_asyncio=False,
+                service_names=None,
+                skip_services=[],
+                count_stack_set_instances=False
             )
         ]
 
@@ -1742,7 +2079,7 @@ class TestConsoleEntryPoint(RunnerTester):
         argv = ['awslimitchecker', '-C', '95', '--ta-refresh-timeout=123',
                 '--ta-refresh-older=456']
         with patch.object(sys, 'argv', argv):
-            with patch('%s.AwsLimitChecker' % pb, autospec=True) as mock_alc:
+            with patch('%s.AwsLimitChecker' % pbc, autospec=True) as mock_alc:
                 with patch('%s.Runner.check_thresholds' % pb,
                            autospec=True) as mock_ct:
                     with pytest.raises(SystemExit) as excinfo:
@@ -1765,7 +2102,15 @@ class TestConsoleEntryPoint(RunnerTester):
                 check_version=True,
                 role_partition='aws',
                 ta_api_region='us-east-1',
-                skip_quotas=False
+                skip_quotas=False,
+                parallel=None,
+                cache=None,
+                quotas_cache_ttl=86400,
+                refresh_cache=False,
+                use_asyncio=False,
+                service_names=None,
+                skip_services=[],
+                count_stack_set_instances=False
             )
         ]
 
@@ -1810,12 +2155,12 @@ class TestConsoleEntryPoint(RunnerTester):
         with patch.object(sys, 'argv', argv):
             with patch('%s.Runner.check_thresholds' % pb) as mock_ct:
                 with patch(
-                    '%s.AlertProvider.get_provider_by_name' % pb
+                    '%s.AlertProvider.get_provider_by_name' % pba
                 ) as m_gpbn:
                     m_gpbn.return_value = mock_alerter
                     with pytest.raises(RuntimeError) as excinfo:
                         with patch(
-                                '%s.AwsLimitChecker' % pb,
+                                '%s.AwsLimitChecker' % pbc,
                                 spec_set=AwsLimitChecker
                         ) as mock_alc:
                             type(mock_alc.return_value).region_name = mock_rn
@@ -1846,12 +2191,12 @@ class TestConsoleEntryPoint(RunnerTester):
                 '%s.Runner.check_thresholds' % pb, autospec=True
             ) as mock_ct:
                 with patch(
-                    '%s.AlertProvider.get_provider_by_name' % pb
+                    '%s.AlertProvider.get_provider_by_name' % pba
                 ) as m_gpbn:
                     m_gpbn.return_value = mock_alerter
                     with pytest.raises(SystemExit) as excinfo:
                         with patch(
-                                '%s.AwsLimitChecker' % pb,
+                                '%s.AwsLimitChecker' % pbc,
                                 spec_set=AwsLimitChecker
                         ) as mock_alc:
                             type(mock_alc.return_value).region_name = mock_rn
@@ -1882,12 +2227,12 @@ class TestConsoleEntryPoint(RunnerTester):
                 '%s.Runner.check_thresholds' % pb, autospec=True
             ) as mock_ct:
                 with patch(
-                    '%s.AlertProvider.get_provider_by_name' % pb
+                    '%s.AlertProvider.get_provider_by_name' % pba
                 ) as m_gpbn:
                     m_gpbn.return_value = mock_alerter
                     with pytest.raises(SystemExit) as excinfo:
                         with patch(
-                                '%s.AwsLimitChecker' % pb,
+                                '%s.AwsLimitChecker' % pbc,
                                 spec_set=AwsLimitChecker
                         ) as mock_alc:
                             type(mock_alc.return_value).region_name = mock_rn
@@ -1918,12 +2263,12 @@ class TestConsoleEntryPoint(RunnerTester):
                 '%s.Runner.check_thresholds' % pb, autospec=True
             ) as mock_ct:
                 with patch(
-                    '%s.AlertProvider.get_provider_by_name' % pb
+                    '%s.AlertProvider.get_provider_by_name' % pba
                 ) as m_gpbn:
                     m_gpbn.return_value = mock_alerter
                     with pytest.raises(SystemExit) as excinfo:
                         with patch(
-                                '%s.AwsLimitChecker' % pb,
+                                '%s.AwsLimitChecker' % pbc,
                                 spec_set=AwsLimitChecker
                         ) as mock_alc:
                             type(mock_alc.return_value).region_name = mock_rn
@@ -1954,11 +2299,11 @@ class TestConsoleEntryPoint(RunnerTester):
                 '%s.Runner.check_thresholds' % pb, autospec=True
             ) as mock_ct:
                 with patch(
-                    '%s.MetricsProvider.get_provider_by_name' % pb
+                    '%s.MetricsProvider.get_provider_by_name' % pbm
                 ) as m_gpbn:
                     m_gpbn.return_value = mock_prov
                     with patch(
-                        '%s.AwsLimitChecker' % pb, spec_set=AwsLimitChecker
+                        '%s.AwsLimitChecker' % pbc, spec_set=AwsLimitChecker
                     ) as mock_alc:
                         type(mock_alc.return_value).region_name = mock_rn
                         with pytest.raises(SystemExit) as excinfo:
@@ -1978,7 +2323,7 @@ class TestConsoleEntryPoint(RunnerTester):
         argv = ['awslimitchecker', '--list-metrics-providers']
         with patch.object(sys, 'argv', argv):
             with patch(
-                '%s.MetricsProvider.providers_by_name' % pb,
+                '%s.MetricsProvider.providers_by_name' % pbm,
             ) as mock_list:
                 mock_list.return_value = {
                     'Prov2': None,
@@ -1997,7 +2342,7 @@ class TestConsoleEntryPoint(RunnerTester):
         argv = ['awslimitchecker', '--list-alert-providers']
         with patch.object(sys, 'argv', argv):
             with patch(
-                '%s.AlertProvider.providers_by_name' % pb,
+                '%s.AlertProvider.providers_by_name' % pba,
             ) as mock_list:
                 mock_list.return_value = {
                     'Prov2': None,
@@ -38,9 +38,15 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 import sys
+import threading
 from botocore.exceptions import ClientError
-from awslimitchecker.trustedadvisor import TrustedAdvisor, datetime_now
+from awslimitchecker.trustedadvisor import (
+    TrustedAdvisor, datetime_now, refresh_poll_delay, TA_CHECK_CACHE_TTL,
+    clear_ta_results, _store_ta_results
+)
+from awslimitchecker import trustedadvisor
 from awslimitchecker.services.base import _AwsService
+from awslimitchecker.cache import JsonFileCache, PersistentCache
 from awslimitchecker.limit import AwsLimit
 import pytest
 from datetime import datetime
@@ -192,6 +198,60 @@ class TestUpdateLimits(object):
             call.debug('Already polled TA; skipping update')
         ]
 
+    def test_background(self):
+        mock_results = Mock()
+        with patch('%s.connect' % pb, autospec=True) as mock_connect:
+            with patch('%s._poll' % pb, autospec=True) as mock_poll:
+                with patch('%s._update_services' % pb,
+                           autospec=True) as mock_update_services:
+                    mock_poll.return_value = mock_results
+                    self.cls.start_update()
+                    self.cls.start_update()
+                    self.cls.update_limits()
+                    self.cls.start_update()
+                    self.cls.update_limits()
+        assert mock_connect.mock_calls == [call(self.cls)]
+        assert mock_poll.mock_calls == [call(self.cls)]
+        assert mock_update_services.mock_calls == [
+            call(self.cls, mock_results)
+        ]
+        assert self.cls.limits_updated is True
+        assert self.cls._update_thread is None
+
+    def test_background_exception(self):
+        with patch('%s.connect' % pb, autospec=True) as mock_connect:
+            with patch('%s._poll' % pb, autospec=True) as mock_poll:
+                with patch('%s._update_services' % pb,
+                           autospec=True) as mock_update_services:
+                    mock_poll.side_effect = RuntimeError('foo')
+                    self.cls.start_update()
+                    with pytest.raises(RuntimeError) as excinfo:
+                        self.cls.update_limits()
+        assert str(excinfo.value) == 'foo'
+        assert mock_connect.mock_calls == [call(self.cls)]
+        assert mock_poll.mock_calls == [call(self.cls)]
+        assert mock_update_services.mock_calls == []
+        assert self.cls.limits_updated is False
+        assert self.cls._update_thread is None
+        assert self.cls._update_error is None
+
+
+class TestRefreshPollDelay(object):
+
+    def test_backoff(self):
+        with patch('%s.random.uniform' % pbm, autospec=True) as mock_uniform:
+            mock_uniform.side_effect = lambda a, b: b
+            res = [refresh_poll_delay(x) for x in range(6)]
+        assert res == [5.0, 10.0, 20.0, 40.0, 60.0, 60.0]
+        assert mock_uniform.mock_calls[0] == call(0, 2.5)
+        assert mock_uniform.mock_calls[5] == call(0, 30.0)
+
+    def test_jitter(self):
+        for attempt in range(8):
+            delay = min(60, 5 * (2 ** attempt))
+            res = refresh_poll_delay(attempt)
+            assert delay / 2.0 <= res <= delay
+
 
 class TestGetLimitCheckId(object):
 
@@ -335,6 +395,7 @@ class TestGetLimitCheckId(object):
 class TestPoll(object):
 
     def setup(self):
+        clear_ta_results()
         self.mock_conn = Mock()
         self.mock_client_config = Mock()
         type(self.mock_client_config).region_name = 'us-east-1'
@@ -700,6 +761,137 @@ class TestPoll(object):
             }
         }
 
+    def test_shared_between_instances(self):
+        self.cls.ta_region = 'us-west-2'
+        other = TrustedAdvisor({}, {'region_name': 'us-east-1'})
+        other.conn = self.mock_conn
+        other_creds = TrustedAdvisor(
+            {}, {'region_name': 'us-east-1', 'aws_access_key_id': 'foo'}
+        )
+        other_creds.conn = self.mock_conn
+        poll_return_value = {
+            'result': {
+                'timestamp': '2015-06-15T20:27:42Z',
+                'flaggedResources': [
+                    {
+                        'region': 'us-west-2',
+                        'metadata': ['us-west-2', 'AutoScaling',
+                                     'Auto Scaling groups', '20']
+                    },
+                    {
+                        'region': 'us-east-1',
+                        'metadata': ['us-east-1', 'AutoScaling',
+                                     'Auto Scaling groups', '40']
+                    },
+                    {
+                        'region': 'us-east-1',
+                        'metadata': ['us-east-1', 'EC2',
+                                     'Foo', 'bad']
+                    },
+                    {
+                        'metadata': ['-', 'IAM', 'Users', '5000']
+                    },
+                ]
+            }
+        }
+        with patch('%s._get_limit_check_id' % pb, autospec=True) as mock_id:
+            with patch('%s._get_refreshed_check_result' % pb,
+                       autospec=True) as mock_hr:
+                mock_hr.return_value = poll_return_value
+                mock_id.return_value = (
+                    'foo', ['Region', 'Service', 'Limit Name', 'Limit Amount']
+                )
+                res1 = self.cls._poll()
+                res2 = other._poll()
+                res1['IAM']['Users'] = 1
+                res3 = other._poll()
+                res4 = other_creds._poll()
+        assert mock_id.mock_calls == [call(self.cls), call(other_creds)]
+        assert mock_hr.mock_calls == [
+            call(self.cls, 'foo'), call(other_creds, 'foo')
+        ]
+        assert res2 == {
+            'AutoScaling': {'Auto Scaling groups': 40},
+            'EC2': {},
+            'IAM': {'Users': 5000}
+        }
+        assert res3 == res2
+        assert res4 == res2
+        # after clearing, the next poll calls the API again
+        clear_ta_results()
+        with patch('%s._poll_all_regions' % pb, autospec=True) as mock_par:
+            mock_par.return_value = {}
+            assert other._poll() == {}
+        assert mock_par.mock_calls == [call(other)]
+
+    def test_shared_expired(self):
+        with patch('%s._poll_all_regions' % pb, autospec=True) as mock_par:
+            with patch('%s.monotonic' % pbm, autospec=True) as mock_mono:
+                mock_mono.side_effect = [100, 200, 100 + 601, 800]
+                mock_par.side_effect = [
+                    {'us-east-1': {'EC2': {'Foo': 1}}},
+                    {'us-east-1': {'EC2': {'Foo': 2}}}
+                ]
+                assert self.cls._poll() == {'EC2': {'Foo': 1}}
+                assert self.cls._poll() == {'EC2': {'Foo': 1}}
+                assert self.cls._poll() == {'EC2': {'Foo': 2}}
+        assert mock_par.mock_calls == [call(self.cls), call(self.cls)]
+
+    def test_shared_have_ta(self):
+        other = TrustedAdvisor({}, {})
+        other.conn = self.mock_conn
+
+        def se_poll(ta):
+            ta.have_ta = False
+            return {}
+
+        with patch('%s._poll_all_regions' % pb, autospec=True) as mock_par:
+            mock_par.side_effect = se_poll
+            assert self.cls._poll() == {}
+            assert other.have_ta is True
+            assert other._poll() == {}
+        assert mock_par.mock_calls == [call(self.cls)]
+        assert self.cls.have_ta is False
+        assert other.have_ta is False
+
+    def test_store_prunes_expired(self):
+        results = trustedadvisor._ta_results
+        locks = trustedadvisor._ta_results_key_locks
+        locks.clear()
+        locks.update({
+            'old': threading.Lock(),
+            'new': threading.Lock()
+        })
+        results.update({
+            'old': (100, {}, True),
+            'new': (500, {'r': {}}, True)
+        })
+        with patch('%s.monotonic' % pbm, autospec=True) as mock_mono:
+            mock_mono.return_value = 100 + 601
+            _store_ta_results('mine', {'r': {'EC2': {}}}, True)
+        assert results == {
+            'new': (500, {'r': {}}, True),
+            'mine': (701, {'r': {'EC2': {}}}, True)
+        }
+        # locks are kept, as another thread may be about to acquire one
+        assert sorted(locks.keys()) == ['new', 'old']
+
+    def test_same_lock_after_prune(self):
+        key = (
+            tuple(sorted(self.cls._boto3_connection_kwargs.items())),
+            self.cls.refresh_mode
+        )
+        with patch('%s._poll_all_regions' % pb, autospec=True) as mock_par:
+            with patch('%s.monotonic' % pbm, autospec=True) as mock_mono:
+                mock_mono.side_effect = [100, 100 + 601]
+                mock_par.return_value = {}
+                self.cls._poll()
+                lock = trustedadvisor._ta_results_key_locks[key]
+                # storing another key prunes this key's results
+                _store_ta_results('other', {}, True)
+        assert key not in trustedadvisor._ta_results
+        assert trustedadvisor._ta_results_key_locks[key] is lock
+
     def test_dont_have_ta(self):
         self.cls.have_ta = False
         with patch('%s._get_limit_check_id' % pb, autospec=True) as mock_id:
@@ -1159,10 +1351,14 @@ class TestPollForRefresh(object):
             with patch('%s.sleep' % pbm, autospec=True) as mock_sleep:
                 with patch('%s._get_check_result' % pb, autospec=True) as gcr:
                     with patch('%s.datetime_now' % pbm) as mock_dt_now:
-                        mock_dt_now.return_value = now_dt
-                        m_s.side_effect = statuses
-                        gcr.return_value = ({'foo': 'bar'}, check_dt)
-                        res = self.cls._poll_for_refresh('abc123')
+                        with patch(
+                            '%s.refresh_poll_delay' % pbm, autospec=True
+                        ) as mock_delay:
+                            mock_delay.side_effect = [2.5, 7.5, 15.0]
+                            mock_dt_now.return_value = now_dt
+                            m_s.side_effect = statuses
+                            gcr.return_value = ({'foo': 'bar'}, check_dt)
+                            res = self.cls._poll_for_refresh('abc123')
         assert res == {'foo': 'bar'}
         assert self.mock_conn.mock_calls == [
             call.describe_trusted_advisor_check_refresh_statuses(
@@ -1175,8 +1371,9 @@ class TestPollForRefresh(object):
                 checkIds=['abc123'])
         ]
         assert gcr.mock_calls == [call(self.cls, 'abc123')]
+        assert mock_delay.mock_calls == [call(0), call(1), call(2)]
         assert mock_sleep.mock_calls == [
-            call(30), call(30), call(30)
+            call(2.5), call(7.5), call(15.0)
         ]
         assert mock_dt_now.mock_calls == [
             call(), call(), call(), call(), call()
@@ -1184,11 +1381,17 @@ class TestPollForRefresh(object):
         assert mock_logger.mock_calls == [
             call.warning('Polling for TA check %s refresh...', 'abc123'),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'none'),
+            call.info(
+                'Refresh status: %s; sleeping %.1fs', 'none', 2.5
+            ),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'enqueued'),
+            call.info(
+                'Refresh status: %s; sleeping %.1fs', 'enqueued', 7.5
+            ),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'processing'),
+            call.info(
+                'Refresh status: %s; sleeping %.1fs', 'processing', 15.0
+            ),
             call.debug('Checking refresh status'),
             call.info('Refresh status: %s; done polling', 'success'),
             call.info('Done polling for check refresh'),
@@ -1211,10 +1414,14 @@ class TestPollForRefresh(object):
             with patch('%s.sleep' % pbm, autospec=True) as mock_sleep:
                 with patch('%s._get_check_result' % pb, autospec=True) as gcr:
                     with patch('%s.datetime_now' % pbm) as mock_dt_now:
-                        mock_dt_now.side_effect = now_dts
-                        m_s.return_value = status
-                        gcr.return_value = ({'foo': 'bar'}, check_dt)
-                        res = self.cls._poll_for_refresh('abc123')
+                        with patch(
+                            '%s.refresh_poll_delay' % pbm, autospec=True
+                        ) as mock_delay:
+                            mock_delay.side_effect = [2.5, 7.5, 15.0]
+                            mock_dt_now.side_effect = now_dts
+                            m_s.return_value = status
+                            gcr.return_value = ({'foo': 'bar'}, check_dt)
+                            res = self.cls._poll_for_refresh('abc123')
         assert res == {'foo': 'bar'}
         assert self.mock_conn.mock_calls == [
             call.describe_trusted_advisor_check_refresh_statuses(
@@ -1223,8 +1430,9 @@ class TestPollForRefresh(object):
                 checkIds=['abc123'])
         ]
         assert gcr.mock_calls == [call(self.cls, 'abc123')]
+        assert mock_delay.mock_calls == [call(0), call(1)]
         assert mock_sleep.mock_calls == [
-            call(30), call(30)
+            call(2.5), call(7.5)
         ]
         assert mock_dt_now.mock_calls == [
             call(), call(), call(), call()
@@ -1232,9 +1440,13 @@ class TestPollForRefresh(object):
         assert mock_logger.mock_calls == [
             call.warning('Polling for TA check %s refresh...', 'abc123'),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'processing'),
+            call.info(
+                'Refresh status: %s; sleeping %.1fs', 'processing', 2.5
+            ),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'processing'),
+            call.info(
+                'Refresh status: %s; sleeping %.1fs', 'processing', 7.5
+            ),
             call.error('Timed out waiting for TA Check refresh; status=%s',
                        'processing'),
             call.info('Done polling for check refresh'),
@@ -1258,10 +1470,14 @@ class TestPollForRefresh(object):
             with patch('%s.sleep' % pbm, autospec=True) as mock_sleep:
                 with patch('%s._get_check_result' % pb, autospec=True) as gcr:
                     with patch('%s.datetime_now' % pbm) as mock_dt_now:
-                        mock_dt_now.return_value = now_dt
-                        m_s.side_effect = statuses
-                        gcr.return_value = ({'foo': 'bar'}, check_dt)
-                        res = self.cls._poll_for_refresh('abc123')
+                        with patch(
+                            '%s.refresh_poll_delay' % pbm, autospec=True
+                        ) as mock_delay:
+                            mock_delay.side_effect = [2.5, 7.5, 15.0]
+                            mock_dt_now.return_value = now_dt
+                            m_s.side_effect = statuses
+                            gcr.return_value = ({'foo': 'bar'}, check_dt)
+                            res = self.cls._poll_for_refresh('abc123')
         assert res == {'foo': 'bar'}
         assert self.mock_conn.mock_calls == [
             call.describe_trusted_advisor_check_refresh_statuses(
@@ -1274,8 +1490,9 @@ class TestPollForRefresh(object):
                 checkIds=['abc123'])
         ]
         assert gcr.mock_calls == [call(self.cls, 'abc123')]
+        assert mock_delay.mock_calls == [call(0), call(1), call(2)]
         assert mock_sleep.mock_calls == [
-            call(30), call(30), call(30)
+            call(2.5), call(7.5), call(15.0)
         ]
         assert mock_dt_now.mock_calls == [
             call(), call(), call(), call(), call()
@@ -1283,11 +1500,17 @@ class TestPollForRefresh(object):
         assert mock_logger.mock_calls == [
             call.warning('Polling for TA check %s refresh...', 'abc123'),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'none'),
+            call.info(
+                'Refresh status: %s; sleeping %.1fs', 'none', 2.5
+            ),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'enqueued'),
+            call.info(
+                'Refresh status: %s; sleeping %.1fs', 'enqueued', 7.5
+            ),
             call.debug('Checking refresh status'),
-            call.info('Refresh status: %s; sleeping 30s', 'processing'),
+            call.info(
+                'Refresh status: %s; sleeping %.1fs', 'processing', 15.0
+            ),
             call.debug('Checking refresh status'),
             call.warning('Trusted Advisor check refresh status went '
                          'from "%s" to "%s"; refresh is either complete '
@@ -1298,6 +1521,157 @@ class TestPollForRefresh(object):
         ]
 
 
+class TestPersistentCache(object):
+
+    def setup(self):
+        self.mock_conn = Mock()
+        self.mock_cache = Mock(spec_set=PersistentCache)
+        self.cls = TrustedAdvisor({}, {'region_name': 'us-west-2'},
+                                  cache=self.mock_cache)
+        self.cls.conn = self.mock_conn
+        self.cls._account_id = '1234'
+
+    def test_persistent_cache_key(self):
+        cls = TrustedAdvisor({}, {}, ta_api_region='us-gov-west-1')
+        mock_sts = Mock()
+        mock_sts.get_caller_identity.return_value = {'Account': '5678'}
+        cls.persistent_cache = self.mock_cache
+        with patch(
+            'awslimitchecker.connectable.cached_client', autospec=True
+        ) as m_cc:
+            m_cc.return_value = mock_sts
+            assert cls._persistent_cache_key('foo') == \
+                'support/5678/us-gov-west-1/foo'
+            assert cls._persistent_cache_key('bar') == \
+                'support/5678/us-gov-west-1/bar'
+        assert m_cc.mock_calls == [
+            call('sts', {'region_name': 'us-gov-west-1'})
+        ]
+        assert mock_sts.mock_calls == [call.get_caller_identity()]
+
+    def test_get_limit_check_id_cached(self):
+        self.mock_cache.get.return_value = (
+            {'id': 'bar', 'metadata': ['Region', 'Service']}, 3600
+        )
+        res = self.cls._get_limit_check_id()
+        assert res == ('bar', ['Region', 'Service'])
+        assert self.mock_conn.mock_calls == []
+        assert self.mock_cache.mock_calls == [
+            call.get('support/1234/us-east-1/check')
+        ]
+
+    def test_get_limit_check_id_store(self):
+        self.mock_cache.get.return_value = (
+            {'id': 'old', 'metadata': []}, TA_CHECK_CACHE_TTL + 1
+        )
+        self.mock_conn.describe_trusted_advisor_checks.return_value = {
+            'checks': [
+                {
+                    'category': 'performance',
+                    'name': 'Service Limits',
+                    'id': 'bar',
+                    'metadata': ['Region', 'Service'],
+                }
+            ]
+        }
+        res = self.cls._get_limit_check_id()
+        assert res == ('bar', ['Region', 'Service'])
+        assert self.mock_conn.mock_calls == [
+            call.describe_trusted_advisor_checks(language='en')
+        ]
+        assert self.mock_cache.mock_calls == [
+            call.get('support/1234/us-east-1/check'),
+            call.set(
+                'support/1234/us-east-1/check',
+                {'id': 'bar', 'metadata': ['Region', 'Service']}
+            )
+        ]
+
+    def test_get_check_result_store(self):
+        resp = {
+            'result': {
+                'timestamp': '2016-12-16T10:30:12Z',
+                'flaggedResources': []
+            },
+            'ResponseMetadata': {}
+        }
+        self.mock_conn.describe_trusted_advisor_check_result.return_value = \
+            resp
+        res = self.cls._get_check_result('abc123')
+        assert res[0] == resp
+        assert self.mock_cache.mock_calls == [
+            call.set(
+                'support/1234/us-east-1/result/abc123',
+                {'result': resp['result']}
+            )
+        ]
+
+    @freeze_time("2016-12-16 10:40:42", tz_offset=0)
+    def test_refreshed_check_result_cached(self):
+        self.cls.refresh_mode = 3600
+        cached = {
+            'result': {
+                'timestamp': '2016-12-16T10:30:12Z',
+                'flaggedResources': []
+            }
+        }
+        self.mock_cache.get.return_value = (cached, 86400)
+        with patch('%s._can_refresh_check' % pb, autospec=True) as mock_crc:
+            res = self.cls._get_refreshed_check_result('abc123')
+        assert res == cached
+        assert mock_crc.mock_calls == []
+        assert self.mock_conn.mock_calls == []
+        assert self.mock_cache.mock_calls == [
+            call.get('support/1234/us-east-1/result/abc123')
+        ]
+
+    @freeze_time("2016-12-16 10:40:42", tz_offset=0)
+    def test_refreshed_check_result_cached_old(self):
+        self.cls.refresh_mode = 120
+        self.mock_cache.get.return_value = ({
+            'result': {
+                'timestamp': '2016-12-16T10:30:12Z',
+                'flaggedResources': []
+            }
+        }, 60)
+        with patch('%s._can_refresh_check' % pb, autospec=True) as mock_crc:
+            with patch('%s._get_check_result' % pb, autospec=True) as m_gcr:
+                mock_crc.return_value = False
+                m_gcr.return_value = ({'mock': 'gcr'}, None)
+                res = self.cls._get_refreshed_check_result('abc123')
+        assert res == {'mock': 'gcr'}
+        assert mock_crc.mock_calls == [call(self.cls, 'abc123')]
+
+    def test_cached_check_result_bad_timestamp(self):
+        self.cls.refresh_mode = 120
+        self.mock_cache.get.return_value = ({'result': {}}, 60)
+        assert self.cls._cached_check_result('abc123') is None
+
+    def test_refreshed_check_result_wait_not_cached(self):
+        self.cls.refresh_mode = 'wait'
+        with patch('%s._can_refresh_check' % pb, autospec=True) as mock_crc:
+            with patch('%s._poll_for_refresh' % pb, autospec=True) as m_pfr:
+                mock_crc.return_value = True
+                m_pfr.return_value = {'mock': 'pfr'}
+                res = self.cls._get_refreshed_check_result('abc123')
+        assert res == {'mock': 'pfr'}
+        assert self.mock_cache.mock_calls == []
+
+    def test_json_file_cache(self, tmpdir):
+        cache = JsonFileCache(str(tmpdir))
+        self.cls.persistent_cache = cache
+        resp = {
+            'result': {
+                'timestamp': '2016-12-16T10:30:12Z',
+                'flaggedResources': [{'region': 'us-east-1'}]
+            }
+        }
+        self.mock_conn.describe_trusted_advisor_check_result.return_value = \
+            resp
+        self.cls._get_check_result('abc123')
+        assert cache.get('support/1234/us-east-1/result/abc123')[0] == resp
+
+
 class TestUpdateServices(object):
 
     def setup(self):
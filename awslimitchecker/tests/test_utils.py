@@ -46,8 +46,11 @@ from awslimitchecker.limit import AwsLimit, AwsLimitUsage
 from awslimitchecker.utils import (
     StoreKeyValuePair, dict2cols, paginate_dict, _get_dict_value_by_path,
     _set_dict_value_by_path, _get_latest_version, color_output,
-    issue_string_tuple
+    issue_string_tuple, chunks, is_throttling_error, throttle_backoff_delay,
+    call_with_throttle_backoff, paginate_dict_pages, paginate_dict_items,
+    paginate_dict_count, TokenBucket
 )
+from botocore.exceptions import ClientError
 
 # https://code.google.com/p/mock/issues/detail?id=249
 # py>=3.4 should use unittest.mock not the mock package on pypi
@@ -151,6 +154,128 @@ class Test_dict2cols(object):
         assert res == ''
 
 
+class TestChunks(object):
+
+    def test_chunks(self):
+        assert list(chunks([1, 2, 3, 4, 5], 2)) == [[1, 2], [3, 4], [5]]
+
+    def test_exact(self):
+        assert list(chunks([1, 2, 3, 4], 2)) == [[1, 2], [3, 4]]
+
+    def test_empty(self):
+        assert list(chunks([], 10)) == []
+
+
+def _client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': 'msg'}}, 'Op')
+
+
+class TestThrottleBackoff(object):
+
+    def test_is_throttling_error(self):
+        assert is_throttling_error(_client_error('Throttling')) is True
+        assert is_throttling_error(
+            _client_error('RequestLimitExceeded')
+        ) is True
+        assert is_throttling_error(_client_error('AccessDenied')) is False
+        assert is_throttling_error(RuntimeError('foo')) is False
+
+    def test_throttle_backoff_delay(self):
+        with patch('%s.random.uniform' % pbm) as mock_uniform:
+            mock_uniform.return_value = 1.5
+            assert throttle_backoff_delay(3) == 1.5
+        assert mock_uniform.mock_calls == [call(0, 8.0)]
+
+    def test_call_success(self):
+        func = Mock(return_value='foo')
+        with patch('%s.time.sleep' % pbm) as mock_sleep:
+            res = call_with_throttle_backoff(func, 'a', b='c')
+        assert res == 'foo'
+        assert func.mock_calls == [call('a', b='c')]
+        assert mock_sleep.mock_calls == []
+
+    def test_call_throttled(self):
+        func = Mock(side_effect=[
+            _client_error('Throttling'), _client_error('Throttling'), 'foo'
+        ])
+        with patch('%s.time.sleep' % pbm) as mock_sleep:
+            with patch('%s.throttle_backoff_delay' % pbm) as mock_delay:
+                mock_delay.side_effect = [1.0, 2.0]
+                res = call_with_throttle_backoff(func, 'a')
+        assert res == 'foo'
+        assert func.mock_calls == [call('a'), call('a'), call('a')]
+        assert mock_delay.mock_calls == [call(0), call(1)]
+        assert mock_sleep.mock_calls == [call(1.0), call(2.0)]
+
+    def test_call_other_error(self):
+        ex = _client_error('AccessDenied')
+        func = Mock(side_effect=ex)
+        with patch('%s.time.sleep' % pbm) as mock_sleep:
+            with pytest.raises(ClientError) as excinfo:
+                call_with_throttle_backoff(func)
+        assert excinfo.value == ex
+        assert func.call_count == 1
+        assert mock_sleep.mock_calls == []
+
+    def test_call_retries_exhausted(self):
+        func = Mock(side_effect=_client_error('Throttling'))
+        with patch('%s.time.sleep' % pbm) as mock_sleep:
+            with patch('%s.THROTTLE_MAX_RETRIES' % pbm, 2):
+                with pytest.raises(ClientError):
+                    call_with_throttle_backoff(func)
+        assert func.call_count == 3
+        assert mock_sleep.call_count == 2
+
+
+class TestTokenBucket(object):
+
+    def test_acquire_burst(self):
+        with patch('%s.time.monotonic' % pbm) as mock_mono:
+            with patch('%s.time.sleep' % pbm) as mock_sleep:
+                mock_mono.return_value = 100.0
+                bucket = TokenBucket(2, capacity=3)
+                bucket.acquire()
+                bucket.acquire()
+                bucket.acquire()
+        assert bucket._tokens == 0
+        assert mock_sleep.mock_calls == []
+
+    def test_acquire_waits(self):
+        with patch('%s.time.monotonic' % pbm) as mock_mono:
+            with patch('%s.time.sleep' % pbm) as mock_sleep:
+                mock_mono.side_effect = [
+                    100.0, 100.0, 100.0, 100.0, 100.25, 100.5
+                ]
+                bucket = TokenBucket(2)
+                bucket.acquire()
+                bucket.acquire()
+                bucket.acquire()
+        assert bucket.capacity == 2.0
+        assert mock_sleep.mock_calls == [call(0.5), call(0.25)]
+        assert bucket._tokens == 0
+
+    def test_acquire_refill_capped(self):
+        with patch('%s.time.monotonic' % pbm) as mock_mono:
+            mock_mono.side_effect = [100.0, 100.0, 200.0]
+            bucket = TokenBucket(5, capacity=2)
+            bucket.acquire()
+            bucket.acquire()
+        assert bucket._tokens == 1
+
+    def test_wrap(self):
+        func = Mock(side_effect=[_client_error('Throttling'), 'foo'])
+        bucket = TokenBucket(10)
+        with patch.object(bucket, 'acquire') as mock_acquire:
+            with patch('%s.time.sleep' % pbm) as mock_sleep:
+                with patch('%s.throttle_backoff_delay' % pbm) as mock_delay:
+                    mock_delay.return_value = 1.0
+                    res = bucket.wrap(func)('a', b='c')
+        assert res == 'foo'
+        assert func.mock_calls == [call('a', b='c'), call('a', b='c')]
+        assert mock_acquire.call_count == 2
+        assert mock_sleep.mock_calls == [call(1.0)]
+
+
 class TestPaginateDict(object):
 
     def test_no_marker_path(self):
@@ -293,6 +418,59 @@ class TestPaginateDict(object):
         ]
 
 
+class TestPaginateDictPages(object):
+
+    def setup(self):
+        self.res1 = {'Data': [1, 2], 'Marker': 'marker1'}
+        self.res2 = {'Marker': 'marker2'}
+        self.res3 = {'Data': [3]}
+        self.func = Mock()
+        self.func.side_effect = [self.res1, self.res2, self.res3]
+        self.kwargs = {
+            'bar': 'baz',
+            'alc_marker_path': ['Marker'],
+            'alc_data_path': ['Data'],
+            'alc_marker_param': 'MarkerParam'
+        }
+        self.expected_calls = [
+            call('foo', bar='baz'),
+            call('foo', bar='baz', MarkerParam='marker1'),
+            call('foo', bar='baz', MarkerParam='marker2')
+        ]
+
+    def test_no_data_path(self):
+        with pytest.raises(Exception) as excinfo:
+            list(paginate_dict_pages(self.func, alc_marker_path=[]))
+        ex_str = "alc_data_path must be specified for queries " \
+                 "that return a dict."
+        assert ex_str in str(excinfo.value)
+        assert self.func.mock_calls == []
+
+    def test_pages(self):
+        gen = paginate_dict_pages(self.func, 'foo', **self.kwargs)
+        assert next(gen) == self.res1
+        # next page is not requested until the first one is consumed
+        assert self.func.mock_calls == [call('foo', bar='baz')]
+        assert list(gen) == [self.res2, self.res3]
+        assert self.func.mock_calls == self.expected_calls
+
+    def test_items(self):
+        res = paginate_dict_items(self.func, 'foo', **self.kwargs)
+        assert list(res) == [1, 2, 3]
+        assert self.func.mock_calls == self.expected_calls
+
+    def test_count(self):
+        res = paginate_dict_count(self.func, 'foo', **self.kwargs)
+        assert res == 3
+        assert self.func.mock_calls == self.expected_calls
+
+    def test_count_no_marker(self):
+        self.func.side_effect = None
+        self.func.return_value = {'Data': [1, 2, 3, 4]}
+        assert paginate_dict_count(self.func, **self.kwargs) == 4
+        assert self.func.mock_calls == [call(bar='baz')]
+
+
 class TestDictFuncs(object):
 
     def test_get_dict_value_by_path(self):
@@ -63,7 +63,7 @@ class TestVersion(object):
         assert version._PROJECT_URL == expected
 
     def test__get_version_info(self):
-        with patch('awslimitchecker.version.find_version') as mock_ver:
+        with patch('versionfinder.find_version') as mock_ver:
             mock_ver.return_value = VersionInfo(
                 pip_url=version._PROJECT_URL,
                 pip_version=version._VERSION,
@@ -76,7 +76,7 @@ class TestVersion(object):
         assert mock_ver.mock_calls == [call('awslimitchecker')]
 
     def test__get_version_info_dirty_commit(self):
-        with patch('awslimitchecker.version.find_version') as mock_ver:
+        with patch('versionfinder.find_version') as mock_ver:
             mock_ver.return_value = VersionInfo(
                 pip_url=version._PROJECT_URL,
                 pip_version=version._VERSION,
@@ -90,7 +90,7 @@ class TestVersion(object):
         assert mock_ver.mock_calls == [call('awslimitchecker')]
 
     def test__get_version_info_long_commit(self):
-        with patch('awslimitchecker.version.find_version') as mock_ver:
+        with patch('versionfinder.find_version') as mock_ver:
             mock_ver.return_value = VersionInfo(
                 pip_url=version._PROJECT_URL,
                 pip_version=version._VERSION,
@@ -106,7 +106,7 @@ class TestVersion(object):
         def se(foo):
             raise Exception("foo")
 
-        with patch('awslimitchecker.version.find_version') as mock_ver:
+        with patch('versionfinder.find_version') as mock_ver:
             mock_ver.side_effect = se
             with patch('awslimitchecker.version.logger') as mock_logger:
                 v = version._get_version_info()
@@ -135,7 +135,7 @@ class TestVersion(object):
             with patch.dict(
                 'awslimitchecker.version.os.environ', {}, clear=True
             ):
-                with patch('awslimitchecker.version.find_version'):
+                with patch('versionfinder.find_version'):
                     version._get_version_info()
         assert mock_logger.mock_calls == [
             call('versionfinder'),
@@ -168,7 +168,7 @@ class TestVersion(object):
                 'awslimitchecker.version.os.environ',
                 {'VERSIONCHECK_DEBUG': 'true'}, clear=True
             ):
-                with patch('awslimitchecker.version.find_version'):
+                with patch('versionfinder.find_version'):
                     version._get_version_info()
         assert mock_logger.mock_calls == []
         assert mock_loggers['versionfinder'].mock_calls == []
@@ -40,14 +40,51 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 from botocore.exceptions import ClientError
 from dateutil import parser
 import logging
+import random
+import threading
 from .connectable import Connectable
 from datetime import datetime, timedelta
 from pytz import utc
-from time import sleep
+from time import sleep, monotonic
 from copy import deepcopy
 
 logger = logging.getLogger(__name__)
 
+#: Delay in seconds before the first re-check of a Trusted Advisor check's
+#: refresh status; doubled after every check, up to
+#: :py:const:`~.TA_POLL_MAX_DELAY`.
+TA_POLL_BASE_DELAY = 5
+
+#: Maximum delay in seconds between checks of a Trusted Advisor check's
+#: refresh status.
+TA_POLL_MAX_DELAY = 60
+
+#: Number of seconds that the ID and metadata of the "Service Limits" check,
+#: stored in a :py:class:`~.PersistentCache`, are considered fresh.
+TA_CHECK_CACHE_TTL = 604800
+
+#: Number of seconds that "Service Limits" check results polled by one
+#: :py:class:`~.TrustedAdvisor` instance are reused by others in the same
+#: process.
+TA_SHARED_RESULTS_TTL = 600
+
+#: Process-wide store of "Service Limits" check results, shared by all
+#: :py:class:`~.TrustedAdvisor` instances. Keys are (connection keyword
+#: arguments, refresh mode) tuples and values are 3-tuples of the
+#: :py:func:`time.monotonic` time they were polled at, the region-indexed
+#: dict returned by :py:meth:`~.TrustedAdvisor._poll_all_regions` and the
+#: polling instance's resulting :py:attr:`~.TrustedAdvisor.have_ta`. Entries
+#: older than :py:const:`~.TA_SHARED_RESULTS_TTL` are removed whenever a new
+#: one is stored (see :py:func:`~._store_ta_results`).
+_ta_results = {}
+_ta_results_lock = threading.Lock()
+
+#: Per-key locks for :py:data:`~._ta_results`, so that only one instance
+#: polls Trusted Advisor for a given key at a time. These are never removed,
+#: so that every instance using a key always gets the same lock; there is one
+#: per combination of credentials, TA API region and refresh mode.
+_ta_results_key_locks = {}
+
 
 class TrustedAdvisor(Connectable):
     """
@@ -60,7 +97,7 @@ class TrustedAdvisor(Connectable):
 
     def __init__(self, all_services, boto_connection_kwargs,
                  ta_refresh_mode=None, ta_refresh_timeout=None,
-                 ta_api_region='us-east-1'):
+                 ta_api_region='us-east-1', cache=None, refresh_cache=False):
         """
         Class to contain all TrustedAdvisor-related logic.
 
@@ -115,6 +152,15 @@ class TrustedAdvisor(Connectable):
           TrustedAdvisor API. This is always us-east-1 for
           non GovCloud accounts.
         :type ta_api_region: str
+        :param cache: optional persistent cache to keep the "Service Limits"
+          check ID and metadata (for :py:const:`~.TA_CHECK_CACHE_TTL` seconds)
+          and its most recent result in between runs. When ``ta_refresh_mode``
+          is an integer and the cached result was refreshed less than that
+          many seconds ago, it is used without calling the Support API.
+        :type cache: :py:class:`~.PersistentCache`
+        :param refresh_cache: if True, ignore any data in ``cache``; query the
+          API and update the cache with the results.
+        :type refresh_cache: bool
         """
         self.conn = None
         self.have_ta = True
@@ -127,6 +173,48 @@ class TrustedAdvisor(Connectable):
         self.all_services = all_services
         self.ta_services = self._make_ta_service_dict()
         self.limits_updated = False
+        self.persistent_cache = cache
+        self.refresh_cache = refresh_cache
+        #: account ID, looked up by :py:meth:`~._persistent_cache_key`
+        self._account_id = None
+        #: background thread started by :py:meth:`~.start_update`, if any
+        self._update_thread = None
+        #: result of the background poll, or the exception it raised
+        self._update_result = None
+        self._update_error = None
+
+    def start_update(self):
+        """
+        Begin polling Trusted Advisor in a background thread, so that a slow
+        check refresh (i.e. ``ta_refresh_mode`` of ``'wait'`` or an integer)
+        overlaps with usage collection. The results are applied to the
+        services' limits by the next call to :py:meth:`~.update_limits`,
+        which waits for the background poll to finish.
+
+        This does nothing if limits have already been updated from TA or a
+        background poll is already running.
+        """
+        if self.limits_updated or self._update_thread is not None:
+            return
+        logger.debug('Starting background TrustedAdvisor poll')
+        self._update_result = None
+        self._update_error = None
+        self._update_thread = threading.Thread(
+            target=self._background_poll, name='TrustedAdvisor'
+        )
+        self._update_thread.daemon = True
+        self._update_thread.start()
+
+    def _background_poll(self):
+        """
+        Target of the :py:meth:`~.start_update` thread; connect and
+        :py:meth:`~._poll`, storing the result or the exception raised.
+        """
+        try:
+            self.connect()
+            self._update_result = self._poll()
+        except Exception as ex:
+            self._update_error = ex
 
     def update_limits(self):
         """
@@ -134,15 +222,25 @@ class TrustedAdvisor(Connectable):
         Iterate over all :py:class:`~.AwsLimit` objects for the given services
         and update their limits from TA if present in TA checks.
 
-        :param services: dict of service name (string) to
-          :py:class:`~._AwsService` objects
-        :type services: dict
+        If :py:meth:`~.start_update` was called, wait for its background poll
+        to finish and use its results (re-raising any exception it raised)
+        instead of polling again.
         """
         if self.limits_updated:
             logger.debug('Already polled TA; skipping update')
             return
-        self.connect()
-        ta_results = self._poll()
+        if self._update_thread is not None:
+            logger.debug('Waiting for background TrustedAdvisor poll')
+            self._update_thread.join()
+            self._update_thread = None
+            if self._update_error is not None:
+                err = self._update_error
+                self._update_error = None
+                raise err
+            ta_results = self._update_result
+        else:
+            self.connect()
+            ta_results = self._poll()
         self._update_services(ta_results)
         self.limits_updated = True
 
@@ -162,6 +260,50 @@ class TrustedAdvisor(Connectable):
                 }
             }
 
+        The check result covers all regions. It is parsed once, by
+        :py:meth:`~._poll_all_regions`, into a process-wide store shared by
+        every instance with the same Trusted Advisor connection arguments
+        (API region and credentials) and refresh mode; for
+        :py:const:`~.TA_SHARED_RESULTS_TTL` seconds, other instances (i.e.
+        those of a :py:class:`~.MultiRegionLimitChecker`) just look up their
+        own region in it without calling the API.
+        """
+        region = self.ta_region or self.conn._client_config.region_name
+        key = (
+            tuple(sorted(self._boto3_connection_kwargs.items())),
+            self.refresh_mode
+        )
+        with _ta_results_lock:
+            key_lock = _ta_results_key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            polled_at, by_region, have_ta = _ta_results.get(
+                key, (None, None, None)
+            )
+            if (
+                polled_at is None or
+                monotonic() - polled_at > TA_SHARED_RESULTS_TTL
+            ):
+                by_region = self._poll_all_regions()
+                _store_ta_results(key, by_region, self.have_ta)
+            else:
+                logger.debug('Using TrustedAdvisor results already polled in '
+                             'this process for region %s', region)
+                self.have_ta = have_ta
+        res = deepcopy(by_region.get(None, {}))
+        for svc_name, limits in by_region.get(region, {}).items():
+            res.setdefault(svc_name, {}).update(limits)
+        return res
+
+    def _poll_all_regions(self):
+        """
+        Poll Trusted Advisor (Support) API for limit checks, and index the
+        results by region in a single pass over them.
+
+        Return a dict of region name keys (None for results that do not
+        specify a region, i.e. global limits) to nested dicts of the form
+        returned by :py:meth:`~._poll`.
+
+        :rtype: dict
         """
         logger.info("Beginning TrustedAdvisor poll")
         tmp = self._get_limit_check_id()
@@ -174,7 +316,6 @@ class TrustedAdvisor(Connectable):
             return {}
         check_id, metadata = tmp
         checks = self._get_refreshed_check_result(check_id)
-        region = self.ta_region or self.conn._client_config.region_name
         res = {}
         if checks['result'].get('status', '') == 'not_available':
             logger.warning(
@@ -189,11 +330,10 @@ class TrustedAdvisor(Connectable):
             )
             return {}
         for check in checks['result']['flaggedResources']:
-            if 'region' in check and check['region'] != region:
-                continue
             data = dict(zip(metadata, check['metadata']))
-            if data['Service'] not in res:
-                res[data['Service']] = {}
+            svc_res = res.setdefault(
+                check.get('region'), {}
+            ).setdefault(data['Service'], {})
             try:
                 val = int(data['Limit Amount'])
             except ValueError:
@@ -207,7 +347,7 @@ class TrustedAdvisor(Connectable):
                     logger.debug('TrustedAdvisor setting explicit "Unlimited" '
                                  'limit for %s - %s', data['Service'],
                                  data['Limit Name'])
-            res[data['Service']][data['Limit Name']] = val
+            svc_res[data['Limit Name']] = val
         logger.info("Finished TrustedAdvisor poll")
         return res
 
@@ -220,6 +360,12 @@ class TrustedAdvisor(Connectable):
           metadata (list), or (None, None).
         :rtype: tuple
         """
+        cached = self._persistent_cache_get(
+            self._persistent_cache_key('check'), TA_CHECK_CACHE_TTL
+        )
+        if cached is not None:
+            logger.debug("Using cached TA check; id=%s", cached['id'])
+            return cached['id'], cached['metadata']
         logger.debug("Querying Trusted Advisor checks")
         try:
             checks = self.conn.describe_trusted_advisor_checks(
@@ -241,6 +387,10 @@ class TrustedAdvisor(Connectable):
                             check['name'] == 'Service Limits'
             ):
                 logger.debug("Found TA check; id=%s", check['id'])
+                self._persistent_cache_set(
+                    self._persistent_cache_key('check'),
+                    {'id': check['id'], 'metadata': check['metadata']}
+                )
                 return (
                     check['id'],
                     check['metadata']
@@ -267,6 +417,10 @@ class TrustedAdvisor(Connectable):
                         "is None)")
             return self._get_check_result(check_id)[0]
         logger.debug("Handling refresh of check: %s", check_id)
+        if isinstance(self.refresh_mode, type(1)):
+            cached = self._cached_check_result(check_id)
+            if cached is not None:
+                return cached
         # if we want to refresh, step 1 is to see if we can yet...
         if not self._can_refresh_check(check_id):
             return self._get_check_result(check_id)[0]
@@ -316,6 +470,7 @@ class TrustedAdvisor(Connectable):
         else:
             cutoff = datetime_now() + timedelta(seconds=self.refresh_timeout)
         last_status = None
+        attempt = 0
         while datetime_now() <= cutoff:
             logger.debug('Checking refresh status')
             status = self.conn.describe_trusted_advisor_check_refresh_statuses(
@@ -331,8 +486,10 @@ class TrustedAdvisor(Connectable):
                                last_status, status)
                 break
             last_status = status
-            logger.info('Refresh status: %s; sleeping 30s', status)
-            sleep(30)
+            delay = refresh_poll_delay(attempt)
+            attempt += 1
+            logger.info('Refresh status: %s; sleeping %.1fs', status, delay)
+            sleep(delay)
         else:
             logger.error('Timed out waiting for TA Check refresh; status=%s',
                          status)
@@ -396,8 +553,46 @@ class TrustedAdvisor(Connectable):
                          "parse timestamp: %s",
                          check_id,
                          checks.get('result', {}).get('timestamp', None))
+        if 'result' in checks:
+            self._persistent_cache_set(
+                self._persistent_cache_key('result', check_id),
+                {'result': checks['result']}
+            )
         return checks, check_datetime
 
+    def _cached_check_result(self, check_id):
+        """
+        Return the check result last stored by :py:meth:`~._get_check_result`
+        in :py:attr:`~.persistent_cache`, if the check was refreshed less than
+        ``self.refresh_mode`` seconds ago (i.e. it would not be refreshed now
+        anyway). Otherwise return None.
+
+        :param check_id: the Trusted Advisor check ID
+        :type check_id: str
+        :return: dict check result, in the same form as returned by
+          :py:meth:`Support.Client.describe_trusted_advisor_check_result`,
+          or None
+        :rtype: dict
+        """
+        # the check data's own refresh time decides freshness, not its age in
+        # the cache
+        checks = self._persistent_cache_get(
+            self._persistent_cache_key('result', check_id), None
+        )
+        if checks is None:
+            return None
+        try:
+            check_datetime = parser.parse(checks['result']['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        if check_datetime < datetime.now(utc) - timedelta(
+            seconds=self.refresh_mode
+        ):
+            return None
+        logger.info('Using cached Trusted Advisor data for check %s as of %s',
+                    check_id, check_datetime)
+        return checks
+
     def _update_services(self, ta_results):
         """
         Given a dict of TrustedAdvisor check results from :py:meth:`~._poll`
@@ -457,3 +652,55 @@ def datetime_now():
     :rtype: datetime.datetime
     """
     return datetime.now()
+
+
+def refresh_poll_delay(attempt):
+    """
+    Return the number of seconds to sleep before the next check of a Trusted
+    Advisor check's refresh status. This is exponential backoff starting at
+    :py:const:`~.TA_POLL_BASE_DELAY` and capped at
+    :py:const:`~.TA_POLL_MAX_DELAY`, with "equal jitter" (a random value
+    between half and all of the backoff delay).
+
+    :param attempt: zero-based number of status checks already slept after
+    :type attempt: int
+    :return: delay in seconds
+    :rtype: float
+    """
+    delay = min(TA_POLL_MAX_DELAY, TA_POLL_BASE_DELAY * (2 ** attempt))
+    return (delay / 2.0) + random.uniform(0, delay / 2.0)
+
+
+def _store_ta_results(key, by_region, have_ta):
+    """
+    Store polled results in :py:data:`~._ta_results`, and remove any other
+    entries that are older than :py:const:`~.TA_SHARED_RESULTS_TTL`, so that
+    the store does not grow with every set of credentials (e.g. every account)
+    used in the process. Their locks in :py:data:`~._ta_results_key_locks`
+    are kept, as another thread may be about to acquire one.
+
+    :param key: (connection keyword arguments, refresh mode) tuple
+    :type key: tuple
+    :param by_region: return value of
+      :py:meth:`~.TrustedAdvisor._poll_all_regions`
+    :type by_region: dict
+    :param have_ta: the polling instance's :py:attr:`~.TrustedAdvisor.have_ta`
+      after polling, restored on instances that reuse ``by_region``
+    :type have_ta: bool
+    """
+    now = monotonic()
+    with _ta_results_lock:
+        for k in list(_ta_results.keys()):
+            if now - _ta_results[k][0] > TA_SHARED_RESULTS_TTL:
+                del _ta_results[k]
+        _ta_results[key] = (now, by_region, have_ta)
+
+
+def clear_ta_results():
+    """
+    Discard all Trusted Advisor results shared between
+    :py:class:`~.TrustedAdvisor` instances, so that the next instance to
+    poll retrieves them from the API again.
+    """
+    with _ta_results_lock:
+        _ta_results.clear()
@@ -41,12 +41,33 @@ import argparse
 import logging
 from copy import deepcopy
 import json
+import random
+import threading
+import time
 import urllib3
 import termcolor
+from botocore.exceptions import ClientError
 from awslimitchecker.version import _VERSION_TUP, _VERSION
 
 logger = logging.getLogger(__name__)
 
+#: Error codes returned by AWS APIs when a request has been throttled
+THROTTLING_ERROR_CODES = frozenset([
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestLimitExceeded',
+    'RequestThrottled',
+    'TooManyRequestsException'
+])
+
+#: Number of times :py:func:`~.call_with_throttle_backoff` retries a call
+#: that was throttled, after botocore's own retries are exhausted
+THROTTLE_MAX_RETRIES = 5
+
+#: Base delay, in seconds, for :py:func:`~.call_with_throttle_backoff`
+THROTTLE_BASE_DELAY = 1.0
+
 
 class StoreKeyValuePair(argparse.Action):
     """
@@ -100,6 +121,140 @@ def dict2cols(d, spaces=2, separator=' '):
     return s
 
 
+def chunks(items, size):
+    """
+    Split a list into consecutive lists of at most ``size`` items, i.e. for
+    APIs that accept a limited number of identifiers per request.
+
+    :param items: the items to split
+    :type items: list
+    :param size: maximum number of items in each chunk
+    :type size: int
+    :returns: generator of lists
+    """
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def is_throttling_error(ex):
+    """
+    Return whether or not an exception is a botocore ``ClientError`` for a
+    throttled request.
+
+    :param ex: the exception
+    :type ex: Exception
+    :rtype: bool
+    """
+    if not isinstance(ex, ClientError):
+        return False
+    return ex.response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+
+
+def throttle_backoff_delay(attempt):
+    """
+    Return the number of seconds to wait before retry number ``attempt``
+    (starting at zero) of a throttled request; exponential backoff with
+    "full jitter".
+
+    :param attempt: zero-based retry number
+    :type attempt: int
+    :rtype: float
+    """
+    return random.uniform(0, THROTTLE_BASE_DELAY * (2 ** attempt))
+
+
+def call_with_throttle_backoff(function_ref, *argv, **kwargs):
+    """
+    Call ``function_ref`` with the given arguments and return its result. If
+    it raises a throttling error (see :py:func:`~.is_throttling_error`), wait
+    for :py:func:`~.throttle_backoff_delay` and try again, up to
+    :py:data:`~.THROTTLE_MAX_RETRIES` times. Other exceptions are raised
+    immediately.
+
+    :param function_ref: the function to call
+    :type function_ref: ``function``
+    :param argv: the parameters to pass to the function
+    :type argv: tuple
+    :param kwargs: keyword arguments to pass to the function
+    :type kwargs: dict
+    """
+    attempt = 0
+    while True:
+        try:
+            return function_ref(*argv, **kwargs)
+        except ClientError as ex:
+            if not is_throttling_error(ex) or attempt >= THROTTLE_MAX_RETRIES:
+                raise
+            delay = throttle_backoff_delay(attempt)
+            logger.warning(
+                'Request throttled calling %s; retrying in %.2f seconds',
+                function_ref, delay
+            )
+            time.sleep(delay)
+            attempt += 1
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket rate limiter, for sharing a request rate limit
+    between threads calling the same API. Tokens are added at ``rate`` per
+    second, up to ``capacity``; each request consumes one.
+
+    :param rate: number of tokens added per second
+    :type rate: float
+    :param capacity: maximum number of tokens, i.e. the largest burst of
+      requests allowed; defaults to ``rate``
+    :type capacity: float
+    """
+
+    def __init__(self, rate, capacity=None):
+        if capacity is None:
+            capacity = rate
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Consume one token, blocking until one is available.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + ((now - self._updated) * self.rate)
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+    def wrap(self, function_ref):
+        """
+        Return a function that calls ``function_ref`` with the arguments it is
+        given, after first calling :py:meth:`~.acquire`. Throttled requests are
+        retried via :py:func:`~.call_with_throttle_backoff`, each retry
+        consuming another token.
+
+        :param function_ref: the function to rate limit
+        :type function_ref: ``function``
+        :rtype: ``function``
+        """
+        def limited(*argv, **kwargs):
+            self.acquire()
+            return function_ref(*argv, **kwargs)
+
+        def wrapped(*argv, **kwargs):
+            return call_with_throttle_backoff(limited, *argv, **kwargs)
+
+        return wrapped
+
+
 def paginate_dict(function_ref, *argv, **kwargs):
     """
     Paginate through a query that returns a dict result, and return the
@@ -124,25 +279,8 @@ def paginate_dict(function_ref, *argv, **kwargs):
     :param kwargs: keyword arguments to pass to the function
     :type kwargs: dict
     """
-    if 'alc_marker_path' not in kwargs:
-        raise Exception("alc_marker_path must be specified for queries "
-                        "that return a dict.")
-    if 'alc_data_path' not in kwargs:
-        raise Exception("alc_data_path must be specified for queries "
-                        "that return a dict.")
-    if 'alc_marker_param' not in kwargs:
-        raise Exception("alc_marker_param must be specified for queries "
-                        "that return a dict.")
-
-    marker_path = kwargs['alc_marker_path']
-    data_path = kwargs['alc_data_path']
-    marker_param = kwargs['alc_marker_param']
-
-    # strip off "^alc_" args
-    pass_kwargs = {}
-    for k, v in kwargs.items():
-        if not k.startswith('alc_'):
-            pass_kwargs[k] = v
+    marker_path, data_path, marker_param, pass_kwargs = \
+        _paginate_dict_kwargs(kwargs)
 
     # first function call
     result = function_ref(*argv, **pass_kwargs)
@@ -169,6 +307,100 @@ def paginate_dict(function_ref, *argv, **kwargs):
     return res
 
 
+def _paginate_dict_kwargs(kwargs):
+    """
+    Validate the special ``alc_`` kwargs for :py:func:`~.paginate_dict` and
+    its variants, and split them from the kwargs to pass to the function.
+
+    :param kwargs: keyword arguments passed to the pagination function
+    :type kwargs: dict
+    :returns: 4-tuple of marker path, data path, marker param name and the
+      dict of kwargs to pass to the paginated function
+    :rtype: tuple
+    """
+    for k in ['alc_marker_path', 'alc_data_path', 'alc_marker_param']:
+        if k not in kwargs:
+            raise Exception("%s must be specified for queries that return a "
+                            "dict." % k)
+    # strip off "^alc_" args
+    pass_kwargs = {}
+    for k, v in kwargs.items():
+        if not k.startswith('alc_'):
+            pass_kwargs[k] = v
+    return (
+        kwargs['alc_marker_path'], kwargs['alc_data_path'],
+        kwargs['alc_marker_param'], pass_kwargs
+    )
+
+
+def paginate_dict_pages(function_ref, *argv, **kwargs):
+    """
+    Generator version of :py:func:`~.paginate_dict`; takes the same arguments
+    (including the special ``alc_marker_path``, ``alc_data_path`` and
+    ``alc_marker_param`` kwargs), but yields each response as it is received
+    instead of combining them. The next page is only requested once the
+    previous one has been consumed, and pages are not retained.
+
+    :param function_ref: the function to call
+    :type function_ref: ``function``
+    :param argv: the parameters to pass to the function
+    :type argv: tuple
+    :param kwargs: keyword arguments to pass to the function
+    :type kwargs: dict
+    """
+    marker_path, _, marker_param, pass_kwargs = _paginate_dict_kwargs(kwargs)
+    result = function_ref(*argv, **pass_kwargs)
+    yield result
+    marker = _get_dict_value_by_path(result, marker_path)
+    while marker is not None:
+        logger.debug("Querying %s with %s=%s", function_ref, marker_param,
+                     marker)
+        pass_kwargs[marker_param] = marker
+        result = function_ref(*argv, **pass_kwargs)
+        yield result
+        marker = _get_dict_value_by_path(result, marker_path)
+
+
+def paginate_dict_items(function_ref, *argv, **kwargs):
+    """
+    Generator yielding each item of the list at ``alc_data_path`` in every
+    page of a paginated query; see :py:func:`~.paginate_dict_pages`.
+
+    :param function_ref: the function to call
+    :type function_ref: ``function``
+    :param argv: the parameters to pass to the function
+    :type argv: tuple
+    :param kwargs: keyword arguments to pass to the function
+    :type kwargs: dict
+    """
+    data_path = kwargs.get('alc_data_path')
+    for page in paginate_dict_pages(function_ref, *argv, **kwargs):
+        for item in _get_dict_value_by_path(page, data_path) or []:
+            yield item
+
+
+def paginate_dict_count(function_ref, *argv, **kwargs):
+    """
+    Return the total number of items in the list at ``alc_data_path`` across
+    every page of a paginated query, for callers that only need the count.
+    Each page is discarded as soon as it has been counted, so memory use does
+    not grow with the number of results. See :py:func:`~.paginate_dict_pages`.
+
+    :param function_ref: the function to call
+    :type function_ref: ``function``
+    :param argv: the parameters to pass to the function
+    :type argv: tuple
+    :param kwargs: keyword arguments to pass to the function
+    :type kwargs: dict
+    :rtype: int
+    """
+    data_path = kwargs.get('alc_data_path')
+    count = 0
+    for page in paginate_dict_pages(function_ref, *argv, **kwargs):
+        count += len(_get_dict_value_by_path(page, data_path) or [])
+    return count
+
+
 def _get_dict_value_by_path(d, path):
     """
     Given a dict (``d``) and a list specifying the hierarchical path to a key
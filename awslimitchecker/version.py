@@ -38,15 +38,11 @@ Jason Antman <jason@jasonantman.com> <http://www.jasonantman.com>
 """
 
 import os
+import sys
 
 import logging
 logger = logging.getLogger(__name__)
 
-try:
-    from versionfinder import find_version
-except ImportError:
-    logger.error("Unable to import versionfinder", exc_info=True)
-
 _VERSION_TUP = (8, 0, 2)
 _VERSION = '.'.join([str(x) for x in _VERSION_TUP])
 _PROJECT_URL = 'https://github.com/jantman/awslimitchecker'
@@ -117,6 +113,8 @@ def _get_version_info():
             l.setLevel(logging.CRITICAL)
             l.propagate = True
     try:
+        # versionfinder imports pip, which is slow; only load it when needed
+        from versionfinder import find_version
         vinfo = find_version('awslimitchecker')
         dirty = ''
         if vinfo.git_is_dirty:
@@ -140,3 +138,27 @@ def _get_version_info():
                          "may not be in compliance with the AGPLv3 license:")
     # fall back to returning just the hard-coded release information
     return AWSLimitCheckerVersion(_VERSION, _PROJECT_URL)
+
+
+def _print_license_notice(vinfo):
+    """
+    Write the AGPL license notice, including the URL of the source code for
+    the running version, to STDERR.
+
+    Pursuant to Sections 5(b) and 13 of the GNU Affero General Public
+    License, version 3, this notice MUST NOT be removed, and MUST be
+    displayed to ALL USERS of this software, even if they interact with it
+    remotely over a network.
+
+    :param vinfo: version information, as returned by
+      :py:func:`~._get_version_info`
+    :type vinfo: :py:class:`~.AWSLimitCheckerVersion`
+    """
+    sys.stderr.write(
+        "awslimitchecker %s is AGPL-licensed free software; "
+        "all users have a right to the full source code of "
+        "this version. See <%s>\n" % (
+            vinfo.version_str,
+            vinfo.url
+        )
+    )
@@ -222,6 +222,13 @@ def build_limits(checker):
         limit_info += '.. _limits.%s:\n\n' % svc_name
         limit_info += svc_name + "\n"
         limit_info += ('-' * (len(svc_name)+1)) + "\n"
+        if svc_name == 'CloudFormation':
+            limit_info += "\n" + dedent("""
+            **Note on CloudFormation Limits:** The "Stack sets" and "Stack
+            instances per stack set" limits are only checked if
+            ``count_stack_set_instances`` is enabled; see
+            :ref:`python_usage.cloudformation_stack_sets`.
+            """) + "\n"
         if svc_name == 'Route53':
             limit_info += "\n" + dedent("""
             **Note on Route53 Limits:** The Route53 limit values (maxima) are
@@ -444,7 +451,10 @@ def build_docs():
     logger.info("Instantiating AwsLimitChecker")
     c = AwsLimitChecker(region=region)
     build_iam_policy(c)
-    build_limits(c)
+    # document the optional CloudFormation StackSet limits too
+    build_limits(
+        AwsLimitChecker(region=region, count_stack_set_instances=True)
+    )
     build_runner_examples()
 
 
@@ -86,6 +86,10 @@ setup(
     description='A script and python module to check your AWS service limits and usage, and warn when usage approaches limits.',
     long_description=long_description,
     install_requires=requires,
+    python_requires='>=3.5',
+    extras_require={
+        'async': ['aiobotocore']
+    },
     keywords="AWS EC2 Amazon boto boto3 limits cloud",
     classifiers=classifiers
 )